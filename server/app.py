@@ -1,6 +1,7 @@
 # FastAPI 应用入口与路由注册。
 import time
 from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
@@ -8,25 +9,42 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from loguru import logger
+from starlette.concurrency import run_in_threadpool
 
 from .config import get_config
+from .db import close_pool
+from .db_profiler import log_request_profile, reset_request_profile, start_request_profile
 from .logger import setup_logger
-from .logging_context import reset_log_context, set_log_context, update_log_user
-from .request_logging import create_request_id, extract_request_body, get_client_ip, log_request_end, log_request_start
+from .logging_context import get_log_context, reset_log_context, restore_log_context, set_log_context, update_log_user
+from .metrics import get_route_template, observe_request, reset_request_db_stats, start_request_db_stats
+from .request_logging import (
+    RequestBodyPreviewMiddleware,
+    create_request_id,
+    extract_request_body,
+    get_client_ip,
+    log_request_end,
+    log_request_start,
+)
 from .response import error_response
-from .routes import auth, changes, claims, dictionary, health, locks, texts, validate
-from .routes.deps import try_resolve_auth_user
+from .routes import auth, changes, claims, dictionary, health, locks, metrics, texts, validate
+from .routes.deps import try_resolve_auth_user, try_resolve_auth_user_from_cache
 from .services.dictionary_correction_scheduler import start_scheduler, stop_scheduler
 from .services.maintenance import build_maintenance_response, get_allow_paths, is_maintenance_enabled, is_path_allowed
+from .services.package_export import start_package_cache_refresher, stop_package_cache_refresher
+from .services.upload_jobs import shutdown_upload_jobs
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     start_scheduler()
+    start_package_cache_refresher()
     try:
         yield
     finally:
+        await stop_package_cache_refresher()
         await stop_scheduler()
+        shutdown_upload_jobs()
+        close_pool()
 
 
 def _configure_middlewares(app: FastAPI, config) -> None:
@@ -44,9 +62,19 @@ def _configure_middlewares(app: FastAPI, config) -> None:
     app.add_middleware(GZipMiddleware, minimum_size=config["http"]["gzip_minimum_size"])
 
     _register_logging_middleware(app)
+    # 需位于日志中间件外层：先预读日志所需的请求体前缀，再回放给下游
+    app.add_middleware(RequestBodyPreviewMiddleware)
     _register_maintenance_middleware(app)
 
 
+async def resolve_request_auth(authorization: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """中间件鉴权：缓存命中时直接返回；需 HMAC 校验或查库时放到线程池，避免阻塞事件循环。"""
+    cached = try_resolve_auth_user_from_cache(authorization)
+    if cached is not None:
+        return cached
+    return await run_in_threadpool(try_resolve_auth_user, authorization)
+
+
 def _register_logging_middleware(app: FastAPI) -> None:
     @app.middleware("http")
     async def logging_middleware(request: Request, call_next):
@@ -56,30 +84,56 @@ def _register_logging_middleware(app: FastAPI) -> None:
         start = time.monotonic()
         request.state.request_id = request_id
 
-        authorization = request.headers.get("Authorization")
-        auth_user, auth_error = try_resolve_auth_user(authorization)
+        auth_user, auth_error = await resolve_request_auth(request.headers.get("Authorization"))
         request.state.auth_user = auth_user
         update_log_user(auth_user)
         request_body = await extract_request_body(request)
         log_request_start(request, request_body, auth_error)
+        db_stats, db_stats_token = start_request_db_stats()
+        sql_profile, sql_profile_token = start_request_profile()
 
         try:
             response = await call_next(request)
         except Exception:
-            elapsed_ms = (time.monotonic() - start) * 1000
-            log_request_end(request, 500, elapsed_ms)
+            elapsed = time.monotonic() - start
+            log_request_end(request, 500, elapsed * 1000)
+            observe_request(request.method, get_route_template(request.scope), 500, elapsed, db_stats)
+            log_request_profile(sql_profile)
             raise
         finally:
+            # 下游任务在 call_next 时已复制上下文，还原后响应体生成期间的 SQL 仍计入本请求
+            reset_request_db_stats(db_stats_token)
+            reset_request_profile(sql_profile_token)
             if "response" not in locals():
                 reset_log_context(context_token)
 
-        elapsed_ms = (time.monotonic() - start) * 1000
         response.headers["X-Request-Id"] = request_id
-        log_request_end(request, response.status_code, elapsed_ms)
+        log_context = get_log_context()
         reset_log_context(context_token)
+
+        def finish_request() -> None:
+            elapsed = time.monotonic() - start
+            token = restore_log_context(log_context)
+            try:
+                log_request_end(request, response.status_code, elapsed * 1000)
+                observe_request(request.method, get_route_template(request.scope), response.status_code, elapsed, db_stats)
+                log_request_profile(sql_profile)
+            finally:
+                reset_log_context(token)
+
+        # 流式响应（导出、下载）的查询发生在响应体生成期间，发送完毕后再统计耗时与 SQL 并输出剖析汇总
+        response.body_iterator = _finish_after_body(response.body_iterator, finish_request)
         return response
 
 
+async def _finish_after_body(body_iterator: AsyncIterator[Any], finish: Callable[[], None]) -> AsyncIterator[Any]:
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        finish()
+
+
 def _register_maintenance_middleware(app: FastAPI) -> None:
     @app.middleware("http")
     async def maintenance_middleware(request: Request, call_next):
@@ -124,6 +178,7 @@ def _register_routers(app: FastAPI) -> None:
     app.include_router(changes.router)
     app.include_router(dictionary.router)
     app.include_router(health.router)
+    app.include_router(metrics.router)
     app.include_router(validate.router)
 
 
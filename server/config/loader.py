@@ -120,14 +120,96 @@ def load_config() -> Dict[str, Any]:
     dictionary_correction = _require_type(_require_key(data, "dictionary_correction", ""), dict, "dictionary_correction")
 
     _require_type(_require_key(database, "dsn", "database."), str, "database.dsn")
+    database_pool = _require_type(_require_key(database, "pool", "database."), dict, "database.pool")
+    _require_type(_require_key(database_pool, "size", "database.pool."), int, "database.pool.size")
+    _require_type(_require_key(database_pool, "max_overflow", "database.pool."), int, "database.pool.max_overflow")
+    _require_type(
+        _require_key(database_pool, "timeout_seconds", "database.pool."),
+        int,
+        "database.pool.timeout_seconds",
+    )
+    _require_type(
+        _require_key(database_pool, "idle_recycle_seconds", "database.pool."),
+        int,
+        "database.pool.idle_recycle_seconds",
+    )
+    database_pool["pre_ping"] = _parse_bool(
+        _require_key(database_pool, "pre_ping", "database.pool."),
+        "database.pool.pre_ping",
+    )
+    if database_pool["size"] <= 0:
+        raise ConfigError("配置项无效: database.pool.size 必须 > 0")
+    if database_pool["max_overflow"] < 0:
+        raise ConfigError("配置项无效: database.pool.max_overflow 必须 >= 0")
+    if database_pool["timeout_seconds"] <= 0:
+        raise ConfigError("配置项无效: database.pool.timeout_seconds 必须 > 0")
+    if database_pool["idle_recycle_seconds"] <= 0:
+        raise ConfigError("配置项无效: database.pool.idle_recycle_seconds 必须 > 0")
+    database_profiler = _require_type(_require_key(database, "profiler", "database."), dict, "database.profiler")
+    database_profiler["enabled"] = _parse_bool(
+        _require_key(database_profiler, "enabled", "database.profiler."),
+        "database.profiler.enabled",
+    )
+    _require_type(
+        _require_key(database_profiler, "slow_query_ms", "database.profiler."),
+        int,
+        "database.profiler.slow_query_ms",
+    )
+    database_profiler["explain_slow_queries"] = _parse_bool(
+        _require_key(database_profiler, "explain_slow_queries", "database.profiler."),
+        "database.profiler.explain_slow_queries",
+    )
+    _require_type(
+        _require_key(database_profiler, "explain_cooldown_seconds", "database.profiler."),
+        int,
+        "database.profiler.explain_cooldown_seconds",
+    )
+    _require_type(
+        _require_key(database_profiler, "summary_top_n", "database.profiler."),
+        int,
+        "database.profiler.summary_top_n",
+    )
+    if database_profiler["slow_query_ms"] < 0:
+        raise ConfigError("配置项无效: database.profiler.slow_query_ms 必须 >= 0")
+    if database_profiler["explain_cooldown_seconds"] < 0:
+        raise ConfigError("配置项无效: database.profiler.explain_cooldown_seconds 必须 >= 0")
+    if database_profiler["summary_top_n"] <= 0:
+        raise ConfigError("配置项无效: database.profiler.summary_top_n 必须 > 0")
+    read_dsns = _require_type(_require_key(database, "read_dsns", "database."), list, "database.read_dsns")
+    for idx, item in enumerate(read_dsns):
+        _require_type(item, str, f"database.read_dsns[{idx}]")
+        if not item.strip():
+            raise ConfigError(f"配置项无效: database.read_dsns[{idx}] 不能为空")
+    read_routing = _require_type(
+        _require_key(database, "read_routing", "database."),
+        dict,
+        "database.read_routing",
+    )
+    for key in ("max_lag_seconds", "lag_check_interval_seconds", "read_your_writes_seconds"):
+        _require_type(_require_key(read_routing, key, "database.read_routing."), int, f"database.read_routing.{key}")
+        if read_routing[key] < 0:
+            raise ConfigError(f"配置项无效: database.read_routing.{key} 必须 >= 0")
 
     _require_type(_require_key(auth, "hash_algorithm", "auth."), str, "auth.hash_algorithm")
     _require_type(_require_key(auth, "salt_bytes", "auth."), int, "auth.salt_bytes")
     _require_type(_require_key(auth, "token_secret", "auth."), str, "auth.token_secret")
     _require_type(_require_key(auth, "token_ttl_seconds", "auth."), int, "auth.token_ttl_seconds")
+    _require_type(_require_key(auth, "cache_ttl_seconds", "auth."), int, "auth.cache_ttl_seconds")
+    _require_type(_require_key(auth, "cache_max_entries", "auth."), int, "auth.cache_max_entries")
+    if auth["cache_ttl_seconds"] < 0:
+        raise ConfigError("配置项无效: auth.cache_ttl_seconds 必须 >= 0")
+    if auth["cache_max_entries"] <= 0:
+        raise ConfigError("配置项无效: auth.cache_max_entries 必须 > 0")
 
     _require_type(_require_key(pagination, "default_page_size", "pagination."), int, "pagination.default_page_size")
     _require_type(_require_key(pagination, "max_page_size", "pagination."), int, "pagination.max_page_size")
+    _require_type(
+        _require_key(pagination, "total_cache_seconds", "pagination."),
+        int,
+        "pagination.total_cache_seconds",
+    )
+    if pagination["total_cache_seconds"] < 0:
+        raise ConfigError("配置项无效: pagination.total_cache_seconds 必须 >= 0")
 
     _require_type(_require_key(locks, "default_ttl_seconds", "locks."), int, "locks.default_ttl_seconds")
     _require_type(_require_key(cors, "allow_origins", "cors."), list, "cors.allow_origins")
@@ -144,7 +226,27 @@ def load_config() -> Dict[str, Any]:
     )
     _require_type(_require_key(logging_config, "redact_fields", "logging."), list, "logging.redact_fields")
     _require_type(_require_key(logging_config, "log_body_methods", "logging."), list, "logging.log_body_methods")
+    logging_config["async_sink"] = _parse_bool(
+        _require_key(logging_config, "async_sink", "logging."),
+        "logging.async_sink",
+    )
+    _require_type(_require_key(logging_config, "sink_batch_size", "logging."), int, "logging.sink_batch_size")
+    _require_type(_require_key(logging_config, "sample_every", "logging."), dict, "logging.sample_every")
     _require_type(_require_key(text_list, "max_text_length", "text_list."), int, "text_list.max_text_length")
+    _require_type(
+        _require_key(text_list, "approximate_total_cache_seconds", "text_list."),
+        int,
+        "text_list.approximate_total_cache_seconds",
+    )
+    if text_list["approximate_total_cache_seconds"] < 0:
+        raise ConfigError("配置项无效: text_list.approximate_total_cache_seconds 必须 >= 0")
+    _require_type(
+        _require_key(text_list, "fulltext_min_keyword_length", "text_list."),
+        int,
+        "text_list.fulltext_min_keyword_length",
+    )
+    if text_list["fulltext_min_keyword_length"] <= 0:
+        raise ConfigError("配置项无效: text_list.fulltext_min_keyword_length 必须 > 0")
     _require_type(
         _require_key(text_import_export, "max_upload_rows", "text_import_export."),
         int,
@@ -170,6 +272,37 @@ def load_config() -> Dict[str, Any]:
         str,
         "text_import_export.download_temp_dir",
     )
+    _require_type(
+        _require_key(text_import_export, "upload_temp_dir", "text_import_export."),
+        str,
+        "text_import_export.upload_temp_dir",
+    )
+    for key in (
+        "upload_job_workers",
+        "upload_job_max_active",
+        "upload_job_max_rows",
+        "upload_job_max_bytes",
+        "upload_job_max_errors",
+        "upload_job_retention_seconds",
+        "upload_job_apply_chunk_rows",
+    ):
+        _require_type(_require_key(text_import_export, key, "text_import_export."), int, f"text_import_export.{key}")
+    text_import_export["package_cache_enabled"] = _parse_bool(
+        _require_key(text_import_export, "package_cache_enabled", "text_import_export."),
+        "text_import_export.package_cache_enabled",
+    )
+    _require_type(
+        _require_key(text_import_export, "package_cache_dir", "text_import_export."),
+        str,
+        "text_import_export.package_cache_dir",
+    )
+    for key in (
+        "package_cache_refresh_interval_seconds",
+        "package_cache_overlap_seconds",
+        "package_cache_full_rebuild_seconds",
+        "package_cache_incremental_max_fids",
+    ):
+        _require_type(_require_key(text_import_export, key, "text_import_export."), int, f"text_import_export.{key}")
     dictionary_correction["enabled"] = _parse_bool(
         _require_key(dictionary_correction, "enabled", "dictionary_correction."),
         "dictionary_correction.enabled",
@@ -189,6 +322,25 @@ def load_config() -> Dict[str, Any]:
         str,
         "dictionary_correction.lock_name",
     )
+    _require_type(
+        _require_key(dictionary_correction, "workers", "dictionary_correction."),
+        int,
+        "dictionary_correction.workers",
+    )
+    _require_type(
+        _require_key(dictionary_correction, "chunk_size", "dictionary_correction."),
+        int,
+        "dictionary_correction.chunk_size",
+    )
+    dictionary_correction["inline_enabled"] = _parse_bool(
+        _require_key(dictionary_correction, "inline_enabled", "dictionary_correction."),
+        "dictionary_correction.inline_enabled",
+    )
+    _require_type(
+        _require_key(dictionary_correction, "inline_index_ttl_seconds", "dictionary_correction."),
+        int,
+        "dictionary_correction.inline_index_ttl_seconds",
+    )
     if text_import_export["max_upload_rows"] <= 0:
         raise ConfigError("配置项无效: text_import_export.max_upload_rows 必须 > 0")
     if text_import_export["max_download_rows"] <= 0:
@@ -199,12 +351,40 @@ def load_config() -> Dict[str, Any]:
         raise ConfigError("配置项无效: text_import_export.download_progress_log_every_batches 必须 > 0")
     if not text_import_export["download_temp_dir"].strip():
         raise ConfigError("配置项无效: text_import_export.download_temp_dir 不能为空")
+    if not text_import_export["upload_temp_dir"].strip():
+        raise ConfigError("配置项无效: text_import_export.upload_temp_dir 不能为空")
+    for key in (
+        "upload_job_workers",
+        "upload_job_max_active",
+        "upload_job_max_rows",
+        "upload_job_max_bytes",
+        "upload_job_retention_seconds",
+        "upload_job_apply_chunk_rows",
+    ):
+        if text_import_export[key] <= 0:
+            raise ConfigError(f"配置项无效: text_import_export.{key} 必须 > 0")
+    if text_import_export["upload_job_max_errors"] < 0:
+        raise ConfigError("配置项无效: text_import_export.upload_job_max_errors 必须 >= 0")
+    if not text_import_export["package_cache_dir"].strip():
+        raise ConfigError("配置项无效: text_import_export.package_cache_dir 不能为空")
+    for key in ("package_cache_refresh_interval_seconds", "package_cache_overlap_seconds"):
+        if text_import_export[key] < 0:
+            raise ConfigError(f"配置项无效: text_import_export.{key} 必须 >= 0")
+    for key in ("package_cache_full_rebuild_seconds", "package_cache_incremental_max_fids"):
+        if text_import_export[key] <= 0:
+            raise ConfigError(f"配置项无效: text_import_export.{key} 必须 > 0")
     if dictionary_correction["scan_interval_seconds"] <= 0:
         raise ConfigError("配置项无效: dictionary_correction.scan_interval_seconds 必须 > 0")
     if dictionary_correction["batch_size"] <= 0:
         raise ConfigError("配置项无效: dictionary_correction.batch_size 必须 > 0")
     if not dictionary_correction["lock_name"].strip():
         raise ConfigError("配置项无效: dictionary_correction.lock_name 不能为空")
+    if dictionary_correction["workers"] <= 0:
+        raise ConfigError("配置项无效: dictionary_correction.workers 必须 > 0")
+    if dictionary_correction["chunk_size"] <= 0:
+        raise ConfigError("配置项无效: dictionary_correction.chunk_size 必须 > 0")
+    if dictionary_correction["inline_index_ttl_seconds"] <= 0:
+        raise ConfigError("配置项无效: dictionary_correction.inline_index_ttl_seconds 必须 > 0")
     if logging_config["request_max_body_length"] <= 0:
         raise ConfigError("配置项无效: logging.request_max_body_length 必须 > 0")
     for idx, item in enumerate(logging_config["redact_fields"]):
@@ -215,6 +395,12 @@ def load_config() -> Dict[str, Any]:
         _require_type(item, str, f"logging.log_body_methods[{idx}]")
         if not item.strip():
             raise ConfigError(f"配置项无效: logging.log_body_methods[{idx}] 不能为空")
+    if logging_config["sink_batch_size"] <= 0:
+        raise ConfigError("配置项无效: logging.sink_batch_size 必须 > 0")
+    for key, value in logging_config["sample_every"].items():
+        _require_type(value, int, f"logging.sample_every.{key}")
+        if value <= 0:
+            raise ConfigError(f"配置项无效: logging.sample_every.{key} 必须 > 0")
 
     maintenance_enabled = _parse_bool(_require_key(maintenance, "enabled", "maintenance."), "maintenance.enabled")
     maintenance_message = _require_type(_require_key(maintenance, "message", "maintenance."), str, "maintenance.message")
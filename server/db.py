@@ -1,14 +1,49 @@
 # 数据库连接与游标管理。
+import itertools
+import threading
+import time
+from collections import deque
 from contextlib import contextmanager
-from typing import Any, Dict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
 from urllib.parse import parse_qs, unquote, urlparse
 
 import pymysql
-from pymysql.constants import FIELD_TYPE
+from pymysql.constants import CR, FIELD_TYPE
 from pymysql.converters import conversions
 from pymysql.cursors import DictCursor, SSDictCursor
 
 from .config import get_config
+from .db_profiler import profile_statement
+from .metrics import record_db_query, record_read_route
+
+
+class _TimedCursorMixin:
+    """记录每条 SQL 的执行次数与耗时（executemany 的批量 INSERT 按实际下发语句计），并交给 SQL 剖析。"""
+
+    _streaming = False
+
+    def execute(self, query, args=None):
+        started_at = time.perf_counter()
+        try:
+            result = super().execute(query, args)
+        except BaseException:
+            record_db_query(time.perf_counter() - started_at)
+            raise
+        elapsed = time.perf_counter() - started_at
+        record_db_query(elapsed)
+        # 流式游标的耗时只到首个结果返回，行数在读完前未知
+        rows = None if self._streaming else self.rowcount
+        profile_statement(self, query, args, elapsed, rows, self._streaming)
+        return result
+
+
+class _TimedDictCursor(_TimedCursorMixin, DictCursor):
+    pass
+
+
+class _TimedSSDictCursor(_TimedCursorMixin, SSDictCursor):
+    _streaming = True
 
 
 class DatabaseConfigError(Exception):
@@ -86,51 +121,514 @@ def _build_mysql_converters():
     return converted
 
 
-def get_connection():
-    dsn = _get_dsn()
-    mysql = _parse_mysql_dsn(dsn)
-    return pymysql.connect(
-        host=mysql["host"],
-        port=mysql["port"],
-        user=mysql["user"],
-        password=mysql["password"],
-        database=mysql["database"],
-        charset=mysql["charset"],
-        cursorclass=DictCursor,
-        conv=_build_mysql_converters(),
-        init_command="SET SESSION sql_mode = CONCAT_WS(',', @@SESSION.sql_mode, 'ANSI_QUOTES'), group_concat_max_len = 16777216",
-        autocommit=False,
+_MYSQL_INIT_COMMAND = (
+    "SET SESSION sql_mode = CONCAT_WS(',', @@SESSION.sql_mode, 'ANSI_QUOTES'), group_concat_max_len = 16777216"
+)
+
+
+@dataclass
+class _PoolEntry:
+    connection: Any
+    created_at: float
+    last_used_at: float
+
+
+class DatabasePoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """有界线程安全连接池：size 常驻 + max_overflow 溢出，归还时多余连接直接关闭。"""
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        size: int,
+        max_overflow: int,
+        timeout_seconds: float,
+        idle_recycle_seconds: float,
+        pre_ping: bool,
+    ):
+        self._connect = connect
+        self._size = size
+        self._max_overflow = max_overflow
+        self._timeout_seconds = timeout_seconds
+        self._idle_recycle_seconds = idle_recycle_seconds
+        self._pre_ping = pre_ping
+        self._condition = threading.Condition()
+        self._idle: Deque[_PoolEntry] = deque()
+        self._in_use: Dict[int, _PoolEntry] = {}
+        self._total = 0
+        self._waiting = 0
+        self._closed = False
+        self._checkout_count = 0
+        self._checkout_wait_total = 0.0
+        self._checkout_wait_max = 0.0
+        self._timeout_count = 0
+        self._created_count = 0
+        self._recycled_count = 0
+        self._discarded_count = 0
+
+    def _create_entry(self) -> _PoolEntry:
+        connection = self._connect()
+        now = time.monotonic()
+        with self._condition:
+            self._created_count += 1
+        return _PoolEntry(connection=connection, created_at=now, last_used_at=now)
+
+    def _close_quietly(self, connection: Any) -> None:
+        try:
+            connection.close()
+        except Exception:
+            return
+
+    def _is_usable(self, entry: _PoolEntry) -> bool:
+        if time.monotonic() - entry.last_used_at > self._idle_recycle_seconds:
+            return False
+        if not self._pre_ping:
+            return True
+        try:
+            entry.connection.ping(reconnect=False)
+        except Exception:
+            return False
+        return True
+
+    def acquire(self) -> Any:
+        started_at = time.monotonic()
+        deadline = started_at + self._timeout_seconds
+        entry: Optional[_PoolEntry] = None
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise DatabaseConfigError("数据库连接池已关闭")
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._total < self._size + self._max_overflow:
+                    self._total += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeout_count += 1
+                    raise DatabasePoolTimeoutError(f"数据库连接池获取连接超时（{self._timeout_seconds}s）")
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        try:
+            if entry is not None and not self._is_usable(entry):
+                self._close_quietly(entry.connection)
+                with self._condition:
+                    self._recycled_count += 1
+                entry = None
+            if entry is None:
+                entry = self._create_entry()
+        except BaseException:
+            with self._condition:
+                self._total -= 1
+                self._condition.notify()
+            raise
+
+        waited = time.monotonic() - started_at
+        with self._condition:
+            self._in_use[id(entry.connection)] = entry
+            self._checkout_count += 1
+            self._checkout_wait_total += waited
+            self._checkout_wait_max = max(self._checkout_wait_max, waited)
+        return entry.connection
+
+    def release(self, connection: Any, discard: bool = False) -> None:
+        with self._condition:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                return
+            keep = not discard and not self._closed and bool(getattr(connection, "open", True)) and len(self._idle) < self._size
+            if keep:
+                entry.last_used_at = time.monotonic()
+                self._idle.append(entry)
+            else:
+                self._total -= 1
+                if discard:
+                    self._discarded_count += 1
+            self._condition.notify()
+        if not keep:
+            self._close_quietly(connection)
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+            self._condition.notify_all()
+        for entry in idle:
+            self._close_quietly(entry.connection)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            checkout_count = self._checkout_count
+            return {
+                "size": self._size,
+                "maxOverflow": self._max_overflow,
+                "total": self._total,
+                "idle": len(self._idle),
+                "inUse": len(self._in_use),
+                "waiting": self._waiting,
+                "checkouts": checkout_count,
+                "checkoutTimeouts": self._timeout_count,
+                "checkoutWaitMsAvg": round(self._checkout_wait_total * 1000 / checkout_count, 3) if checkout_count else 0.0,
+                "checkoutWaitMsMax": round(self._checkout_wait_max * 1000, 3),
+                "created": self._created_count,
+                "recycled": self._recycled_count,
+                "discarded": self._discarded_count,
+            }
+
+
+class PooledConnection:
+    """连接池连接代理：close() 归还连接池而非断开 TCP。"""
+
+    def __init__(self, pool: ConnectionPool, connection: Any):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._connection, name)
+
+    def close(self) -> None:
+        if self._connection is None:
+            return
+        connection = self._connection
+        self._connection = None
+        try:
+            connection.rollback()
+            connection.autocommit(False)
+        except Exception:
+            self._pool.release(connection, discard=True)
+            return
+        self._pool.release(connection)
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _build_connect_factory(dsn: Optional[str] = None) -> Callable[[], Any]:
+    mysql = _parse_mysql_dsn(dsn if dsn is not None else _get_dsn())
+    converters = _build_mysql_converters()
+
+    def connect():
+        return pymysql.connect(
+            host=mysql["host"],
+            port=mysql["port"],
+            user=mysql["user"],
+            password=mysql["password"],
+            database=mysql["database"],
+            charset=mysql["charset"],
+            cursorclass=_TimedDictCursor,
+            conv=converters,
+            init_command=_MYSQL_INIT_COMMAND,
+            autocommit=False,
+        )
+
+    return connect
+
+
+def _create_pool(dsn: Optional[str] = None) -> ConnectionPool:
+    pool_config = get_config()["database"]["pool"]
+    return ConnectionPool(
+        _build_connect_factory(dsn),
+        size=pool_config["size"],
+        max_overflow=pool_config["max_overflow"],
+        timeout_seconds=pool_config["timeout_seconds"],
+        idle_recycle_seconds=pool_config["idle_recycle_seconds"],
+        pre_ping=pool_config["pre_ping"],
     )
 
 
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _create_pool()
+        return _pool
+
+
+@dataclass
+class _ReadReplica:
+    name: str
+    pool: ConnectionPool
+    available: bool = True
+    lag_seconds: Optional[float] = None
+    checked_at: Optional[float] = None
+    check_lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+READ_TARGET_PRIMARY = "primary"
+
+_read_replicas: Optional[List[_ReadReplica]] = None
+_read_replica_cursor = itertools.count()
+_recent_writes: Dict[Any, float] = {}
+_recent_writes_lock = threading.Lock()
+
+
+def _get_read_routing_config() -> Dict[str, Any]:
+    return get_config()["database"]["read_routing"]
+
+
+def _get_read_replicas() -> List[_ReadReplica]:
+    global _read_replicas
+    if _read_replicas is not None:
+        return _read_replicas
+    with _pool_lock:
+        if _read_replicas is None:
+            replicas = []
+            for dsn in get_config()["database"]["read_dsns"]:
+                parsed = _parse_mysql_dsn(dsn)
+                replicas.append(_ReadReplica(f"{parsed['host']}:{parsed['port']}", _create_pool(dsn)))
+            _read_replicas = replicas
+        return _read_replicas
+
+
+def _query_replica_lag(connection: Any) -> Optional[float]:
+    """返回副本延迟秒数；未配置复制（独立实例）视为无延迟，复制线程中断时返回 None。"""
+    with connection.cursor(DictCursor) as cursor:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except pymysql.MySQLError:
+            # MySQL 8.0.22 之前只支持旧语法
+            cursor.execute("SHOW SLAVE STATUS")
+        row = cursor.fetchone()
+    if not row:
+        return 0.0
+    lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+    return None if lag is None else float(lag)
+
+
+def _check_replica(replica: _ReadReplica) -> None:
+    try:
+        connection = replica.pool.acquire()
+    except Exception:
+        replica.available = False
+        replica.lag_seconds = None
+        return
+    try:
+        replica.lag_seconds = _query_replica_lag(connection)
+        connection.rollback()
+    except Exception:
+        replica.pool.release(connection, discard=True)
+        replica.available = False
+        replica.lag_seconds = None
+        return
+    replica.pool.release(connection)
+    replica.available = replica.lag_seconds is not None
+
+
+def _is_replica_usable(replica: _ReadReplica, routing: Dict[str, Any]) -> bool:
+    now = time.monotonic()
+    if replica.checked_at is None or now - replica.checked_at >= routing["lag_check_interval_seconds"]:
+        # 同一副本只由一个线程检查，其余线程沿用上次结果
+        if replica.check_lock.acquire(blocking=replica.checked_at is None):
+            try:
+                _check_replica(replica)
+                replica.checked_at = time.monotonic()
+            finally:
+                replica.check_lock.release()
+    return replica.available and replica.lag_seconds is not None and replica.lag_seconds <= routing["max_lag_seconds"]
+
+
+# 连接级错误码：连接不上、连接中断、服务端断开；其余 OperationalError（锁等待超时、死锁等）与副本健康无关
+_REPLICA_CONNECTION_ERRORS = frozenset((CR.CR_CONN_HOST_ERROR, CR.CR_SERVER_GONE_ERROR, CR.CR_SERVER_LOST))
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    if isinstance(exc, pymysql.InterfaceError):
+        return True
+    return isinstance(exc, pymysql.OperationalError) and bool(exc.args) and exc.args[0] in _REPLICA_CONNECTION_ERRORS
+
+
+def _mark_replica_failed(replica: _ReadReplica) -> None:
+    replica.available = False
+    replica.checked_at = time.monotonic()
+
+
+def mark_user_write(user_id: Any) -> None:
+    """记录用户刚写入主库；read_your_writes_seconds 内该用户的读请求不走副本。"""
+    if user_id is None:
+        return
+    with _recent_writes_lock:
+        now = time.monotonic()
+        _recent_writes[user_id] = now
+        if len(_recent_writes) > 1024:
+            window = _get_read_routing_config()["read_your_writes_seconds"]
+            for key in [key for key, written_at in _recent_writes.items() if now - written_at >= window]:
+                del _recent_writes[key]
+
+
+def _has_recent_write(user_id: Any, routing: Dict[str, Any]) -> bool:
+    if user_id is None:
+        return False
+    with _recent_writes_lock:
+        written_at = _recent_writes.get(user_id)
+    return written_at is not None and time.monotonic() - written_at < routing["read_your_writes_seconds"]
+
+
+def _select_read_replica(user_id: Any) -> Optional[_ReadReplica]:
+    replicas = _get_read_replicas()
+    if not replicas:
+        return None
+    routing = _get_read_routing_config()
+    if _has_recent_write(user_id, routing):
+        record_read_route("primary", "read_your_writes")
+        return None
+    start = next(_read_replica_cursor)
+    for offset in range(len(replicas)):
+        replica = replicas[(start + offset) % len(replicas)]
+        if _is_replica_usable(replica, routing):
+            return replica
+    record_read_route("primary", "replica_unavailable")
+    return None
+
+
+def close_pool() -> None:
+    global _pool, _read_replicas
+    with _pool_lock:
+        pool = _pool
+        _pool = None
+        replicas = _read_replicas or []
+        _read_replicas = None
+    if pool is not None:
+        pool.close()
+    for replica in replicas:
+        replica.pool.close()
+
+
+def get_pool_stats() -> Optional[Dict[str, Any]]:
+    pool = _pool
+    if pool is None:
+        return None
+    return pool.stats()
+
+
+def get_read_replica_stats() -> List[Dict[str, Any]]:
+    return [
+        {
+            "name": replica.name,
+            "available": replica.available,
+            "lagSeconds": replica.lag_seconds,
+            "pool": replica.pool.stats(),
+        }
+        for replica in (_read_replicas or [])
+    ]
+
+
+def get_connection():
+    pool = get_pool()
+    return PooledConnection(pool, pool.acquire())
+
+
 def get_raw_connection():
-    dsn = _get_dsn()
-    mysql = _parse_mysql_dsn(dsn)
-    return pymysql.connect(
-        host=mysql["host"],
-        port=mysql["port"],
-        user=mysql["user"],
-        password=mysql["password"],
-        database=mysql["database"],
-        charset=mysql["charset"],
-        cursorclass=DictCursor,
-        conv=_build_mysql_converters(),
-        init_command="SET SESSION sql_mode = CONCAT_WS(',', @@SESSION.sql_mode, 'ANSI_QUOTES'), group_concat_max_len = 16777216",
-        autocommit=True,
-    )
+    connection = get_connection()
+    try:
+        connection.autocommit(True)
+    except Exception:
+        connection.close()
+        raise
+    return connection
 
 
 @contextmanager
-def db_cursor():
-    with get_connection() as connection:
+def _pool_cursor(pool: ConnectionPool, connection: Any):
+    try:
         with connection.cursor() as cursor:
             yield cursor
             connection.commit()
+    except BaseException:
+        try:
+            connection.rollback()
+        except Exception:
+            pool.release(connection, discard=True)
+        else:
+            pool.release(connection)
+        raise
+    pool.release(connection)
+
+
+@contextmanager
+def _pool_stream_cursor(pool: ConnectionPool, connection: Any):
+    cursor = connection.cursor(_TimedSSDictCursor)
+    try:
+        yield cursor
+        cursor.close()
+        connection.commit()
+    except BaseException:
+        # 未读完的流式结果集只能逐行排空，直接丢弃连接代价更低。
+        pool.release(connection, discard=True)
+        raise
+    pool.release(connection)
+
+
+@contextmanager
+def db_cursor():
+    pool = get_pool()
+    with _pool_cursor(pool, pool.acquire()) as cursor:
+        yield cursor
 
 
 @contextmanager
 def db_stream_cursor():
-    with get_connection() as connection:
-        with connection.cursor(SSDictCursor) as cursor:
+    pool = get_pool()
+    with _pool_stream_cursor(pool, pool.acquire()) as cursor:
+        yield cursor
+
+
+def get_read_target(cursor: Any) -> str:
+    """返回游标连接的库：主库为 READ_TARGET_PRIMARY，副本为副本名（host:port）。"""
+    return getattr(cursor, "read_target", READ_TARGET_PRIMARY)
+
+
+@contextmanager
+def _read_cursor(user_id: Any, open_cursor: Callable[[ConnectionPool, Any], Any]):
+    replica = _select_read_replica(user_id)
+    connection = None
+    if replica is not None:
+        try:
+            connection = replica.pool.acquire()
+        except Exception:
+            _mark_replica_failed(replica)
+            record_read_route("primary", "replica_unavailable")
+            replica = None
+    if replica is None:
+        pool = get_pool()
+        connection = pool.acquire()
+    else:
+        pool = replica.pool
+        record_read_route("replica", replica.name)
+    try:
+        with open_cursor(pool, connection) as cursor:
+            if replica is not None:
+                cursor.read_target = replica.name
             yield cursor
-            connection.commit()
+    except (pymysql.OperationalError, pymysql.InterfaceError) as exc:
+        # 副本连接中断：本次请求失败，后续读请求在下次检查前回退主库
+        if replica is not None and _is_connection_error(exc):
+            _mark_replica_failed(replica)
+        raise
+
+
+@contextmanager
+def db_read_cursor(user_id: Any = None):
+    """只读游标：优先路由到可用且延迟达标的副本，否则回退主库；user_id 用于读己之写。"""
+    with _read_cursor(user_id, _pool_cursor) as cursor:
+        yield cursor
+
+
+@contextmanager
+def db_read_stream_cursor(user_id: Any = None):
+    """只读流式游标，路由规则同 db_read_cursor。"""
+    with _read_cursor(user_id, _pool_stream_cursor) as cursor:
+        yield cursor
@@ -0,0 +1,197 @@
+# SQL 剖析：语句指纹、请求级汇总与慢语句 EXPLAIN。
+import re
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from pymysql.cursors import DictCursor
+
+from .config import get_config
+
+_EXPLAINABLE_KEYWORDS = {"SELECT", "UPDATE", "DELETE", "INSERT", "REPLACE", "WITH"}
+_COMMENT_PATTERN = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRING_PATTERN = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_PATTERN = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_PATTERN = re.compile(r"%s|%\([^)]+\)s")
+_PLACEHOLDER_LIST_PATTERN = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST_PATTERN = re.compile(r"(\(\?\+?\))(?:\s*,\s*\(\?\+?\))+")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+_explained_at: Dict[str, float] = {}
+_explained_lock = threading.Lock()
+
+
+@lru_cache(maxsize=2048)
+def fingerprint_sql(query: str) -> str:
+    """归一化 SQL：去注释、字面量与占位符替换为 ?，IN/VALUES 列表折叠为 (?+)，空白压缩为单个空格。"""
+    text = _COMMENT_PATTERN.sub(" ", query)
+    text = _STRING_PATTERN.sub("?", text)
+    text = _PLACEHOLDER_PATTERN.sub("?", text)
+    text = _NUMBER_PATTERN.sub("?", text)
+    text = _PLACEHOLDER_LIST_PATTERN.sub("(?+)", text)
+    text = _VALUES_LIST_PATTERN.sub(r"\1", text)
+    return _WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+@dataclass
+class StatementStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+
+
+@dataclass
+class RequestProfile:
+    statements: Dict[str, StatementStats] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(self, fingerprint: str, elapsed_seconds: float, rows: Optional[int]) -> None:
+        with self.lock:
+            stats = self.statements.get(fingerprint)
+            if stats is None:
+                stats = self.statements[fingerprint] = StatementStats()
+            stats.count += 1
+            stats.total_seconds += elapsed_seconds
+            stats.max_seconds = max(stats.max_seconds, elapsed_seconds)
+            if rows is not None and rows > 0:
+                stats.rows += rows
+
+    def summary(self, top_n: int) -> Dict[str, Any]:
+        with self.lock:
+            items = list(self.statements.items())
+        ranked = sorted(items, key=lambda item: item[1].total_seconds, reverse=True)[:top_n]
+        return {
+            "statements": sum(stats.count for _, stats in items),
+            "distinct": len(items),
+            "dbMs": round(sum(stats.total_seconds for _, stats in items) * 1000, 1),
+            "rows": sum(stats.rows for _, stats in items),
+            "top": [
+                {
+                    "sql": fingerprint,
+                    "count": stats.count,
+                    "totalMs": round(stats.total_seconds * 1000, 1),
+                    "maxMs": round(stats.max_seconds * 1000, 1),
+                    "rows": stats.rows,
+                }
+                for fingerprint, stats in ranked
+            ],
+        }
+
+
+_request_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def _get_profiler_config() -> Dict[str, Any]:
+    return get_config()["database"]["profiler"]
+
+
+def start_request_profile():
+    """开启当前请求的 SQL 剖析；未启用时返回 (None, None)。"""
+    if not _get_profiler_config()["enabled"]:
+        return None, None
+    profile = RequestProfile()
+    return profile, _request_profile.set(profile)
+
+
+def reset_request_profile(token) -> None:
+    """还原请求剖析上下文；已复制该上下文的下游任务仍会继续记录到同一 RequestProfile。"""
+    if token is not None:
+        _request_profile.reset(token)
+
+
+def log_request_profile(profile: Optional[RequestProfile]) -> None:
+    """输出请求级 SQL 汇总（日志上下文中带 requestId）；流式响应需在响应体发送完毕后调用。"""
+    if profile is None or not profile.statements:
+        return
+    summary = profile.summary(_get_profiler_config()["summary_top_n"])
+    logger.info(
+        "HTTP request sql summary: statements={} distinct={} dbMs={} rows={} top={}",
+        summary["statements"],
+        summary["distinct"],
+        summary["dbMs"],
+        summary["rows"],
+        summary["top"],
+    )
+
+
+def _should_explain(fingerprint: str, cooldown_seconds: int) -> bool:
+    keyword = fingerprint.split(" ", 1)[0].upper()
+    if keyword not in _EXPLAINABLE_KEYWORDS:
+        return False
+    now = time.monotonic()
+    with _explained_lock:
+        last = _explained_at.get(fingerprint)
+        if last is not None and now - last < cooldown_seconds:
+            return False
+        _explained_at[fingerprint] = now
+    return True
+
+
+def _format_plan(rows: List[Dict[str, Any]]) -> List[str]:
+    return [
+        "table={} type={} key={} rows={} filtered={} extra={}".format(
+            row.get("table"),
+            row.get("type"),
+            row.get("key"),
+            row.get("rows"),
+            row.get("filtered"),
+            row.get("Extra"),
+        )
+        for row in rows
+    ]
+
+
+def _explain(connection: Any, statement: str) -> List[str]:
+    with connection.cursor(DictCursor) as cursor:
+        cursor.execute(f"EXPLAIN {statement}")
+        return _format_plan(list(cursor.fetchall()))
+
+
+def _explain_on_new_connection(statement: str) -> List[str]:
+    # 流式游标的结果集尚未读完，当前连接无法执行其他语句，改用连接池中的另一条连接
+    from .db import get_pool
+
+    pool = get_pool()
+    connection = pool.acquire()
+    try:
+        plan = _explain(connection, statement)
+        connection.rollback()
+    except BaseException:
+        pool.release(connection, discard=True)
+        raise
+    pool.release(connection)
+    return plan
+
+
+def profile_statement(cursor: Any, query: Any, args: Any, elapsed_seconds: float, rows: Optional[int], streaming: bool) -> None:
+    """记录单条语句；未启用剖析时直接返回。超过阈值的语句输出慢日志与 EXPLAIN。"""
+    config = _get_profiler_config()
+    if not config["enabled"]:
+        return
+    query_text = query.decode("utf-8", errors="replace") if isinstance(query, bytes) else str(query)
+    fingerprint = fingerprint_sql(query_text)
+    profile = _request_profile.get()
+    if profile is not None:
+        profile.record(fingerprint, elapsed_seconds, rows)
+
+    if elapsed_seconds * 1000 < config["slow_query_ms"]:
+        return
+    plan: Optional[List[str]] = None
+    if config["explain_slow_queries"] and _should_explain(fingerprint, config["explain_cooldown_seconds"]):
+        try:
+            statement = cursor.mogrify(query, args)
+            plan = _explain_on_new_connection(statement) if streaming else _explain(cursor.connection, statement)
+        except Exception as exc:  # noqa: BLE001 - EXPLAIN 失败不影响业务语句
+            plan = [f"EXPLAIN 失败: {exc}"]
+    logger.warning(
+        "slow sql: elapsedMs={:.1f} rows={} sql={} plan={}",
+        elapsed_seconds * 1000,
+        rows,
+        fingerprint,
+        plan,
+    )
@@ -1,13 +1,25 @@
 # 日志配置（loguru）。
+import atexit
+import itertools
+import queue
 import sys
+import threading
+import time
 from datetime import date, datetime
 from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, TextIO
 
 from loguru import logger
 
+from .config import get_config
 from .logging_context import get_log_context
 
 _LOG_FILE_ROTATION_SIZE_BYTES = 20 * 1024 * 1024
+_LOG_FILE_RETENTION_DAYS = 30
+_SINK_STOP_TIMEOUT_SECONDS = 5
+
+_sample_counters: Dict[str, Iterator[int]] = {}
+_batched_sinks: List["BatchedSink"] = []
 
 
 def _patch_record(record):
@@ -21,23 +33,174 @@ def _get_log_file_date(file) -> date | None:
         return None
 
 
+def _message_bytes(message: str) -> int:
+    return len(message) if message.isascii() else len(message.encode("utf-8"))
+
+
 class DailyOrSizeRotation:
+    """按日期或文件大小轮转；文件大小在内存中累加，仅在换文件后通过 seek/tell 对齐一次。"""
+
     def __init__(self, max_bytes: int):
         self.max_bytes = max_bytes
         self._current_date: date | None = None
+        self._file = None
+        self._size = 0
 
     def __call__(self, message, file) -> bool:
         message_date = message.record["time"].date()
         if self._current_date is None:
             self._current_date = _get_log_file_date(file) or message_date
 
+        if file is not self._file:
+            file.seek(0, 2)
+            self._size = file.tell()
+            self._file = file
+
         if message_date != self._current_date:
             self._current_date = message_date
+            self._file = None
             return True
 
-        file.seek(0, 2)
-        pending_bytes = len(str(message).encode("utf-8"))
-        return file.tell() + pending_bytes > self.max_bytes
+        pending_bytes = _message_bytes(message)
+        if self._size + pending_bytes > self.max_bytes:
+            self._file = None
+            return True
+        self._size += pending_bytes
+        return False
+
+
+class BatchedSink:
+    """loguru 可调用 sink：调用方只把格式化后的消息放入进程内队列，后台线程批量取出后一次写出。
+
+    与 loguru 的 enqueue=True 不同，这里不经过多进程管道与 pickle，调用方开销只有一次入队。
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        name: str,
+        write_batch: Callable[[List[str]], None],
+        batch_size: int,
+        on_stop: Optional[Callable[[], None]] = None,
+    ):
+        self._queue: "queue.SimpleQueue[object]" = queue.SimpleQueue()
+        self._write_batch = write_batch
+        self._batch_size = batch_size
+        self._on_stop = on_stop
+        self._thread = threading.Thread(target=self._run, name=f"log-sink-{name}", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message) -> None:
+        self._queue.put(message)
+
+    def stop(self) -> None:
+        self._queue.put(self._STOP)
+        self._thread.join(_SINK_STOP_TIMEOUT_SECONDS)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch: List[str] = []
+            while True:
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self._batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
+            try:
+                self._write_batch(batch)
+            except Exception as exc:  # noqa: BLE001 - 日志线程不能退出，只能把错误打到 stderr
+                sys.stderr.write(f"日志写入失败: {exc}\n")
+        if self._on_stop is not None:
+            self._on_stop()
+
+
+def _write_stream_batch(stream: TextIO) -> Callable[[List[str]], None]:
+    def write_batch(batch: List[str]) -> None:
+        stream.write("".join(batch))
+        stream.flush()
+
+    return write_batch
+
+
+class RotatingFileWriter:
+    """BatchedSink 的文件写入端：按 DailyOrSizeRotation 轮转，轮转文件命名与 loguru 一致，并清理过期文件。"""
+
+    def __init__(self, path: Path, rotation: DailyOrSizeRotation, retention_days: int):
+        self.path = path
+        self.rotation = rotation
+        self.retention_days = retention_days
+        self._file: Optional[TextIO] = None
+
+    def __call__(self, batch: List[str]) -> None:
+        if self._file is None:
+            self._open()
+        pending: List[str] = []
+        for message in batch:
+            if self.rotation(message, self._file):
+                self._file.write("".join(pending))
+                pending = []
+                self._rotate()
+                # 轮转策略在下一条消息时按新文件 tell() 对齐大小，触发轮转的消息需先落到新文件
+                self._file.write(message)
+                continue
+            pending.append(message)
+        self._file.write("".join(pending))
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self) -> None:
+        self.close()
+        if self.path.exists():
+            suffix = datetime.now().strftime("%Y-%m-%d_%H-%M-%S_%f")
+            self.path.rename(self.path.with_name(f"{self.path.stem}.{suffix}{self.path.suffix}"))
+        self._remove_expired()
+        self._open()
+
+    def _remove_expired(self) -> None:
+        deadline = time.time() - self.retention_days * 86400
+        for item in self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}"):
+            try:
+                if item.stat().st_mtime < deadline:
+                    item.unlink()
+            except OSError:
+                continue
+
+
+def should_log_sample(key: str) -> bool:
+    """高频 info 日志采样：按 logging.sample_every[key] 每 N 条返回一次 True，未配置时总是 True。"""
+    every = get_config()["logging"]["sample_every"].get(key, 1)
+    if every <= 1:
+        return True
+    counter = _sample_counters.get(key)
+    if counter is None:
+        counter = _sample_counters.setdefault(key, itertools.count())
+    return next(counter) % every == 0
+
+
+def _stop_batched_sinks() -> None:
+    while _batched_sinks:
+        _batched_sinks.pop().stop()
+
+
+atexit.register(_stop_batched_sinks)
 
 
 def setup_logger() -> None:
@@ -61,15 +224,32 @@ def setup_logger() -> None:
         "{message}"
     )
 
-    logger.add(sys.stdout, format=log_format, level="INFO", colorize=True)
-
+    logging_config = get_config()["logging"]
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
-    logger.add(
+    # 重复初始化时先让旧的后台写线程写完队列再退出
+    _stop_batched_sinks()
+
+    if not logging_config["async_sink"]:
+        logger.add(sys.stdout, format=log_format, level="INFO", colorize=True)
+        logger.add(
+            log_dir / "server.log",
+            format=file_format,
+            level="INFO",
+            rotation=DailyOrSizeRotation(_LOG_FILE_ROTATION_SIZE_BYTES),
+            retention=f"{_LOG_FILE_RETENTION_DAYS} days",
+            encoding="utf-8",
+        )
+        return
+
+    batch_size = logging_config["sink_batch_size"]
+    stdout_sink = BatchedSink("stdout", _write_stream_batch(sys.stdout), batch_size)
+    file_writer = RotatingFileWriter(
         log_dir / "server.log",
-        format=file_format,
-        level="INFO",
-        rotation=DailyOrSizeRotation(_LOG_FILE_ROTATION_SIZE_BYTES),
-        retention="30 days",
-        encoding="utf-8",
+        DailyOrSizeRotation(_LOG_FILE_ROTATION_SIZE_BYTES),
+        _LOG_FILE_RETENTION_DAYS,
     )
+    file_sink = BatchedSink("file", file_writer, batch_size, on_stop=file_writer.close)
+    _batched_sinks.extend([stdout_sink, file_sink])
+    logger.add(stdout_sink, format=log_format, level="INFO", colorize=True)
+    logger.add(file_sink, format=file_format, level="INFO")
@@ -38,5 +38,10 @@ def get_log_context() -> LogContext:
     return _log_context_var.get().copy()
 
 
+def restore_log_context(context: LogContext) -> Token[LogContext]:
+    """在请求上下文之外（如响应体发送完毕时）临时恢复 get_log_context 取得的上下文。"""
+    return _log_context_var.set(context.copy())
+
+
 def reset_log_context(token: Token[LogContext]) -> None:
     _log_context_var.reset(token)
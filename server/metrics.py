@@ -0,0 +1,193 @@
+# 进程内指标采集与 Prometheus 文本格式输出。
+import bisect
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_QUERY_BUCKETS: Tuple[float, ...] = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+UNMATCHED_ROUTE = "<unmatched>"
+
+LabelValues = Tuple[str, ...]
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """线程安全的计数器/直方图注册表；单进程部署，不做跨进程聚合。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelValues, float]] = {}
+        self._histograms: Dict[str, Dict[LabelValues, _Histogram]] = {}
+        self._label_names: Dict[str, Tuple[str, ...]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> None:
+        self._help[name] = help_text
+        self._label_names[name] = tuple(label_names)
+
+    def inc(self, name: str, labels: LabelValues = (), amount: float = 1) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name: str, value: float, buckets: Sequence[float], labels: LabelValues = ()) -> None:
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> List[str]:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.extend(self._header(name, "counter"))
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(self._label_names.get(name, ()), labels)} {_format_value(value)}")
+            for name in sorted(self._histograms):
+                lines.extend(self._header(name, "histogram"))
+                label_names = self._label_names.get(name, ())
+                for labels, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        bucket_labels = _format_labels(label_names + ("le",), labels + (_format_value(bound),))
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    inf_labels = _format_labels(label_names + ("le",), labels + ("+Inf",))
+                    lines.append(f"{name}_bucket{inf_labels} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(label_names, labels)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(label_names, labels)} {histogram.count}")
+        return lines
+
+    def _header(self, name: str, metric_type: str) -> List[str]:
+        lines = []
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        return lines
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label_value(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(float(value))
+
+
+def render_snapshot(
+    name: str, help_text: str, metric_type: str, samples: Iterable[Tuple[Dict[str, str], Any]]
+) -> List[str]:
+    """把运行时快照（连接池、缓存、调度器等）渲染为指标。
+
+    累计值（进程启动以来只增不减）用 counter 且名称以 _total 结尾，瞬时值用 gauge。
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+    return lines
+
+
+registry = MetricsRegistry()
+registry.describe("lotro_http_requests_total", "HTTP 请求数", ("method", "route", "status"))
+registry.describe("lotro_http_request_duration_seconds", "HTTP 请求耗时（至响应头返回）", ("method", "route"))
+registry.describe("lotro_http_request_db_queries", "单个 HTTP 请求执行的 SQL 语句数", ("method", "route"))
+registry.describe("lotro_http_request_db_seconds_total", "HTTP 请求内 SQL 执行累计耗时", ("method", "route"))
+registry.describe("lotro_db_queries_total", "SQL 语句执行数（含后台任务）")
+registry.describe("lotro_db_query_seconds_total", "SQL 语句执行累计耗时（含后台任务）")
+registry.describe("lotro_export_rows_total", "导出接口从数据库流式读取的行数", ("export",))
+registry.describe("lotro_db_read_routes_total", "只读请求路由次数（replica 的 reason 为副本名）", ("target", "reason"))
+registry.describe("lotro_list_total_cache_lookups_total", "列表精确总数缓存查询次数", ("scope", "result"))
+
+
+@dataclass
+class RequestDbStats:
+    queries: int = 0
+    seconds: float = 0.0
+
+
+_request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def start_request_db_stats():
+    """开启当前请求的 SQL 统计；同步路由在线程池中执行时会继承该上下文。"""
+    stats = RequestDbStats()
+    return stats, _request_db_stats.set(stats)
+
+
+def reset_request_db_stats(token) -> None:
+    _request_db_stats.reset(token)
+
+
+def record_db_query(elapsed_seconds: float) -> None:
+    registry.inc("lotro_db_queries_total")
+    registry.inc("lotro_db_query_seconds_total", amount=elapsed_seconds)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed_seconds
+
+
+def observe_request(method: str, route: str, status_code: int, elapsed_seconds: float, db_stats: RequestDbStats) -> None:
+    labels = (method, route)
+    registry.inc("lotro_http_requests_total", (method, route, str(status_code)))
+    registry.observe("lotro_http_request_duration_seconds", elapsed_seconds, LATENCY_BUCKETS, labels)
+    registry.observe("lotro_http_request_db_queries", db_stats.queries, DB_QUERY_BUCKETS, labels)
+    registry.inc("lotro_http_request_db_seconds_total", labels, db_stats.seconds)
+
+
+def record_export_rows(export: str, rows: int) -> None:
+    if rows:
+        registry.inc("lotro_export_rows_total", (export,), rows)
+
+
+def record_read_route(target: str, reason: str) -> None:
+    registry.inc("lotro_db_read_routes_total", (target, reason))
+
+
+def record_list_total_lookup(scope: str, result: str) -> None:
+    registry.inc("lotro_list_total_cache_lookups_total", (scope, result))
+
+
+def get_route_template(scope: Dict[str, Any]) -> str:
+    """取路由模板（如 /texts/{text_id}）作为标签，避免按实际路径产生无限标签值。"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or UNMATCHED_ROUTE
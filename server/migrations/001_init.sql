@@ -5,7 +5,9 @@ SET FOREIGN_KEY_CHECKS = 0;
 
 DROP TABLE IF EXISTS text_changes;
 DROP TABLE IF EXISTS text_locks;
+DROP TABLE IF EXISTS text_latest_claim;
 DROP TABLE IF EXISTS text_claims;
+DROP TABLE IF EXISTS text_main_generation;
 DROP TABLE IF EXISTS text_main;
 DROP TABLE IF EXISTS dictionary_correction_logs;
 DROP TABLE IF EXISTS role_permissions;
@@ -84,6 +86,19 @@ CREATE INDEX idx_text_main_text_id ON text_main(`textId`);
 CREATE INDEX idx_text_main_status ON text_main(status);
 CREATE INDEX idx_text_main_upt_time ON text_main(`uptTime`);
 
+-- ngram 全文索引（sourceMatchMode/translatedMatchMode=fulltext），需 MySQL 启动参数 ngram_token_size=2
+SET SESSION innodb_ft_enable_stopword = OFF;
+CREATE FULLTEXT INDEX ft_text_main_source_text ON text_main(`sourceText`) WITH PARSER ngram;
+CREATE FULLTEXT INDEX ft_text_main_translated_text ON text_main(`translatedText`) WITH PARSER ngram;
+
+CREATE TABLE text_main_generation (
+  id TINYINT NOT NULL COMMENT '固定为1（单行表）',
+  generation BIGINT NOT NULL DEFAULT 0 COMMENT '译文变更计数',
+  PRIMARY KEY (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci COMMENT='译文变更计数表（译文写入提交后递增）';
+
+INSERT INTO text_main_generation (id, generation) VALUES (1, 0);
+
 CREATE TABLE text_claims (
   id BIGINT NOT NULL AUTO_INCREMENT COMMENT '主键ID',
   `textId` BIGINT NOT NULL COMMENT '文本ID',
@@ -95,6 +110,15 @@ CREATE TABLE text_claims (
   KEY idx_text_claims_user_id (`userId`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci COMMENT='文本认领记录表';
 
+CREATE TABLE text_latest_claim (
+  `textId` BIGINT NOT NULL COMMENT '文本ID',
+  `claimId` BIGINT NOT NULL COMMENT '最新认领记录ID',
+  `userId` BIGINT NOT NULL COMMENT '认领用户ID',
+  `claimedAt` TIMESTAMP NOT NULL COMMENT '认领时间',
+  PRIMARY KEY (`textId`),
+  KEY idx_text_latest_claim_user_id (`userId`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci COMMENT='文本最新认领投影表（由认领接口事务内维护）';
+
 CREATE TABLE text_locks (
   id BIGINT NOT NULL AUTO_INCREMENT COMMENT '主键ID',
   `textId` BIGINT NOT NULL COMMENT '文本ID',
@@ -138,6 +162,8 @@ CREATE TABLE dictionary_entries (
   `correctionLastFinishedAt` TIMESTAMP NULL COMMENT '最近纠错完成时间',
   `correctionLastError` VARCHAR(255) NULL COMMENT '最近纠错错误信息',
   `correctionUpdatedTextCount` INT NOT NULL DEFAULT 0 COMMENT '最近纠错更新文本数',
+  `correctionProgressVersion` INT NOT NULL DEFAULT 0 COMMENT '纠错进度所属版本',
+  `correctionProgressTextId` BIGINT NOT NULL DEFAULT 0 COMMENT '纠错已处理到的文本ID（分块续跑）',
   category VARCHAR(64) COMMENT '分类',
   remark VARCHAR(255) COMMENT '备注',
   `isActive` BOOLEAN NOT NULL DEFAULT TRUE COMMENT '是否启用',
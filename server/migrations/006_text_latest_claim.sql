@@ -0,0 +1,25 @@
+-- 文本最新认领投影：列表查询以主键 JOIN 取代逐行相关子查询，认领人筛选可走 userId 索引
+
+CREATE TABLE IF NOT EXISTS text_latest_claim (
+  `textId` BIGINT NOT NULL COMMENT '文本ID',
+  `claimId` BIGINT NOT NULL COMMENT '最新认领记录ID',
+  `userId` BIGINT NOT NULL COMMENT '认领用户ID',
+  `claimedAt` TIMESTAMP NOT NULL COMMENT '认领时间',
+  PRIMARY KEY (`textId`),
+  KEY idx_text_latest_claim_user_id (`userId`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci COMMENT='文本最新认领投影表（由认领接口事务内维护）';
+
+-- 回填历史认领：每个文本取 claimedAt、id 最大的一条
+DELETE FROM text_latest_claim;
+INSERT INTO text_latest_claim (`textId`, `claimId`, `userId`, `claimedAt`)
+SELECT ranked.`textId`, ranked.id, ranked.`userId`, ranked.`claimedAt`
+FROM (
+  SELECT
+    c.id,
+    c.`textId`,
+    c.`userId`,
+    c.`claimedAt`,
+    ROW_NUMBER() OVER (PARTITION BY c.`textId` ORDER BY c.`claimedAt` DESC, c.id DESC) AS rn
+  FROM text_claims c
+) ranked
+WHERE ranked.rn = 1;
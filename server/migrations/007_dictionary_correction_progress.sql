@@ -0,0 +1,5 @@
+-- 词典纠错分块进度：每个分块与写入同事务推进，进程中断后从进度处续跑
+
+ALTER TABLE dictionary_entries
+  ADD COLUMN `correctionProgressVersion` INT NOT NULL DEFAULT 0 COMMENT '纠错进度所属版本' AFTER `correctionUpdatedTextCount`,
+  ADD COLUMN `correctionProgressTextId` BIGINT NOT NULL DEFAULT 0 COMMENT '纠错已处理到的文本ID（分块续跑）' AFTER `correctionProgressVersion`;
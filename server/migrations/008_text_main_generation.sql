@@ -0,0 +1,9 @@
+-- 译文变更计数：text_main 译文写入提交后以单独的短事务递增，汉化包产物缓存以此判断是否过期
+
+CREATE TABLE IF NOT EXISTS text_main_generation (
+  id TINYINT NOT NULL COMMENT '固定为1（单行表）',
+  generation BIGINT NOT NULL DEFAULT 0 COMMENT '译文变更计数',
+  PRIMARY KEY (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci COMMENT='译文变更计数表（译文写入提交后递增）';
+
+INSERT IGNORE INTO text_main_generation (id, generation) VALUES (1, 0);
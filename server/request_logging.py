@@ -1,11 +1,13 @@
 # 请求日志拦截与脱敏工具。
 import json
 import uuid
-from typing import Any, Dict, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import parse_qs
 
 from fastapi import Request
 from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from .config import get_config
 
@@ -71,52 +73,175 @@ def sanitize_query_params(request: Request) -> Dict[str, Any]:
     return sanitize_payload(normalized, redact_fields, max_body_length)
 
 
-async def extract_request_body(request: Request) -> Optional[Any]:
+_BODY_PREVIEW_STATE_KEY = "request_body_preview"
+_TEXT_CONTENT_TYPES = ("application/json", "application/x-www-form-urlencoded", "text/")
+
+
+@dataclass(frozen=True)
+class RequestBodyPreview:
+    content_type: str
+    data: bytes
+    complete: bool
+    body_bytes: Optional[int]
+
+
+def _is_text_content_type(content_type: str) -> bool:
+    return not content_type or content_type.startswith(_TEXT_CONTENT_TYPES)
+
+
+def _parse_content_length(value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        length = int(value)
+    except ValueError:
+        return None
+    return length if length >= 0 else None
+
+
+async def _read_body_prefix(receive: Receive, limit: int, capture: bool) -> Tuple[List[Message], bytes, bool, int]:
+    """读取请求体直到超过 limit 字节或读完；返回 (已读消息, 捕获内容, 是否读完, 已读字节数)。
+
+    已读消息需原样回放给下游；读完时捕获完整内容供解析，否则只保留前缀；capture=False 时只计数不拼接。
+    """
+    messages: List[Message] = []
+    size = 0
+    complete = False
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        if not message.get("more_body", False):
+            complete = True
+            break
+        if size > limit:
+            break
+    if not capture:
+        return messages, b"", complete, size
+    data = b"".join(item.get("body", b"") for item in messages)
+    return messages, data if complete else data[: limit + 1], complete, size
+
+
+async def capture_request_body(request_headers: Any, method: str, receive: Receive) -> Tuple[Optional[RequestBodyPreview], List[Message]]:
+    """按日志配置预读请求体前缀；文本类只保留前 request_max_body_length 字节，二进制类不保留内容。"""
     logging_config = _get_logging_config()
     log_body_methods = {str(item).upper() for item in logging_config["log_body_methods"]}
-    if request.method.upper() not in log_body_methods:
-        return None
+    if method.upper() not in log_body_methods:
+        return None, []
+
+    content_type = request_headers.get("content-type", "")
+    content_length = _parse_content_length(request_headers.get("content-length"))
+    if not _is_text_content_type(content_type):
+        if content_length is not None:
+            return RequestBodyPreview(content_type, b"", False, content_length), []
+        # 无 Content-Length 时只预读一条消息估算大小，不拼接内容
+        messages, _, complete, size = await _read_body_prefix(receive, 0, capture=False)
+        return RequestBodyPreview(content_type, b"", complete, size if complete else None), messages
+
+    max_body_length = logging_config["request_max_body_length"]
+    messages, data, complete, size = await _read_body_prefix(receive, max_body_length, capture=True)
+    body_bytes = content_length if content_length is not None else (size if complete else None)
+    return RequestBodyPreview(content_type, data, complete, body_bytes), messages
+
+
+class RequestBodyPreviewMiddleware:
+    """在路由读取请求体之前预读日志所需的前缀，并把已读消息回放给下游，整个请求体只在路由侧缓冲一次。"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        preview, messages = await capture_request_body(request.headers, scope["method"], receive)
+        scope.setdefault("state", {})[_BODY_PREVIEW_STATE_KEY] = preview
+        if not messages:
+            await self.app(scope, receive, send)
+            return
+
+        async def replay_receive() -> Message:
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        await self.app(scope, replay_receive, send)
+
 
-    body = await request.body()
-    if not body:
+def _summarize_body_preview(preview: RequestBodyPreview) -> Optional[Any]:
+    if preview.body_bytes == 0:
         return None
 
+    logging_config = _get_logging_config()
     max_body_length = logging_config["request_max_body_length"]
     redact_fields = {str(item).lower() for item in logging_config["redact_fields"]}
-    content_type = request.headers.get("content-type", "")
+    content_type = preview.content_type
+
+    if content_type.startswith("multipart/form-data"):
+        return {
+            "contentType": content_type,
+            "bodyBytes": preview.body_bytes,
+            "bodySummary": "<multipart omitted>",
+        }
+    if not _is_text_content_type(content_type):
+        return {
+            "contentType": content_type,
+            "bodyBytes": preview.body_bytes,
+            "bodySummary": "<binary omitted>",
+        }
+    if not preview.data:
+        return None
+
+    is_structured = content_type.startswith(("application/json", "application/x-www-form-urlencoded"))
+    if is_structured and not preview.complete:
+        # 截断的结构化请求体无法解析脱敏，只记录大小
+        return {
+            "contentType": content_type,
+            "bodyBytes": preview.body_bytes,
+            "bodySummary": "<truncated body omitted>",
+        }
 
     if content_type.startswith("application/json"):
         try:
-            parsed = json.loads(body.decode("utf-8"))
+            parsed = json.loads(preview.data.decode("utf-8"))
         except (UnicodeDecodeError, json.JSONDecodeError):
-            return {
-                "contentType": content_type,
-                "bodyBytes": len(body),
-                "bodyPreview": _truncate_text(body.decode("utf-8", errors="replace"), max_body_length),
-            }
-        return sanitize_payload(parsed, redact_fields, max_body_length)
+            pass
+        else:
+            return sanitize_payload(parsed, redact_fields, max_body_length)
 
     if content_type.startswith("application/x-www-form-urlencoded"):
-        parsed = parse_qs(body.decode("utf-8"), keep_blank_values=True)
+        parsed_form = parse_qs(preview.data.decode("utf-8", errors="replace"), keep_blank_values=True)
         normalized: Dict[str, Any] = {}
-        for key, values in parsed.items():
+        for key, values in parsed_form.items():
             normalized[key] = values[0] if len(values) == 1 else values
         return sanitize_payload(normalized, redact_fields, max_body_length)
 
-    if content_type.startswith("multipart/form-data"):
-        return {
-            "contentType": content_type,
-            "bodyBytes": len(body),
-            "bodySummary": "<multipart omitted>",
-        }
-
+    preview_text = preview.data[:max_body_length].decode("utf-8", errors="replace")
+    if not preview.complete or len(preview.data) > max_body_length:
+        preview_text = f"{preview_text}...(truncated)"
     return {
         "contentType": content_type or "application/octet-stream",
-        "bodyBytes": len(body),
-        "bodyPreview": _truncate_text(body.decode("utf-8", errors="replace"), max_body_length),
+        "bodyBytes": preview.body_bytes,
+        "bodyPreview": preview_text,
     }
 
 
+async def extract_request_body(request: Request) -> Optional[Any]:
+    """生成请求体日志摘要，只使用 RequestBodyPreviewMiddleware 预读的前缀。
+
+    未挂载该中间件时返回 None：在这里读取 receive 无法回放给路由，会导致路由读到空请求体。
+    """
+    state = request.scope.get("state") or {}
+    preview = state.get(_BODY_PREVIEW_STATE_KEY)
+    if preview is None:
+        return None
+    return _summarize_body_preview(preview)
+
+
 def log_request_start(request: Request, request_body: Optional[Any], auth_error: Optional[str]) -> None:
     logger.info(
         "HTTP request start: method={} path={} query={} body={} authError={} userAgent={}",
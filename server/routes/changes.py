@@ -4,7 +4,7 @@ from typing import Any, Dict
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from loguru import logger
 
-from ..db import db_cursor
+from ..db import db_read_cursor
 from ..response import success_response
 from .deps import require_auth
 
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/changes", tags=["changes"])
 def list_changes(id: int = Query(...), user: Dict[str, Any] = Depends(require_auth)):
     """查询指定文本的变更历史。"""
     logger.info("Changes list: textId={} userId={}", id, user["userId"])
-    with db_cursor() as cursor:
+    with db_read_cursor(user["userId"]) as cursor:
         cursor.execute("SELECT id FROM text_main WHERE id = %s", (id,))
         if cursor.fetchone() is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文本不存在")
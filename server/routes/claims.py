@@ -5,8 +5,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from loguru import logger
 from pydantic import BaseModel
 
-from ..db import db_cursor
+from ..db import db_cursor, mark_user_write
 from ..response import success_response
+from ..services.list_totals import SCOPE_TEXTS, bump_generation
 from .deps import require_auth
 
 router = APIRouter(prefix="/claims", tags=["claims"])
@@ -16,12 +17,29 @@ class ClaimRequest(BaseModel):
     id: int
 
 
+def _refresh_latest_claim(cursor, text_main_id: int) -> None:
+    """按 text_claims 重算单条文本的最新认领投影，需与认领写入处于同一事务。"""
+    cursor.execute('DELETE FROM text_latest_claim WHERE "textId" = %s', (text_main_id,))
+    cursor.execute(
+        """
+        INSERT INTO text_latest_claim ("textId", "claimId", "userId", "claimedAt")
+        SELECT c."textId", c.id, c."userId", c."claimedAt"
+        FROM text_claims c
+        WHERE c."textId" = %s
+        ORDER BY c."claimedAt" DESC, c.id DESC
+        LIMIT 1
+        """,
+        (text_main_id,),
+    )
+
+
 @router.post("")
 def create_claim(request: ClaimRequest, user: Dict[str, Any] = Depends(require_auth)):
     """创建认领记录，重复认领自动忽略。"""
     logger.info(f"Claim create: id={request.id} userId={user['userId']}")
     with db_cursor() as cursor:
-        cursor.execute("SELECT id FROM text_main WHERE id = %s", (request.id,))
+        # 锁定文本行，串行化同一文本的认领变更，保证最新认领投影一致。
+        cursor.execute("SELECT id FROM text_main WHERE id = %s FOR UPDATE", (request.id,))
         if cursor.fetchone() is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文本不存在")
 
@@ -45,7 +63,10 @@ def create_claim(request: ClaimRequest, user: Dict[str, Any] = Depends(require_a
             claimId = existing["id"]
         else:
             claimId = claim_id
+            _refresh_latest_claim(cursor, request.id)
 
+    mark_user_write(user["userId"])
+    bump_generation(SCOPE_TEXTS)
     logger.info(f"Claim created: claimId={claimId} id={request.id} userId={user['userId']}")
     return success_response({"claimId": claimId})
 
@@ -56,7 +77,7 @@ def release_claim(claimId: int, user: Dict[str, Any] = Depends(require_auth)):
     logger.info(f"Claim release: claimId={claimId} userId={user['userId']}")
     with db_cursor() as cursor:
         cursor.execute(
-            'SELECT id, "userId" FROM text_claims WHERE id = %s',
+            'SELECT id, "textId", "userId" FROM text_claims WHERE id = %s',
             (claimId,),
         )
         claim = cursor.fetchone()
@@ -65,7 +86,11 @@ def release_claim(claimId: int, user: Dict[str, Any] = Depends(require_auth)):
         if claim["userId"] != user["userId"]:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="无权释放认领")
 
+        cursor.execute("SELECT id FROM text_main WHERE id = %s FOR UPDATE", (claim["textId"],))
         cursor.execute("DELETE FROM text_claims WHERE id = %s", (claimId,))
+        _refresh_latest_claim(cursor, claim["textId"])
 
+    mark_user_write(user["userId"])
+    bump_generation(SCOPE_TEXTS)
     logger.info(f"Claim released: claimId={claimId} userId={user['userId']}")
     return success_response({"id": claimId})
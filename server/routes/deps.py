@@ -12,7 +12,7 @@ def _resolve_user_from_authorization(authorization: str) -> Dict[str, int]:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="缺少 Bearer token")
     token = authorization.removeprefix("Bearer ").strip()
     try:
-        payload = auth_service.verify_token(token)
+        payload = auth_service.verify_token_cached(token)
     except auth_service.AuthError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
 
@@ -20,7 +20,7 @@ def _resolve_user_from_authorization(authorization: str) -> Dict[str, int]:
     if not isinstance(userId, int):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="token 无效")
 
-    user = auth_service.get_user_by_id(userId)
+    user = auth_service.get_user_by_id_cached(userId)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="用户不存在")
 
@@ -37,6 +37,26 @@ def try_resolve_auth_user(authorization: Optional[str]) -> Tuple[Optional[Dict[s
         return None, detail
 
 
+def try_resolve_auth_user_from_cache(
+    authorization: Optional[str],
+) -> Optional[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """仅凭进程内缓存解析鉴权，不做 HMAC 校验与数据库查询；需要这些操作时返回 None。"""
+    if authorization is None or authorization.strip() == "":
+        return None, None
+    if not authorization.startswith("Bearer "):
+        return None, "缺少 Bearer token"
+    payload = auth_service.peek_cached_token(authorization.removeprefix("Bearer ").strip())
+    if payload is None:
+        return None
+    userId = payload.get("sub")
+    if not isinstance(userId, int):
+        return None
+    user = auth_service.peek_cached_user(userId)
+    if user is None:
+        return None
+    return {"userId": userId, "username": user["username"]}, None
+
+
 def require_auth(request: Request, authorization: str = Header(..., alias="Authorization")) -> Dict[str, int]:
     """鉴权依赖：校验 Bearer token 并返回用户信息。"""
     request_user = getattr(request.state, "auth_user", None)
@@ -16,9 +16,10 @@ from pydantic import BaseModel
 from starlette.background import BackgroundTask
 
 from ..config import get_config
-from ..db import db_cursor, db_stream_cursor
+from ..db import db_cursor, db_read_stream_cursor, mark_user_write
 from ..response import success_response
 from ..services import dictionary_correction
+from ..services.list_totals import SCOPE_CORRECTION_LOGS, SCOPE_DICTIONARY, TOTAL_MODE_SET, bump_generation, resolve_total
 from .deps import require_auth
 
 router = APIRouter(prefix="/dictionary", tags=["dictionary"])
@@ -58,6 +59,14 @@ def _apply_pagination(page: int, page_size: int) -> int:
     return (page - 1) * page_size
 
 
+def _parse_total_mode(value: Optional[str]) -> str:
+    if value is None or value == "":
+        return "exact"
+    if value not in TOTAL_MODE_SET:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="totalMode 必须为 exact/approximate/none")
+    return value
+
+
 def _require_non_empty_text(value: str, field_name: str) -> str:
     cleaned = value.strip()
     if not cleaned:
@@ -292,11 +301,12 @@ def list_dictionary(
     isActive: Optional[bool] = None,
     page: int = 1,
     pageSize: Optional[int] = Query(default=None, alias="pageSize"),
+    totalModeRaw: Optional[str] = Query(default=None, alias="totalMode"),
     user: Dict[str, Any] = Depends(require_auth),
 ):
     """查询词典条目，支持筛选与分页。"""
     logger.info(
-        "Dict list: keyword={} termKey={} termValue={} category={} isActive={} page={} pageSize={} userId={}",
+        "Dict list: keyword={} termKey={} termValue={} category={} isActive={} page={} pageSize={} totalMode={} userId={}",
         keyword,
         termKey,
         termValue,
@@ -304,8 +314,10 @@ def list_dictionary(
         isActive,
         page,
         pageSize,
+        totalModeRaw,
         user["userId"],
     )
+    total_mode = _parse_total_mode(totalModeRaw)
     config = get_config()
     pagination = config["pagination"]
     default_page_size = pagination["default_page_size"]
@@ -320,15 +332,7 @@ def list_dictionary(
     where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 
     with db_cursor() as cursor:
-        cursor.execute(
-            f"""
-            SELECT COUNT(*) AS total
-            FROM dictionary_entries de
-            {where_clause}
-            """,
-            tuple(params),
-        )
-        total = cursor.fetchone()["total"]
+        total = resolve_total(cursor, total_mode, SCOPE_DICTIONARY, "dictionary_entries de", where_clause, params)
 
         cursor.execute(
             f"""
@@ -433,6 +437,9 @@ def create_dictionary(request: DictionaryCreateRequest, user: Dict[str, Any] = D
         )
         entry_id = cursor.lastrowid
 
+    mark_user_write(user["userId"])
+    dictionary_correction.invalidate_inline_correction_index()
+    bump_generation(SCOPE_DICTIONARY)
     logger.info("Dict created: entryId={} termKey={} userId={}", entry_id, term_key, user["userId"])
     return success_response({"id": entry_id})
 
@@ -523,6 +530,9 @@ def update_dictionary(entryId: int, request: DictionaryUpdateRequest, user: Dict
         )
         cursor.execute(update_sql, update_params)
 
+    mark_user_write(user["userId"])
+    dictionary_correction.invalidate_inline_correction_index()
+    bump_generation(SCOPE_DICTIONARY)
     logger.info("Dict updated: entryId={} termKey={} userId={}", entryId, entry["termKey"], user["userId"])
     return success_response({"id": entryId})
 
@@ -536,6 +546,7 @@ def correct_dictionary_entry(entryId: int, user: Dict[str, Any] = Depends(requir
         dictionary_correction.mark_dictionary_correction_failed(entryId, str(error))
         logger.exception("Dict correction failed: entryId={} userId={} error={}", entryId, user["userId"], error)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"系统纠错失败: {error}") from error
+    mark_user_write(user["userId"])
     return success_response(
         {
             "dictionaryId": result.dictionary_id,
@@ -590,6 +601,9 @@ def correct_all_dictionary_entries(user: Dict[str, Any] = Depends(require_auth))
         )
         requeued_count = int(cursor.rowcount)
 
+    mark_user_write(user["userId"])
+    dictionary_correction.invalidate_inline_correction_index()
+    bump_generation(SCOPE_DICTIONARY)
     logger.info(
         "Dict correction all queued: totalCount={} requeuedCount={} skippedRunningCount={} userId={}",
         total_count,
@@ -613,17 +627,20 @@ def list_dictionary_correction_records(
     onlyAbnormal: bool = Query(default=True, alias="onlyAbnormal"),
     page: int = 1,
     pageSize: Optional[int] = Query(default=None, alias="pageSize"),
+    totalModeRaw: Optional[str] = Query(default=None, alias="totalMode"),
     user: Dict[str, Any] = Depends(require_auth),
 ):
     logger.info(
-        "Dict correction records list: entryId={} correctionVersion={} onlyAbnormal={} page={} pageSize={} userId={}",
+        "Dict correction records list: entryId={} correctionVersion={} onlyAbnormal={} page={} pageSize={} totalMode={} userId={}",
         entryId,
         correctionVersion,
         onlyAbnormal,
         page,
         pageSize,
+        totalModeRaw,
         user["userId"],
     )
+    total_mode = _parse_total_mode(totalModeRaw)
     config = get_config()
     pagination = config["pagination"]
     default_page_size = pagination["default_page_size"]
@@ -658,15 +675,7 @@ def list_dictionary_correction_records(
             params.append("skipped")
         where_clause = f"WHERE {' AND '.join(conditions)}"
 
-        cursor.execute(
-            f"""
-            SELECT COUNT(*) AS total
-            FROM dictionary_correction_logs l
-            {where_clause}
-            """,
-            tuple(params),
-        )
-        total = int(cursor.fetchone()["total"])
+        total = resolve_total(cursor, total_mode, SCOPE_CORRECTION_LOGS, "dictionary_correction_logs l", where_clause, params)
 
         cursor.execute(
             f"""
@@ -729,7 +738,7 @@ def download_dictionary(
     termValue: Optional[str] = None,
     category: Optional[str] = None,
     isActive: Optional[bool] = None,
-    _: Dict[str, Any] = Depends(require_auth),
+    user: Dict[str, Any] = Depends(require_auth),
 ):
     """根据筛选条件导出词典数据。"""
     request_started_at = perf_counter()
@@ -763,7 +772,7 @@ def download_dictionary(
     batch_count = 0
     tmp_path: Optional[str] = None
     try:
-        with db_stream_cursor() as cursor:
+        with db_read_stream_cursor(user["userId"]) as cursor:
             cursor.execute(
                 f"""
                 SELECT
@@ -1060,6 +1069,9 @@ async def upload_dictionary(
                 cursor.execute(update_sql, update_params)
                 updated_count += 1
 
+    mark_user_write(user["userId"])
+    dictionary_correction.invalidate_inline_correction_index()
+    bump_generation(SCOPE_DICTIONARY)
     logger.info(
         "Upload dictionary complete: fileName={} createdCount={} updatedCount={} userId={}",
         fileName,
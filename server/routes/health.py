@@ -1,7 +1,10 @@
 # 健康检查路由。
 from fastapi import APIRouter
 
+from ..db import get_pool_stats, get_read_replica_stats
 from ..response import success_response
+from ..services.auth import get_auth_cache_stats
+from ..services.dictionary_correction_scheduler import get_scheduler_metrics
 from ..services.maintenance import get_maintenance_state
 
 router = APIRouter(prefix="/health", tags=["health"])
@@ -10,4 +13,13 @@ router = APIRouter(prefix="/health", tags=["health"])
 @router.get("")
 def health_check():
     """服务健康检查。"""
-    return success_response({"status": "ok", "maintenance": get_maintenance_state()})
+    return success_response(
+        {
+            "status": "ok",
+            "maintenance": get_maintenance_state(),
+            "dbPool": get_pool_stats(),
+            "dbReadReplicas": get_read_replica_stats(),
+            "authCache": get_auth_cache_stats(),
+            "dictionaryCorrection": get_scheduler_metrics(),
+        }
+    )
@@ -7,7 +7,7 @@ from loguru import logger
 from pydantic import BaseModel
 
 from ..config import get_config
-from ..db import db_cursor
+from ..db import db_cursor, mark_user_write
 from ..response import success_response
 from .deps import require_auth
 
@@ -63,6 +63,7 @@ def create_lock(request: LockRequest, user: Dict[str, Any] = Depends(require_aut
         )
         lockId = cursor.lastrowid
 
+    mark_user_write(user["userId"])
     logger.info(f"Lock created: lockId={lockId} id={request.id} userId={user['userId']} expiresAt={expiresAt}")
     return success_response({"lockId": lockId, "expiresAt": expiresAt})
 
@@ -94,5 +95,6 @@ def release_lock(lockId: int, user: Dict[str, Any] = Depends(require_auth)):
             (now, lockId),
         )
 
+    mark_user_write(user["userId"])
     logger.info(f"Lock released: lockId={lockId} userId={user['userId']} releasedAt={now}")
     return success_response({"releasedAt": now})
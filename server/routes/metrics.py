@@ -0,0 +1,78 @@
+# Prometheus 指标路由。
+from typing import Any, Dict, List
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..db import get_pool_stats
+from ..metrics import registry, render_snapshot
+from ..services.auth import get_auth_cache_stats
+from ..services.dictionary_correction_scheduler import get_scheduler_metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_POOL_METRICS = (
+    ("total", "lotro_db_pool_connections", "gauge", "连接池当前连接数"),
+    ("idle", "lotro_db_pool_idle_connections", "gauge", "连接池空闲连接数"),
+    ("inUse", "lotro_db_pool_in_use_connections", "gauge", "连接池已借出连接数"),
+    ("waiting", "lotro_db_pool_waiting_threads", "gauge", "等待借出连接的线程数"),
+    ("checkouts", "lotro_db_pool_checkouts_total", "counter", "连接借出累计次数"),
+    ("checkoutTimeouts", "lotro_db_pool_checkout_timeouts_total", "counter", "连接借出超时累计次数"),
+    ("checkoutWaitMsMax", "lotro_db_pool_checkout_wait_max_ms", "gauge", "连接借出最长等待（毫秒）"),
+)
+
+_CORRECTION_METRICS = (
+    ("queueDepth", "lotro_dictionary_correction_queue_depth", "gauge", "待纠错词典条目数"),
+    ("activeWorkers", "lotro_dictionary_correction_active_workers", "gauge", "正在执行纠错的工作线程数"),
+    ("roundsTotal", "lotro_dictionary_correction_rounds_total", "counter", "纠错调度累计轮数"),
+    (
+        "entriesProcessedTotal",
+        "lotro_dictionary_correction_entries_processed_total",
+        "counter",
+        "累计处理的词典条目数",
+    ),
+    ("entriesFailedTotal", "lotro_dictionary_correction_entries_failed_total", "counter", "累计失败的词典条目数"),
+    ("textsUpdatedTotal", "lotro_dictionary_correction_texts_updated_total", "counter", "累计纠错更新的文本数"),
+    (
+        "lastRoundEntriesPerSec",
+        "lotro_dictionary_correction_last_round_entries_per_second",
+        "gauge",
+        "最近一轮纠错吞吐（条目/秒）",
+    ),
+)
+
+_AUTH_CACHE_METRICS = (
+    ("hits", "lotro_auth_cache_hits_total", "counter", "鉴权缓存命中累计次数"),
+    ("misses", "lotro_auth_cache_misses_total", "counter", "鉴权缓存未命中累计次数"),
+    ("size", "lotro_auth_cache_entries", "gauge", "鉴权缓存条目数"),
+)
+
+
+def _render_snapshot_metrics() -> List[str]:
+    lines: List[str] = []
+    pool_stats = get_pool_stats()
+    if pool_stats is not None:
+        for key, name, metric_type, help_text in _POOL_METRICS:
+            lines.extend(render_snapshot(name, help_text, metric_type, [({}, pool_stats[key])]))
+
+    correction_stats = get_scheduler_metrics()
+    for key, name, metric_type, help_text in _CORRECTION_METRICS:
+        lines.extend(render_snapshot(name, help_text, metric_type, [({}, correction_stats[key])]))
+
+    auth_stats = get_auth_cache_stats()
+    if auth_stats is not None:
+        for field, name, metric_type, help_text in _AUTH_CACHE_METRICS:
+            samples: List[tuple[Dict[str, Any], Any]] = [
+                ({"cache": cache_name}, stats[field]) for cache_name, stats in auth_stats.items()
+            ]
+            lines.extend(render_snapshot(name, help_text, metric_type, samples))
+    return lines
+
+
+@router.get("", response_class=PlainTextResponse)
+def export_metrics():
+    """导出 Prometheus 文本格式指标。"""
+    lines = registry.render() + _render_snapshot_metrics()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
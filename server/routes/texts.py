@@ -1,35 +1,51 @@
 # 主文本列表与详情路由。
+import base64
+import binascii
+import json
 import os
 import threading
 from datetime import datetime
 from io import BytesIO
 from tempfile import NamedTemporaryFile
 from time import perf_counter
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from loguru import logger
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from openpyxl import Workbook, load_workbook
 from pydantic import BaseModel
 from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 from ..config import get_config
-from ..db import db_cursor, db_stream_cursor
+from ..db import db_cursor, db_read_cursor, db_read_stream_cursor, mark_user_write
+from ..logger import should_log_sample
+from ..metrics import record_export_rows
 from ..response import success_response
+from ..services import dictionary_correction
+from ..services.list_totals import SCOPE_CORRECTION_LOGS, SCOPE_TEXTS, TOTAL_MODE_SET, bump_generation, resolve_total
+from ..services.package_export import (
+    PACKAGE_HEADERS,
+    append_package_row,
+    bump_text_main_generation,
+    format_package_segment,
+    get_package_artifact,
+)
+from ..services.upload_jobs import UploadJob, UploadJobLimitError, get_upload_job, submit_upload_job
 from .deps import require_auth
 
 router = APIRouter(prefix="/texts", tags=["texts"])
 
 
 TEXT_TEMPLATE_HEADERS: Tuple[str, ...] = ("编号", "FID", "TextId", "Part", "原文", "译文", "状态")
-PACKAGE_HEADERS: Tuple[str, ...] = ("fid", "translation")
-_EXCEL_CELL_CHAR_LIMIT = 32767
 _package_download_lock = threading.Semaphore(1)
+UPLOAD_APPLY_BATCH_SIZE = 500
 STATUS_LABEL_TO_VALUE: Dict[str, int] = {"新增": 1, "修改": 2, "已完成": 3}
 STATUS_VALUE_TO_LABEL: Dict[int, str] = {value: label for label, value in STATUS_LABEL_TO_VALUE.items()}
 STATUS_VALUE_SET = {1, 2, 3}
-TEXT_MATCH_MODE_SET = {"fuzzy", "exact"}
+TEXT_MATCH_MODE_SET = {"fuzzy", "exact", "fulltext"}
+_FULLTEXT_FALLBACK_CHARS = frozenset('"%_\\')
 
 
 def _apply_pagination(page: int, page_size: int) -> int:
@@ -46,15 +62,105 @@ def _parse_text_match_mode(value: Optional[str], field_name: str) -> str:
     if value not in TEXT_MATCH_MODE_SET:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"{field_name} 必须为 fuzzy/exact",
+            detail=f"{field_name} 必须为 fuzzy/exact/fulltext",
         )
     return value
 
 
-def _build_text_match_clause(column_sql: str, keyword: str, match_mode: str) -> Tuple[str, str]:
+def _parse_total_mode(value: Optional[str], keyset_mode: bool) -> str:
+    if value is None or value == "":
+        return "none" if keyset_mode else "exact"
+    if value not in TOTAL_MODE_SET:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="totalMode 必须为 exact/approximate/none")
+    return value
+
+
+def _encode_cursor(kind: str, values: List[Any]) -> str:
+    """游标为 base64url(JSON)，对客户端不透明；kind 防止跨接口误用。"""
+    encoded_values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    data = json.dumps({"k": kind, "v": encoded_values}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _decode_cursor(value: str, kind: str) -> List[Any]:
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (UnicodeError, binascii.Error, ValueError) as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="cursor 无效") from error
+    if not isinstance(payload, dict) or payload.get("k") != kind:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="cursor 无效")
+    values = payload.get("v")
+    if not isinstance(values, list) or len(values) != 2:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="cursor 无效")
+    try:
+        if kind == "children":
+            return [int(values[0]), int(values[1])]
+        return [datetime.fromisoformat(values[0]), int(values[1])]
+    except (TypeError, ValueError) as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="cursor 无效") from error
+
+
+def _build_upt_time_seek(values: List[Any]) -> Tuple[str, List[Any]]:
+    """ORDER BY uptTime DESC, id DESC 的下一页谓词（拆成 OR 以便走 uptTime 索引）。"""
+    upt_time, row_id = values
+    return '(tm."uptTime" < %s OR (tm."uptTime" = %s AND tm.id < %s))', [upt_time, upt_time, row_id]
+
+
+def _build_part_seek(values: List[Any]) -> Tuple[str, List[Any]]:
+    """ORDER BY part ASC, id ASC 的下一页谓词。"""
+    part, row_id = values
+    return "(tm.part > %s OR (tm.part = %s AND tm.id > %s))", [part, part, row_id]
+
+
+def _append_where(where_clause: str, condition: str) -> str:
+    if where_clause:
+        return f"{where_clause} AND {condition}"
+    return f"WHERE {condition}"
+
+
+def _build_keyset_page(
+    items: List[Dict[str, Any]],
+    page_size: int,
+    total: Optional[int],
+    total_mode: str,
+    cursor_kind: str,
+    cursor_columns: Tuple[str, str],
+) -> Dict[str, Any]:
+    has_more = len(items) > page_size
+    page_items = items[:page_size]
+    next_cursor = None
+    if has_more and page_items:
+        last = page_items[-1]
+        next_cursor = _encode_cursor(cursor_kind, [last[column] for column in cursor_columns])
+    return {
+        "items": page_items,
+        "total": total,
+        "totalMode": total_mode,
+        "pageSize": page_size,
+        "nextCursor": next_cursor,
+        "hasMore": has_more,
+    }
+
+
+def _can_use_fulltext(keyword: str) -> bool:
+    """ngram 索引查不到短于 ngram_token_size 的词，也无法表达空白/通配符，这些情况回退 LIKE。"""
+    min_length = get_config()["text_list"]["fulltext_min_keyword_length"]
+    if len(keyword) < min_length:
+        return False
+    return not any(char.isspace() or char in _FULLTEXT_FALLBACK_CHARS for char in keyword)
+
+
+def _build_text_match_clause(column_sql: str, keyword: str, match_mode: str) -> Tuple[str, List[Any]]:
     if match_mode == "exact":
-        return f"{column_sql} = %s", keyword
-    return f"{column_sql} LIKE %s", f"%{keyword}%"
+        return f"{column_sql} = %s", [keyword]
+    if match_mode == "fulltext" and _can_use_fulltext(keyword):
+        # ngram 索引负责缩小候选集，LIKE 复核保证与 fuzzy 子串语义一致。
+        return (
+            f"(MATCH({column_sql}) AGAINST (%s IN BOOLEAN MODE) AND {column_sql} LIKE %s)",
+            [f'"{keyword}"', f"%{keyword}%"],
+        )
+    return f"{column_sql} LIKE %s", [f"%{keyword}%"]
 
 
 def _log_text_filters(
@@ -64,6 +170,8 @@ def _log_text_filters(
     where_clause: str,
     params: List[Any],
 ) -> None:
+    if not should_log_sample("text_filters"):
+        return
     logger.info(
         "{} filters: sourceMatchMode={} translatedMatchMode={} where_clause={} params={}",
         route_name,
@@ -177,8 +285,12 @@ def _validate_template_header(header_values: List[Any]) -> None:
 def _load_upload_sheet(file_bytes: bytes):
     if not file_bytes:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="上传文件为空")
+    return _open_upload_sheet(BytesIO(file_bytes))
+
+
+def _open_upload_sheet(source: Any):
     try:
-        workbook = load_workbook(filename=BytesIO(file_bytes), read_only=True, data_only=True)
+        workbook = load_workbook(filename=source, read_only=True, data_only=True)
     except Exception as error:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"上传文件解析失败: {error}") from error
     if not workbook.worksheets:
@@ -212,57 +324,6 @@ def _format_part_range(parts: List[int]) -> str:
     return ",".join(ranges)
 
 
-def _split_translation_into_rows(fid: str, translation: str) -> List[List[str]]:
-    """将超长 translation 按 ||| segment 边界拆分为多行写入 xlsx。
-    segment（textId::::::[text]）为最小原子单位，绝不在内部截断。
-    非末行末尾追加 '|||' 表示续行；单个 segment 超过 limit 时独占一行（完整保留）。
-    """
-    segments = translation.split("|||")
-    rows: List[List[str]] = []
-    current_parts: List[str] = []
-    current_len = 0
-    sep_len = 3  # len("|||")
-
-    for seg in segments:
-        seg_len = len(seg)
-        if not current_parts:
-            current_parts.append(seg)
-            current_len = seg_len
-        else:
-            if current_len + sep_len + seg_len > _EXCEL_CELL_CHAR_LIMIT - sep_len:
-                rows.append([fid, "|||".join(current_parts) + "|||"])
-                current_parts = [seg]
-                current_len = seg_len
-            else:
-                current_parts.append(seg)
-                current_len += sep_len + seg_len
-
-    if current_parts:
-        rows.append([fid, "|||".join(current_parts)])
-
-    return rows
-
-
-def _merge_fid_rows(fid_rows: List[Dict[str, Any]]) -> Tuple[str, str]:
-    """合并同一 fid 的多个 part 为一行，还原分段协议格式。
-    - textId 不含 ':::' → textId::::::[text]   (格式1)
-    - textId 含 ':::'   → textId:::[text]       (格式2/3)
-    空译文取原文填充。返回 (fid, translation)。
-    """
-    fid = fid_rows[0]["fid"]
-    translated_segments = []
-    for row in fid_rows:
-        text_id = str(row["textId"])
-        source = row["sourceText"] or ""
-        translated = row["translatedText"] or source
-        if ":::" in text_id:
-            translated_segments.append(f"{text_id}:::[{translated}]")
-        else:
-            translated_segments.append(f"{text_id}::::::[{translated}]")
-
-    return fid, "|||".join(translated_segments)
-
-
 def _build_download_conditions(
     fid: Optional[str],
     textId: Optional[str],
@@ -293,15 +354,15 @@ def _build_download_conditions(
         conditions.append("tm.status = %s")
         params.append(status_filter)
     if sourceKeyword is not None:
-        condition_sql, condition_param = _build_text_match_clause('tm."sourceText"', sourceKeyword, sourceMatchMode)
+        condition_sql, condition_params = _build_text_match_clause('tm."sourceText"', sourceKeyword, sourceMatchMode)
         conditions.append(condition_sql)
-        params.append(condition_param)
+        params.extend(condition_params)
     if translatedKeyword is not None:
-        condition_sql, condition_param = _build_text_match_clause(
+        condition_sql, condition_params = _build_text_match_clause(
             'tm."translatedText"', translatedKeyword, translatedMatchMode
         )
         conditions.append(condition_sql)
-        params.append(condition_param)
+        params.extend(condition_params)
     if updatedFrom is not None:
         conditions.append('tm."uptTime" >= %s')
         params.append(updatedFrom)
@@ -311,21 +372,19 @@ def _build_download_conditions(
     if claimer is not None:
         conditions.append(
             """
-            (
-              SELECT u.username
-              FROM text_claims c
-              JOIN users u ON u.id = c."userId"
-              WHERE c."textId" = tm.id
-              ORDER BY c."claimedAt" DESC, c.id DESC
-              LIMIT 1
-            ) LIKE %s
+            tm.id IN (
+              SELECT lc."textId"
+              FROM text_latest_claim lc
+              JOIN users u ON u.id = lc."userId"
+              WHERE u.username LIKE %s
+            )
             """
         )
         params.append(f"%{claimer}%")
     if claimed is True:
-        conditions.append('EXISTS (SELECT 1 FROM text_claims c WHERE c."textId" = tm.id)')
+        conditions.append('EXISTS (SELECT 1 FROM text_latest_claim lc WHERE lc."textId" = tm.id)')
     if claimed is False:
-        conditions.append('NOT EXISTS (SELECT 1 FROM text_claims c WHERE c."textId" = tm.id)')
+        conditions.append('NOT EXISTS (SELECT 1 FROM text_latest_claim lc WHERE lc."textId" = tm.id)')
 
     return conditions, params
 
@@ -345,21 +404,27 @@ def list_texts(
     claimed: Optional[bool] = None,
     page: int = 1,
     pageSize: Optional[int] = Query(default=None, alias="pageSize"),
+    cursorRaw: Optional[str] = Query(default=None, alias="cursor"),
+    totalModeRaw: Optional[str] = Query(default=None, alias="totalMode"),
     user: Dict[str, Any] = Depends(require_auth),
 ):
-    """获取平铺主文本列表（全量 part），支持筛选与分页。"""
+    """获取平铺主文本列表（全量 part），支持筛选与分页。
+    传入 cursor（首页传空字符串）切换为 (uptTime, id) 游标分页，返回 nextCursor，默认不统计总数。
+    """
     config = get_config()
     pagination = config["pagination"]
     default_page_size = pagination["default_page_size"]
     max_page_size = pagination["max_page_size"]
     source_match_mode = _parse_text_match_mode(sourceMatchModeRaw, "sourceMatchMode")
     translated_match_mode = _parse_text_match_mode(translatedMatchModeRaw, "translatedMatchMode")
+    keyset_mode = cursorRaw is not None
+    total_mode = _parse_total_mode(totalModeRaw, keyset_mode)
 
     effective_page_size = pageSize if pageSize is not None else default_page_size
     if effective_page_size > max_page_size:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="pageSize 超出最大限制")
 
-    offset = _apply_pagination(page, effective_page_size)
+    offset = 0 if keyset_mode else _apply_pagination(page, effective_page_size)
     conditions, params = _build_download_conditions(
         fid=fid,
         textId=textId,
@@ -376,17 +441,16 @@ def list_texts(
     where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
     _log_text_filters("list_texts", source_match_mode, translated_match_mode, where_clause, params)
     max_text_length = config["text_list"]["max_text_length"]
+    page_where_clause = where_clause
+    page_params = list(params)
+    if cursorRaw:
+        seek_sql, seek_params = _build_upt_time_seek(_decode_cursor(cursorRaw, "texts"))
+        page_where_clause = _append_where(where_clause, seek_sql)
+        page_params.extend(seek_params)
+    fetch_size = effective_page_size + 1 if keyset_mode else effective_page_size
 
-    with db_cursor() as cursor:
-        cursor.execute(
-            f"""
-            SELECT COUNT(*) AS total
-            FROM text_main tm
-            {where_clause}
-            """,
-            tuple(params),
-        )
-        total = cursor.fetchone()["total"]
+    with db_read_cursor(user["userId"]) as cursor:
+        total = resolve_total(cursor, total_mode, SCOPE_TEXTS, "text_main tm", where_clause, params)
 
         cursor.execute(
             f"""
@@ -408,44 +472,34 @@ def list_texts(
               tm."editCount" AS "editCount",
               tm."uptTime" AS "uptTime",
               tm."crtTime" AS "crtTime",
-              (
-                SELECT c.id
-                FROM text_claims c
-                WHERE c."textId" = tm.id
-                ORDER BY c."claimedAt" DESC, c.id DESC
-                LIMIT 1
-              ) AS "claimId",
-              (
-                SELECT u.username
-                FROM text_claims c
-                JOIN users u ON u.id = c."userId"
-                WHERE c."textId" = tm.id
-                ORDER BY c."claimedAt" DESC, c.id DESC
-                LIMIT 1
-              ) AS "claimedBy",
-              (
-                SELECT c."claimedAt"
-                FROM text_claims c
-                WHERE c."textId" = tm.id
-                ORDER BY c."claimedAt" DESC, c.id DESC
-                LIMIT 1
-              ) AS "claimedAt",
-              EXISTS (
-                SELECT 1
-                FROM text_claims c
-                WHERE c."textId" = tm.id
-              ) AS "isClaimed"
+              lc."claimId" AS "claimId",
+              lcu.username AS "claimedBy",
+              lc."claimedAt" AS "claimedAt",
+              lc."textId" IS NOT NULL AS "isClaimed"
             FROM text_main tm
-            {where_clause}
+            LEFT JOIN text_latest_claim lc ON lc."textId" = tm.id
+            LEFT JOIN users lcu ON lcu.id = lc."userId"
+            {page_where_clause}
             ORDER BY tm."uptTime" DESC, tm.id DESC
             LIMIT %s OFFSET %s
             """,
-            tuple([max_text_length, max_text_length, max_text_length, max_text_length] + params + [effective_page_size, offset]),
+            tuple([max_text_length, max_text_length, max_text_length, max_text_length] + page_params + [fetch_size, offset]),
         )
         items = cursor.fetchall()
         for item in items:
             item["isClaimed"] = bool(item["isClaimed"])
 
+    if keyset_mode:
+        data = _build_keyset_page(items, effective_page_size, total, total_mode, "texts", ("uptTime", "id"))
+        logger.info(
+            "list_texts complete: mode=cursor total={} pageSize={} hasMore={} userId={}",
+            total,
+            effective_page_size,
+            data["hasMore"],
+            user["userId"],
+        )
+        return success_response(data)
+
     logger.info("list_texts complete: total={} page={} pageSize={} userId={}", total, page, effective_page_size, user["userId"])
     return success_response(
         {
@@ -471,21 +525,25 @@ def list_parent_texts(
     claimed: Optional[bool] = None,
     page: int = 1,
     pageSize: Optional[int] = Query(default=None, alias="pageSize"),
+    cursorRaw: Optional[str] = Query(default=None, alias="cursor"),
+    totalModeRaw: Optional[str] = Query(default=None, alias="totalMode"),
     user: Dict[str, Any] = Depends(require_auth),
 ):
-    """获取父级主文本列表（仅 part=1），支持筛选与分页。"""
+    """获取父级主文本列表（仅 part=1），支持筛选与分页；cursor 用法同 list_texts。"""
     config = get_config()
     pagination = config["pagination"]
     default_page_size = pagination["default_page_size"]
     max_page_size = pagination["max_page_size"]
     source_match_mode = _parse_text_match_mode(sourceMatchModeRaw, "sourceMatchMode")
     translated_match_mode = _parse_text_match_mode(translatedMatchModeRaw, "translatedMatchMode")
+    keyset_mode = cursorRaw is not None
+    total_mode = _parse_total_mode(totalModeRaw, keyset_mode)
 
     effective_page_size = pageSize if pageSize is not None else default_page_size
     if effective_page_size > max_page_size:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="pageSize 超出最大限制")
 
-    offset = _apply_pagination(page, effective_page_size)
+    offset = 0 if keyset_mode else _apply_pagination(page, effective_page_size)
 
     conditions: List[str] = []
     params: List[Any] = []
@@ -501,7 +559,7 @@ def list_parent_texts(
         conditions.append("tm.status = %s")
         params.append(status_filter)
     if sourceKeyword is not None:
-        condition_sql, condition_param = _build_text_match_clause('tmx."sourceText"', sourceKeyword, source_match_mode)
+        condition_sql, condition_params = _build_text_match_clause('tmx."sourceText"', sourceKeyword, source_match_mode)
         conditions.append(
             f"""
             EXISTS (
@@ -512,9 +570,9 @@ def list_parent_texts(
             )
             """
         )
-        params.append(condition_param)
+        params.extend(condition_params)
     if translatedKeyword is not None:
-        condition_sql, condition_param = _build_text_match_clause(
+        condition_sql, condition_params = _build_text_match_clause(
             'tmx."translatedText"', translatedKeyword, translated_match_mode
         )
         conditions.append(
@@ -527,7 +585,7 @@ def list_parent_texts(
             )
             """
         )
-        params.append(condition_param)
+        params.extend(condition_params)
     if updatedFrom is not None:
         conditions.append('tm."uptTime" >= %s')
         params.append(updatedFrom)
@@ -537,37 +595,37 @@ def list_parent_texts(
     if claimer is not None:
         conditions.append(
             """
-            (
-              SELECT u.username
-              FROM text_claims c
-              JOIN users u ON u.id = c."userId"
-              WHERE c."textId" = tm.id
-              ORDER BY c."claimedAt" DESC, c.id DESC
-              LIMIT 1
-            ) LIKE %s
+            tm.id IN (
+              SELECT lc."textId"
+              FROM text_latest_claim lc
+              JOIN users u ON u.id = lc."userId"
+              WHERE u.username LIKE %s
+            )
             """
         )
         params.append(f"%{claimer}%")
     if claimed is True:
-        conditions.append('EXISTS (SELECT 1 FROM text_claims c WHERE c."textId" = tm.id)')
+        conditions.append('EXISTS (SELECT 1 FROM text_latest_claim lc WHERE lc."textId" = tm.id)')
     if claimed is False:
-        conditions.append('NOT EXISTS (SELECT 1 FROM text_claims c WHERE c."textId" = tm.id)')
+        conditions.append('NOT EXISTS (SELECT 1 FROM text_latest_claim lc WHERE lc."textId" = tm.id)')
 
     where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
     _log_text_filters("list_parent_texts", source_match_mode, translated_match_mode, where_clause, params)
 
     max_text_length = config["text_list"]["max_text_length"]
-
-    with db_cursor() as cursor:
-        cursor.execute(
-            f"""
-            SELECT COUNT(*) AS total
-            FROM text_main tm
-            {where_clause}
-            """,
-            tuple(params),
-        )
-        total = cursor.fetchone()["total"]
+    page_where_clause = where_clause
+    page_params = list(params)
+    order_sql = 'tm."uptTime" DESC'
+    if keyset_mode:
+        order_sql = 'tm."uptTime" DESC, tm.id DESC'
+        if cursorRaw:
+            seek_sql, seek_params = _build_upt_time_seek(_decode_cursor(cursorRaw, "parents"))
+            page_where_clause = _append_where(where_clause, seek_sql)
+            page_params.extend(seek_params)
+    fetch_size = effective_page_size + 1 if keyset_mode else effective_page_size
+
+    with db_read_cursor(user["userId"]) as cursor:
+        total = resolve_total(cursor, total_mode, SCOPE_TEXTS, "text_main tm", where_clause, params)
 
         cursor.execute(
             f"""
@@ -589,44 +647,34 @@ def list_parent_texts(
               tm."editCount" AS "editCount",
               tm."uptTime" AS "uptTime",
               tm."crtTime" AS "crtTime",
-              (
-                SELECT c.id
-                FROM text_claims c
-                WHERE c."textId" = tm.id
-                ORDER BY c."claimedAt" DESC, c.id DESC
-                LIMIT 1
-              ) AS "claimId",
-              (
-                SELECT u.username
-                FROM text_claims c
-                JOIN users u ON u.id = c."userId"
-                WHERE c."textId" = tm.id
-                ORDER BY c."claimedAt" DESC, c.id DESC
-                LIMIT 1
-              ) AS "claimedBy",
-              (
-                SELECT c."claimedAt"
-                FROM text_claims c
-                WHERE c."textId" = tm.id
-                ORDER BY c."claimedAt" DESC, c.id DESC
-                LIMIT 1
-              ) AS "claimedAt",
-              EXISTS (
-                SELECT 1
-                FROM text_claims c
-                WHERE c."textId" = tm.id
-              ) AS "isClaimed"
+              lc."claimId" AS "claimId",
+              lcu.username AS "claimedBy",
+              lc."claimedAt" AS "claimedAt",
+              lc."textId" IS NOT NULL AS "isClaimed"
             FROM text_main tm
-            {where_clause}
-            ORDER BY tm."uptTime" DESC
+            LEFT JOIN text_latest_claim lc ON lc."textId" = tm.id
+            LEFT JOIN users lcu ON lcu.id = lc."userId"
+            {page_where_clause}
+            ORDER BY {order_sql}
             LIMIT %s OFFSET %s
             """,
-            tuple([max_text_length, max_text_length, max_text_length, max_text_length] + params + [effective_page_size, offset]),
+            tuple([max_text_length, max_text_length, max_text_length, max_text_length] + page_params + [fetch_size, offset]),
         )
         items = cursor.fetchall()
         for item in items:
             item["isClaimed"] = bool(item["isClaimed"])
 
+    if keyset_mode:
+        data = _build_keyset_page(items, effective_page_size, total, total_mode, "parents", ("uptTime", "id"))
+        logger.info(
+            "list_parent_texts complete: mode=cursor total={} pageSize={} hasMore={} userId={}",
+            total,
+            effective_page_size,
+            data["hasMore"],
+            user["userId"],
+        )
+        return success_response(data)
+
     logger.info("list_parent_texts complete: total={} page={} pageSize={} userId={}", total, page, effective_page_size, user["userId"])
     return success_response(
         {
@@ -648,9 +696,11 @@ def list_child_texts(
     translatedMatchModeRaw: Optional[str] = Query(default=None, alias="translatedMatchMode"),
     page: int = 1,
     pageSize: Optional[int] = Query(default=None, alias="pageSize"),
+    cursorRaw: Optional[str] = Query(default=None, alias="cursor"),
+    totalModeRaw: Optional[str] = Query(default=None, alias="totalMode"),
     user: Dict[str, Any] = Depends(require_auth),
 ):
-    """获取指定 fid 的子列表（默认排除 part=1），支持筛选与分页。"""
+    """获取指定 fid 的子列表（默认排除 part=1），支持筛选与分页；cursor 模式按 (part, id) 翻页。"""
     logger.info("list_child_texts start: fid={} textId={} page={} pageSize={} userId={}", fid, textId, page, pageSize, user["userId"])
     config = get_config()
     pagination = config["pagination"]
@@ -658,12 +708,14 @@ def list_child_texts(
     max_page_size = pagination["max_page_size"]
     source_match_mode = _parse_text_match_mode(sourceMatchModeRaw, "sourceMatchMode")
     translated_match_mode = _parse_text_match_mode(translatedMatchModeRaw, "translatedMatchMode")
+    keyset_mode = cursorRaw is not None
+    total_mode = _parse_total_mode(totalModeRaw, keyset_mode)
 
     effective_page_size = pageSize if pageSize is not None else default_page_size
     if effective_page_size > max_page_size:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="pageSize 超出最大限制")
 
-    offset = _apply_pagination(page, effective_page_size)
+    offset = 0 if keyset_mode else _apply_pagination(page, effective_page_size)
 
     params: List[Any] = [fid]
     where_clause = "WHERE tm.fid = %s AND tm.part <> 1"
@@ -671,28 +723,30 @@ def list_child_texts(
         where_clause += ' AND tm."textId" LIKE %s'
         params.append(f"{textId}%")
     if sourceKeyword is not None:
-        condition_sql, condition_param = _build_text_match_clause('tm."sourceText"', sourceKeyword, source_match_mode)
+        condition_sql, condition_params = _build_text_match_clause('tm."sourceText"', sourceKeyword, source_match_mode)
         where_clause += f" AND {condition_sql}"
-        params.append(condition_param)
+        params.extend(condition_params)
     if translatedKeyword is not None:
-        condition_sql, condition_param = _build_text_match_clause(
+        condition_sql, condition_params = _build_text_match_clause(
             'tm."translatedText"', translatedKeyword, translated_match_mode
         )
         where_clause += f" AND {condition_sql}"
-        params.append(condition_param)
+        params.extend(condition_params)
 
     max_text_length = config["text_list"]["max_text_length"]
-
-    with db_cursor() as cursor:
-        cursor.execute(
-            f"""
-            SELECT COUNT(*) AS total
-            FROM text_main tm
-            {where_clause}
-            """,
-            tuple(params),
-        )
-        total = cursor.fetchone()["total"]
+    page_where_clause = where_clause
+    page_params = list(params)
+    order_sql = "tm.part ASC"
+    if keyset_mode:
+        order_sql = "tm.part ASC, tm.id ASC"
+        if cursorRaw:
+            seek_sql, seek_params = _build_part_seek(_decode_cursor(cursorRaw, "children"))
+            page_where_clause = _append_where(where_clause, seek_sql)
+            page_params.extend(seek_params)
+    fetch_size = effective_page_size + 1 if keyset_mode else effective_page_size
+
+    with db_read_cursor(user["userId"]) as cursor:
+        total = resolve_total(cursor, total_mode, SCOPE_TEXTS, "text_main tm", where_clause, params)
 
         cursor.execute(
             f"""
@@ -714,44 +768,35 @@ def list_child_texts(
               tm."editCount" AS "editCount",
               tm."uptTime" AS "uptTime",
               tm."crtTime" AS "crtTime",
-              (
-                SELECT c.id
-                FROM text_claims c
-                WHERE c."textId" = tm.id
-                ORDER BY c."claimedAt" DESC, c.id DESC
-                LIMIT 1
-              ) AS "claimId",
-              (
-                SELECT u.username
-                FROM text_claims c
-                JOIN users u ON u.id = c."userId"
-                WHERE c."textId" = tm.id
-                ORDER BY c."claimedAt" DESC, c.id DESC
-                LIMIT 1
-              ) AS "claimedBy",
-              (
-                SELECT c."claimedAt"
-                FROM text_claims c
-                WHERE c."textId" = tm.id
-                ORDER BY c."claimedAt" DESC, c.id DESC
-                LIMIT 1
-              ) AS "claimedAt",
-              EXISTS (
-                SELECT 1
-                FROM text_claims c
-                WHERE c."textId" = tm.id
-              ) AS "isClaimed"
+              lc."claimId" AS "claimId",
+              lcu.username AS "claimedBy",
+              lc."claimedAt" AS "claimedAt",
+              lc."textId" IS NOT NULL AS "isClaimed"
             FROM text_main tm
-            {where_clause}
-            ORDER BY tm.part ASC
+            LEFT JOIN text_latest_claim lc ON lc."textId" = tm.id
+            LEFT JOIN users lcu ON lcu.id = lc."userId"
+            {page_where_clause}
+            ORDER BY {order_sql}
             LIMIT %s OFFSET %s
             """,
-            tuple([max_text_length, max_text_length, max_text_length, max_text_length] + params + [effective_page_size, offset]),
+            tuple([max_text_length, max_text_length, max_text_length, max_text_length] + page_params + [fetch_size, offset]),
         )
         items = cursor.fetchall()
         for item in items:
             item["isClaimed"] = bool(item["isClaimed"])
 
+    if keyset_mode:
+        data = _build_keyset_page(items, effective_page_size, total, total_mode, "children", ("part", "id"))
+        logger.info(
+            "list_child_texts complete: mode=cursor fid={} total={} pageSize={} hasMore={} userId={}",
+            fid,
+            total,
+            effective_page_size,
+            data["hasMore"],
+            user["userId"],
+        )
+        return success_response(data)
+
     logger.info("list_child_texts complete: fid={} total={} page={} pageSize={} userId={}", fid, total, page, effective_page_size, user["userId"])
     return success_response(
         {
@@ -795,7 +840,7 @@ def download_texts(
     updatedTo: Optional[str] = None,
     claimer: Optional[str] = None,
     claimed: Optional[bool] = None,
-    _: Dict[str, Any] = Depends(require_auth),
+    user: Dict[str, Any] = Depends(require_auth),
 ):
     """根据筛选条件导出文本数据（流式 + 低内存）。"""
     request_started_at = perf_counter()
@@ -857,7 +902,7 @@ def download_texts(
     try:
         db_read_started_at = perf_counter()
         logger.info("download_texts stage=db_stream start")
-        with db_stream_cursor() as cursor:
+        with db_read_stream_cursor(user["userId"]) as cursor:
             cursor.execute(
                 f"""
                 SELECT
@@ -949,6 +994,7 @@ def download_texts(
             _cleanup_temp_file(tmp_path)
         raise
     workbook.close()
+    record_export_rows("texts", fetched_row_count)
 
     export_name = f"text_export_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx"
     logger.info(
@@ -968,8 +1014,46 @@ def download_texts(
     )
 
 
+def _serve_cached_package(request: Request, request_started_at: float):
+    max_download_rows = get_config()["text_import_export"]["max_download_rows"]
+    artifact = get_package_artifact()
+    if artifact.fid_count == 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="当前筛选条件无可导出数据")
+    if artifact.fid_count > max_download_rows:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"导出数据量超过限制（{max_download_rows}），请缩小筛选范围后重试",
+        )
+
+    etag = f'"{artifact.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None and etag in {item.strip() for item in if_none_match.split(",")}:
+        logger.info(
+            "download_package done: mode=cache notModified=true etag={} totalElapsedSec={:.3f}",
+            artifact.etag,
+            perf_counter() - request_started_at,
+        )
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    logger.info(
+        "download_package done: mode=cache etag={} fidRows={} builtAt={} totalElapsedSec={:.3f}",
+        artifact.etag,
+        artifact.fid_count,
+        artifact.built_at,
+        perf_counter() - request_started_at,
+    )
+    return FileResponse(
+        path=artifact.xlsx_path,
+        filename="text_work.xlsx",
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers=headers,
+    )
+
+
 @router.get("/download-package")
 def download_package(
+    request: Request,
     fid: Optional[str] = None,
     status_filter: Optional[int] = Query(default=None, alias="status"),
     sourceKeyword: Optional[str] = None,
@@ -980,11 +1064,12 @@ def download_package(
     updatedTo: Optional[str] = None,
     claimer: Optional[str] = None,
     claimed: Optional[bool] = None,
-    _: Dict[str, Any] = Depends(require_auth),
+    user: Dict[str, Any] = Depends(require_auth),
 ):
     """下载汉化包：按 fid + part 顺序流式读取，Python 端按 fid 增量合并。
     translation 超过单元格字符限制时按 segment 边界自动分行，不截断任何 segment。
-    使用进程内信号量避免并发导出拖垮系统。
+    无筛选条件时直接返回预构建的全量产物（支持 ETag/If-None-Match）；
+    带筛选条件时现场生成，并使用进程内信号量避免并发导出拖垮系统。
     """
     request_started_at = perf_counter()
     logger.info(
@@ -1000,6 +1085,12 @@ def download_package(
     )
     source_match_mode = _parse_text_match_mode(sourceMatchModeRaw, "sourceMatchMode")
     translated_match_mode = _parse_text_match_mode(translatedMatchModeRaw, "translatedMatchMode")
+    unfiltered = all(
+        item is None
+        for item in (fid, status_filter, sourceKeyword, translatedKeyword, updatedFrom, updatedTo, claimer, claimed)
+    )
+    if unfiltered and get_config()["text_import_export"]["package_cache_enabled"]:
+        return _serve_cached_package(request, request_started_at)
     if not _package_download_lock.acquire(blocking=False):
         logger.warning(
             "download_package rejected: semaphore busy elapsedSec={:.3f}",
@@ -1067,17 +1158,11 @@ def download_package(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail=f"导出数据量超过限制（{max_download_rows}），请缩小筛选范围后重试",
                     )
-                translation = "|||".join(current_segments)
-                if len(translation) > _EXCEL_CELL_CHAR_LIMIT:
-                    logger.warning(f"fid={current_fid} translation 超过 Excel 单元格字符上限，按 segment 边界分行")
-                    for split_row in _split_translation_into_rows(current_fid, translation):
-                        sheet.append(split_row)
-                else:
-                    sheet.append([current_fid, translation])
+                append_package_row(sheet, current_fid, "|||".join(current_segments))
                 current_fid = None
                 current_segments = []
 
-            with db_stream_cursor() as cursor:
+            with db_read_stream_cursor(user["userId"]) as cursor:
                 db_read_started_at = perf_counter()
                 logger.info("download_package stage=db_stream start")
                 cursor.execute(
@@ -1108,13 +1193,9 @@ def download_package(
                             flush_current_fid()
                             current_fid = row_fid
 
-                        source_text = row["sourceText"] or ""
-                        translated_text = row["translatedText"] or source_text
-                        text_id = str(row["textId"])
-                        if ":::" in text_id:
-                            current_segments.append(f"{text_id}:::[{translated_text}]")
-                        else:
-                            current_segments.append(f"{text_id}::::::[{translated_text}]")
+                        current_segments.append(
+                            format_package_segment(row["textId"], row["sourceText"], row["translatedText"])
+                        )
                     if batch_count == 1 or batch_count % download_progress_log_every_batches == 0:
                         logger.info(
                             "download_package stage=db_stream progress: batch={} batchRows={} fetchedPartRows={} flushedFidRows={} elapsedSec={:.3f}",
@@ -1168,6 +1249,7 @@ def download_package(
                 _cleanup_temp_file(tmp_path)
             raise
         workbook.close()
+        record_export_rows("package", fetched_part_rows)
     finally:
         _package_download_lock.release()
         logger.info(
@@ -1191,6 +1273,153 @@ def download_package(
     )
 
 
+def _validate_upload_file_name(file_name: str) -> None:
+    if not file_name:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="上传文件缺少文件名")
+    if not file_name.lower().endswith(".xlsx"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="上传文件必须为 .xlsx 格式")
+
+
+def _validate_upload_sheet_header(sheet) -> None:
+    header_rows = list(sheet.iter_rows(min_row=1, max_row=1))
+    if not header_rows:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="上传文件为空")
+    header_values = [cell.value for cell in header_rows[0]]
+    _validate_template_header(header_values)
+
+
+def _parse_upload_row(row: Tuple[Any, ...], row_index: int) -> Optional[Dict[str, Any]]:
+    """解析模板数据行，空行返回 None，字段非法时抛出 HTTPException。"""
+    cells = list(row[: len(TEXT_TEMPLATE_HEADERS)])
+    if len(cells) < len(TEXT_TEMPLATE_HEADERS):
+        cells.extend([None] * (len(TEXT_TEMPLATE_HEADERS) - len(cells)))
+    if all(_is_empty_cell(item) for item in cells):
+        return None
+
+    extra_cells = list(row[len(TEXT_TEMPLATE_HEADERS) :])
+    if any(not _is_empty_cell(item) for item in extra_cells):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"第 {row_index} 行存在模板外数据，请删除多余列",
+        )
+
+    row_id = _parse_required_int(cells[0], "编号", row_index)
+    text_id = _parse_required_str(cells[2], "TextId", row_index)
+    part = _parse_required_int(cells[3], "Part", row_index)
+    if row_id <= 0 or part <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"第 {row_index} 行编号/Part 必须 > 0")
+
+    return {
+        "rowNumber": row_index,
+        "id": row_id,
+        "fid": _parse_required_str(cells[1], "FID", row_index),
+        "textId": text_id,
+        "part": part,
+        "translatedText": _normalize_text(cells[5]),
+        "status": _parse_status(cells[6], row_index),
+    }
+
+
+def _fetch_upload_targets(
+    cursor,
+    parsed_rows: List[Dict[str, Any]],
+    on_batch: Optional[Callable[[int], None]] = None,
+    lock_rows: bool = True,
+) -> Dict[int, Dict[str, Any]]:
+    """分批读取上传涉及的主文本行（lock_rows 时加 FOR UPDATE），返回 id -> 数据库行。"""
+    db_map: Dict[int, Dict[str, Any]] = {}
+    lock_clause = "FOR UPDATE" if lock_rows else ""
+    for offset in range(0, len(parsed_rows), UPLOAD_APPLY_BATCH_SIZE):
+        batch_ids = [item["id"] for item in parsed_rows[offset : offset + UPLOAD_APPLY_BATCH_SIZE]]
+        placeholders = ",".join(["%s"] * len(batch_ids))
+        cursor.execute(
+            f"""
+            SELECT id, fid, "textId" AS "textId", part, "translatedText" AS "translatedText", status
+            FROM text_main
+            WHERE id IN ({placeholders})
+            {lock_clause}
+            """,
+            tuple(batch_ids),
+        )
+        for row in cursor.fetchall():
+            db_map[row["id"]] = row
+        if on_batch is not None:
+            on_batch(len(batch_ids))
+    return db_map
+
+
+def _find_upload_target_errors(
+    parsed_rows: List[Dict[str, Any]],
+    db_map: Dict[int, Dict[str, Any]],
+) -> List[Tuple[int, str]]:
+    """校验编号/FID/TextId/Part 与数据库一致，返回 (行号, 错误信息) 列表。"""
+    errors: List[Tuple[int, str]] = []
+    for item in parsed_rows:
+        db_item = db_map.get(item["id"])
+        if db_item is None:
+            errors.append((item["rowNumber"], f"第 {item['rowNumber']} 行编号不存在: {item['id']}"))
+            continue
+        if db_item["fid"] != item["fid"] or db_item["textId"] != item["textId"] or db_item["part"] != item["part"]:
+            errors.append(
+                (item["rowNumber"], f"第 {item['rowNumber']} 行校验失败: 编号/FID/TextId/Part 与数据库不匹配")
+            )
+    return errors
+
+
+def _select_changed_upload_rows(
+    parsed_rows: List[Dict[str, Any]],
+    db_map: Dict[int, Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    return [
+        item
+        for item in parsed_rows
+        if item["translatedText"] != db_map[item["id"]]["translatedText"] or item["status"] != db_map[item["id"]]["status"]
+    ]
+
+
+def _apply_upload_rows(
+    cursor,
+    changed_rows: List[Dict[str, Any]],
+    db_map: Dict[int, Dict[str, Any]],
+    user_id: int,
+    reason: Optional[str],
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> None:
+    """按批次以集合语句写入译文/状态，并批量追加变更记录。"""
+    for offset in range(0, len(changed_rows), UPLOAD_APPLY_BATCH_SIZE):
+        batch = changed_rows[offset : offset + UPLOAD_APPLY_BATCH_SIZE]
+        case_sql = " ".join(["WHEN %s THEN %s"] * len(batch))
+        placeholders = ",".join(["%s"] * len(batch))
+        translated_params: List[Any] = []
+        status_params: List[Any] = []
+        for item in batch:
+            translated_params.extend([item["id"], item["translatedText"]])
+            status_params.extend([item["id"], item["status"]])
+        cursor.execute(
+            f"""
+            UPDATE text_main
+            SET "translatedText" = CASE id {case_sql} END,
+                status = CASE id {case_sql} END,
+                "editCount" = "editCount" + 1,
+                "uptTime" = NOW()
+            WHERE id IN ({placeholders})
+            """,
+            tuple(translated_params + status_params + [item["id"] for item in batch]),
+        )
+        cursor.executemany(
+            """
+            INSERT INTO text_changes ("textId", "userId", "beforeText", "afterText", reason)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            [
+                (item["id"], user_id, db_map[item["id"]]["translatedText"] or "", item["translatedText"] or "", reason)
+                for item in batch
+            ],
+        )
+        if on_batch is not None:
+            on_batch(len(batch))
+
+
 @router.post("/upload")
 async def upload_text_template(
     request: Request,
@@ -1200,56 +1429,23 @@ async def upload_text_template(
 ):
     """按模板上传翻译结果并覆盖译文与状态。"""
     logger.info(f"Upload start: fileName={fileName} userId={user['userId']} reason={reason}")
-    if not fileName:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="上传文件缺少文件名")
-    if not fileName.lower().endswith(".xlsx"):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="上传文件必须为 .xlsx 格式")
+    _validate_upload_file_name(fileName)
 
     config = get_config()
     text_import_export = config["text_import_export"]
     max_upload_rows = text_import_export["max_upload_rows"]
 
+    request_started_at = perf_counter()
     file_bytes = await request.body()
     sheet = _load_upload_sheet(file_bytes)
 
-    header_rows = list(sheet.iter_rows(min_row=1, max_row=1))
-    if not header_rows:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="上传文件为空")
-    header_values = [cell.value for cell in header_rows[0]]
-    _validate_template_header(header_values)
+    _validate_upload_sheet_header(sheet)
 
     parsed_rows: List[Dict[str, Any]] = []
     for row_index, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-        cells = list(row[: len(TEXT_TEMPLATE_HEADERS)])
-        if len(cells) < len(TEXT_TEMPLATE_HEADERS):
-            cells.extend([None] * (len(TEXT_TEMPLATE_HEADERS) - len(cells)))
-        if all(_is_empty_cell(item) for item in cells):
-            continue
-
-        extra_cells = list(row[len(TEXT_TEMPLATE_HEADERS) :])
-        if any(not _is_empty_cell(item) for item in extra_cells):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"第 {row_index} 行存在模板外数据，请删除多余列",
-            )
-
-        row_id = _parse_required_int(cells[0], "编号", row_index)
-        text_id = _parse_required_str(cells[2], "TextId", row_index)
-        part = _parse_required_int(cells[3], "Part", row_index)
-        if row_id <= 0 or part <= 0:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"第 {row_index} 行编号/Part 必须 > 0")
-
-        parsed_rows.append(
-            {
-                "rowNumber": row_index,
-                "id": row_id,
-                "fid": _parse_required_str(cells[1], "FID", row_index),
-                "textId": text_id,
-                "part": part,
-                "translatedText": _normalize_text(cells[5]),
-                "status": _parse_status(cells[6], row_index),
-            }
-        )
+        item = _parse_upload_row(row, row_index)
+        if item is not None:
+            parsed_rows.append(item)
 
     if not parsed_rows:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="上传文件没有可处理的数据行")
@@ -1264,53 +1460,210 @@ async def upload_text_template(
     if len(set(ids)) != len(ids):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="上传文件存在重复编号")
 
-    placeholders = ",".join(["%s"] * len(ids))
+    logger.info(
+        "upload_texts stage=parse done: rows={} stageElapsedSec={:.3f}",
+        len(parsed_rows),
+        perf_counter() - request_started_at,
+    )
+
     with db_cursor() as cursor:
-        cursor.execute(
-            f"""
-            SELECT id, fid, "textId" AS "textId", part, "translatedText" AS "translatedText"
-            FROM text_main
-            WHERE id IN ({placeholders})
-            """,
-            tuple(ids),
+        validate_started_at = perf_counter()
+        db_map = _fetch_upload_targets(cursor, parsed_rows)
+        target_errors = _find_upload_target_errors(parsed_rows, db_map)
+        if target_errors:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=target_errors[0][1])
+        changed_rows = _select_changed_upload_rows(parsed_rows, db_map)
+        logger.info(
+            "upload_texts stage=validate done: rows={} changedRows={} stageElapsedSec={:.3f}",
+            len(parsed_rows),
+            len(changed_rows),
+            perf_counter() - validate_started_at,
         )
-        db_rows = cursor.fetchall()
-        db_map = {item["id"]: item for item in db_rows}
-
-        for item in parsed_rows:
-            db_item = db_map.get(item["id"])
-            if db_item is None:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"第 {item['rowNumber']} 行编号不存在: {item['id']}",
-                )
-            if db_item["fid"] != item["fid"] or db_item["textId"] != item["textId"] or db_item["part"] != item["part"]:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"第 {item['rowNumber']} 行校验失败: 编号/FID/TextId/Part 与数据库不匹配",
-                )
 
-        for item in parsed_rows:
-            db_item = db_map[item["id"]]
-            before_text = db_item["translatedText"] or ""
-            cursor.execute(
-                """
-                UPDATE text_main
-                SET "translatedText" = %s, status = %s, "editCount" = "editCount" + 1, "uptTime" = NOW()
-                WHERE id = %s
-                """,
-                (item["translatedText"], item["status"], item["id"]),
-            )
-            cursor.execute(
-                """
-                INSERT INTO text_changes ("textId", "userId", "beforeText", "afterText", reason)
-                VALUES (%s, %s, %s, %s, %s)
-                """,
-                (item["id"], user["userId"], before_text, item["translatedText"] or "", reason),
+        apply_started_at = perf_counter()
+        _apply_upload_rows(cursor, changed_rows, db_map, user["userId"], reason)
+        corrected = dictionary_correction.apply_inline_corrections(
+            cursor, [(item["id"], item["translatedText"]) for item in changed_rows]
+        )
+        logger.info(
+            "upload_texts stage=apply done: updatedRows={} correctedRows={} stageElapsedSec={:.3f}",
+            len(changed_rows),
+            len(corrected),
+            perf_counter() - apply_started_at,
+        )
+    mark_user_write(user["userId"])
+    bump_generation(SCOPE_TEXTS, SCOPE_CORRECTION_LOGS)
+    if changed_rows:
+        bump_text_main_generation()
+
+    skipped_count = len(parsed_rows) - len(changed_rows)
+    logger.info(
+        "Upload complete: fileName={} updatedCount={} skippedCount={} totalElapsedSec={:.3f} userId={}",
+        fileName,
+        len(changed_rows),
+        skipped_count,
+        perf_counter() - request_started_at,
+        user["userId"],
+    )
+    return success_response(
+        {"updatedCount": len(changed_rows), "skippedCount": skipped_count, "correctedCount": len(corrected)}
+    )
+
+
+def _run_upload_job(job: UploadJob) -> Optional[str]:
+    """后台执行上传任务：解析 -> 校验（只读）-> 分块写入；返回失败原因，成功返回 None。
+
+    写入按 upload_job_apply_chunk_rows 分块，每块单独加锁并提交，避免长时间锁住译者正在编辑的行；
+    因此超过一块的任务在写入中途失败时，此前已提交的块不会回滚（快照中 partialApply/appliedRows）。
+    """
+    config = get_config()["text_import_export"]
+    max_rows = config["upload_job_max_rows"]
+    chunk_rows = config["upload_job_apply_chunk_rows"]
+    try:
+        sheet = _open_upload_sheet(job.file_path)
+        _validate_upload_sheet_header(sheet)
+    except HTTPException as error:
+        return str(error.detail)
+
+    job.set_phase("parse", max(int(sheet.max_row or 1) - 1, 0))
+    parsed_rows: List[Dict[str, Any]] = []
+    first_row_by_id: Dict[int, int] = {}
+    for row_index, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
+        job.advance(1)
+        try:
+            item = _parse_upload_row(row, row_index)
+        except HTTPException as error:
+            job.add_error(row_index, str(error.detail))
+            continue
+        if item is None:
+            continue
+        first_row = first_row_by_id.get(item["id"])
+        if first_row is not None:
+            job.add_error(row_index, f"第 {row_index} 行编号重复: {item['id']}（首次出现在第 {first_row} 行）")
+            continue
+        first_row_by_id[item["id"]] = row_index
+        parsed_rows.append(item)
+        if len(parsed_rows) > max_rows:
+            return f"上传行数超限，最大允许 {max_rows} 行"
+
+    if job.error_count:
+        return f"上传文件存在 {job.error_count} 处错误，未写入任何数据"
+    if not parsed_rows:
+        return "上传文件没有可处理的数据行"
+
+    # 校验阶段不加锁，只读；写入阶段逐块加锁时再复核
+    with db_cursor() as cursor:
+        job.set_phase("validate", len(parsed_rows))
+        db_map = _fetch_upload_targets(cursor, parsed_rows, on_batch=job.advance, lock_rows=False)
+    for row_number, message in _find_upload_target_errors(parsed_rows, db_map):
+        job.add_error(row_number, message)
+    if job.error_count:
+        return f"上传文件存在 {job.error_count} 处错误，未写入任何数据"
+
+    job.set_phase("apply", len(parsed_rows))
+    with job.lock:
+        job.partial_apply = len(parsed_rows) > chunk_rows
+    for offset in range(0, len(parsed_rows), chunk_rows):
+        chunk = parsed_rows[offset : offset + chunk_rows]
+        try:
+            with db_cursor() as cursor:
+                chunk_map = _fetch_upload_targets(cursor, chunk)
+                chunk_errors = _find_upload_target_errors(chunk, chunk_map)
+                if chunk_errors:
+                    for row_number, message in chunk_errors:
+                        job.add_error(row_number, message)
+                    changed_rows: List[Dict[str, Any]] = []
+                    corrected: List[Any] = []
+                else:
+                    changed_rows = _select_changed_upload_rows(chunk, chunk_map)
+                    _apply_upload_rows(cursor, changed_rows, chunk_map, job.user_id, job.reason)
+                    corrected = dictionary_correction.apply_inline_corrections(
+                        cursor, [(item["id"], item["translatedText"]) for item in changed_rows]
+                    )
+        except Exception as error:
+            logger.exception("upload job apply failed: jobId={} offset={} error={}", job.id, offset, error)
+            return f"写入失败: {error}；已提交 {job.applied_rows} 行，之前提交的分块不会回滚"
+        if chunk_errors:
+            return (
+                f"写入阶段复核发现 {len(chunk_errors)} 处错误（数据已被并发修改），"
+                f"已提交 {job.applied_rows} 行，之前提交的分块不会回滚"
             )
 
-    logger.info(f"Upload complete: fileName={fileName} updatedCount={len(parsed_rows)} userId={user['userId']}")
-    return success_response({"updatedCount": len(parsed_rows)})
+        mark_user_write(job.user_id)
+        bump_generation(SCOPE_TEXTS, SCOPE_CORRECTION_LOGS)
+        if changed_rows:
+            bump_text_main_generation()
+        with job.lock:
+            job.updated_count += len(changed_rows)
+            job.skipped_count += len(chunk) - len(changed_rows)
+            job.corrected_count += len(corrected)
+            job.applied_rows += len(chunk)
+            job.processed_rows += len(chunk)
+
+    with job.lock:
+        job.phase = "done"
+    return None
+
+
+@router.post("/upload-jobs")
+async def create_upload_job(
+    request: Request,
+    fileName: str = Query(..., alias="fileName"),
+    reason: Optional[str] = Query(default=None, alias="reason"),
+    user: Dict[str, Any] = Depends(require_auth),
+):
+    """创建异步上传任务：请求体流式落盘后交由后台线程池解析写入。"""
+    logger.info(f"Upload job create: fileName={fileName} userId={user['userId']} reason={reason}")
+    _validate_upload_file_name(fileName)
+
+    text_import_export = get_config()["text_import_export"]
+    max_bytes = text_import_export["upload_job_max_bytes"]
+    tmp_file = NamedTemporaryFile(
+        prefix="tmp_text_upload_",
+        suffix=".xlsx",
+        dir=text_import_export["upload_temp_dir"],
+        delete=False,
+    )
+    tmp_path = tmp_file.name
+    received_bytes = 0
+    try:
+        with tmp_file:
+            async for chunk in request.stream():
+                received_bytes += len(chunk)
+                if received_bytes > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"上传文件超过大小限制（{max_bytes} 字节）",
+                    )
+                # 写盘放到线程池，避免阻塞事件循环
+                await run_in_threadpool(tmp_file.write, chunk)
+        if received_bytes == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="上传文件为空")
+        try:
+            job = submit_upload_job(user["userId"], fileName, reason, tmp_path, _run_upload_job)
+        except UploadJobLimitError as error:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(error)) from error
+    except BaseException:
+        _cleanup_temp_file(tmp_path)
+        raise
+
+    logger.info(
+        "Upload job queued: jobId={} fileName={} bytes={} userId={}",
+        job.id,
+        fileName,
+        received_bytes,
+        user["userId"],
+    )
+    return success_response(job.snapshot())
+
+
+@router.get("/upload-jobs/{jobId}")
+def get_upload_job_status(jobId: str, user: Dict[str, Any] = Depends(require_auth)):
+    """查询上传任务进度，仅任务创建者可见。"""
+    job = get_upload_job(jobId)
+    if job is None or job.user_id != user["userId"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="上传任务不存在或已过期")
+    return success_response(job.snapshot())
 
 
 @router.get("/by-textid")
@@ -1321,7 +1674,7 @@ def get_text_by_textid(
 ):
     """根据 fid + textId 获取主文本详情。"""
     logger.info("get_text_by_textid start: fid={} textId={} userId={}", fid, textId, user["userId"])
-    with db_cursor() as cursor:
+    with db_read_cursor(user["userId"]) as cursor:
         cursor.execute(
             """
             SELECT
@@ -1395,7 +1748,7 @@ def get_text_by_textid(
 def get_text(textId: int, user: Dict[str, Any] = Depends(require_auth)):
     """获取主文本详情以及认领/锁定信息。"""
     logger.info("get_text start: textId={} userId={}", textId, user["userId"])
-    with db_cursor() as cursor:
+    with db_read_cursor(user["userId"]) as cursor:
         cursor.execute(
             """
             SELECT
@@ -1504,6 +1857,22 @@ def update_translation(
             """,
             (textId, user["userId"], beforeText, request.translatedText, request.reason),
         )
+        corrected = dictionary_correction.apply_inline_corrections(cursor, [(textId, request.translatedText)])
+    mark_user_write(user["userId"])
+    bump_generation(SCOPE_TEXTS, SCOPE_CORRECTION_LOGS)
+    bump_text_main_generation()
 
-    logger.info("Translate complete: textId={} userId={} status={}", textId, user["userId"], 3 if request.isCompleted else 2)
-    return success_response({"id": textId})
+    logger.info(
+        "Translate complete: textId={} userId={} status={} dictionaryCorrected={}",
+        textId,
+        user["userId"],
+        3 if request.isCompleted else 2,
+        textId in corrected,
+    )
+    return success_response(
+        {
+            "id": textId,
+            "translatedText": corrected.get(textId, request.translatedText),
+            "dictionaryCorrected": textId in corrected,
+        }
+    )
@@ -3,8 +3,10 @@ import base64
 import hashlib
 import hmac
 import json
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..config import ConfigError, get_config
 from ..db import db_cursor
@@ -14,6 +16,74 @@ class AuthError(Exception):
     pass
 
 
+class _TtlLruCache:
+    """进程内 TTL + LRU 缓存，记录命中/未命中次数。"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def peek(self, key: Any) -> Optional[Any]:
+        """只读查询：命中计入 hits，未命中不计数（调用方随后会走 get 完整路径）。"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] <= now:
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Any, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        effective_ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if effective_ttl <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + effective_ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def pop_where(self, predicate) -> None:
+        with self._lock:
+            for key in [key for key, (_, value) in self._items.items() if predicate(value)]:
+                del self._items[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+_token_cache: Optional[_TtlLruCache] = None
+_user_cache: Optional[_TtlLruCache] = None
+_cache_init_lock = threading.Lock()
+
+
 def _get_auth_config() -> Dict[str, Any]:
     config = get_config()
     auth_config = config["auth"]
@@ -23,6 +93,19 @@ def _get_auth_config() -> Dict[str, Any]:
     return auth_config
 
 
+def _get_caches() -> Tuple[_TtlLruCache, _TtlLruCache]:
+    global _token_cache, _user_cache
+    if _token_cache is None or _user_cache is None:
+        with _cache_init_lock:
+            if _token_cache is None or _user_cache is None:
+                auth_config = _get_auth_config()
+                max_entries = auth_config["cache_max_entries"]
+                ttl_seconds = auth_config["cache_ttl_seconds"]
+                _token_cache = _TtlLruCache(max_entries, ttl_seconds)
+                _user_cache = _TtlLruCache(max_entries, ttl_seconds)
+    return _token_cache, _user_cache
+
+
 def _hash_password(password: str, salt_hex: str, algorithm: str) -> str:
     try:
         salt_bytes = bytes.fromhex(salt_hex)
@@ -87,6 +170,32 @@ def verify_token(token: str) -> Dict[str, Any]:
     return payload
 
 
+def verify_token_cached(token: str) -> Dict[str, Any]:
+    """带缓存的 token 校验：同一 token 在缓存窗口内只做一次 HMAC 校验，且不会越过 exp。"""
+    token_cache, _ = _get_caches()
+    payload = token_cache.get(token)
+    if payload is not None and int(time.time()) < payload["exp"]:
+        return payload
+    payload = verify_token(token)
+    token_cache.set(token, payload, ttl_seconds=payload["exp"] - time.time())
+    return payload
+
+
+def peek_cached_token(token: str) -> Optional[Dict[str, Any]]:
+    """仅从缓存取已校验的 token payload，不做 HMAC 校验。"""
+    token_cache, _ = _get_caches()
+    payload = token_cache.peek(token)
+    if payload is not None and int(time.time()) < payload["exp"]:
+        return payload
+    return None
+
+
+def peek_cached_user(userId: int) -> Optional[Dict[str, Any]]:
+    """仅从缓存取用户信息，不访问数据库。"""
+    _, user_cache = _get_caches()
+    return user_cache.peek(userId)
+
+
 def authenticate_user(username: str, password: str) -> Dict[str, Any]:
     with db_cursor() as cursor:
         cursor.execute(
@@ -146,9 +255,45 @@ def get_user_by_id(userId: int) -> Optional[Dict[str, Any]]:
         }
 
 
+def get_user_by_id_cached(userId: int) -> Optional[Dict[str, Any]]:
+    _, user_cache = _get_caches()
+    user = user_cache.get(userId)
+    if user is not None:
+        return user
+    user = get_user_by_id(userId)
+    if user is not None:
+        user_cache.set(userId, user)
+    return user
+
+
+def invalidate_token(token: str) -> None:
+    token_cache, _ = _get_caches()
+    token_cache.pop(token)
+
+
+def invalidate_user(userId: int) -> None:
+    """用户信息变更（改名/禁用/删除）后调用，同时清理该用户已缓存的 token。"""
+    token_cache, user_cache = _get_caches()
+    user_cache.pop(userId)
+    token_cache.pop_where(lambda payload: payload.get("sub") == userId)
+
+
+def clear_auth_cache() -> None:
+    token_cache, user_cache = _get_caches()
+    token_cache.clear()
+    user_cache.clear()
+
+
+def get_auth_cache_stats() -> Optional[Dict[str, Any]]:
+    if _token_cache is None or _user_cache is None:
+        return None
+    return {"token": _token_cache.stats(), "user": _user_cache.stats()}
+
+
 def issue_login_response(username: str, password: str) -> Dict[str, Any]:
     auth_config = _get_auth_config()
     user = authenticate_user(username, password)
+    invalidate_user(user["id"])
     now = int(time.time())
     payload = {
         "sub": user["id"],
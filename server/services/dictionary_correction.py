@@ -2,13 +2,19 @@
 from __future__ import annotations
 
 import json
+import threading
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from time import monotonic
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 from loguru import logger
 
+from ..config import get_config
 from ..db import db_cursor, get_raw_connection
+from .dictionary_matcher import CompiledCorrectionIndex, CorrectionRule
+from .list_totals import SCOPE_CORRECTION_LOGS, SCOPE_TEXTS, bump_generation
+from .package_export import bump_text_main_generation
 
 SYSTEM_USERNAME = "SYSTEM"
 
@@ -18,6 +24,11 @@ CORRECTION_STATUS_RUNNING = 2
 CORRECTION_STATUS_DONE = 3
 CORRECTION_STATUS_FAILED = 4
 
+UNCHANGED_REASON = "替换后文本未变化"
+TEXT_MISSING_REASON = "文本已不存在，本次未纠错"
+
+INLINE_CORRECTION_BATCH_SIZE = 500
+
 
 @dataclass
 class CorrectionResult:
@@ -112,21 +123,36 @@ def get_system_user_id() -> int:
 
 
 def fetch_pending_dictionary_ids(limit: int) -> List[int]:
+    """取待纠错条目；包含进程中断后残留的纠错中条目，由进度续跑。"""
     with db_cursor() as cursor:
         cursor.execute(
             """
             SELECT id
             FROM dictionary_entries
-            WHERE "correctionStatus" IN (%s, %s)
+            WHERE "correctionStatus" IN (%s, %s, %s)
               AND "correctionVersion" > "appliedCorrectionVersion"
             ORDER BY "uptTime" ASC, id ASC
             LIMIT %s
             """,
-            (CORRECTION_STATUS_PENDING, CORRECTION_STATUS_FAILED, limit),
+            (CORRECTION_STATUS_PENDING, CORRECTION_STATUS_RUNNING, CORRECTION_STATUS_FAILED, limit),
         )
         return [int(row["id"]) for row in cursor.fetchall()]
 
 
+def count_pending_dictionary_entries() -> int:
+    with db_cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT COUNT(*) AS "pendingCount"
+            FROM dictionary_entries
+            WHERE "correctionStatus" IN (%s, %s, %s)
+              AND "correctionVersion" > "appliedCorrectionVersion"
+            """,
+            (CORRECTION_STATUS_PENDING, CORRECTION_STATUS_RUNNING, CORRECTION_STATUS_FAILED),
+        )
+        return int(cursor.fetchone()["pendingCount"])
+
+
 def acquire_correction_lock(lock_name: str):
     connection = get_raw_connection()
     try:
@@ -150,114 +176,115 @@ def release_correction_lock(lock_name: str, connection) -> None:
         connection.close()
 
 
-def _count_non_overlapping_occurrences(text: str, needle: str) -> int:
-    if not text or not needle:
-        return 0
-    count = 0
-    start = 0
-    while True:
-        match_index = text.find(needle, start)
-        if match_index < 0:
-            return count
-        count += 1
-        start = match_index + len(needle)
-
-
-def _analyze_and_replace_variants(text: Optional[str], variants: List[str], term_value: str) -> TextCorrectionAnalysis:
-    source_text = text or ""
-    if not source_text:
-        return TextCorrectionAnalysis(source_match_count=0, translated_match_count=0, after_text="")
-
-    sorted_variants = sorted(variants, key=len, reverse=True)
-    translated_match_count = 0
-    result_parts: List[str] = []
-    cursor = 0
-    text_length = len(source_text)
-
-    while cursor < text_length:
-        matched_variant = None
-        for variant in sorted_variants:
-            if source_text.startswith(variant, cursor):
-                matched_variant = variant
-                break
-        if matched_variant is None:
-            result_parts.append(source_text[cursor])
-            cursor += 1
-            continue
-        translated_match_count += 1
-        result_parts.append(term_value)
-        cursor += len(matched_variant)
-
-    return TextCorrectionAnalysis(
-        source_match_count=0,
-        translated_match_count=translated_match_count,
-        after_text="".join(result_parts),
-    )
+def _decide_correction(analysis: TextCorrectionAnalysis, before_text: str) -> Tuple[str, str]:
+    """按匹配次数判定单行处理结果，返回 (action, reason)。"""
+    if analysis.source_match_count <= 0 or analysis.translated_match_count <= 0:
+        return "skipped", "原文或译文匹配次数为 0"
+    if analysis.source_match_count != analysis.translated_match_count:
+        return (
+            "skipped",
+            f"原文匹配 {analysis.source_match_count} 次，译文匹配 {analysis.translated_match_count} 次，次数不一致",
+        )
+    if analysis.after_text == before_text:
+        return "skipped", UNCHANGED_REASON
+    return "updated", "原文与译文匹配次数一致，已执行纠错"
 
 
-def _build_text_correction_analysis(source_text: Optional[str], translated_text: Optional[str], term_key: str, variants: List[str], term_value: str) -> TextCorrectionAnalysis:
-    source_match_count = _count_non_overlapping_occurrences(source_text or "", term_key)
-    translated_analysis = _analyze_and_replace_variants(translated_text, variants, term_value)
-    return TextCorrectionAnalysis(
-        source_match_count=source_match_count,
-        translated_match_count=translated_analysis.translated_match_count,
-        after_text=translated_analysis.after_text,
-    )
+def _build_change_reason(entry_id: int, term_key: str, variant_values: Sequence[str], term_value: str) -> str:
+    return f"SYSTEM纠错[词典#{entry_id}][{term_key}]: {' | '.join(variant_values)} -> {term_value}"
 
 
-def _insert_correction_log(
-    cursor,
-    *,
-    dictionary_entry_id: int,
-    correction_version: int,
-    text_main_id: int,
-    fid: str,
-    text_id: str,
-    action: str,
-    reason: str,
-    source_match_count: int,
-    translated_match_count: int,
-) -> None:
-    cursor.execute(
-        """
-        INSERT INTO dictionary_correction_logs (
-          "dictionaryEntryId",
-          "correctionVersion",
-          "textMainId",
-          fid,
-          "textId",
-          action,
-          reason,
-          "sourceMatchCount",
-          "translatedMatchCount",
-          "crtTime"
+@dataclass
+class _CorrectionStep:
+    rule_index: int
+    action: str
+    reason: str
+    source_match_count: int
+    translated_match_count: int
+    before_text: str
+    after_text: str
+
+
+@dataclass
+class _ClaimedEntry:
+    rule: CorrectionRule
+    version: int
+    progress_text_id: int
+    aborted: bool = False
+
+
+class _ProgressConflict(Exception):
+    """写入分块时条目进度已被其他执行者推进或版本已变化。"""
+
+    def __init__(self, rule_indexes: List[int]):
+        super().__init__(f"dictionary correction progress conflict: {rule_indexes}")
+        self.rule_indexes = rule_indexes
+
+
+def _plan_row_corrections(
+    index: CompiledCorrectionIndex,
+    source_text: Optional[str],
+    translated_text: Optional[str],
+    excluded_rules: Optional[Set[int]] = None,
+) -> List[_CorrectionStep]:
+    """按规则顺序对单行依次纠错，结果与逐条目串行执行一致。
+
+    候选条件等价于单条目路径的 LIKE 过滤：原文含术语且当前译文含任一变体。
+    某条规则改写译文后重新扫描变体，后续规则基于改写后的文本判定。
+    """
+    variant_matches = index.scan_variants(translated_text)
+    if not variant_matches:
+        return []
+    term_counts = index.count_terms(source_text)
+    current_text = translated_text or ""
+    steps: List[_CorrectionStep] = []
+    next_rule_index = 0
+    while True:
+        candidates = [
+            rule_index
+            for rule_index in index.matched_rules(variant_matches)
+            if rule_index >= next_rule_index
+            and term_counts[rule_index] > 0
+            and not (excluded_rules and rule_index in excluded_rules)
+        ]
+        if not candidates:
+            return steps
+        rule_index = candidates[0]
+        translated_match_count, after_text = index.replace_variants(rule_index, current_text, variant_matches)
+        analysis = TextCorrectionAnalysis(
+            source_match_count=term_counts[rule_index],
+            translated_match_count=translated_match_count,
+            after_text=after_text,
         )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-        """,
-        (
-            dictionary_entry_id,
-            correction_version,
-            text_main_id,
-            fid,
-            text_id,
-            action,
-            reason,
-            source_match_count,
-            translated_match_count,
-        ),
-    )
+        action, reason = _decide_correction(analysis, current_text)
+        steps.append(
+            _CorrectionStep(
+                rule_index=rule_index,
+                action=action,
+                reason=reason,
+                source_match_count=analysis.source_match_count,
+                translated_match_count=analysis.translated_match_count,
+                before_text=current_text,
+                after_text=after_text if action == "updated" else current_text,
+            )
+        )
+        next_rule_index = rule_index + 1
+        if action == "updated":
+            current_text = after_text
+            variant_matches = index.scan_variants(current_text)
 
 
-def run_dictionary_correction(entry_id: int) -> CorrectionResult:
-    system_user_id = get_system_user_id()
-    started_at = datetime.now().isoformat()
-    matched_text_count = 0
-    updated_text_count = 0
-    skipped_text_count = 0
+def _claim_entries(entry_ids: Sequence[int], started_at: str) -> Tuple[List[_ClaimedEntry], List[CorrectionResult]]:
+    """锁定条目并标记运行中，返回 (待纠错条目, 直接置为 IDLE 的结果)。
 
+    进度版本与当前版本一致时沿用已保存的进度继续执行，否则清空本版本日志从头开始。
+    """
+    claimed: List[_ClaimedEntry] = []
+    idle_results: List[CorrectionResult] = []
+    placeholders = ", ".join(["%s"] * len(entry_ids))
     with db_cursor() as cursor:
         cursor.execute(
-            """
+            f"""
             SELECT
               id,
               "termKey" AS "termKey",
@@ -265,227 +292,728 @@ def run_dictionary_correction(entry_id: int) -> CorrectionResult:
               "variantValues" AS "variantValues",
               "isActive" AS "isActive",
               "correctionVersion" AS "correctionVersion",
-              "appliedCorrectionVersion" AS "appliedCorrectionVersion"
+              "correctionProgressVersion" AS "correctionProgressVersion",
+              "correctionProgressTextId" AS "correctionProgressTextId"
             FROM dictionary_entries
-            WHERE id = %s
+            WHERE id IN ({placeholders})
             FOR UPDATE
             """,
-            (entry_id,),
+            tuple(entry_ids),
         )
-        entry = cursor.fetchone()
-        if entry is None:
-            raise RuntimeError("词典条目不存在")
+        entries = {int(row["id"]): row for row in cursor.fetchall()}
+        for entry_id in entry_ids:
+            entry = entries.get(entry_id)
+            if entry is None:
+                logger.warning("dictionary correction skipped missing entry: entryId={}", entry_id)
+                continue
+            variant_values = normalize_variant_values(entry["variantValues"])
+            correction_version = int(entry["correctionVersion"])
+            if not entry["isActive"] or not variant_values:
+                cursor.execute(
+                    """
+                    UPDATE dictionary_entries
+                    SET
+                      "correctionStatus" = %s,
+                      "appliedCorrectionVersion" = "correctionVersion",
+                      "correctionLastStartedAt" = NOW(),
+                      "correctionLastFinishedAt" = NOW(),
+                      "correctionLastError" = NULL,
+                      "correctionUpdatedTextCount" = 0
+                    WHERE id = %s
+                    """,
+                    (CORRECTION_STATUS_IDLE, entry_id),
+                )
+                idle_results.append(
+                    CorrectionResult(
+                        dictionary_id=entry_id,
+                        matched_text_count=0,
+                        updated_text_count=0,
+                        status=CORRECTION_STATUS_IDLE,
+                        applied_version=correction_version,
+                        started_at=started_at,
+                        finished_at=datetime.now().isoformat(),
+                        error=None,
+                    )
+                )
+                logger.info(
+                    "dictionary correction skipped: entryId={} termKey={} isActive={} variantCount={} status={}",
+                    entry_id,
+                    entry["termKey"],
+                    bool(entry["isActive"]),
+                    len(variant_values),
+                    CORRECTION_STATUS_IDLE,
+                )
+                continue
 
-        variant_values = normalize_variant_values(entry["variantValues"])
-        correction_version = int(entry["correctionVersion"])
-        if not entry["isActive"] or not variant_values:
-            cursor.execute(
-                """
-                UPDATE dictionary_entries
-                SET
-                  "correctionStatus" = %s,
-                  "appliedCorrectionVersion" = "correctionVersion",
-                  "correctionLastStartedAt" = NOW(),
-                  "correctionLastFinishedAt" = NOW(),
-                  "correctionLastError" = NULL,
-                  "correctionUpdatedTextCount" = 0
-                WHERE id = %s
-                """,
-                (CORRECTION_STATUS_IDLE, entry_id),
-            )
-            result = CorrectionResult(
-                dictionary_id=entry_id,
-                matched_text_count=0,
-                updated_text_count=0,
-                status=CORRECTION_STATUS_IDLE,
-                applied_version=correction_version,
-                started_at=started_at,
-                finished_at=datetime.now().isoformat(),
-                error=None,
-            )
-            logger.info(
-                "dictionary correction skipped: entryId={} termKey={} isActive={} variantCount={} status={}",
-                entry_id,
-                entry["termKey"],
-                bool(entry["isActive"]),
-                len(variant_values),
-                CORRECTION_STATUS_IDLE,
+            progress_text_id = int(entry["correctionProgressTextId"] or 0)
+            resumed = int(entry["correctionProgressVersion"]) == correction_version and progress_text_id > 0
+            if resumed:
+                cursor.execute(
+                    """
+                    UPDATE dictionary_entries
+                    SET "correctionStatus" = %s, "correctionLastFinishedAt" = NULL, "correctionLastError" = NULL
+                    WHERE id = %s
+                    """,
+                    (CORRECTION_STATUS_RUNNING, entry_id),
+                )
+                logger.info(
+                    "dictionary correction resumed: entryId={} version={} progressTextId={}",
+                    entry_id,
+                    correction_version,
+                    progress_text_id,
+                )
+            else:
+                progress_text_id = 0
+                cursor.execute(
+                    """
+                    UPDATE dictionary_entries
+                    SET
+                      "correctionStatus" = %s,
+                      "correctionLastStartedAt" = NOW(),
+                      "correctionLastFinishedAt" = NULL,
+                      "correctionLastError" = NULL,
+                      "correctionProgressVersion" = "correctionVersion",
+                      "correctionProgressTextId" = 0
+                    WHERE id = %s
+                    """,
+                    (CORRECTION_STATUS_RUNNING, entry_id),
+                )
+                cursor.execute(
+                    """
+                    DELETE FROM dictionary_correction_logs
+                    WHERE "dictionaryEntryId" = %s AND "correctionVersion" = %s
+                    """,
+                    (entry_id, correction_version),
+                )
+            claimed.append(
+                _ClaimedEntry(
+                    rule=CorrectionRule(entry_id, entry["termKey"], entry["termValue"], tuple(variant_values)),
+                    version=correction_version,
+                    progress_text_id=progress_text_id,
+                )
             )
-            return result
+    if claimed:
+        bump_generation(SCOPE_CORRECTION_LOGS)
+    return claimed, idle_results
+
+
+def _fetch_correction_chunk(after_text_id: int, chunk_size: int, prefilter_rule: Optional[CorrectionRule]) -> List[Dict[str, Any]]:
+    """按主键顺序读取一个分块（不加锁）；单条目执行时在 SQL 侧用 LIKE 预过滤候选行。"""
+    conditions = ["id > %s"]
+    params: List[Any] = [after_text_id]
+    if prefilter_rule is not None:
+        conditions.append('"sourceText" LIKE %s')
+        params.append(f"%{prefilter_rule.term_key}%")
+        conditions.append("(" + " OR ".join(['"translatedText" LIKE %s' for _ in prefilter_rule.variants]) + ")")
+        params.extend(f"%{variant}%" for variant in prefilter_rule.variants)
+    with db_cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT
+              id,
+              fid,
+              "textId" AS "textId",
+              "sourceText" AS "sourceText",
+              "translatedText" AS "translatedText"
+            FROM text_main
+            WHERE {" AND ".join(conditions)}
+            ORDER BY id ASC
+            LIMIT %s
+            """,
+            tuple([*params, chunk_size]),
+        )
+        return cursor.fetchall()
 
+
+def _advance_progress(cursor, claimed: Sequence[_ClaimedEntry], last_text_id: int) -> List[int]:
+    """在写入事务内以 CAS 推进条目进度，返回推进失败（被并发推进或版本变化）的条目下标。"""
+    conflicts: List[int] = []
+    for rule_index, entry in enumerate(claimed):
+        if entry.aborted or entry.progress_text_id >= last_text_id:
+            continue
         cursor.execute(
             """
             UPDATE dictionary_entries
-            SET
-              "correctionStatus" = %s,
-              "correctionLastStartedAt" = NOW(),
-              "correctionLastFinishedAt" = NULL,
-              "correctionLastError" = NULL
+            SET "correctionProgressTextId" = %s
             WHERE id = %s
+              AND "correctionVersion" = %s
+              AND "correctionProgressVersion" = %s
+              AND "correctionProgressTextId" = %s
             """,
-            (CORRECTION_STATUS_RUNNING, entry_id),
+            (last_text_id, entry.rule.entry_id, entry.version, entry.version, entry.progress_text_id),
         )
-        cursor.execute(
+        if cursor.rowcount != 1:
+            conflicts.append(rule_index)
+    return conflicts
+
+
+def _insert_correction_rows(cursor, change_rows: Sequence[Tuple[Any, ...]], log_rows: Sequence[Tuple[Any, ...]]) -> None:
+    if change_rows:
+        cursor.executemany(
             """
-            DELETE FROM dictionary_correction_logs
-            WHERE "dictionaryEntryId" = %s AND "correctionVersion" = %s
+            INSERT INTO text_changes ("textId", "userId", "beforeText", "afterText", reason)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            change_rows,
+        )
+    if log_rows:
+        cursor.executemany(
+            """
+            INSERT INTO dictionary_correction_logs (
+              "dictionaryEntryId",
+              "correctionVersion",
+              "textMainId",
+              fid,
+              "textId",
+              action,
+              reason,
+              "sourceMatchCount",
+              "translatedMatchCount",
+              "crtTime"
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
             """,
-            (entry_id, correction_version),
+            log_rows,
         )
 
-        source_pattern = f"%{entry['termKey']}%"
-        translated_conditions = " OR ".join(['"translatedText" LIKE %s' for _ in variant_values])
-        translated_params = [f"%{variant}%" for variant in variant_values]
+
+def _replan_locked_row(
+    cursor,
+    index: CompiledCorrectionIndex,
+    row: Dict[str, Any],
+    steps: List[_CorrectionStep],
+    excluded_rules: Optional[Set[int]],
+) -> Tuple[Dict[str, Any], List[_CorrectionStep], bool]:
+    """CAS 未命中时锁定该行重读最新译文并重新规划，返回 (最新行, 步骤, 是否已写入)。"""
+    cursor.execute(
+        """
+        SELECT "sourceText" AS "sourceText", "translatedText" AS "translatedText"
+        FROM text_main
+        WHERE id = %s
+        FOR UPDATE
+        """,
+        (row["id"],),
+    )
+    current = cursor.fetchone()
+    if current is None:
+        return row, steps, False
+    row = {**row, "sourceText": current["sourceText"], "translatedText": current["translatedText"]}
+    steps = _plan_row_corrections(index, row.get("sourceText"), row.get("translatedText"), excluded_rules)
+    updated_steps = [step for step in steps if step.action == "updated"]
+    if updated_steps:
         cursor.execute(
-            f"""
-            SELECT
-              id,
-              fid,
-              "textId" AS "textId",
-              "sourceText" AS "sourceText",
-              "translatedText" AS "translatedText",
-              status
-            FROM text_main
-            WHERE "sourceText" LIKE %s
-              AND ({translated_conditions})
-            FOR UPDATE
+            """
+            UPDATE text_main
+            SET "translatedText" = %s, "editCount" = "editCount" + %s, "uptTime" = NOW()
+            WHERE id = %s
             """,
-            tuple([source_pattern, *translated_params]),
+            (updated_steps[-1].after_text, len(updated_steps), row["id"]),
         )
-        rows = cursor.fetchall()
-
-        for row in rows:
-            analysis = _build_text_correction_analysis(
-                row.get("sourceText"),
-                row.get("translatedText"),
-                entry["termKey"],
-                variant_values,
-                entry["termValue"],
-            )
-            before_text = row["translatedText"] or ""
-            if analysis.source_match_count <= 0 or analysis.translated_match_count <= 0:
-                skipped_text_count += 1
-                _insert_correction_log(
-                    cursor,
-                    dictionary_entry_id=entry_id,
-                    correction_version=correction_version,
-                    text_main_id=int(row["id"]),
-                    fid=str(row["fid"]),
-                    text_id=str(row["textId"]),
-                    action="skipped",
-                    reason="原文或译文匹配次数为 0",
-                    source_match_count=analysis.source_match_count,
-                    translated_match_count=analysis.translated_match_count,
-                )
-                continue
-            if analysis.source_match_count != analysis.translated_match_count:
-                skipped_text_count += 1
-                _insert_correction_log(
-                    cursor,
-                    dictionary_entry_id=entry_id,
-                    correction_version=correction_version,
-                    text_main_id=int(row["id"]),
-                    fid=str(row["fid"]),
-                    text_id=str(row["textId"]),
-                    action="skipped",
-                    reason=f"原文匹配 {analysis.source_match_count} 次，译文匹配 {analysis.translated_match_count} 次，次数不一致",
-                    source_match_count=analysis.source_match_count,
-                    translated_match_count=analysis.translated_match_count,
+    return row, steps, True
+
+
+def _write_correction_chunk(
+    index: CompiledCorrectionIndex,
+    pending: Sequence[Tuple[Dict[str, Any], List[_CorrectionStep], Optional[Set[int]]]],
+    claimed: Sequence[_ClaimedEntry],
+    last_text_id: int,
+    system_user_id: int,
+) -> None:
+    """单个短事务写入一个分块：推进进度、CAS 更新译文、批量插入修改记录与纠错日志。
+
+    进度 CAS 失败时抛出 _ProgressConflict 回滚整个分块；译文 CAS 未命中的行加锁重读后重新规划。
+    """
+    log_rows: List[Tuple[Any, ...]] = []
+    change_rows: List[Tuple[Any, ...]] = []
+    with db_cursor() as cursor:
+        conflicts = _advance_progress(cursor, claimed, last_text_id)
+        if conflicts:
+            raise _ProgressConflict(conflicts)
+
+        for row, steps, excluded_rules in pending:
+            updated_steps = [step for step in steps if step.action == "updated"]
+            applied = True
+            if updated_steps:
+                cursor.execute(
+                    """
+                    UPDATE text_main
+                    SET "translatedText" = %s, "editCount" = "editCount" + %s, "uptTime" = NOW()
+                    WHERE id = %s AND "translatedText" <=> %s
+                    """,
+                    (updated_steps[-1].after_text, len(updated_steps), row["id"], row["translatedText"]),
                 )
-                continue
-            matched_text_count += 1
-            after_text = analysis.after_text
-            if after_text == before_text:
-                skipped_text_count += 1
-                _insert_correction_log(
-                    cursor,
-                    dictionary_entry_id=entry_id,
-                    correction_version=correction_version,
-                    text_main_id=int(row["id"]),
-                    fid=str(row["fid"]),
-                    text_id=str(row["textId"]),
-                    action="skipped",
-                    reason="替换后文本未变化",
-                    source_match_count=analysis.source_match_count,
-                    translated_match_count=analysis.translated_match_count,
+                applied = cursor.rowcount == 1
+            if not applied:
+                # 读取后译文被保存或被其他纠错分区改写：加行锁重读并基于最新译文重新规划
+                row, steps, applied = _replan_locked_row(cursor, index, row, steps, excluded_rules)
+
+            for step in steps:
+                entry = claimed[step.rule_index]
+                action = step.action
+                reason = step.reason
+                if action == "updated" and not applied:
+                    action = "skipped"
+                    reason = TEXT_MISSING_REASON
+                if action == "updated":
+                    change_rows.append(
+                        (
+                            row["id"],
+                            system_user_id,
+                            step.before_text,
+                            step.after_text,
+                            _build_change_reason(
+                                entry.rule.entry_id, entry.rule.term_key, entry.rule.variants, entry.rule.term_value
+                            ),
+                        )
+                    )
+                log_rows.append(
+                    (
+                        entry.rule.entry_id,
+                        entry.version,
+                        int(row["id"]),
+                        str(row["fid"]),
+                        str(row["textId"]),
+                        action,
+                        reason,
+                        step.source_match_count,
+                        step.translated_match_count,
+                    )
                 )
-                continue
-            cursor.execute(
-                """
-                UPDATE text_main
-                SET "translatedText" = %s, "editCount" = "editCount" + 1, "uptTime" = NOW()
-                WHERE id = %s
-                """,
-                (after_text, row["id"]),
-            )
-            cursor.execute(
-                """
-                INSERT INTO text_changes ("textId", "userId", "beforeText", "afterText", reason)
-                VALUES (%s, %s, %s, %s, %s)
-                """,
-                (
-                    row["id"],
-                    system_user_id,
-                    before_text,
-                    after_text,
-                    f"SYSTEM纠错[词典#{entry_id}][{entry['termKey']}]: {' | '.join(variant_values)} -> {entry['termValue']}",
-                ),
-            )
-            _insert_correction_log(
-                cursor,
-                dictionary_entry_id=entry_id,
-                correction_version=correction_version,
-                text_main_id=int(row["id"]),
-                fid=str(row["fid"]),
-                text_id=str(row["textId"]),
-                action="updated",
-                reason="原文与译文匹配次数一致，已执行纠错",
-                source_match_count=analysis.source_match_count,
-                translated_match_count=analysis.translated_match_count,
-            )
-            updated_text_count += 1
 
-        correction_last_error = None
-        if skipped_text_count > 0:
-            correction_last_error = (
-                f"存在 {skipped_text_count} 条异常记录，请查看纠错异常记录"
-            )
+        _insert_correction_rows(cursor, change_rows, log_rows)
+    bump_generation(SCOPE_TEXTS, SCOPE_CORRECTION_LOGS)
+    if change_rows:
+        bump_text_main_generation()
+
+    for entry in claimed:
+        if not entry.aborted and entry.progress_text_id < last_text_id:
+            entry.progress_text_id = last_text_id
 
+
+def _plan_chunk(
+    index: CompiledCorrectionIndex,
+    claimed: Sequence[_ClaimedEntry],
+    rows: Sequence[Dict[str, Any]],
+) -> List[Tuple[Dict[str, Any], List[_CorrectionStep], Optional[Set[int]]]]:
+    aborted_rules = {rule_index for rule_index, entry in enumerate(claimed) if entry.aborted}
+    max_progress = max(entry.progress_text_id for entry in claimed)
+    pending: List[Tuple[Dict[str, Any], List[_CorrectionStep], Optional[Set[int]]]] = []
+    for row in rows:
+        row_id = int(row["id"])
+        excluded_rules = aborted_rules
+        if row_id <= max_progress:
+            # 续跑时各条目进度不同，已处理过的行不再重复纠错
+            excluded_rules = aborted_rules | {
+                rule_index for rule_index, entry in enumerate(claimed) if entry.progress_text_id >= row_id
+            }
+        steps = _plan_row_corrections(index, row.get("sourceText"), row.get("translatedText"), excluded_rules)
+        if steps:
+            pending.append((row, steps, excluded_rules))
+    return pending
+
+
+def _finalize_entry(entry: _ClaimedEntry, started_at: str) -> CorrectionResult:
+    """按本版本日志汇总计数并标记完成；版本已变化时保持待处理状态。"""
+    with db_cursor() as cursor:
         cursor.execute(
             """
-            UPDATE dictionary_entries
-            SET
-              "correctionStatus" = %s,
-              "appliedCorrectionVersion" = "correctionVersion",
-              "correctionLastFinishedAt" = NOW(),
-              "correctionLastError" = %s,
-              "correctionUpdatedTextCount" = %s
+            SELECT "correctionVersion" AS "correctionVersion"
+            FROM dictionary_entries
             WHERE id = %s
+            FOR UPDATE
+            """,
+            (entry.rule.entry_id,),
+        )
+        current = cursor.fetchone()
+        cursor.execute(
+            """
+            SELECT
+              COALESCE(SUM(action = 'updated'), 0) AS "updatedCount",
+              COALESCE(SUM(action = 'skipped'), 0) AS "skippedCount",
+              COALESCE(SUM(action = 'updated' OR reason = %s), 0) AS "matchedCount"
+            FROM dictionary_correction_logs
+            WHERE "dictionaryEntryId" = %s AND "correctionVersion" = %s
             """,
-            (CORRECTION_STATUS_DONE, correction_last_error, updated_text_count, entry_id),
+            (UNCHANGED_REASON, entry.rule.entry_id, entry.version),
         )
-        applied_version = correction_version
+        counts = cursor.fetchone()
+        updated_text_count = int(counts["updatedCount"])
+        skipped_text_count = int(counts["skippedCount"])
+        matched_text_count = int(counts["matchedCount"])
+
+        status = CORRECTION_STATUS_PENDING
+        if current is not None and int(current["correctionVersion"]) == entry.version and not entry.aborted:
+            status = CORRECTION_STATUS_DONE
+            correction_last_error = None
+            if skipped_text_count > 0:
+                correction_last_error = (
+                    f"存在 {skipped_text_count} 条异常记录，请查看纠错异常记录"
+                )
+            cursor.execute(
+                """
+                UPDATE dictionary_entries
+                SET
+                  "correctionStatus" = %s,
+                  "appliedCorrectionVersion" = %s,
+                  "correctionLastFinishedAt" = NOW(),
+                  "correctionLastError" = %s,
+                  "correctionUpdatedTextCount" = %s
+                WHERE id = %s
+                """,
+                (CORRECTION_STATUS_DONE, entry.version, correction_last_error, updated_text_count, entry.rule.entry_id),
+            )
 
-    finished_at = datetime.now().isoformat()
     logger.info(
-        "dictionary correction complete: entryId={} matchedTextCount={} updatedTextCount={} skippedTextCount={}",
-        entry_id,
+        "dictionary correction complete: entryId={} matchedTextCount={} updatedTextCount={} skippedTextCount={} status={}",
+        entry.rule.entry_id,
         matched_text_count,
         updated_text_count,
         skipped_text_count,
+        status,
     )
     return CorrectionResult(
-        dictionary_id=entry_id,
+        dictionary_id=entry.rule.entry_id,
         matched_text_count=matched_text_count,
         updated_text_count=updated_text_count,
-        status=CORRECTION_STATUS_DONE,
-        applied_version=applied_version,
+        status=status,
+        applied_version=entry.version,
         started_at=started_at,
-        finished_at=finished_at,
+        finished_at=datetime.now().isoformat(),
         error=None,
     )
 
 
+def _run_correction(entry_ids: Sequence[int]) -> List[CorrectionResult]:
+    """分块执行纠错：读取不加锁，每个分块在一个短事务内写入并推进进度，崩溃后从进度处续跑。
+
+    所有条目编译为同一个索引，text_main 只按主键扫描一次；单条目执行时用 LIKE 预过滤减少传输。
+    """
+    chunk_size = int(get_config()["dictionary_correction"]["chunk_size"])
+    system_user_id = get_system_user_id()
+    started_at = datetime.now().isoformat()
+    started = monotonic()
+
+    claimed, results = _claim_entries(entry_ids, started_at)
+    if not claimed:
+        return results
+
+    index = CompiledCorrectionIndex([entry.rule for entry in claimed])
+    prefilter_rule = claimed[0].rule if len(claimed) == 1 else None
+    position = min(entry.progress_text_id for entry in claimed)
+    scanned_row_count = 0
+    chunk_count = 0
+    while not all(entry.aborted for entry in claimed):
+        rows = _fetch_correction_chunk(position, chunk_size, prefilter_rule)
+        if not rows:
+            break
+        last_text_id = int(rows[-1]["id"])
+        while True:
+            pending = _plan_chunk(index, claimed, rows)
+            try:
+                _write_correction_chunk(index, pending, claimed, last_text_id, system_user_id)
+                break
+            except _ProgressConflict as conflict:
+                # 冲突条目交由其他执行者或下一轮处理，剩余条目重新规划本分块
+                for rule_index in conflict.rule_indexes:
+                    claimed[rule_index].aborted = True
+                    logger.warning(
+                        "dictionary correction progress conflict: entryId={} version={}",
+                        claimed[rule_index].rule.entry_id,
+                        claimed[rule_index].version,
+                    )
+                if all(entry.aborted for entry in claimed):
+                    break
+        scanned_row_count += len(rows)
+        chunk_count += 1
+        position = last_text_id
+        if len(rows) < chunk_size:
+            break
+    logger.info(
+        "stage=dictionary_correction_scan done: entryCount={} chunkCount={} scannedRows={} stageElapsedSec={:.3f}",
+        len(claimed),
+        chunk_count,
+        scanned_row_count,
+        monotonic() - started,
+    )
+
+    for entry in claimed:
+        results.append(_finalize_entry(entry, started_at))
+    return results
+
+
+def _texts_overlap(left: str, right: str) -> bool:
+    """两段文本能否在同一译文中重叠出现：互为子串，或一方的后缀是另一方的前缀。"""
+    if not left or not right:
+        return False
+    if left in right or right in left:
+        return True
+    longest = min(len(left), len(right))
+    return any(left.endswith(right[:size]) or right.endswith(left[:size]) for size in range(1, longest))
+
+
+def _rules_interact(left: CorrectionRule, right: CorrectionRule) -> bool:
+    """一方的变体或标准译文与另一方的变体可能重叠时，两条规则的纠错顺序会影响结果。
+
+    例如 "ab"→"X" 与 "bc"→"Y" 作用于 "abc"：先后顺序不同分别得到 "Xc" 与 "aY"。
+    """
+    left_texts = (*left.variants, left.term_value)
+    right_texts = (*right.variants, right.term_value)
+    return any(_texts_overlap(a, b) for a in left_texts for b in right.variants) or any(
+        _texts_overlap(a, b) for a in right_texts for b in left.variants
+    )
+
+
+def _group_interacting_rules(rules: Sequence[CorrectionRule]) -> List[List[int]]:
+    """按相互影响关系（并查集）分组，返回规则下标分组，组内保持原顺序。"""
+    parents = list(range(len(rules)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    for left in range(len(rules)):
+        for right in range(left + 1, len(rules)):
+            if _rules_interact(rules[left], rules[right]):
+                parents[find(right)] = find(left)
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(rules)):
+        groups.setdefault(find(index), []).append(index)
+    return list(groups.values())
+
+
+def _partition_rule_indexes(rules: Sequence[CorrectionRule], partition_count: int) -> List[List[int]]:
+    partitions: List[List[int]] = [[] for _ in range(min(partition_count, len(rules)))]
+    for group in sorted(_group_interacting_rules(rules), key=len, reverse=True):
+        min(partitions, key=len).extend(group)
+    return [sorted(partition) for partition in partitions if partition]
+
+
+def partition_correction_entries(entry_ids: Sequence[int], partition_count: int) -> List[List[int]]:
+    """把待纠错条目划分为可并行执行的分区。
+
+    相互影响的条目归入同一分区以保持串行语义；分区之间只会在同一行上发生写冲突，
+    由行级 CAS 与加锁重读处理。分区按条目数贪心均衡，分区内保持队列顺序。
+    """
+    if partition_count <= 1 or len(entry_ids) <= 1:
+        return [list(entry_ids)] if entry_ids else []
+    placeholders = ", ".join(["%s"] * len(entry_ids))
+    with db_cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT
+              id,
+              "termKey" AS "termKey",
+              "termValue" AS "termValue",
+              "variantValues" AS "variantValues"
+            FROM dictionary_entries
+            WHERE id IN ({placeholders})
+            """,
+            tuple(entry_ids),
+        )
+        entries = {int(row["id"]): row for row in cursor.fetchall()}
+    rules: List[CorrectionRule] = []
+    for entry_id in entry_ids:
+        entry = entries.get(entry_id)
+        variant_values = normalize_variant_values(entry["variantValues"]) if entry else []
+        term_value = entry["termValue"] if entry else ""
+        term_key = entry["termKey"] if entry else ""
+        rules.append(CorrectionRule(entry_id, term_key, term_value, tuple(variant_values)))
+
+    return [[entry_ids[index] for index in partition] for partition in _partition_rule_indexes(rules, partition_count)]
+
+
+def run_dictionary_correction(entry_id: int) -> CorrectionResult:
+    results = _run_correction([entry_id])
+    if not results:
+        raise RuntimeError("词典条目不存在")
+    return results[0]
+
+
+def run_dictionary_correction_batch(entry_ids: Sequence[int]) -> List[CorrectionResult]:
+    """一次扫描 text_main 完成多个词典条目的纠错，同一行命中多个条目时按条目顺序依次纠错。"""
+    if not entry_ids:
+        return []
+    return _run_correction(entry_ids)
+
+
+@dataclass(frozen=True)
+class _InlineCorrectionIndex:
+    index: CompiledCorrectionIndex
+    system_user_id: int
+
+
+_inline_index: Optional[_InlineCorrectionIndex] = None
+_inline_index_expires_at = 0.0
+_inline_index_lock = threading.Lock()
+
+
+def invalidate_inline_correction_index() -> None:
+    """词典条目变化后调用，下次保存译文时重新编译。"""
+    global _inline_index, _inline_index_expires_at
+    with _inline_index_lock:
+        _inline_index = None
+        _inline_index_expires_at = 0.0
+
+
+def _load_inline_correction_index() -> Optional[_InlineCorrectionIndex]:
+    with db_cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT
+              id,
+              "termKey" AS "termKey",
+              "termValue" AS "termValue",
+              "variantValues" AS "variantValues"
+            FROM dictionary_entries
+            WHERE "isActive" = TRUE
+            ORDER BY "uptTime" ASC, id ASC
+            """
+        )
+        entries = cursor.fetchall()
+    rules: List[CorrectionRule] = []
+    for entry in entries:
+        variant_values = normalize_variant_values(entry["variantValues"])
+        if not variant_values:
+            continue
+        rules.append(CorrectionRule(int(entry["id"]), entry["termKey"], entry["termValue"], tuple(variant_values)))
+    if not rules:
+        return None
+    return _InlineCorrectionIndex(
+        index=CompiledCorrectionIndex(rules),
+        system_user_id=get_system_user_id(),
+    )
+
+
+def _get_inline_correction_index() -> Optional[_InlineCorrectionIndex]:
+    """返回启用条目的编译索引；进程内缓存，条目变更时主动失效，TTL 兜底其他途径的修改。"""
+    global _inline_index, _inline_index_expires_at
+    config = get_config()["dictionary_correction"]
+    if not config["inline_enabled"]:
+        return None
+    with _inline_index_lock:
+        if monotonic() < _inline_index_expires_at:
+            return _inline_index
+        started = monotonic()
+        _inline_index = _load_inline_correction_index()
+        _inline_index_expires_at = monotonic() + int(config["inline_index_ttl_seconds"])
+        logger.info(
+            "dictionary inline index loaded: ruleCount={} elapsedSec={:.3f}",
+            len(_inline_index.index.rules) if _inline_index is not None else 0,
+            monotonic() - started,
+        )
+        return _inline_index
+
+
+def _delete_stale_skipped_logs(cursor, text_main_ids: Sequence[int]) -> None:
+    """按主键删除这些行在条目当前版本下的异常记录。
+
+    当前版本用一致性读（不加锁）取得，DELETE 只锁日志行本身，不关联 dictionary_entries。
+    """
+    for offset in range(0, len(text_main_ids), INLINE_CORRECTION_BATCH_SIZE):
+        batch_ids = text_main_ids[offset : offset + INLINE_CORRECTION_BATCH_SIZE]
+        placeholders = ", ".join(["%s"] * len(batch_ids))
+        cursor.execute(
+            f"""
+            SELECT l.id
+            FROM dictionary_correction_logs l
+            JOIN dictionary_entries d
+              ON d.id = l."dictionaryEntryId" AND d."correctionVersion" = l."correctionVersion"
+            WHERE l."textMainId" IN ({placeholders}) AND l.action = 'skipped'
+            """,
+            tuple(batch_ids),
+        )
+        log_ids = [int(row["id"]) for row in cursor.fetchall()]
+        if log_ids:
+            cursor.execute(
+                f"DELETE FROM dictionary_correction_logs WHERE id IN ({', '.join(['%s'] * len(log_ids))})",
+                tuple(log_ids),
+            )
+
+
+def apply_inline_corrections(cursor, saved_rows: Sequence[Tuple[int, Optional[str]]]) -> Dict[int, str]:
+    """在保存译文的同一事务内对刚写入的译文做增量纠错，返回被纠正行的 {id: 纠正后译文}。
+
+    saved_rows 为 (text_main.id, 已保存译文)。纠正结果按 SYSTEM 身份写入修改记录，并清除这些行在
+    条目当前版本下已过期的异常记录。纠错日志只由调度器按版本写入：_finalize_entry 按版本汇总日志计数，
+    即时纠错若写入已完成的版本会使计数与日志不一致。条目本身的变化仍由调度器全量处理。
+
+    调用方事务已持有 text_main 行锁，而纠错分块先锁 dictionary_entries 再锁 text_main；
+    这里只能用一致性读访问 dictionary_entries，不能对其加锁，否则两者会形成死锁环。
+    """
+    if not saved_rows:
+        return {}
+    try:
+        inline_index = _get_inline_correction_index()
+    except Exception as error:
+        # 索引加载失败不阻塞保存，条目的全量纠错仍由调度器兜底
+        logger.exception("dictionary inline index load failed: {}", error)
+        return {}
+    if inline_index is None:
+        return {}
+    index = inline_index.index
+    _delete_stale_skipped_logs(cursor, [text_main_id for text_main_id, _ in saved_rows])
+
+    saved_texts = {
+        text_main_id: translated_text
+        for text_main_id, translated_text in saved_rows
+        if index.scan_variants(translated_text)
+    }
+    if not saved_texts:
+        return {}
+
+    candidate_ids = list(saved_texts)
+    corrected: Dict[int, str] = {}
+    change_rows: List[Tuple[Any, ...]] = []
+    for offset in range(0, len(candidate_ids), INLINE_CORRECTION_BATCH_SIZE):
+        batch_ids = candidate_ids[offset : offset + INLINE_CORRECTION_BATCH_SIZE]
+        placeholders = ", ".join(["%s"] * len(batch_ids))
+        cursor.execute(
+            f"""
+            SELECT id, fid, "textId" AS "textId", "sourceText" AS "sourceText"
+            FROM text_main
+            WHERE id IN ({placeholders})
+            """,
+            tuple(batch_ids),
+        )
+        for row in cursor.fetchall():
+            text_main_id = int(row["id"])
+            steps = _plan_row_corrections(index, row.get("sourceText"), saved_texts[text_main_id])
+            for step in steps:
+                rule = index.rules[step.rule_index]
+                if step.action == "updated":
+                    change_rows.append(
+                        (
+                            text_main_id,
+                            inline_index.system_user_id,
+                            step.before_text,
+                            step.after_text,
+                            _build_change_reason(rule.entry_id, rule.term_key, rule.variants, rule.term_value),
+                        )
+                    )
+            updated_steps = [step for step in steps if step.action == "updated"]
+            if updated_steps:
+                corrected[text_main_id] = updated_steps[-1].after_text
+                cursor.execute(
+                    """
+                    UPDATE text_main
+                    SET "translatedText" = %s, "editCount" = "editCount" + %s, "uptTime" = NOW()
+                    WHERE id = %s
+                    """,
+                    (updated_steps[-1].after_text, len(updated_steps), text_main_id),
+                )
+
+    _insert_correction_rows(cursor, change_rows, [])
+    if corrected:
+        logger.info(
+            "dictionary inline correction applied: savedRows={} correctedRows={}",
+            len(saved_rows),
+            len(corrected),
+        )
+    return corrected
+
+
 def mark_dictionary_correction_failed(entry_id: int, error_message: str) -> None:
     with db_cursor() as cursor:
         cursor.execute(
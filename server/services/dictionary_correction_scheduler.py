@@ -2,8 +2,11 @@
 from __future__ import annotations
 
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
-from typing import Optional
+from time import monotonic
+from typing import Any, Dict, List, Optional
 
 from loguru import logger
 
@@ -11,6 +14,113 @@ from ..config import get_config
 from . import dictionary_correction
 
 _scheduler_task: Optional[asyncio.Task] = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, Any] = {
+    "queueDepth": 0,
+    "activeWorkers": 0,
+    "roundsTotal": 0,
+    "entriesProcessedTotal": 0,
+    "entriesFailedTotal": 0,
+    "textsUpdatedTotal": 0,
+    "entryDurationSecCount": 0,
+    "entryDurationSecSum": 0.0,
+    "entryDurationSecMax": 0.0,
+    "lastRoundEntryCount": 0,
+    "lastRoundDurationSec": 0.0,
+    "lastRoundEntriesPerSec": 0.0,
+}
+
+
+def get_scheduler_metrics() -> Dict[str, Any]:
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+def _record_partition(entry_count: int, failed: bool, updated_text_count: int, elapsed: float) -> None:
+    # 分区内条目共用一次扫描，单条目耗时按所在分区的耗时计
+    with _metrics_lock:
+        _metrics["entriesProcessedTotal"] += entry_count
+        if failed:
+            _metrics["entriesFailedTotal"] += entry_count
+        _metrics["textsUpdatedTotal"] += updated_text_count
+        _metrics["entryDurationSecCount"] += entry_count
+        _metrics["entryDurationSecSum"] += elapsed * entry_count
+        _metrics["entryDurationSecMax"] = max(_metrics["entryDurationSecMax"], elapsed)
+
+
+def _run_partition(entry_ids: List[int]) -> None:
+    """工作线程内执行一个分区，失败时整个分区标记为失败，由下一轮从进度续跑。"""
+    with _metrics_lock:
+        _metrics["activeWorkers"] += 1
+    started = monotonic()
+    failed = False
+    updated_text_count = 0
+    try:
+        results = dictionary_correction.run_dictionary_correction_batch(entry_ids)
+        updated_text_count = sum(result.updated_text_count for result in results)
+    except Exception as error:
+        failed = True
+        for entry_id in entry_ids:
+            dictionary_correction.mark_dictionary_correction_failed(entry_id, str(error))
+        logger.exception("scheduled dictionary correction failed: entryIds={} error={}", entry_ids, error)
+    finally:
+        elapsed = monotonic() - started
+        with _metrics_lock:
+            _metrics["activeWorkers"] -= 1
+        _record_partition(len(entry_ids), failed, updated_text_count, elapsed)
+    logger.info(
+        "dictionary correction partition done: entryIds={} failed={} updatedTextCount={} elapsedSec={:.3f}",
+        entry_ids,
+        failed,
+        updated_text_count,
+        elapsed,
+    )
+
+
+def _get_executor(workers: int) -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dictionary-correction")
+    return _executor
+
+
+async def _run_round(lock_name: str, batch_size: int, workers: int) -> None:
+    """单轮调度：加分布式锁、取待纠错条目、按分区并发执行；数据库调用全部在线程中进行。"""
+    lock_connection = await asyncio.to_thread(dictionary_correction.acquire_correction_lock, lock_name)
+    if lock_connection is None:
+        logger.debug("dictionary correction scheduler skipped: lock not acquired")
+        return
+    try:
+        entry_ids = await asyncio.to_thread(dictionary_correction.fetch_pending_dictionary_ids, batch_size)
+        queue_depth = await asyncio.to_thread(dictionary_correction.count_pending_dictionary_entries)
+        with _metrics_lock:
+            _metrics["queueDepth"] = queue_depth
+        if not entry_ids:
+            return
+
+        partitions = await asyncio.to_thread(dictionary_correction.partition_correction_entries, entry_ids, workers)
+        started = monotonic()
+        loop = asyncio.get_running_loop()
+        executor = _get_executor(workers)
+        await asyncio.gather(*(loop.run_in_executor(executor, _run_partition, partition) for partition in partitions))
+        elapsed = monotonic() - started
+        with _metrics_lock:
+            _metrics["roundsTotal"] += 1
+            _metrics["queueDepth"] = max(queue_depth - len(entry_ids), 0)
+            _metrics["lastRoundEntryCount"] = len(entry_ids)
+            _metrics["lastRoundDurationSec"] = elapsed
+            _metrics["lastRoundEntriesPerSec"] = len(entry_ids) / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            "dictionary correction round done: entryCount={} partitionCount={} queueDepth={} elapsedSec={:.3f}",
+            len(entry_ids),
+            len(partitions),
+            queue_depth,
+            elapsed,
+        )
+    finally:
+        await asyncio.to_thread(dictionary_correction.release_correction_lock, lock_name, lock_connection)
 
 
 async def _run_loop() -> None:
@@ -18,29 +128,18 @@ async def _run_loop() -> None:
     interval_seconds = int(config["scan_interval_seconds"])
     batch_size = int(config["batch_size"])
     lock_name = str(config["lock_name"])
+    workers = int(config["workers"])
 
     logger.info(
-        "dictionary correction scheduler started: intervalSeconds={} batchSize={} lockName={}",
+        "dictionary correction scheduler started: intervalSeconds={} batchSize={} workers={} lockName={}",
         interval_seconds,
         batch_size,
+        workers,
         lock_name,
     )
     while True:
         try:
-            lock_connection = dictionary_correction.acquire_correction_lock(lock_name)
-            if lock_connection is not None:
-                try:
-                    entry_ids = dictionary_correction.fetch_pending_dictionary_ids(batch_size)
-                    for entry_id in entry_ids:
-                        try:
-                            dictionary_correction.run_dictionary_correction(entry_id)
-                        except Exception as error:
-                            dictionary_correction.mark_dictionary_correction_failed(entry_id, str(error))
-                            logger.exception("scheduled dictionary correction failed: entryId={} error={}", entry_id, error)
-                finally:
-                    dictionary_correction.release_correction_lock(lock_name, lock_connection)
-            else:
-                logger.debug("dictionary correction scheduler skipped: lock not acquired")
+            await _run_round(lock_name, batch_size, workers)
         except asyncio.CancelledError:
             raise
         except Exception as error:
@@ -61,10 +160,14 @@ def start_scheduler() -> None:
 
 
 async def stop_scheduler() -> None:
-    global _scheduler_task
+    global _scheduler_task, _executor
     if _scheduler_task is None:
         return
     _scheduler_task.cancel()
     with suppress(asyncio.CancelledError):
         await _scheduler_task
     _scheduler_task = None
+    if _executor is not None:
+        # 运行中的分区随线程自然结束，未完成的进度由下次启动续跑
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
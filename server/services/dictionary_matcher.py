@@ -0,0 +1,165 @@
+# 词典纠错多模式匹配：Aho-Corasick 自动机与编译后的纠错索引。
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+class AhoCorasickAutomaton:
+    """多模式串自动机，一次扫描输出全部（含重叠）命中。"""
+
+    __slots__ = ("patterns", "_goto", "_fail", "_outputs")
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns: Tuple[str, ...] = tuple(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[Tuple[int, ...]] = [()]
+
+        node_outputs: List[List[int]] = [[]]
+        for pattern_index, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("模式串不能为空")
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    node_outputs.append([])
+                node = next_node
+            node_outputs[node].append(pattern_index)
+
+        # BFS 计算失败指针，并把失败链上的输出合并到当前节点，扫描时无需再沿链回溯取输出
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                node_outputs[child].extend(node_outputs[self._fail[child]])
+                queue.append(child)
+        self._outputs = [tuple(items) for items in node_outputs]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """按结束位置升序产出 (起始下标, 模式下标)。"""
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        patterns = self.patterns
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                end = index + 1
+                for pattern_index in outputs[node]:
+                    yield end - len(patterns[pattern_index]), pattern_index
+
+
+def replace_longest(text: str, matches: Iterable[Tuple[int, int]], lengths: Sequence[int], replacement: str) -> Tuple[int, str]:
+    """从左到右在每个位置取最长命中替换，未命中位置逐字保留；返回 (替换次数, 替换后文本)。"""
+    longest: Dict[int, int] = {}
+    for start, pattern_index in matches:
+        length = lengths[pattern_index]
+        if length > longest.get(start, 0):
+            longest[start] = length
+    if not longest:
+        return 0, text
+
+    parts: List[str] = []
+    count = 0
+    cursor = 0
+    for start in sorted(longest):
+        if start < cursor:
+            continue
+        parts.append(text[cursor:start])
+        parts.append(replacement)
+        cursor = start + longest[start]
+        count += 1
+    parts.append(text[cursor:])
+    return count, "".join(parts)
+
+
+@dataclass(frozen=True)
+class CorrectionRule:
+    entry_id: int
+    term_key: str
+    term_value: str
+    variants: Tuple[str, ...]
+
+
+class CompiledCorrectionIndex:
+    """为一组词典条目编译原文术语与译文变体两台自动机，原文/译文各扫描一次即可得到所有条目的命中。"""
+
+    def __init__(self, rules: Sequence[CorrectionRule]):
+        self.rules: Tuple[CorrectionRule, ...] = tuple(rules)
+
+        term_indexes: Dict[str, int] = {}
+        self._rule_term_index: List[int] = []
+        for rule in self.rules:
+            self._rule_term_index.append(term_indexes.setdefault(rule.term_key, len(term_indexes)))
+        self._terms: Tuple[str, ...] = tuple(term_indexes)
+        self._term_automaton = AhoCorasickAutomaton(self._terms)
+
+        variant_indexes: Dict[str, int] = {}
+        self._rule_variant_indexes: List[frozenset] = []
+        self._variant_rules: List[List[int]] = []
+        for rule_index, rule in enumerate(self.rules):
+            indexes = set()
+            for variant in rule.variants:
+                variant_index = variant_indexes.setdefault(variant, len(variant_indexes))
+                if variant_index == len(self._variant_rules):
+                    self._variant_rules.append([])
+                if variant_index not in indexes:
+                    self._variant_rules[variant_index].append(rule_index)
+                indexes.add(variant_index)
+            self._rule_variant_indexes.append(frozenset(indexes))
+        self._variants: Tuple[str, ...] = tuple(variant_indexes)
+        self._variant_lengths: Tuple[int, ...] = tuple(len(variant) for variant in self._variants)
+        self._variant_automaton = AhoCorasickAutomaton(self._variants) if self._variants else None
+
+    def count_terms(self, source_text: Optional[str]) -> List[int]:
+        """返回每条规则的原文术语非重叠命中次数（与规则顺序一致）。"""
+        term_counts = [0] * len(self._terms)
+        if source_text:
+            next_start = [0] * len(self._terms)
+            for start, term_index in self._term_automaton.iter_matches(source_text):
+                if start >= next_start[term_index]:
+                    term_counts[term_index] += 1
+                    next_start[term_index] = start + len(self._terms[term_index])
+        return [term_counts[term_index] for term_index in self._rule_term_index]
+
+    def scan_variants(self, translated_text: Optional[str]) -> List[Tuple[int, int]]:
+        if not translated_text or self._variant_automaton is None:
+            return []
+        return list(self._variant_automaton.iter_matches(translated_text))
+
+    def matched_rules(self, variant_matches: Sequence[Tuple[int, int]]) -> List[int]:
+        """返回译文命中任一变体的规则下标（升序）。"""
+        hit_rules = set()
+        for pattern_index in {pattern_index for _, pattern_index in variant_matches}:
+            hit_rules.update(self._variant_rules[pattern_index])
+        return sorted(hit_rules)
+
+    def replace_variants(
+        self,
+        rule_index: int,
+        translated_text: Optional[str],
+        variant_matches: Optional[Sequence[Tuple[int, int]]] = None,
+    ) -> Tuple[int, str]:
+        """对单条规则执行最长变体替换；variant_matches 可复用 scan_variants 的结果避免重复扫描。"""
+        text = translated_text or ""
+        if not text:
+            return 0, ""
+        if variant_matches is None:
+            variant_matches = self.scan_variants(text)
+        allowed = self._rule_variant_indexes[rule_index]
+        rule_matches = (item for item in variant_matches if item[1] in allowed)
+        return replace_longest(text, rule_matches, self._variant_lengths, self.rules[rule_index].term_value)
@@ -0,0 +1,156 @@
+# 列表总数：按筛选条件短时缓存精确 COUNT(*)，写入路径递增写代次使缓存失效；近似总数取执行计划估算。
+from __future__ import annotations
+
+import threading
+from time import monotonic
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from ..config import get_config
+from ..db import READ_TARGET_PRIMARY, get_read_target
+from ..metrics import record_list_total_lookup
+
+TOTAL_MODE_SET = {"exact", "approximate", "none"}
+
+# 写代次作用域：每个作用域对应一组会影响列表总数的表
+SCOPE_TEXTS = "texts"
+SCOPE_DICTIONARY = "dictionary"
+SCOPE_CORRECTION_LOGS = "dictionary_correction_logs"
+
+_CacheKey = Tuple[str, str, str, str, Tuple[Any, ...]]
+
+_generations: Dict[str, int] = {}
+_bumped_at: Dict[str, float] = {}
+_exact_cache: Dict[_CacheKey, Tuple[float, int, int]] = {}
+_approximate_cache: Dict[_CacheKey, Tuple[float, int]] = {}
+_cache_lock = threading.Lock()
+_MAX_CACHE_ENTRIES = 1024
+
+
+def bump_generation(*scopes: str) -> None:
+    """写事务提交后调用；先于提交递增会让并发读把旧总数缓存到新代次下。"""
+    now = monotonic()
+    with _cache_lock:
+        for scope in scopes:
+            _generations[scope] = _generations.get(scope, 0) + 1
+            _bumped_at[scope] = now
+
+
+def get_generation(scope: str) -> int:
+    with _cache_lock:
+        return _generations.get(scope, 0)
+
+
+def reset_total_cache() -> None:
+    with _cache_lock:
+        _exact_cache.clear()
+        _approximate_cache.clear()
+
+
+def _build_cache_key(
+    scope: str, target: str, from_sql: str, where_clause: str, params: Sequence[Any]
+) -> _CacheKey:
+    # 条件 SQL 由固定片段拼接，压缩空白后与参数一起即为归一化的筛选集合；
+    # 主库与各副本的计数分开缓存，副本计数不会返回给路由到主库的读请求
+    return scope, target, from_sql, " ".join(where_clause.split()), tuple(params)
+
+
+def _store(cache: Dict[_CacheKey, Any], key: _CacheKey, value: Any) -> None:
+    if len(cache) >= _MAX_CACHE_ENTRIES and key not in cache:
+        cache.clear()
+    cache[key] = value
+
+
+def _count_exact(cursor, from_sql: str, where_clause: str, params: Sequence[Any]) -> int:
+    cursor.execute(
+        f"""
+        SELECT COUNT(*) AS total
+        FROM {from_sql}
+        {where_clause}
+        """,
+        tuple(params),
+    )
+    return int(cursor.fetchone()["total"])
+
+
+def _estimate(cursor, from_sql: str, where_clause: str, params: Sequence[Any]) -> int:
+    """无筛选取 information_schema 行数估计，有筛选取 EXPLAIN 估算行数。"""
+    table_name = from_sql.split()[0]
+    if not where_clause:
+        cursor.execute(
+            """
+            SELECT TABLE_ROWS AS total
+            FROM information_schema.tables
+            WHERE table_schema = DATABASE() AND table_name = %s
+            """,
+            (table_name,),
+        )
+        row = cursor.fetchone()
+        return int(row["total"] or 0) if row else 0
+    cursor.execute(f"EXPLAIN SELECT 1 FROM {from_sql} {where_clause}", tuple(params))
+    plan = cursor.fetchall()
+    if not plan:
+        return 0
+    filtered = float(plan[0].get("filtered") or 100)
+    return int(int(plan[0].get("rows") or 0) * filtered / 100)
+
+
+def _cached_exact_total(cursor, scope: str, from_sql: str, where_clause: str, params: Sequence[Any]) -> int:
+    cache_seconds = get_config()["pagination"]["total_cache_seconds"]
+    if cache_seconds == 0:
+        return _count_exact(cursor, from_sql, where_clause, params)
+    target = get_read_target(cursor)
+    key = _build_cache_key(scope, target, from_sql, where_clause, params)
+    now = monotonic()
+    with _cache_lock:
+        generation = _generations.get(scope, 0)
+        bumped_at = _bumped_at.get(scope)
+        cached = _exact_cache.get(key)
+    if cached is not None and cached[0] > now and cached[1] == generation:
+        record_list_total_lookup(scope, "hit")
+        return cached[2]
+    record_list_total_lookup(scope, "miss")
+
+    # 计数期间发生的写入会递增代次，按计数前读到的代次入缓存，下次读取即失效
+    total = _count_exact(cursor, from_sql, where_clause, params)
+    if target != READ_TARGET_PRIMARY and bumped_at is not None:
+        # 副本可能尚未回放最近一次写入，此时的计数缓存到新代次下会一直偏旧
+        if now - bumped_at < get_config()["database"]["read_routing"]["read_your_writes_seconds"]:
+            return total
+    with _cache_lock:
+        _store(_exact_cache, key, (now + cache_seconds, generation, total))
+    return total
+
+
+def _cached_approximate_total(cursor, scope: str, from_sql: str, where_clause: str, params: Sequence[Any]) -> int:
+    key = _build_cache_key(scope, get_read_target(cursor), from_sql, where_clause, params)
+    now = monotonic()
+    with _cache_lock:
+        cached = _approximate_cache.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    estimate = _estimate(cursor, from_sql, where_clause, params)
+    cache_seconds = get_config()["text_list"]["approximate_total_cache_seconds"]
+    with _cache_lock:
+        _store(_approximate_cache, key, (now + cache_seconds, estimate))
+    return estimate
+
+
+def resolve_total(
+    cursor,
+    total_mode: str,
+    scope: str,
+    from_sql: str,
+    where_clause: str,
+    params: Sequence[Any],
+) -> Optional[int]:
+    """按 totalMode 返回列表总数：exact 为带写代次校验的缓存 COUNT(*)，approximate 为估算值，none 不统计。
+
+    from_sql 为 COUNT 的 FROM 子句（如 "text_main tm"），首个单词须为表名。
+    """
+    if total_mode == "none":
+        return None
+    if total_mode == "approximate":
+        return _cached_approximate_total(cursor, scope, from_sql, where_clause, params)
+    return _cached_exact_total(cursor, scope, from_sql, where_clause, params)
+
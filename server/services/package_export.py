@@ -0,0 +1,441 @@
+# 汉化包导出：分段合并格式与全量汉化包产物缓存。
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from time import monotonic, perf_counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from openpyxl import Workbook
+
+from ..config import get_config
+from ..db import db_cursor, db_stream_cursor
+
+PACKAGE_HEADERS: Tuple[str, ...] = ("fid", "translation")
+EXCEL_CELL_CHAR_LIMIT = 32767
+_ARTIFACT_FORMAT_VERSION = 2
+_MANIFEST_NAME = "manifest.json"
+_CHANGED_FID_BATCH_SIZE = 500
+
+
+def format_package_segment(text_id: Any, source_text: Optional[str], translated_text: Optional[str]) -> str:
+    """还原单个 part 的分段协议格式，空译文取原文填充。
+    - textId 不含 ':::' → textId::::::[text]   (格式1)
+    - textId 含 ':::'   → textId:::[text]       (格式2/3)
+    """
+    text_id_str = str(text_id)
+    translated = translated_text or source_text or ""
+    if ":::" in text_id_str:
+        return f"{text_id_str}:::[{translated}]"
+    return f"{text_id_str}::::::[{translated}]"
+
+
+def merge_fid_rows(fid_rows: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """合并同一 fid 的多个 part 为一行，返回 (fid, translation)。"""
+    fid = fid_rows[0]["fid"]
+    segments = [format_package_segment(row["textId"], row["sourceText"], row["translatedText"]) for row in fid_rows]
+    return fid, "|||".join(segments)
+
+
+def split_translation_into_rows(fid: str, translation: str) -> List[List[str]]:
+    """将超长 translation 按 ||| segment 边界拆分为多行写入 xlsx。
+    segment（textId::::::[text]）为最小原子单位，绝不在内部截断。
+    非末行末尾追加 '|||' 表示续行；单个 segment 超过 limit 时独占一行（完整保留）。
+    """
+    segments = translation.split("|||")
+    rows: List[List[str]] = []
+    current_parts: List[str] = []
+    current_len = 0
+    sep_len = 3  # len("|||")
+
+    for seg in segments:
+        seg_len = len(seg)
+        if not current_parts:
+            current_parts.append(seg)
+            current_len = seg_len
+        else:
+            if current_len + sep_len + seg_len > EXCEL_CELL_CHAR_LIMIT - sep_len:
+                rows.append([fid, "|||".join(current_parts) + "|||"])
+                current_parts = [seg]
+                current_len = seg_len
+            else:
+                current_parts.append(seg)
+                current_len += sep_len + seg_len
+
+    if current_parts:
+        rows.append([fid, "|||".join(current_parts)])
+
+    return rows
+
+
+def append_package_row(sheet, fid: str, translation: str) -> None:
+    if len(translation) > EXCEL_CELL_CHAR_LIMIT:
+        logger.warning(f"fid={fid} translation 超过 Excel 单元格字符上限，按 segment 边界分行")
+        for split_row in split_translation_into_rows(fid, translation):
+            sheet.append(split_row)
+    else:
+        sheet.append([fid, translation])
+
+
+def _iter_merged_fids(rows: Iterator[Dict[str, Any]]) -> Iterator[Tuple[str, str]]:
+    """按 fid, part 有序的行流增量合并为 (fid, translation)。"""
+    current_fid: Optional[str] = None
+    current_segments: List[str] = []
+    for row in rows:
+        if current_fid is not None and row["fid"] != current_fid:
+            yield current_fid, "|||".join(current_segments)
+            current_segments = []
+        current_fid = row["fid"]
+        current_segments.append(format_package_segment(row["textId"], row["sourceText"], row["translatedText"]))
+    if current_fid is not None:
+        yield current_fid, "|||".join(current_segments)
+
+
+@dataclass
+class PackageArtifact:
+    etag: str
+    generation: int
+    max_id: int
+    checked_at: str
+    fid_count: int
+    xlsx_path: str
+    rows_path: str
+    built_at: str
+    full_built_at: str
+
+
+_artifact: Optional[PackageArtifact] = None
+_artifact_loaded = False
+_build_lock = threading.Lock()
+_refresher_task: Optional[asyncio.Task] = None
+
+
+def _get_cache_config() -> Dict[str, Any]:
+    return get_config()["text_import_export"]
+
+
+def bump_text_main_generation() -> None:
+    """译文写入事务提交后调用，用单独的短事务递增变更计数。
+
+    不放在写入事务内：计数只有一行，行锁会持有到提交，所有保存/上传/纠错分块都会在此串行。
+    提交与递增之间构建的产物已包含该写入，递增后只会多重建一次；递增失败只记录日志，
+    下一次写入递增计数后，增量重建从上一代产物读取计数的时间回看，仍会补上这次写入。
+    """
+    try:
+        with db_cursor() as cursor:
+            cursor.execute("UPDATE text_main_generation SET generation = generation + 1 WHERE id = 1")
+    except Exception as error:
+        logger.exception("text_main generation bump failed: {}", error)
+
+
+def _read_watermark() -> Dict[str, Any]:
+    """读取变更计数与 text_main 最大主键（均为主键查找），并记录数据库当前时间供增量回看使用。"""
+    with db_cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT
+              g.generation,
+              (SELECT COALESCE(MAX(id), 0) FROM text_main) AS "maxId",
+              NOW() AS "checkedAt"
+            FROM text_main_generation g
+            WHERE g.id = 1
+            """
+        )
+        row = cursor.fetchone()
+    if row is None:
+        raise RuntimeError("text_main_generation 缺少计数行，请执行 server/migrations/008_text_main_generation.sql")
+    return {
+        "generation": int(row["generation"]),
+        "maxId": int(row["maxId"]),
+        "checkedAt": row["checkedAt"].isoformat(),
+    }
+
+
+def _build_etag(watermark: Dict[str, Any]) -> str:
+    raw = f"{_ARTIFACT_FORMAT_VERSION}|{watermark['generation']}|{watermark['maxId']}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _matches(artifact: PackageArtifact, watermark: Dict[str, Any]) -> bool:
+    return artifact.generation == watermark["generation"] and artifact.max_id == watermark["maxId"]
+
+
+def _load_manifest(cache_dir: str) -> Optional[PackageArtifact]:
+    manifest_path = os.path.join(cache_dir, _MANIFEST_NAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as handle:
+            artifact = PackageArtifact(**json.load(handle))
+    except FileNotFoundError:
+        return None
+    except (ValueError, TypeError) as error:
+        logger.warning("package cache manifest invalid, ignored: path={} error={}", manifest_path, error)
+        return None
+    if not os.path.isfile(artifact.xlsx_path) or not os.path.isfile(artifact.rows_path):
+        return None
+    return artifact
+
+
+def _save_manifest(cache_dir: str, artifact: PackageArtifact) -> None:
+    manifest_path = os.path.join(cache_dir, _MANIFEST_NAME)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(asdict(artifact), handle, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def _cleanup_stale_files(cache_dir: str, keep_paths: List[str]) -> None:
+    """只保留当前与上一代产物，避免删除仍在下载中的文件。"""
+    keep = {os.path.abspath(path) for path in keep_paths}
+    for name in os.listdir(cache_dir):
+        if not name.startswith("package_"):
+            continue
+        path = os.path.abspath(os.path.join(cache_dir, name))
+        if path not in keep:
+            with suppress(FileNotFoundError):
+                os.remove(path)
+
+
+def _write_rows_file(rows_path: str, merged: Iterator[Tuple[str, str]]) -> int:
+    fid_count = 0
+    with open(rows_path, "w", encoding="utf-8") as handle:
+        for fid, translation in merged:
+            handle.write(json.dumps([fid, translation], ensure_ascii=False))
+            handle.write("\n")
+            fid_count += 1
+    return fid_count
+
+
+def _iter_rows_file(rows_path: str) -> Iterator[Tuple[str, str]]:
+    with open(rows_path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            fid, translation = json.loads(line)
+            yield fid, translation
+
+
+def _write_xlsx(rows_path: str, xlsx_path: str) -> None:
+    workbook = Workbook(write_only=True)
+    try:
+        sheet = workbook.create_sheet(title="texts")
+        sheet.append(list(PACKAGE_HEADERS))
+        for fid, translation in _iter_rows_file(rows_path):
+            append_package_row(sheet, fid, translation)
+        workbook.save(xlsx_path)
+    finally:
+        workbook.close()
+
+
+def _stream_all_merged(fetch_batch_size: int) -> Iterator[Tuple[str, str]]:
+    with db_stream_cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT
+              tm.fid,
+              tm."textId" AS "textId",
+              tm.part,
+              tm."sourceText" AS "sourceText",
+              tm."translatedText" AS "translatedText"
+            FROM text_main tm
+            ORDER BY tm.fid ASC, tm.part ASC
+            """
+        )
+
+        def iter_rows() -> Iterator[Dict[str, Any]]:
+            while True:
+                rows = cursor.fetchmany(fetch_batch_size)
+                if not rows:
+                    return
+                yield from rows
+
+        yield from _iter_merged_fids(iter_rows())
+
+
+def _load_changed_fids(since: datetime) -> List[str]:
+    with db_cursor() as cursor:
+        cursor.execute(
+            'SELECT DISTINCT fid FROM text_main WHERE "uptTime" >= %s',
+            (since,),
+        )
+        return [row["fid"] for row in cursor.fetchall()]
+
+
+def _load_merged_for_fids(fids: List[str]) -> Dict[str, str]:
+    merged: Dict[str, str] = {}
+    with db_cursor() as cursor:
+        for offset in range(0, len(fids), _CHANGED_FID_BATCH_SIZE):
+            batch = fids[offset : offset + _CHANGED_FID_BATCH_SIZE]
+            placeholders = ",".join(["%s"] * len(batch))
+            cursor.execute(
+                f"""
+                SELECT
+                  tm.fid,
+                  tm."textId" AS "textId",
+                  tm.part,
+                  tm."sourceText" AS "sourceText",
+                  tm."translatedText" AS "translatedText"
+                FROM text_main tm
+                WHERE tm.fid IN ({placeholders})
+                ORDER BY tm.fid ASC, tm.part ASC
+                """,
+                tuple(batch),
+            )
+            for fid, translation in _iter_merged_fids(iter(cursor.fetchall())):
+                merged[fid] = translation
+    return merged
+
+
+def _plan_incremental(
+    previous: Optional[PackageArtifact],
+    watermark: Dict[str, Any],
+    config: Dict[str, Any],
+) -> Optional[List[str]]:
+    """返回需重建的 fid 列表；返回 None 表示必须全量构建。"""
+    if previous is None:
+        return None
+    # 服务端只改写译文，不增删行；最大主键变化说明版本迭代替换过数据，fid 集合可能变化
+    if previous.max_id != watermark["maxId"]:
+        return None
+    full_built_at = datetime.fromisoformat(previous.full_built_at)
+    if datetime.now() - full_built_at > timedelta(seconds=config["package_cache_full_rebuild_seconds"]):
+        return None
+    # 上一代产物在 checked_at 读取计数之后才构建，之后提交的写入都需重建；
+    # uptTime 取自语句开始时间，回看窗口覆盖在 checked_at 之前执行、之后才提交的事务
+    since = datetime.fromisoformat(previous.checked_at) - timedelta(seconds=config["package_cache_overlap_seconds"])
+    changed_fids = _load_changed_fids(since)
+    if len(changed_fids) > config["package_cache_incremental_max_fids"]:
+        return None
+    return changed_fids
+
+
+def _build_artifact(previous: Optional[PackageArtifact], watermark: Dict[str, Any]) -> PackageArtifact:
+    config = _get_cache_config()
+    cache_dir = config["package_cache_dir"]
+    os.makedirs(cache_dir, exist_ok=True)
+    etag = _build_etag(watermark)
+    rows_path = os.path.join(cache_dir, f"package_{etag}.jsonl")
+    xlsx_path = os.path.join(cache_dir, f"package_{etag}.xlsx")
+    started_at = perf_counter()
+
+    changed_fids = _plan_incremental(previous, watermark, config)
+    now_text = datetime.now().isoformat()
+    try:
+        if changed_fids is None:
+            mode = "full"
+            fid_count = _write_rows_file(rows_path, _stream_all_merged(config["download_fetch_batch_size"]))
+            full_built_at = now_text
+        else:
+            mode = "incremental"
+            replacements = _load_merged_for_fids(changed_fids)
+            merged = (
+                (fid, replacements.get(fid, translation)) for fid, translation in _iter_rows_file(previous.rows_path)
+            )
+            fid_count = _write_rows_file(rows_path, merged)
+            full_built_at = previous.full_built_at
+        rows_elapsed = perf_counter() - started_at
+        _write_xlsx(rows_path, xlsx_path)
+    except Exception:
+        for path in (rows_path, xlsx_path):
+            with suppress(FileNotFoundError):
+                os.remove(path)
+        raise
+
+    artifact = PackageArtifact(
+        etag=etag,
+        generation=watermark["generation"],
+        max_id=watermark["maxId"],
+        checked_at=watermark["checkedAt"],
+        fid_count=fid_count,
+        xlsx_path=xlsx_path,
+        rows_path=rows_path,
+        built_at=now_text,
+        full_built_at=full_built_at,
+    )
+    _save_manifest(cache_dir, artifact)
+    keep_paths = [rows_path, xlsx_path]
+    if previous is not None:
+        keep_paths.extend([previous.rows_path, previous.xlsx_path])
+    _cleanup_stale_files(cache_dir, keep_paths)
+    logger.info(
+        "package cache built: mode={} etag={} fidRows={} changedFids={} rowsElapsedSec={:.3f} totalElapsedSec={:.3f}",
+        mode,
+        etag,
+        fid_count,
+        len(changed_fids) if changed_fids is not None else "-",
+        rows_elapsed,
+        perf_counter() - started_at,
+    )
+    return artifact
+
+
+def get_package_artifact() -> PackageArtifact:
+    """返回与当前变更计数一致的汉化包产物，过期时在锁内增量/全量重建。
+    计数在构建前读取：写入在提交后才递增计数，构建期间提交的写入会使计数前进，下次检查时再次重建。
+    并发调用方会等待同一次构建完成后直接复用其结果。
+    """
+    global _artifact, _artifact_loaded
+    watermark = _read_watermark()
+    current = _artifact
+    if current is not None and _matches(current, watermark):
+        return current
+
+    with _build_lock:
+        if not _artifact_loaded:
+            _artifact = _load_manifest(_get_cache_config()["package_cache_dir"])
+            _artifact_loaded = True
+        watermark = _read_watermark()
+        if _artifact is not None and _matches(_artifact, watermark):
+            return _artifact
+        _artifact = _build_artifact(_artifact, watermark)
+        return _artifact
+
+
+def refresh_package_cache() -> None:
+    started_at = monotonic()
+    artifact = get_package_artifact()
+    logger.debug(
+        "package cache refresh checked: etag={} elapsedSec={:.3f}",
+        artifact.etag,
+        monotonic() - started_at,
+    )
+
+
+async def _run_refresher(interval_seconds: int) -> None:
+    logger.info("package cache refresher started: intervalSeconds={}", interval_seconds)
+    while True:
+        try:
+            await asyncio.to_thread(refresh_package_cache)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            logger.exception("package cache refresh failed: {}", error)
+        await asyncio.sleep(interval_seconds)
+
+
+def start_package_cache_refresher() -> None:
+    global _refresher_task
+    config = _get_cache_config()
+    if not config["package_cache_enabled"] or config["package_cache_refresh_interval_seconds"] == 0:
+        logger.info("package cache refresher disabled by config")
+        return
+    if _refresher_task is not None and not _refresher_task.done():
+        return
+    _refresher_task = asyncio.create_task(
+        _run_refresher(config["package_cache_refresh_interval_seconds"]),
+        name="package-cache-refresher",
+    )
+
+
+async def stop_package_cache_refresher() -> None:
+    global _refresher_task
+    if _refresher_task is None:
+        return
+    _refresher_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await _refresher_task
+    _refresher_task = None
@@ -0,0 +1,224 @@
+# 文本模板异步上传任务：进程内任务表 + 后台线程池。
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from ..config import get_config
+
+UPLOAD_JOB_STATUS_QUEUED = "queued"
+UPLOAD_JOB_STATUS_RUNNING = "running"
+UPLOAD_JOB_STATUS_SUCCEEDED = "succeeded"
+UPLOAD_JOB_STATUS_FAILED = "failed"
+_FINISHED_STATUSES = {UPLOAD_JOB_STATUS_SUCCEEDED, UPLOAD_JOB_STATUS_FAILED}
+
+
+class UploadJobLimitError(Exception):
+    """未完成任务数达到上限。"""
+
+
+@dataclass
+class UploadJob:
+    id: str
+    user_id: int
+    file_name: str
+    reason: Optional[str]
+    file_path: str
+    max_errors: int
+    status: str = UPLOAD_JOB_STATUS_QUEUED
+    phase: str = "queued"
+    total_rows: int = 0
+    processed_rows: int = 0
+    updated_count: int = 0
+    skipped_count: int = 0
+    corrected_count: int = 0
+    error_count: int = 0
+    # 写入按块提交：partial_apply 表示任务超过一块、失败时可能只写入部分；applied_rows 为已提交的行数
+    partial_apply: bool = False
+    applied_rows: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    message: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    finished_monotonic: Optional[float] = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def set_phase(self, phase: str, total_rows: Optional[int] = None) -> None:
+        with self.lock:
+            self.phase = phase
+            self.processed_rows = 0
+            if total_rows is not None:
+                self.total_rows = total_rows
+
+    def advance(self, rows: int) -> None:
+        with self.lock:
+            self.processed_rows += rows
+
+    def add_error(self, row_number: Optional[int], message: str) -> None:
+        """记录行级错误，超过上限只计数不保存明细。"""
+        with self.lock:
+            self.error_count += 1
+            if len(self.errors) < self.max_errors:
+                self.errors.append({"rowNumber": row_number, "message": message})
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "id": self.id,
+                "fileName": self.file_name,
+                "status": self.status,
+                "phase": self.phase,
+                "totalRows": self.total_rows,
+                "processedRows": self.processed_rows,
+                "updatedCount": self.updated_count,
+                "skippedCount": self.skipped_count,
+                "correctedCount": self.corrected_count,
+                "errorCount": self.error_count,
+                "partialApply": self.partial_apply,
+                "appliedRows": self.applied_rows,
+                "errors": list(self.errors),
+                "message": self.message,
+                "createdAt": self.created_at,
+                "startedAt": self.started_at,
+                "finishedAt": self.finished_at,
+            }
+
+
+_jobs: Dict[str, UploadJob] = {}
+_jobs_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            workers = get_config()["text_import_export"]["upload_job_workers"]
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="text-upload-job")
+        return _executor
+
+
+def _prune_finished_jobs(retention_seconds: int) -> None:
+    now = monotonic()
+    expired = [
+        job_id
+        for job_id, job in _jobs.items()
+        if job.finished_monotonic is not None and now - job.finished_monotonic > retention_seconds
+    ]
+    for job_id in expired:
+        del _jobs[job_id]
+
+
+def _cleanup_job_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+
+
+def _mark_finished(job: UploadJob, job_status: str, message: Optional[str]) -> None:
+    """调用方需持有 job.lock。"""
+    job.status = job_status
+    job.message = message
+    job.finished_at = datetime.now()
+    job.finished_monotonic = monotonic()
+
+
+def _finish_job(job: UploadJob, job_status: str, message: Optional[str]) -> None:
+    with job.lock:
+        _mark_finished(job, job_status, message)
+
+
+def _run_job(job: UploadJob, runner: Callable[[UploadJob], Optional[str]]) -> None:
+    with job.lock:
+        # 关闭服务时排队任务可能已被标记为失败
+        if job.status != UPLOAD_JOB_STATUS_QUEUED:
+            return
+        job.status = UPLOAD_JOB_STATUS_RUNNING
+        job.started_at = datetime.now()
+    started_at = monotonic()
+    logger.info("upload job start: jobId={} fileName={} userId={}", job.id, job.file_name, job.user_id)
+    # 先删除临时文件再标记结束，轮询方看到结束状态时文件一定已清理
+    try:
+        failure = runner(job)
+    except Exception as error:
+        logger.exception("upload job crashed: jobId={} error={}", job.id, error)
+        _cleanup_job_file(job.file_path)
+        _finish_job(job, UPLOAD_JOB_STATUS_FAILED, f"上传任务执行失败: {error}")
+    else:
+        _cleanup_job_file(job.file_path)
+        if failure is None:
+            _finish_job(job, UPLOAD_JOB_STATUS_SUCCEEDED, None)
+        else:
+            _finish_job(job, UPLOAD_JOB_STATUS_FAILED, failure)
+
+    logger.info(
+        "upload job done: jobId={} status={} updatedCount={} skippedCount={} errorCount={} elapsedSec={:.3f}",
+        job.id,
+        job.status,
+        job.updated_count,
+        job.skipped_count,
+        job.error_count,
+        monotonic() - started_at,
+    )
+
+
+def submit_upload_job(
+    user_id: int,
+    file_name: str,
+    reason: Optional[str],
+    file_path: str,
+    runner: Callable[[UploadJob], Optional[str]],
+) -> UploadJob:
+    """登记并提交上传任务；runner 返回 None 表示成功，返回字符串表示失败原因。"""
+    config = get_config()["text_import_export"]
+    executor = _get_executor()
+    with _jobs_lock:
+        _prune_finished_jobs(config["upload_job_retention_seconds"])
+        active_count = sum(1 for job in _jobs.values() if job.status not in _FINISHED_STATUSES)
+        if active_count >= config["upload_job_max_active"]:
+            raise UploadJobLimitError(f"未完成的上传任务已达上限（{config['upload_job_max_active']}），请稍后重试")
+        job = UploadJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            file_name=file_name,
+            reason=reason,
+            file_path=file_path,
+            max_errors=config["upload_job_max_errors"],
+        )
+        _jobs[job.id] = job
+    executor.submit(_run_job, job, runner)
+    return job
+
+
+def get_upload_job(job_id: str) -> Optional[UploadJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def shutdown_upload_jobs() -> None:
+    """停止接收新任务并取消排队中的任务（标记为失败），运行中的任务由线程自然结束。"""
+    global _executor
+    with _jobs_lock:
+        executor = _executor
+        _executor = None
+        queued_jobs = [job for job in _jobs.values() if job.status == UPLOAD_JOB_STATUS_QUEUED]
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+    for job in queued_jobs:
+        # 检查、删除文件与标记失败在同一次持锁内完成：工作线程要么已切到运行中（此处跳过），
+        # 要么之后在 _run_job 中看到失败状态直接返回，不会读到已删除的文件或被覆盖结束状态
+        with job.lock:
+            if job.status != UPLOAD_JOB_STATUS_QUEUED:
+                continue
+            _cleanup_job_file(job.file_path)
+            _mark_finished(job, UPLOAD_JOB_STATUS_FAILED, "服务正在关闭，上传任务已取消，请稍后重新上传")
@@ -7,6 +7,7 @@ import pytest
 
 from server.config import get_config
 from server.db import db_cursor
+from server.services.list_totals import reset_total_cache
 
 
 def pytest_addoption(parser):
@@ -46,6 +47,7 @@ def ensure_tables(config: Dict[str, object], request):
         "role_permissions",
         "text_main",
         "text_claims",
+        "text_latest_claim",
         "text_locks",
         "text_changes",
         "dictionary_entries",
@@ -66,6 +68,8 @@ def ensure_tables(config: Dict[str, object], request):
                 raise RuntimeError(f"缺少数据表: {table}，请先执行迁移")
         for table in required_tables:
             cursor.execute(f"TRUNCATE TABLE {table}")
+    # 用例直接写库不经过写代次递增，清空总数缓存避免读到上个用例的计数
+    reset_total_cache()
     yield
 
 
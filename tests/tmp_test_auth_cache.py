@@ -0,0 +1,132 @@
+# 鉴权 token/用户缓存测试（不依赖数据库）。
+import time
+
+import pytest
+
+from server.config import loader
+from server.services import auth as auth_service
+
+pytestmark = pytest.mark.no_db
+
+
+@pytest.fixture(autouse=True)
+def auth_config(monkeypatch):
+    config = {
+        "auth": {
+            "hash_algorithm": "sha256",
+            "salt_bytes": 16,
+            "token_secret": "test-secret",
+            "token_ttl_seconds": 3600,
+            "cache_ttl_seconds": 60,
+            "cache_max_entries": 2,
+        }
+    }
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", config)
+    monkeypatch.setattr(auth_service, "_token_cache", None)
+    monkeypatch.setattr(auth_service, "_user_cache", None)
+    return config
+
+
+def _issue(user_id: int, exp_offset: int = 3600) -> str:
+    now = int(time.time())
+    return auth_service.issue_token({"sub": user_id, "iat": now, "exp": now + exp_offset})
+
+
+def test_verify_token_cached_verifies_once_per_token(monkeypatch):
+    token = _issue(1)
+    calls = []
+    original = auth_service.verify_token
+
+    def counting_verify(value):
+        calls.append(value)
+        return original(value)
+
+    monkeypatch.setattr(auth_service, "verify_token", counting_verify)
+
+    assert auth_service.verify_token_cached(token)["sub"] == 1
+    assert auth_service.verify_token_cached(token)["sub"] == 1
+    assert len(calls) == 1
+    assert auth_service.get_auth_cache_stats()["token"] == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_verify_token_cached_does_not_cache_invalid_token():
+    data, _ = _issue(1).split(".")
+    with pytest.raises(auth_service.AuthError, match="签名无效"):
+        auth_service.verify_token_cached(f"{data}.{auth_service._encode_part(b'forged')}")
+    assert auth_service.get_auth_cache_stats()["token"]["size"] == 0
+
+
+def test_get_user_by_id_cached_and_invalidate(monkeypatch):
+    lookups = []
+
+    def fake_get_user_by_id(user_id):
+        lookups.append(user_id)
+        return {"id": user_id, "username": f"user{user_id}", "isGuest": False}
+
+    monkeypatch.setattr(auth_service, "get_user_by_id", fake_get_user_by_id)
+    token = _issue(7)
+    auth_service.verify_token_cached(token)
+
+    assert auth_service.get_user_by_id_cached(7)["username"] == "user7"
+    assert auth_service.get_user_by_id_cached(7)["username"] == "user7"
+    assert lookups == [7]
+
+    auth_service.invalidate_user(7)
+    assert auth_service.get_auth_cache_stats()["token"]["size"] == 0
+    auth_service.get_user_by_id_cached(7)
+    assert lookups == [7, 7]
+
+
+def test_cache_evicts_least_recently_used():
+    cache = auth_service._TtlLruCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cache_entry_expires_with_ttl():
+    cache = auth_service._TtlLruCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1, ttl_seconds=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_resolve_from_cache_only_after_warm_up(monkeypatch):
+    from server.routes import deps
+
+    token = _issue(5)
+    authorization = f"Bearer {token}"
+    monkeypatch.setattr(auth_service, "get_user_by_id", lambda user_id: {"id": user_id, "username": "u5", "isGuest": False})
+
+    assert deps.try_resolve_auth_user_from_cache(None) == (None, None)
+    assert deps.try_resolve_auth_user_from_cache("Token abc") == (None, "缺少 Bearer token")
+    assert deps.try_resolve_auth_user_from_cache(authorization) is None
+
+    assert deps.try_resolve_auth_user(authorization) == ({"userId": 5, "username": "u5"}, None)
+    assert deps.try_resolve_auth_user_from_cache(authorization) == ({"userId": 5, "username": "u5"}, None)
+
+
+def test_middleware_auth_runs_blocking_lookup_off_event_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    from server import app as app_module
+
+    loop_thread = threading.get_ident()
+    lookup_threads = []
+
+    def slow_lookup(user_id):
+        lookup_threads.append(threading.get_ident())
+        time.sleep(0.01)
+        return {"id": user_id, "username": f"u{user_id}", "isGuest": False}
+
+    monkeypatch.setattr(auth_service, "get_user_by_id", slow_lookup)
+    result = asyncio.run(app_module.resolve_request_auth(f"Bearer {_issue(6)}"))
+
+    assert result == ({"userId": 6, "username": "u6"}, None)
+    assert lookup_threads and lookup_threads[0] != loop_thread
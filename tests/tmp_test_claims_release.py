@@ -40,3 +40,41 @@ def test_release_claim(seed_user):
     response = client.delete(f"/claims/{claim_id}", headers=headers)
     assert response.status_code == 200
     assert response.json()["data"]["id"] == claim_id
+
+
+def test_claim_projection_in_listing(seed_user):
+    with db_cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO text_main (fid, "textId", part, "sourceText", "translatedText", status, "editCount")
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            ("file_b", 2001, 1, "hello", None, 1, 0),
+        )
+        text_id = cursor.lastrowid
+
+    client = TestClient(app)
+    token = _login(client, seed_user)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.post("/claims", json={"id": text_id}, headers=headers)
+    assert response.status_code == 200
+    claim_id = response.json()["data"]["claimId"]
+
+    response = client.get("/texts", params={"fid": "file_b", "claimer": seed_user["username"]}, headers=headers)
+    assert response.status_code == 200
+    items = response.json()["data"]["items"]
+    assert [item["id"] for item in items] == [text_id]
+    assert items[0]["claimId"] == claim_id
+    assert items[0]["claimedBy"] == seed_user["username"]
+    assert items[0]["isClaimed"] is True
+
+    response = client.delete(f"/claims/{claim_id}", headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/texts", params={"fid": "file_b", "claimed": "false"}, headers=headers)
+    assert response.status_code == 200
+    items = response.json()["data"]["items"]
+    assert [item["id"] for item in items] == [text_id]
+    assert items[0]["claimId"] is None
+    assert items[0]["isClaimed"] is False
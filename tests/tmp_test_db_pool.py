@@ -0,0 +1,129 @@
+# 数据库连接池测试（不依赖真实数据库）。
+import threading
+
+import pytest
+
+from server.db import ConnectionPool, DatabasePoolTimeoutError
+
+pytestmark = pytest.mark.no_db
+
+
+class _FakeConnection:
+    def __init__(self, index: int):
+        self.index = index
+        self.open = True
+        self.ping_error = False
+
+    def ping(self, reconnect: bool = False):
+        if self.ping_error:
+            raise RuntimeError("gone away")
+
+    def close(self):
+        self.open = False
+
+
+def _build_pool(**overrides):
+    created = []
+
+    def connect():
+        connection = _FakeConnection(len(created) + 1)
+        created.append(connection)
+        return connection
+
+    options = {
+        "size": 2,
+        "max_overflow": 1,
+        "timeout_seconds": 0.05,
+        "idle_recycle_seconds": 60,
+        "pre_ping": True,
+    }
+    options.update(overrides)
+    return ConnectionPool(connect, **options), created
+
+
+def test_pool_reuses_released_connection():
+    pool, created = _build_pool()
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+
+    assert second is first
+    assert len(created) == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_pool_closes_overflow_connection_on_release():
+    pool, created = _build_pool()
+    connections = [pool.acquire() for _ in range(3)]
+    assert pool.stats()["inUse"] == 3
+
+    for connection in connections:
+        pool.release(connection)
+
+    stats = pool.stats()
+    assert stats["idle"] == 2
+    assert stats["total"] == 2
+    assert created[2].open is False
+
+
+def test_pool_times_out_when_exhausted():
+    pool, _ = _build_pool(size=1, max_overflow=0)
+    pool.acquire()
+
+    with pytest.raises(DatabasePoolTimeoutError):
+        pool.acquire()
+    assert pool.stats()["checkoutTimeouts"] == 1
+
+
+def test_pool_waiter_receives_released_connection():
+    pool, _ = _build_pool(size=1, max_overflow=0, timeout_seconds=2)
+    holder = pool.acquire()
+    acquired = []
+
+    def worker():
+        acquired.append(pool.acquire())
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    while pool.stats()["waiting"] == 0:
+        pass
+    pool.release(holder)
+    thread.join(timeout=2)
+
+    assert acquired == [holder]
+
+
+def test_pool_replaces_connection_failing_pre_ping():
+    pool, created = _build_pool()
+    first = pool.acquire()
+    pool.release(first)
+    first.ping_error = True
+
+    second = pool.acquire()
+
+    assert second is not first
+    assert first.open is False
+    assert len(created) == 2
+    assert pool.stats()["recycled"] == 1
+
+
+def test_pool_recycles_idle_connection():
+    pool, created = _build_pool(idle_recycle_seconds=0, pre_ping=False)
+    first = pool.acquire()
+    pool.release(first)
+
+    second = pool.acquire()
+
+    assert second is not first
+    assert len(created) == 2
+
+
+def test_pool_discard_drops_connection():
+    pool, _ = _build_pool()
+    connection = pool.acquire()
+    pool.release(connection, discard=True)
+
+    stats = pool.stats()
+    assert connection.open is False
+    assert stats["total"] == 0
+    assert stats["discarded"] == 1
@@ -0,0 +1,165 @@
+# SQL 剖析测试。
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from loguru import logger
+
+from server import app as app_module
+from server import db_profiler
+from server.config import get_config, loader
+from server.db import db_cursor
+
+
+def _profiler_config(**overrides):
+    profiler = {
+        "enabled": True,
+        "slow_query_ms": 100,
+        "explain_slow_queries": True,
+        "explain_cooldown_seconds": 300,
+        "summary_top_n": 2,
+    }
+    profiler.update(overrides)
+    return {"database": {"profiler": profiler}}
+
+
+@pytest.fixture
+def captured_logs():
+    messages = []
+    handler_id = logger.add(lambda message: messages.append(message.record["message"]), level="INFO")
+    yield messages
+    logger.remove(handler_id)
+
+
+class _FakeCursor:
+    def __init__(self, plan_rows):
+        self.connection = self
+        self.plan_rows = plan_rows
+        self.explained = []
+
+    def mogrify(self, query, args):
+        return query.replace("%s", "'{}'").format(*args)
+
+    # 作为 connection.cursor(DictCursor) 返回的游标
+    def cursor(self, _cursor_class):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement):
+        self.explained.append(statement)
+
+    def fetchall(self):
+        return self.plan_rows
+
+
+@pytest.mark.no_db
+def test_fingerprint_normalizes_literals_and_lists():
+    first = db_profiler.fingerprint_sql(
+        'SELECT id FROM text_main  WHERE "textId" IN (%s, %s, %s) AND status = 3 -- hot\n AND fid = \'a\''
+    )
+    second = db_profiler.fingerprint_sql('SELECT id FROM text_main WHERE "textId" IN (%s) AND status = 1 AND fid = %s')
+
+    assert first == 'SELECT id FROM text_main WHERE "textId" IN (?+) AND status = ? AND fid = ?'
+    assert second == 'SELECT id FROM text_main WHERE "textId" IN (?) AND status = ? AND fid = ?'
+    assert db_profiler.fingerprint_sql("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)") == "INSERT INTO t (a, b) VALUES (?+)"
+
+
+@pytest.mark.no_db
+def test_request_profile_summary_ranks_by_total_time(monkeypatch, captured_logs):
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", _profiler_config(slow_query_ms=10000))
+    profile, token = db_profiler.start_request_profile()
+    cursor = _FakeCursor([])
+    db_profiler.profile_statement(cursor, "SELECT 1 FROM a WHERE id = %s", (1,), 0.010, 1, False)
+    db_profiler.profile_statement(cursor, "SELECT 1 FROM a WHERE id = %s", (2,), 0.030, 1, False)
+    db_profiler.profile_statement(cursor, "UPDATE b SET x = %s", (1,), 0.005, 3, False)
+    db_profiler.profile_statement(cursor, "DELETE FROM c", None, 0.001, 0, False)
+
+    summary = profile.summary(2)
+    db_profiler.reset_request_profile(token)
+    db_profiler.log_request_profile(profile)
+
+    assert (summary["statements"], summary["distinct"], summary["rows"]) == (4, 3, 5)
+    assert [item["sql"] for item in summary["top"]] == ["SELECT ? FROM a WHERE id = ?", "UPDATE b SET x = ?"]
+    assert summary["top"][0] == {"sql": "SELECT ? FROM a WHERE id = ?", "count": 2, "totalMs": 40.0, "maxMs": 30.0, "rows": 2}
+    assert any(message.startswith("HTTP request sql summary: statements=4") for message in captured_logs)
+    assert cursor.explained == []
+
+
+@pytest.mark.no_db
+def test_slow_statement_logs_explain_once_per_cooldown(monkeypatch, captured_logs):
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", _profiler_config())
+    monkeypatch.setattr(db_profiler, "_explained_at", {})
+    cursor = _FakeCursor([{"table": "text_main", "type": "ALL", "key": None, "rows": 90000, "filtered": 10.0, "Extra": "Using where"}])
+
+    db_profiler.profile_statement(cursor, "SELECT * FROM text_main WHERE fid = %s", ("f1",), 0.5, 7, False)
+    db_profiler.profile_statement(cursor, "SELECT * FROM text_main WHERE fid = %s", ("f2",), 0.5, 7, False)
+    db_profiler.profile_statement(cursor, "SET @x = %s", (1,), 0.5, 0, False)
+
+    assert cursor.explained == ["EXPLAIN SELECT * FROM text_main WHERE fid = 'f1'"]
+    slow_logs = [message for message in captured_logs if message.startswith("slow sql:")]
+    assert len(slow_logs) == 3
+    assert "type=ALL key=None rows=90000" in slow_logs[0]
+    assert slow_logs[1].endswith("plan=None")
+
+
+@pytest.mark.no_db
+def test_request_summary_includes_streamed_body_statements(monkeypatch, captured_logs):
+    profiler = get_config()["database"]["profiler"]
+    monkeypatch.setitem(profiler, "enabled", True)
+    monkeypatch.setitem(profiler, "slow_query_ms", 10000)
+    cursor = _FakeCursor([])
+    demo = FastAPI()
+    app_module._register_logging_middleware(demo)
+
+    @demo.get("/export")
+    def export():
+        def rows():
+            for index in range(3):
+                db_profiler.profile_statement(cursor, "SELECT id FROM text_main WHERE id > %s", (index,), 0.01, 1, True)
+                yield f"row{index}\n"
+
+        db_profiler.profile_statement(cursor, "SELECT 1", None, 0.01, 1, False)
+        return StreamingResponse(rows(), media_type="text/plain")
+
+    assert TestClient(demo).get("/export").status_code == 200
+
+    summaries = [message for message in captured_logs if message.startswith("HTTP request sql summary:")]
+    assert len(summaries) == 1
+    assert summaries[0].startswith("HTTP request sql summary: statements=4 distinct=2")
+    # 汇总在响应体发送完毕后输出，位于请求结束日志之后
+    assert captured_logs.index(summaries[0]) > next(
+        index for index, message in enumerate(captured_logs) if message.startswith("HTTP request end:")
+    )
+
+
+@pytest.mark.no_db
+def test_disabled_profiler_records_nothing(monkeypatch):
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", _profiler_config(enabled=False))
+    assert db_profiler.start_request_profile() == (None, None)
+    cursor = _FakeCursor([])
+    db_profiler.profile_statement(cursor, "SELECT 1", None, 10.0, 1, False)
+    assert cursor.explained == []
+
+
+def test_db_cursor_profiles_statements_with_real_explain(monkeypatch, captured_logs):
+    profiler = get_config()["database"]["profiler"]
+    monkeypatch.setitem(profiler, "enabled", True)
+    monkeypatch.setitem(profiler, "slow_query_ms", 0)
+    monkeypatch.setattr(db_profiler, "_explained_at", {})
+
+    profile, token = db_profiler.start_request_profile()
+    with db_cursor() as cursor:
+        cursor.execute("SELECT id FROM text_main WHERE fid = %s", ("profiler_fid",))
+        cursor.fetchall()
+    summary = profile.summary(5)
+    db_profiler.reset_request_profile(token)
+    db_profiler.log_request_profile(profile)
+
+    assert summary["top"][0]["sql"] == "SELECT id FROM text_main WHERE fid = ?"
+    slow_logs = [message for message in captured_logs if message.startswith("slow sql:")]
+    assert slow_logs and "table=text_main" in slow_logs[0]
@@ -0,0 +1,149 @@
+# 只读副本路由测试（不依赖真实数据库）。
+import pymysql
+import pytest
+
+from server import db
+from server.config import loader
+
+pytestmark = pytest.mark.no_db
+
+
+class _FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, args=None):
+        self.connection.executed.append(query)
+        if self.connection.state.get("fail_queries"):
+            raise pymysql.OperationalError(*self.connection.state["fail_queries"])
+        if query == "SHOW REPLICA STATUS":
+            self._row = self.connection.state.get("status")
+        else:
+            self._row = {"server": self.connection.server}
+
+    def fetchone(self):
+        return self._row
+
+    def close(self):
+        pass
+
+
+class _FakeConnection:
+    def __init__(self, server, state):
+        self.server = server
+        self.state = state
+        self.open = True
+        self.executed = []
+
+    def cursor(self, _cursor_class=None):
+        return _FakeCursor(self)
+
+    def ping(self, reconnect=False):
+        if self.state.get("down"):
+            raise pymysql.OperationalError(2006, "MySQL server has gone away")
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.open = False
+
+
+def _fake_pool(server, state):
+    def connect():
+        if state.get("down"):
+            raise pymysql.OperationalError(2003, "Can't connect")
+        return _FakeConnection(server, state)
+
+    return db.ConnectionPool(connect, size=2, max_overflow=0, timeout_seconds=1, idle_recycle_seconds=60, pre_ping=True)
+
+
+@pytest.fixture
+def routing(monkeypatch):
+    config = {
+        "database": {
+            "read_routing": {"max_lag_seconds": 5, "lag_check_interval_seconds": 0, "read_your_writes_seconds": 60},
+        }
+    }
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", config)
+    replica_state = {"status": {"Seconds_Behind_Source": 1}}
+    monkeypatch.setattr(db, "_pool", _fake_pool("primary", {}))
+    monkeypatch.setattr(db, "_read_replicas", [db._ReadReplica("replica:3306", _fake_pool("replica", replica_state))])
+    monkeypatch.setattr(db, "_recent_writes", {})
+    return replica_state
+
+
+def _read_server(user_id=None):
+    with db.db_read_cursor(user_id) as cursor:
+        cursor.execute("SELECT 1")
+        return cursor.fetchone()["server"]
+
+
+def test_reads_go_to_replica_within_lag(routing):
+    assert _read_server(7) == "replica"
+
+    routing["status"] = {"Seconds_Behind_Source": 30}
+    assert _read_server(7) == "primary"
+
+
+def test_read_cursor_reports_its_target(routing):
+    with db.db_read_cursor(7) as cursor:
+        assert db.get_read_target(cursor) == "replica:3306"
+
+    db.mark_user_write(7)
+    with db.db_read_cursor(7) as cursor:
+        assert db.get_read_target(cursor) == db.READ_TARGET_PRIMARY
+
+
+def test_read_your_writes_pins_user_to_primary(routing):
+    db.mark_user_write(7)
+
+    assert _read_server(7) == "primary"
+    assert _read_server(8) == "replica"
+
+
+def test_stopped_replication_and_unreachable_replica_fall_back(routing):
+    routing["status"] = {"Seconds_Behind_Source": None}
+    assert _read_server() == "primary"
+
+    routing["status"] = None
+    routing["down"] = True
+    assert _read_server() == "primary"
+
+    routing["down"] = False
+    assert _read_server() == "replica"
+
+
+def test_replica_connection_error_marks_replica_failed(routing, monkeypatch):
+    replica = db._read_replicas[0]
+    assert _read_server() == "replica"
+
+    routing["fail_queries"] = (2013, "Lost connection")
+    monkeypatch.setattr(db, "_is_replica_usable", lambda item, config: item.available)
+    with pytest.raises(pymysql.OperationalError):
+        _read_server()
+
+    assert replica.available is False
+    assert _read_server() == "primary"
+
+
+def test_query_level_error_keeps_replica_available(routing, monkeypatch):
+    replica = db._read_replicas[0]
+    routing["fail_queries"] = (1205, "Lock wait timeout exceeded")
+    monkeypatch.setattr(db, "_is_replica_usable", lambda item, config: item.available)
+    with pytest.raises(pymysql.OperationalError):
+        _read_server()
+
+    assert replica.available is True
+    routing["fail_queries"] = None
+    assert _read_server() == "replica"
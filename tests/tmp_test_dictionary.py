@@ -320,3 +320,97 @@ def test_dictionary_correction_records_lists_abnormal_items(seed_user):
     assert payload["items"][0]["textId"] == "218649171"
     assert payload["items"][0]["sourceMatchCount"] == 1
     assert payload["items"][0]["translatedMatchCount"] == 2
+
+
+def test_dictionary_correction_batch_applies_entries_in_one_scan(seed_user):
+    client = TestClient(app)
+    token = _login(client, seed_user)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    entry_ids = []
+    for payload in (
+        {"termKey": "Bree", "termValue": "布雷", "variantValues": ["布里"], "category": "place"},
+        {"termKey": "Shire", "termValue": "夏尔", "variantValues": ["夏耳"], "category": "place"},
+    ):
+        create = client.post("/dictionary", json=payload, headers=headers)
+        assert create.status_code == 200
+        entry_ids.append(create.json()["data"]["id"])
+
+    with db_cursor() as cursor:
+        cursor.executemany(
+            """
+            INSERT INTO text_main (fid, "textId", part, "sourceText", "translatedText", status, "editCount")
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            [
+                ("file_batch", 17001, 1, "Bree and Shire", "布里和夏耳", 1, 0),
+                ("file_batch", 17002, 1, "Bree Bree", "布里", 1, 0),
+            ],
+        )
+
+    results = dictionary_correction.run_dictionary_correction_batch(entry_ids)
+    assert [result.status for result in results] == [dictionary_correction.CORRECTION_STATUS_DONE] * 2
+    assert [result.updated_text_count for result in results] == [1, 1]
+
+    with db_cursor() as cursor:
+        cursor.execute(
+            'SELECT "textId", "translatedText", "editCount" FROM text_main WHERE fid = %s ORDER BY "textId"',
+            ("file_batch",),
+        )
+        rows = cursor.fetchall()
+        assert [(row["translatedText"], row["editCount"]) for row in rows] == [("布雷和夏尔", 2), ("布里", 0)]
+        cursor.execute(
+            'SELECT "correctionStatus", "correctionLastError" FROM dictionary_entries WHERE id = %s',
+            (entry_ids[0],),
+        )
+        entry = cursor.fetchone()
+        assert entry["correctionStatus"] == dictionary_correction.CORRECTION_STATUS_DONE
+        assert entry["correctionLastError"] == "存在 1 条异常记录，请查看纠错异常记录"
+
+
+def test_dictionary_correction_resumes_from_saved_progress(seed_user):
+    client = TestClient(app)
+    token = _login(client, seed_user)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    create = client.post(
+        "/dictionary",
+        json={"termKey": "Rivendell", "termValue": "幽谷", "variantValues": ["瑞文戴尔"], "category": "place"},
+        headers=headers,
+    )
+    assert create.status_code == 200
+    entry_id = create.json()["data"]["id"]
+
+    text_ids = []
+    with db_cursor() as cursor:
+        for text_id in (17101, 17102):
+            cursor.execute(
+                """
+                INSERT INTO text_main (fid, "textId", part, "sourceText", "translatedText", status, "editCount")
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """,
+                ("file_resume", text_id, 1, "To Rivendell", "前往瑞文戴尔", 1, 0),
+            )
+            text_ids.append(cursor.lastrowid)
+        # 模拟上次执行在处理完第一行后中断
+        cursor.execute(
+            """
+            UPDATE dictionary_entries
+            SET "correctionStatus" = %s, "correctionProgressVersion" = "correctionVersion", "correctionProgressTextId" = %s
+            WHERE id = %s
+            """,
+            (dictionary_correction.CORRECTION_STATUS_FAILED, text_ids[0], entry_id),
+        )
+
+    result = dictionary_correction.run_dictionary_correction(entry_id)
+    assert result.status == dictionary_correction.CORRECTION_STATUS_DONE
+    assert result.updated_text_count == 1
+
+    with db_cursor() as cursor:
+        cursor.execute(
+            'SELECT id, "translatedText" FROM text_main WHERE fid = %s ORDER BY id',
+            ("file_resume",),
+        )
+        assert [row["translatedText"] for row in cursor.fetchall()] == ["前往瑞文戴尔", "前往幽谷"]
+        cursor.execute('SELECT "correctionProgressTextId" FROM dictionary_entries WHERE id = %s', (entry_id,))
+        assert cursor.fetchone()["correctionProgressTextId"] == text_ids[1]
@@ -23,32 +23,335 @@ def test_normalize_variant_values_rejects_non_string_items():
         dictionary_correction.normalize_variant_values('["skill1", 2]')
 
 
-def test_count_non_overlapping_occurrences():
-    assert dictionary_correction._count_non_overlapping_occurrences("Bree Bree Bree", "Bree") == 3
-    assert dictionary_correction._count_non_overlapping_occurrences("aaaa", "aa") == 2
-
-
-def test_build_text_correction_analysis_matches_counts_and_replaces_variants():
-    result = dictionary_correction._build_text_correction_analysis(
-        "Bree-pony from Bree",
-        "布里小马回到布里",
-        "Bree",
-        ["布里"],
-        "布雷",
+def test_count_terms_counts_non_overlapping_occurrences():
+    index = dictionary_correction.CompiledCorrectionIndex(
+        [
+            dictionary_correction.CorrectionRule(1, "Bree", "布雷", ("布里",)),
+            dictionary_correction.CorrectionRule(2, "aa", "x", ("y",)),
+        ]
     )
-    assert result.source_match_count == 2
-    assert result.translated_match_count == 2
-    assert result.after_text == "布雷小马回到布雷"
-
-
-def test_build_text_correction_analysis_uses_longest_variant_first():
-    result = dictionary_correction._build_text_correction_analysis(
-        "Bree Bree",
-        "布里镇和布里",
-        "Bree",
-        ["布里", "布里镇"],
-        "布雷",
+    assert index.count_terms("Bree Bree Bree") == [3, 0]
+    assert index.count_terms("aaaa") == [0, 2]
+
+
+def test_plan_row_corrections_matches_counts_and_replaces_variants():
+    index = dictionary_correction.CompiledCorrectionIndex(
+        [dictionary_correction.CorrectionRule(1, "Bree", "布雷", ("布里",))]
+    )
+    (step,) = dictionary_correction._plan_row_corrections(index, "Bree-pony from Bree", "布里小马回到布里")
+    assert step.source_match_count == 2
+    assert step.translated_match_count == 2
+    assert step.after_text == "布雷小马回到布雷"
+
+
+def test_plan_row_corrections_uses_longest_variant_first():
+    index = dictionary_correction.CompiledCorrectionIndex(
+        [dictionary_correction.CorrectionRule(1, "Bree", "布雷", ("布里", "布里镇"))]
+    )
+    (step,) = dictionary_correction._plan_row_corrections(index, "Bree Bree", "布里镇和布里")
+    assert step.source_match_count == 2
+    assert step.translated_match_count == 2
+    assert step.after_text == "布雷和布雷"
+
+
+def _legacy_count(text, needle):
+    count = 0
+    start = text.find(needle)
+    while start >= 0:
+        count += 1
+        start = text.find(needle, start + len(needle))
+    return count
+
+
+def _legacy_replace(text, variants, term_value):
+    sorted_variants = sorted(variants, key=len, reverse=True)
+    count = 0
+    parts = []
+    cursor = 0
+    while cursor < len(text):
+        matched = next((variant for variant in sorted_variants if text.startswith(variant, cursor)), None)
+        if matched is None:
+            parts.append(text[cursor])
+            cursor += 1
+            continue
+        count += 1
+        parts.append(term_value)
+        cursor += len(matched)
+    return count, "".join(parts)
+
+
+def _sequential_corrections(rules, source_text, translated_text):
+    """逐条目串行执行的参考实现（对应调度器旧逻辑）。"""
+    current = translated_text
+    actions = []
+    for rule in rules:
+        if rule.term_key not in source_text or not any(variant in current for variant in rule.variants):
+            continue
+        translated_match_count, after_text = _legacy_replace(current, rule.variants, rule.term_value)
+        analysis = dictionary_correction.TextCorrectionAnalysis(
+            source_match_count=_legacy_count(source_text, rule.term_key),
+            translated_match_count=translated_match_count,
+            after_text=after_text,
+        )
+        action, _ = dictionary_correction._decide_correction(analysis, current)
+        actions.append((rule.entry_id, action))
+        if action == "updated":
+            current = analysis.after_text
+    return actions, current
+
+
+def test_plan_row_corrections_matches_sequential_entries():
+    rules = [
+        dictionary_correction.CorrectionRule(1, "Bree", "布雷", ("布里",)),
+        dictionary_correction.CorrectionRule(2, "Bree-land", "布雷地区", ("布雷地",)),
+        dictionary_correction.CorrectionRule(3, "Shire", "夏尔", ("夏耳",)),
+        dictionary_correction.CorrectionRule(4, "Hobbit", "霍比特人", ("哈比人",)),
+    ]
+    index = dictionary_correction.CompiledCorrectionIndex(rules)
+    cases = [
+        ("Bree Bree-land", "布里和布里地"),
+        ("Shire Hobbit", "夏耳的哈比人和哈比人"),
+        ("Bree", "无关文本"),
+        ("nothing", "布里"),
+    ]
+    for source_text, translated_text in cases:
+        steps = dictionary_correction._plan_row_corrections(index, source_text, translated_text)
+        expected_actions, expected_text = _sequential_corrections(rules, source_text, translated_text)
+        assert [(rules[step.rule_index].entry_id, step.action) for step in steps] == expected_actions
+        final_text = steps[-1].after_text if steps else translated_text
+        assert final_text == expected_text
+
+    steps = dictionary_correction._plan_row_corrections(index, "Bree Bree-land", "布里和布里地")
+    # 条目 1 改写后产生的 “布雷地” 由条目 2 继续处理，与串行执行一致
+    assert [step.action for step in steps] == ["updated", "updated"]
+    assert steps[1].before_text == steps[0].after_text
+
+
+class _RecordingCursor:
+    def __init__(self, rowcounts, fetched=None):
+        self.rowcounts = list(rowcounts)
+        self.fetched = list(fetched or [])
+        self.rowcount = 0
+        self.executed = []
+        self.many = []
+
+    def execute(self, sql, params=None):
+        self.executed.append(params)
+        self.rowcount = self.rowcounts.pop(0)
+
+    def fetchone(self):
+        return self.fetched.pop(0)
+
+    def executemany(self, sql, rows):
+        self.many.append((sql, list(rows)))
+
+
+def _patch_db_cursor(monkeypatch, cursor):
+    from contextlib import contextmanager
+
+    @contextmanager
+    def fake_db_cursor():
+        yield cursor
+
+    monkeypatch.setattr(dictionary_correction, "db_cursor", fake_db_cursor)
+
+
+def _pending_rows(index, text_main_ids):
+    pending = []
+    for text_main_id in text_main_ids:
+        row = {"id": text_main_id, "fid": "f", "textId": text_main_id, "sourceText": "Bree", "translatedText": "布里"}
+        steps = dictionary_correction._plan_row_corrections(index, row["sourceText"], row["translatedText"])
+        pending.append((row, steps, set()))
+    return pending
+
+
+def test_write_correction_chunk_replans_rows_changed_after_read(monkeypatch):
+    bumps = []
+    monkeypatch.setattr(dictionary_correction, "bump_text_main_generation", lambda: bumps.append(1))
+    # 依次为：进度 CAS 成功、第一行译文 CAS 成功、第二行 CAS 未命中、加锁重读、按最新译文写入
+    cursor = _RecordingCursor([1, 1, 0, 1, 1], fetched=[{"sourceText": "Bree", "translatedText": "新布里"}])
+    _patch_db_cursor(monkeypatch, cursor)
+    rule = dictionary_correction.CorrectionRule(1, "Bree", "布雷", ("布里",))
+    index = dictionary_correction.CompiledCorrectionIndex([rule])
+    claimed = [dictionary_correction._ClaimedEntry(rule=rule, version=3, progress_text_id=5)]
+
+    dictionary_correction._write_correction_chunk(index, _pending_rows(index, (10, 11)), claimed, 20, 99)
+
+    assert cursor.executed == [
+        (20, 1, 3, 3, 5),
+        ("布雷", 1, 10, "布里"),
+        ("布雷", 1, 11, "布里"),
+        (11,),
+        ("新布雷", 1, 11),
+    ]
+    # 变更计数在分块事务提交后单独递增，不在分块事务内持有计数行锁
+    assert bumps == [1]
+    (_, change_rows), (_, log_rows) = cursor.many
+    assert [(row[0], row[2], row[3]) for row in change_rows] == [(10, "布里", "布雷"), (11, "新布里", "新布雷")]
+    assert [(row[2], row[5]) for row in log_rows] == [(10, "updated"), (11, "updated")]
+    assert claimed[0].progress_text_id == 20
+
+
+def test_write_correction_chunk_skips_deleted_rows(monkeypatch):
+    cursor = _RecordingCursor([1, 0, 1], fetched=[None])
+    _patch_db_cursor(monkeypatch, cursor)
+    rule = dictionary_correction.CorrectionRule(1, "Bree", "布雷", ("布里",))
+    index = dictionary_correction.CompiledCorrectionIndex([rule])
+    claimed = [dictionary_correction._ClaimedEntry(rule=rule, version=3, progress_text_id=5)]
+
+    dictionary_correction._write_correction_chunk(index, _pending_rows(index, (10,)), claimed, 20, 99)
+
+    ((_, log_rows),) = cursor.many
+    assert [(row[5], row[6]) for row in log_rows] == [("skipped", dictionary_correction.TEXT_MISSING_REASON)]
+
+
+def test_write_correction_chunk_raises_on_progress_conflict(monkeypatch):
+    cursor = _RecordingCursor([0])
+    _patch_db_cursor(monkeypatch, cursor)
+    rule = dictionary_correction.CorrectionRule(1, "Bree", "布雷", ("布里",))
+    index = dictionary_correction.CompiledCorrectionIndex([rule])
+    claimed = [dictionary_correction._ClaimedEntry(rule=rule, version=3, progress_text_id=5)]
+
+    with pytest.raises(dictionary_correction._ProgressConflict) as error:
+        dictionary_correction._write_correction_chunk(index, _pending_rows(index, (10,)), claimed, 20, 99)
+
+    assert error.value.rule_indexes == [0]
+    assert cursor.many == []
+    assert claimed[0].progress_text_id == 5
+
+
+def test_plan_chunk_skips_rows_already_processed_by_resumed_entry():
+    rules = [
+        dictionary_correction.CorrectionRule(1, "Bree", "布雷", ("布里",)),
+        dictionary_correction.CorrectionRule(2, "Shire", "夏尔", ("夏耳",)),
+    ]
+    index = dictionary_correction.CompiledCorrectionIndex(rules)
+    claimed = [
+        dictionary_correction._ClaimedEntry(rule=rules[0], version=1, progress_text_id=10),
+        dictionary_correction._ClaimedEntry(rule=rules[1], version=1, progress_text_id=0),
+    ]
+    rows = [
+        {"id": 5, "fid": "f", "textId": 5, "sourceText": "Bree Shire", "translatedText": "布里夏耳"},
+        {"id": 15, "fid": "f", "textId": 15, "sourceText": "Bree Shire", "translatedText": "布里夏耳"},
+    ]
+
+    pending = dictionary_correction._plan_chunk(index, claimed, rows)
+
+    assert [(row["id"], [step.rule_index for step in steps]) for row, steps, _ in pending] == [(5, [1]), (15, [0, 1])]
+
+
+class _InlineCursor:
+    def __init__(self, text_rows, stale_log_ids=()):
+        self.text_rows = text_rows
+        self.stale_log_ids = list(stale_log_ids)
+        self.executed = []
+        self.many = []
+        self._result = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((" ".join(sql.split()), params))
+        if "FROM dictionary_correction_logs l" in sql:
+            self._result = [{"id": log_id} for log_id in self.stale_log_ids]
+        elif sql.strip().startswith("SELECT"):
+            self._result = [self.text_rows[text_main_id] for text_main_id in params]
+        else:
+            self._result = []
+
+    def fetchall(self):
+        return self._result
+
+    def executemany(self, sql, rows):
+        self.many.append((" ".join(sql.split()), list(rows)))
+
+
+def _inline_config(monkeypatch, **overrides):
+    from server.config import loader
+
+    config = {"inline_enabled": True, "inline_index_ttl_seconds": 60}
+    config.update(overrides)
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", {"dictionary_correction": config})
+    dictionary_correction.invalidate_inline_correction_index()
+
+
+def test_apply_inline_corrections_rewrites_saved_text(monkeypatch):
+    _inline_config(monkeypatch)
+    rules = [dictionary_correction.CorrectionRule(1, "Bree", "布雷", ("布里",))]
+    inline_index = dictionary_correction._InlineCorrectionIndex(
+        index=dictionary_correction.CompiledCorrectionIndex(rules), system_user_id=99
+    )
+    monkeypatch.setattr(dictionary_correction, "_load_inline_correction_index", lambda: inline_index)
+    cursor = _InlineCursor(
+        {
+            10: {"id": 10, "fid": "f", "textId": 1, "sourceText": "Bree"},
+            11: {"id": 11, "fid": "f", "textId": 2, "sourceText": "Bree Bree"},
+        },
+        stale_log_ids=(501, 502),
     )
-    assert result.source_match_count == 2
-    assert result.translated_match_count == 2
-    assert result.after_text == "布雷和布雷"
+
+    corrected = dictionary_correction.apply_inline_corrections(cursor, [(10, "去布里"), (11, "去布里"), (12, "无关")])
+
+    assert corrected == {10: "去布雷"}
+    statements = [sql.split()[0] for sql, _ in cursor.executed]
+    assert statements == ["SELECT", "DELETE", "SELECT", "UPDATE"]
+    # 过期异常记录先用一致性读取主键，DELETE 不关联 dictionary_entries，避免对条目行加共享锁
+    assert "FOR UPDATE" not in cursor.executed[0][0] and "LOCK IN SHARE MODE" not in cursor.executed[0][0]
+    assert cursor.executed[1] == ("DELETE FROM dictionary_correction_logs WHERE id IN (%s, %s)", (501, 502))
+    assert cursor.executed[2][1] == (10, 11)
+    assert cursor.executed[3][1] == ("去布雷", 1, 10)
+    # 纠错日志只由调度器按版本写入，即时纠错只追加修改记录
+    ((change_sql, change_rows),) = cursor.many
+    assert change_sql.startswith("INSERT INTO text_changes")
+    assert change_rows[0][:4] == (10, 99, "去布里", "去布雷")
+
+
+def test_inline_index_cached_until_invalidated(monkeypatch):
+    _inline_config(monkeypatch)
+    calls = []
+    monkeypatch.setattr(dictionary_correction, "_load_inline_correction_index", lambda: calls.append(1))
+
+    dictionary_correction._get_inline_correction_index()
+    dictionary_correction._get_inline_correction_index()
+    assert len(calls) == 1
+
+    dictionary_correction.invalidate_inline_correction_index()
+    dictionary_correction._get_inline_correction_index()
+    assert len(calls) == 2
+
+    _inline_config(monkeypatch, inline_enabled=False)
+    assert dictionary_correction.apply_inline_corrections(_InlineCursor({}), [(1, "布里")]) == {}
+    assert len(calls) == 2
+
+
+def test_rules_interact_detects_partial_overlaps():
+    def rule(entry_id, term_value, *variants):
+        return dictionary_correction.CorrectionRule(entry_id, f"term{entry_id}", term_value, variants)
+
+    # "abc" 上先 A 得 "Xc"、先 B 得 "aY"
+    assert dictionary_correction._rules_interact(rule(1, "X", "ab"), rule(2, "Y", "bc"))
+    assert dictionary_correction._rules_interact(rule(2, "Y", "bc"), rule(1, "X", "ab"))
+    # 标准译文与后续文本拼出另一条目的变体
+    assert dictionary_correction._rules_interact(rule(1, "布雷", "布里"), rule(2, "地区", "雷地"))
+    assert not dictionary_correction._rules_interact(rule(1, "X", "ab"), rule(2, "Y", "cd"))
+    assert not dictionary_correction._rules_interact(rule(1, "", "ab"), rule(2, "", "cd"))
+
+    rules = [rule(1, "X", "ab"), rule(2, "Y", "bc"), rule(3, "Z", "mn")]
+    assert any({0, 1} <= set(partition) for partition in dictionary_correction._partition_rule_indexes(rules, 3))
+
+
+def test_partition_rule_indexes_keeps_interacting_entries_together():
+    rules = [
+        dictionary_correction.CorrectionRule(1, "Bree", "布雷", ("布里",)),
+        dictionary_correction.CorrectionRule(2, "Shire", "夏尔", ("夏耳",)),
+        dictionary_correction.CorrectionRule(3, "Bree-land", "布雷地区", ("布雷地",)),
+        dictionary_correction.CorrectionRule(4, "Hobbit", "霍比特人", ("哈比人",)),
+        dictionary_correction.CorrectionRule(5, "Moria", "墨瑞亚", ("摩瑞亚",)),
+    ]
+
+    partitions = dictionary_correction._partition_rule_indexes(rules, 2)
+
+    # 条目 1 的标准译文是条目 3 变体的子串，必须在同一分区且保持队列顺序
+    assert any({0, 2} <= set(partition) for partition in partitions)
+    assert all(partition == sorted(partition) for partition in partitions)
+    assert sorted(index for partition in partitions for index in partition) == [0, 1, 2, 3, 4]
+    assert len(partitions) == 2
+    assert dictionary_correction._partition_rule_indexes(rules, 1) == [[0, 1, 2, 3, 4]]
@@ -0,0 +1,59 @@
+# 词典纠错调度测试（不依赖数据库）。
+import asyncio
+import threading
+
+import pytest
+
+from server.services import dictionary_correction, dictionary_correction_scheduler as scheduler
+
+pytestmark = pytest.mark.no_db
+
+
+@pytest.fixture
+def fake_correction(monkeypatch):
+    state = {"batches": [], "failed": [], "released": 0}
+    barrier = threading.Barrier(2, timeout=5)
+
+    def run_batch(entry_ids):
+        # 两个分区必须同时进入才能通过屏障，验证分区是并发执行的
+        barrier.wait()
+        state["batches"].append(list(entry_ids))
+        if 99 in entry_ids:
+            raise RuntimeError("boom")
+        return [
+            dictionary_correction.CorrectionResult(entry_id, 1, 1, dictionary_correction.CORRECTION_STATUS_DONE, 1, None, None, None)
+            for entry_id in entry_ids
+        ]
+
+    monkeypatch.setattr(dictionary_correction, "acquire_correction_lock", lambda name: object())
+    monkeypatch.setattr(
+        dictionary_correction, "release_correction_lock", lambda name, connection: state.__setitem__("released", 1)
+    )
+    monkeypatch.setattr(dictionary_correction, "fetch_pending_dictionary_ids", lambda limit: [1, 2, 99])
+    monkeypatch.setattr(dictionary_correction, "count_pending_dictionary_entries", lambda: 5)
+    monkeypatch.setattr(dictionary_correction, "partition_correction_entries", lambda ids, workers: [[1, 2], [99]])
+    monkeypatch.setattr(dictionary_correction, "run_dictionary_correction_batch", run_batch)
+    monkeypatch.setattr(
+        dictionary_correction, "mark_dictionary_correction_failed", lambda entry_id, message: state["failed"].append(entry_id)
+    )
+    monkeypatch.setattr(scheduler, "_executor", None)
+    monkeypatch.setattr(scheduler, "_metrics", dict(scheduler._metrics, entriesProcessedTotal=0, entriesFailedTotal=0, textsUpdatedTotal=0))
+    yield state
+    if scheduler._executor is not None:
+        scheduler._executor.shutdown(wait=True)
+
+
+def test_run_round_executes_partitions_concurrently(fake_correction):
+    asyncio.run(scheduler._run_round("lock", 10, 2))
+
+    assert sorted(fake_correction["batches"]) == [[1, 2], [99]]
+    assert fake_correction["failed"] == [99]
+    assert fake_correction["released"] == 1
+
+    metrics = scheduler.get_scheduler_metrics()
+    assert metrics["entriesProcessedTotal"] == 3
+    assert metrics["entriesFailedTotal"] == 1
+    assert metrics["textsUpdatedTotal"] == 2
+    assert metrics["queueDepth"] == 2
+    assert metrics["activeWorkers"] == 0
+    assert metrics["lastRoundEntryCount"] == 3
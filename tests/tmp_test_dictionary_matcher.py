@@ -0,0 +1,94 @@
+# 词典纠错多模式匹配测试（对照旧版逐字符实现）。
+import random
+from typing import List
+
+import pytest
+
+from server.services import dictionary_correction
+from server.services.dictionary_matcher import AhoCorasickAutomaton, CompiledCorrectionIndex, CorrectionRule
+
+pytestmark = pytest.mark.no_db
+
+
+def _legacy_count(text: str, needle: str) -> int:
+    count = 0
+    start = text.find(needle)
+    while start >= 0:
+        count += 1
+        start = text.find(needle, start + len(needle))
+    return count
+
+
+def _legacy_replace(text: str, variants: List[str], term_value: str):
+    sorted_variants = sorted(variants, key=len, reverse=True)
+    count = 0
+    parts: List[str] = []
+    cursor = 0
+    while cursor < len(text):
+        matched = None
+        for variant in sorted_variants:
+            if text.startswith(variant, cursor):
+                matched = variant
+                break
+        if matched is None:
+            parts.append(text[cursor])
+            cursor += 1
+            continue
+        count += 1
+        parts.append(term_value)
+        cursor += len(matched)
+    return count, "".join(parts)
+
+
+def test_automaton_reports_overlapping_matches():
+    automaton = AhoCorasickAutomaton(["he", "she", "his", "hers"])
+    matches = sorted(automaton.iter_matches("ushers"))
+    assert matches == [(1, 1), (2, 0), (2, 3)]
+
+
+def test_automaton_rejects_empty_pattern():
+    with pytest.raises(ValueError):
+        AhoCorasickAutomaton(["a", ""])
+
+
+def test_compiled_index_matches_legacy_semantics_on_random_texts():
+    rng = random.Random(20260301)
+    alphabet = "布里镇雷aAb"
+    for _ in range(300):
+        variants = list({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(1, 4))})
+        term_key = "".join(rng.choice("ab") for _ in range(rng.randint(1, 3)))
+        source = "".join(rng.choice("ab ") for _ in range(rng.randint(0, 30)))
+        translated = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+
+        index = CompiledCorrectionIndex([CorrectionRule(1, term_key, "X", tuple(variants))])
+        steps = dictionary_correction._plan_row_corrections(index, source, translated)
+
+        assert index.count_terms(source) == [_legacy_count(source, term_key)]
+        assert index.replace_variants(0, translated) == _legacy_replace(translated, variants, "X")
+        expected_count, expected_text = _legacy_replace(translated, variants, "X")
+        if _legacy_count(source, term_key) and expected_count:
+            (step,) = steps
+            assert (step.source_match_count, step.translated_match_count) == (_legacy_count(source, term_key), expected_count)
+            assert step.before_text == translated
+            assert step.after_text == (expected_text if step.action == "updated" else translated)
+        else:
+            assert steps == []
+
+
+def test_compiled_index_handles_multiple_rules_in_one_scan():
+    index = CompiledCorrectionIndex(
+        [
+            CorrectionRule(1, "Bree", "布雷", ("布里", "布里镇")),
+            CorrectionRule(2, "Shire", "夏尔", ("舍尔",)),
+            CorrectionRule(3, "Bree", "布理", ("布里",)),
+        ]
+    )
+    source = "Bree and Shire, Bree"
+    translated = "布里镇与舍尔，布里"
+
+    assert index.count_terms(source) == [2, 1, 2]
+    matches = index.scan_variants(translated)
+    assert index.matched_rules(matches) == [0, 1, 2]
+    assert index.replace_variants(0, translated, matches) == (2, "布雷与舍尔，布雷")
+    assert index.replace_variants(1, translated, matches) == (1, "布里镇与夏尔，布里")
+    assert index.replace_variants(2, translated, matches) == (2, "布理镇与舍尔，布理")
@@ -4,10 +4,7 @@ import pytest
 from openpyxl import Workbook, load_workbook
 
 from tools.valid_format.fix_xlsx_missing_brackets import (
-    _build_missing_colon_patterns,
-    _build_missing_close_patterns,
-    _build_missing_open_patterns,
-    _build_valid_patterns,
+    SegmentParser,
     _repair_cell_text,
     _repair_segment,
     run_from_config,
@@ -17,25 +14,16 @@ from tools.valid_format.fix_xlsx_missing_brackets import (
 pytestmark = pytest.mark.no_db
 
 
-def _patterns():
-    id_pattern = r"\d{2,10}"
-    return (
-        _build_valid_patterns(id_pattern),
-        _build_missing_colon_patterns(id_pattern),
-        _build_missing_open_patterns(id_pattern),
-        _build_missing_close_patterns(id_pattern),
-    )
+def _segment_parser():
+    return SegmentParser(r"\d{2,10}")
 
 
 def test_repair_segment_adds_missing_opening_bracket():
-    valid_patterns, missing_colon_patterns, missing_open_patterns, missing_close_patterns = _patterns()
+    segment_parser = _segment_parser()
 
     repaired, repair_kinds = _repair_segment(
         "91111505::::::'我当然来了，孩子！']",
-        valid_patterns,
-        missing_colon_patterns,
-        missing_open_patterns,
-        missing_close_patterns,
+        segment_parser,
         allow_missing_colon=True,
         allow_missing_opening=True,
         allow_missing_closing=True,
@@ -46,14 +34,11 @@ def test_repair_segment_adds_missing_opening_bracket():
 
 
 def test_repair_segment_adds_missing_closing_bracket():
-    valid_patterns, missing_colon_patterns, missing_open_patterns, missing_close_patterns = _patterns()
+    segment_parser = _segment_parser()
 
     repaired, repair_kinds = _repair_segment(
         "91111506::::::['你不该这么匆忙地来这里！我告诉过你这是愚蠢的！'",
-        valid_patterns,
-        missing_colon_patterns,
-        missing_open_patterns,
-        missing_close_patterns,
+        segment_parser,
         allow_missing_colon=True,
         allow_missing_opening=True,
         allow_missing_closing=True,
@@ -64,14 +49,11 @@ def test_repair_segment_adds_missing_closing_bracket():
 
 
 def test_repair_segment_adds_missing_colon_for_colon6_protocol():
-    valid_patterns, missing_colon_patterns, missing_open_patterns, missing_close_patterns = _patterns()
+    segment_parser = _segment_parser()
 
     repaired, repair_kinds = _repair_segment(
         "228870261:::::[Maethad竞技场]",
-        valid_patterns,
-        missing_colon_patterns,
-        missing_open_patterns,
-        missing_close_patterns,
+        segment_parser,
         allow_missing_colon=True,
         allow_missing_opening=True,
         allow_missing_closing=True,
@@ -82,14 +64,11 @@ def test_repair_segment_adds_missing_colon_for_colon6_protocol():
 
 
 def test_repair_segment_adds_missing_colon_and_closing_bracket_together():
-    valid_patterns, missing_colon_patterns, missing_open_patterns, missing_close_patterns = _patterns()
+    segment_parser = _segment_parser()
 
     repaired, repair_kinds = _repair_segment(
         "228870261:::::[Maethad竞技场",
-        valid_patterns,
-        missing_colon_patterns,
-        missing_open_patterns,
-        missing_close_patterns,
+        segment_parser,
         allow_missing_colon=True,
         allow_missing_opening=True,
         allow_missing_closing=True,
@@ -100,15 +79,12 @@ def test_repair_segment_adds_missing_colon_and_closing_bracket_together():
 
 
 def test_repair_cell_text_only_repairs_clear_protocol_bracket_errors():
-    valid_patterns, missing_colon_patterns, missing_open_patterns, missing_close_patterns = _patterns()
+    segment_parser = _segment_parser()
 
     result = _repair_cell_text(
         "263655938::::::['我会尽力帮助你。跟我来。']|||228870261:::::[Maethad竞技场]|||91111505::::::'我当然来了，孩子！']|||91111506::::::['你不该这么匆忙地来这里！我告诉过你这是愚蠢的！'",
         "|||",
-        valid_patterns,
-        missing_colon_patterns,
-        missing_open_patterns,
-        missing_close_patterns,
+        segment_parser,
         allow_missing_colon=True,
         allow_missing_opening=True,
         allow_missing_closing=True,
@@ -127,15 +103,12 @@ def test_repair_cell_text_only_repairs_clear_protocol_bracket_errors():
 
 
 def test_repair_cell_text_keeps_unfixable_invalid_segment():
-    valid_patterns, missing_colon_patterns, missing_open_patterns, missing_close_patterns = _patterns()
+    segment_parser = _segment_parser()
 
     result = _repair_cell_text(
         "1加斯阿格温98::::::[你未能援助拉达加斯特]",
         "|||",
-        valid_patterns,
-        missing_colon_patterns,
-        missing_open_patterns,
-        missing_close_patterns,
+        segment_parser,
         allow_missing_colon=True,
         allow_missing_opening=True,
         allow_missing_closing=True,
@@ -0,0 +1,153 @@
+# 列表总数缓存测试（不依赖数据库）。
+import pytest
+
+from server.config import loader
+from server.services import list_totals
+
+pytestmark = pytest.mark.no_db
+
+
+class FakeCursor:
+    def __init__(self, total=0, plan_rows=0):
+        self.total = total
+        self.plan_rows = plan_rows
+        self.statements = []
+        self._result = None
+
+    def execute(self, query, args=None):
+        self.statements.append((" ".join(query.split()), args))
+        if query.startswith("EXPLAIN"):
+            self._result = [{"rows": self.plan_rows, "filtered": 50.0}]
+        elif "information_schema" in query:
+            self._result = [{"total": self.plan_rows}]
+        else:
+            self._result = [{"total": self.total}]
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return self._result
+
+
+class FakeReplicaCursor(FakeCursor):
+    read_target = "replica:3306"
+
+
+@pytest.fixture(autouse=True)
+def totals_env(monkeypatch):
+    config = {
+        "pagination": {"default_page_size": 20, "max_page_size": 200, "total_cache_seconds": 30},
+        "text_list": {"approximate_total_cache_seconds": 60},
+        "database": {"read_routing": {"read_your_writes_seconds": 10}},
+    }
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", config)
+    monkeypatch.setattr(list_totals, "_generations", {})
+    monkeypatch.setattr(list_totals, "_bumped_at", {})
+    monkeypatch.setattr(list_totals, "_exact_cache", {})
+    monkeypatch.setattr(list_totals, "_approximate_cache", {})
+    return config
+
+
+def _resolve(cursor, total_mode="exact", where_clause="WHERE tm.fid = %s", params=("f1",)):
+    return list_totals.resolve_total(cursor, total_mode, list_totals.SCOPE_TEXTS, "text_main tm", where_clause, params)
+
+
+def test_exact_total_cached_per_filter_set():
+    cursor = FakeCursor(total=7)
+
+    assert _resolve(cursor) == 7
+    cursor.total = 8
+    assert _resolve(cursor, where_clause="WHERE  tm.fid = %s\n") == 7
+    assert _resolve(cursor, params=("f2",)) == 8
+    assert len(cursor.statements) == 2
+    assert cursor.statements[0] == ("SELECT COUNT(*) AS total FROM text_main tm WHERE tm.fid = %s", ("f1",))
+
+
+def test_generation_bump_invalidates_only_its_scope():
+    cursor = FakeCursor(total=3)
+    _resolve(cursor)
+    list_totals.resolve_total(cursor, "exact", list_totals.SCOPE_DICTIONARY, "dictionary_entries de", "", [])
+
+    cursor.total = 4
+    list_totals.bump_generation(list_totals.SCOPE_TEXTS)
+
+    assert _resolve(cursor) == 4
+    assert list_totals.resolve_total(cursor, "exact", list_totals.SCOPE_DICTIONARY, "dictionary_entries de", "", []) == 3
+    assert len(cursor.statements) == 3
+
+
+def test_write_during_count_is_not_cached_under_new_generation(monkeypatch):
+    cursor = FakeCursor(total=5)
+    original_count = list_totals._count_exact
+
+    def count_with_concurrent_write(*args):
+        total = original_count(*args)
+        list_totals.bump_generation(list_totals.SCOPE_TEXTS)
+        return total
+
+    monkeypatch.setattr(list_totals, "_count_exact", count_with_concurrent_write)
+    assert _resolve(cursor) == 5
+    monkeypatch.setattr(list_totals, "_count_exact", original_count)
+
+    cursor.total = 6
+    assert _resolve(cursor) == 6
+
+
+def test_cache_disabled_and_expired(totals_env, monkeypatch):
+    cursor = FakeCursor(total=1)
+    totals_env["pagination"]["total_cache_seconds"] = 0
+    _resolve(cursor)
+    _resolve(cursor)
+    assert len(cursor.statements) == 2
+
+    totals_env["pagination"]["total_cache_seconds"] = 30
+    now = [1000.0]
+    monkeypatch.setattr(list_totals, "monotonic", lambda: now[0])
+    _resolve(cursor)
+    now[0] += 29
+    _resolve(cursor)
+    assert len(cursor.statements) == 3
+    now[0] += 2
+    _resolve(cursor)
+    assert len(cursor.statements) == 4
+
+
+def test_approximate_and_none_modes():
+    cursor = FakeCursor(total=100, plan_rows=40)
+
+    assert _resolve(cursor, "none") is None
+    assert _resolve(cursor, "approximate") == 20
+    assert _resolve(cursor, "approximate", where_clause="", params=()) == 40
+    assert cursor.statements[0][0] == "EXPLAIN SELECT 1 FROM text_main tm WHERE tm.fid = %s"
+    assert cursor.statements[1][1] == ("text_main",)
+
+    list_totals.bump_generation(list_totals.SCOPE_TEXTS)
+    assert _resolve(cursor, "approximate") == 20
+    assert len(cursor.statements) == 2
+
+
+def test_replica_count_not_cached_right_after_write(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(list_totals, "monotonic", lambda: now[0])
+    primary = FakeCursor(total=5)
+    replica = FakeReplicaCursor(total=4)
+    list_totals.bump_generation(list_totals.SCOPE_TEXTS)
+
+    # 副本尚未回放刚才的写入：计数照常返回，但不缓存到新代次下
+    now[0] += 1
+    assert _resolve(replica) == 4
+    replica.total = 5
+    assert _resolve(replica) == 5
+    assert len(replica.statements) == 2
+
+    # 主库计数单独缓存，副本缓存不会返回给主库读请求
+    assert _resolve(primary) == 5
+    assert _resolve(primary) == 5
+    assert len(primary.statements) == 1
+
+    # 距最近一次写入超过 read_your_writes_seconds 后副本计数可以缓存
+    now[0] += 10
+    assert _resolve(replica) == 5
+    assert _resolve(replica) == 5
+    assert len(replica.statements) == 3
@@ -2,6 +2,8 @@ from datetime import datetime, timedelta
 
 import pytest
 
+from server import logger as server_logger
+from server.config import loader
 from server.logger import DailyOrSizeRotation
 
 
@@ -47,3 +49,68 @@ def test_daily_or_size_rotation_rotates_when_log_day_changes(tmp_path):
     with log_path.open("r+", encoding="utf-8") as file:
         assert rotation(_LogMessage("first", first_log_time), file) is False
         assert rotation(_LogMessage("second", next_day_log_time), file) is True
+
+
+
+class _CountingFile:
+    def __init__(self, file):
+        self._file = file
+        self.seeks = 0
+        self.name = file.name
+
+    def seek(self, *args):
+        self.seeks += 1
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+
+@pytest.mark.no_db
+def test_daily_or_size_rotation_counts_size_without_seeking(tmp_path):
+    log_path = tmp_path / "server.log"
+    log_path.write_text("12345", encoding="utf-8")
+    rotation = DailyOrSizeRotation(max_bytes=20)
+    now = datetime.now()
+
+    with log_path.open("r+", encoding="utf-8") as raw_file:
+        file = _CountingFile(raw_file)
+        assert rotation(_LogMessage("abcde", now), file) is False
+        assert rotation(_LogMessage("译文", now), file) is False
+        # 5 + 5 + 6（中文按 UTF-8 字节计）= 16，再写 5 字节超过上限
+        assert rotation(_LogMessage("fghij", now), file) is True
+
+    assert file.seeks == 1
+
+
+@pytest.mark.no_db
+def test_batched_sink_writes_in_order_and_rotates(tmp_path):
+    log_path = tmp_path / "server.log"
+    writer = server_logger.RotatingFileWriter(log_path, DailyOrSizeRotation(max_bytes=30), retention_days=30)
+    batches = []
+
+    def write_batch(batch):
+        batches.append(len(batch))
+        writer(batch)
+
+    sink = server_logger.BatchedSink("test", write_batch, batch_size=4, on_stop=writer.close)
+    now = datetime.now()
+    for index in range(10):
+        sink(_LogMessage(f"line-{index}\n", now))
+    sink.stop()
+
+    rotated = sorted(tmp_path.glob("server.*.log"))
+    assert len(rotated) == 2
+    contents = "".join(path.read_text(encoding="utf-8") for path in rotated) + log_path.read_text(encoding="utf-8")
+    assert contents == "".join(f"line-{index}\n" for index in range(10))
+    assert all(path.stat().st_size <= 30 for path in rotated)
+    assert sum(batches) == 10 and max(batches) <= 4
+
+
+@pytest.mark.no_db
+def test_should_log_sample_keeps_one_of_every_n(monkeypatch):
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", {"logging": {"sample_every": {"text_filters": 3}}})
+    monkeypatch.setattr(server_logger, "_sample_counters", {})
+
+    assert [server_logger.should_log_sample("text_filters") for _ in range(6)] == [True, False, False, True, False, False]
+    assert all(server_logger.should_log_sample("other") for _ in range(3))
@@ -0,0 +1,173 @@
+# 指标采集与 /metrics 输出测试。
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+
+from server import app as app_module
+from server import metrics
+from server.app import app
+from server.config import get_config
+
+
+@pytest.mark.no_db
+def test_registry_renders_counters_and_cumulative_histograms():
+    registry = metrics.MetricsRegistry()
+    registry.describe("demo_requests_total", "demo", ("route",))
+    registry.describe("demo_seconds", "demo latency", ("route",))
+    registry.inc("demo_requests_total", ("/texts/{text_id}",))
+    registry.inc("demo_requests_total", ("/texts/{text_id}",))
+    for value in (0.01, 0.2, 3.0):
+        registry.observe("demo_seconds", value, (0.1, 1.0), ("/a",))
+
+    lines = registry.render()
+
+    assert 'demo_requests_total{route="/texts/{text_id}"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+    assert "# TYPE demo_seconds histogram" in lines
+
+
+@pytest.mark.no_db
+def test_snapshot_metrics_render_cumulative_values_as_counters(monkeypatch):
+    from server.routes import metrics as metrics_route
+
+    pool_stats = {
+        "total": 4,
+        "idle": 3,
+        "inUse": 1,
+        "waiting": 0,
+        "checkouts": 120,
+        "checkoutTimeouts": 2,
+        "checkoutWaitMsMax": 15.5,
+    }
+    correction_stats = {
+        "queueDepth": 5,
+        "activeWorkers": 1,
+        "roundsTotal": 9,
+        "entriesProcessedTotal": 30,
+        "entriesFailedTotal": 1,
+        "textsUpdatedTotal": 42,
+        "lastRoundEntriesPerSec": 2.5,
+    }
+    monkeypatch.setattr(metrics_route, "get_pool_stats", lambda: pool_stats)
+    monkeypatch.setattr(metrics_route, "get_scheduler_metrics", lambda: correction_stats)
+    monkeypatch.setattr(
+        metrics_route, "get_auth_cache_stats", lambda: {"token": {"hits": 7, "misses": 3, "size": 2}}
+    )
+
+    lines = metrics_route._render_snapshot_metrics()
+
+    for name in (
+        "lotro_db_pool_checkouts_total",
+        "lotro_db_pool_checkout_timeouts_total",
+        "lotro_dictionary_correction_rounds_total",
+        "lotro_dictionary_correction_entries_processed_total",
+        "lotro_dictionary_correction_entries_failed_total",
+        "lotro_dictionary_correction_texts_updated_total",
+        "lotro_auth_cache_hits_total",
+        "lotro_auth_cache_misses_total",
+    ):
+        assert f"# TYPE {name} counter" in lines
+    for name in (
+        "lotro_db_pool_idle_connections",
+        "lotro_db_pool_in_use_connections",
+        "lotro_db_pool_waiting_threads",
+        "lotro_dictionary_correction_queue_depth",
+        "lotro_dictionary_correction_active_workers",
+        "lotro_dictionary_correction_last_round_entries_per_second",
+        "lotro_auth_cache_entries",
+    ):
+        assert f"# TYPE {name} gauge" in lines
+    assert "lotro_db_pool_checkouts_total 120" in lines
+    assert 'lotro_auth_cache_hits_total{cache="token"} 7' in lines
+
+
+@pytest.mark.no_db
+def test_request_db_stats_follow_threadpool_routes():
+    async def handle():
+        stats, token = metrics.start_request_db_stats()
+        try:
+            await run_in_threadpool(metrics.record_db_query, 0.25)
+            await run_in_threadpool(metrics.record_db_query, 0.5)
+        finally:
+            metrics.reset_request_db_stats(token)
+        return stats
+
+    stats = asyncio.run(handle())
+
+    assert (stats.queries, stats.seconds) == (2, 0.75)
+    # 请求之外（后台任务）只计入全局计数
+    metrics.record_db_query(0.1)
+    assert stats.queries == 2
+
+
+@pytest.mark.no_db
+def test_request_db_stats_include_streamed_body(monkeypatch):
+    monkeypatch.setitem(get_config()["database"]["profiler"], "enabled", False)
+    observed = []
+    monkeypatch.setattr(
+        app_module,
+        "observe_request",
+        lambda method, route, status_code, elapsed, db_stats: observed.append((route, status_code, db_stats.queries)),
+    )
+    demo = FastAPI()
+    app_module._register_logging_middleware(demo)
+
+    @demo.get("/export")
+    def export():
+        def rows():
+            for index in range(3):
+                metrics.record_db_query(0.01)
+                yield f"row{index}\n"
+
+        metrics.record_db_query(0.01)
+        return StreamingResponse(rows(), media_type="text/plain")
+
+    response = TestClient(demo).get("/export")
+
+    assert response.text == "row0\nrow1\nrow2\n"
+    assert response.headers["X-Request-Id"]
+    assert observed == [("/export", 200, 4)]
+
+
+@pytest.mark.no_db
+def test_route_template_label():
+    demo = FastAPI()
+    seen = {}
+
+    @demo.get("/texts/{text_id}")
+    def read_text(text_id: int):
+        return {"id": text_id}
+
+    @demo.middleware("http")
+    async def capture(request, call_next):
+        response = await call_next(request)
+        seen[request.url.path] = metrics.get_route_template(request.scope)
+        return response
+
+    client = TestClient(demo)
+    client.get("/texts/42")
+    client.get("/missing")
+
+    assert seen == {"/texts/42": "/texts/{text_id}", "/missing": metrics.UNMATCHED_ROUTE}
+
+
+def test_metrics_endpoint_exports_request_histograms(seed_user):
+    client = TestClient(app)
+    assert client.get("/health").status_code == 200
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'lotro_http_requests_total{method="GET",route="/health",status="200"}' in body
+    assert 'lotro_http_request_duration_seconds_bucket{method="GET",route="/health",le="+Inf"}' in body
+    assert "lotro_db_pool_connections" in body
+    assert "lotro_dictionary_correction_queue_depth" in body
@@ -0,0 +1,183 @@
+# 汉化包产物缓存测试（不依赖数据库）。
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from openpyxl import load_workbook
+
+from server.config import loader
+from server.services import package_export
+
+pytestmark = pytest.mark.no_db
+
+
+@pytest.fixture
+def cache_env(monkeypatch, tmp_path):
+    config = {
+        "text_import_export": {
+            "download_fetch_batch_size": 100,
+            "package_cache_enabled": True,
+            "package_cache_dir": str(tmp_path),
+            "package_cache_refresh_interval_seconds": 0,
+            "package_cache_overlap_seconds": 60,
+            "package_cache_full_rebuild_seconds": 86400,
+            "package_cache_incremental_max_fids": 10,
+        }
+    }
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", config)
+    monkeypatch.setattr(package_export, "_artifact", None)
+    monkeypatch.setattr(package_export, "_artifact_loaded", False)
+
+    state = {
+        "watermark": {"generation": 7, "maxId": 3, "checkedAt": "2026-03-01T10:00:00"},
+        "full_builds": 0,
+        "changed_fids": [],
+        "since": [],
+        "merged": {"fid_a": "1::::::[a]", "fid_b": "2::::::[b]|||3::::::[c]"},
+    }
+
+    def fake_stream(_batch_size):
+        state["full_builds"] += 1
+        yield from sorted(state["merged"].items())
+
+    monkeypatch.setattr(package_export, "_read_watermark", lambda: dict(state["watermark"]))
+    monkeypatch.setattr(package_export, "_stream_all_merged", fake_stream)
+    def fake_changed_fids(since):
+        state["since"].append(since)
+        return list(state["changed_fids"])
+
+    monkeypatch.setattr(package_export, "_load_changed_fids", fake_changed_fids)
+    monkeypatch.setattr(
+        package_export,
+        "_load_merged_for_fids",
+        lambda fids: {fid: state["merged"][fid] for fid in fids},
+    )
+    return state
+
+
+def _read_rows(path):
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return list(workbook.worksheets[0].iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def test_format_segment_and_split():
+    assert package_export.format_package_segment(101, "src", None) == "101::::::[src]"
+    assert package_export.format_package_segment("a:::b", "src", "dst") == "a:::b:::[dst]"
+    assert package_export.merge_fid_rows(
+        [
+            {"fid": "f", "textId": 1, "sourceText": "s1", "translatedText": "t1"},
+            {"fid": "f", "textId": 2, "sourceText": "s2", "translatedText": None},
+        ]
+    ) == ("f", "1::::::[t1]|||2::::::[s2]")
+
+    long_segment = "x" * 20000
+    translation = f"1::::::[{long_segment}]|||2::::::[{long_segment}]"
+    rows = package_export.split_translation_into_rows("f", translation)
+    assert len(rows) == 2
+    assert rows[0][1].endswith("|||")
+    assert "".join(row[1] for row in rows) == translation
+
+
+def test_artifact_reused_until_watermark_changes(cache_env):
+    first = package_export.get_package_artifact()
+    second = package_export.get_package_artifact()
+
+    assert second is first
+    assert cache_env["full_builds"] == 1
+    assert _read_rows(first.xlsx_path) == [
+        ("fid", "translation"),
+        ("fid_a", "1::::::[a]"),
+        ("fid_b", "2::::::[b]|||3::::::[c]"),
+    ]
+
+
+def test_incremental_rebuild_replaces_only_changed_fids(cache_env):
+    first = package_export.get_package_artifact()
+
+    cache_env["merged"]["fid_b"] = "2::::::[B]|||3::::::[c]"
+    cache_env["changed_fids"] = ["fid_b"]
+    cache_env["watermark"] = {"generation": 8, "maxId": 3, "checkedAt": "2026-03-01T10:05:00"}
+    second = package_export.get_package_artifact()
+
+    assert second.etag != first.etag
+    assert cache_env["full_builds"] == 1
+    assert second.full_built_at == first.full_built_at
+    assert _read_rows(second.xlsx_path)[2] == ("fid_b", "2::::::[B]|||3::::::[c]")
+    # 回看起点取上一代产物读取计数的时间减去 overlap，而非数据里的 MAX(uptTime)
+    assert cache_env["since"] == [datetime(2026, 3, 1, 9, 59, 0)]
+
+
+def test_generation_bump_without_time_change_rebuilds(cache_env):
+    # 同一秒内的写入不会改变 MAX(uptTime)，计数仍然前进
+    first = package_export.get_package_artifact()
+
+    cache_env["changed_fids"] = ["fid_a"]
+    cache_env["merged"]["fid_a"] = "1::::::[A]"
+    cache_env["watermark"] = dict(cache_env["watermark"], generation=8)
+    second = package_export.get_package_artifact()
+
+    assert second.etag != first.etag
+    assert second.generation == 8
+    assert _read_rows(second.xlsx_path)[1] == ("fid_a", "1::::::[A]")
+
+
+def test_max_id_change_forces_full_rebuild(cache_env):
+    package_export.get_package_artifact()
+
+    cache_env["merged"]["fid_c"] = "4::::::[d]"
+    cache_env["watermark"] = {"generation": 7, "maxId": 4, "checkedAt": "2026-03-01T10:05:00"}
+    artifact = package_export.get_package_artifact()
+
+    assert cache_env["full_builds"] == 2
+    assert artifact.fid_count == 3
+
+
+def test_manifest_survives_restart(cache_env, monkeypatch):
+    first = package_export.get_package_artifact()
+    monkeypatch.setattr(package_export, "_artifact", None)
+    monkeypatch.setattr(package_export, "_artifact_loaded", False)
+
+    restored = package_export.get_package_artifact()
+
+    assert restored.etag == first.etag
+    assert cache_env["full_builds"] == 1
+
+
+def test_read_watermark_requires_generation_row(monkeypatch):
+    class _Cursor:
+        def execute(self, sql, params=None):
+            self.sql = sql
+
+        def fetchone(self):
+            return None
+
+    @contextmanager
+    def fake_db_cursor():
+        yield _Cursor()
+
+    monkeypatch.setattr(package_export, "db_cursor", fake_db_cursor)
+
+    with pytest.raises(RuntimeError, match="008_text_main_generation"):
+        package_export._read_watermark()
+
+
+def test_generation_bump_runs_in_own_transaction_and_never_raises(monkeypatch):
+    executed = []
+
+    class _Cursor:
+        def execute(self, sql, params=None):
+            executed.append(sql)
+            raise RuntimeError("lock wait timeout")
+
+    @contextmanager
+    def fake_db_cursor():
+        yield _Cursor()
+
+    monkeypatch.setattr(package_export, "db_cursor", fake_db_cursor)
+
+    package_export.bump_text_main_generation()
+
+    assert executed == ["UPDATE text_main_generation SET generation = generation + 1 WHERE id = 1"]
@@ -0,0 +1,46 @@
+import pytest
+
+from tools.segment_format.parallel_pipeline import map_ordered, resolve_workers
+
+
+pytestmark = pytest.mark.no_db
+
+
+def _square_and_log(value):
+    print(f"item {value}")
+    if value == 7:
+        raise ValueError("bad item 7")
+    return value * value
+
+
+def _collect(workers, items, chunk_size=3):
+    results = []
+    try:
+        for result in map_ordered(_square_and_log, items, workers=workers, chunk_size=chunk_size):
+            results.append(result)
+    except ValueError as exc:
+        results.append(str(exc))
+    return results
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_map_ordered_keeps_input_order_and_replays_output(workers, capsys):
+    results = _collect(workers, range(6), chunk_size=2)
+
+    assert results == [0, 1, 4, 9, 16, 25]
+    assert capsys.readouterr().out == "".join(f"item {value}\n" for value in range(6))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_map_ordered_raises_at_same_position_as_serial(workers, capsys):
+    results = _collect(workers, range(20))
+
+    assert results == [0, 1, 4, 9, 16, 25, 36, "bad item 7"]
+    assert capsys.readouterr().out == "".join(f"item {value}\n" for value in range(8))
+
+
+def test_resolve_workers():
+    assert resolve_workers(3) == 3
+    assert resolve_workers(0) >= 1
+    with pytest.raises(ValueError):
+        resolve_workers(-1)
@@ -4,7 +4,21 @@ import asyncio
 import pytest
 from starlette.requests import Request
 
-from server.request_logging import extract_request_body, sanitize_payload
+from server.config import loader
+from server.request_logging import RequestBodyPreviewMiddleware, extract_request_body, sanitize_payload
+
+
+@pytest.fixture
+def logging_config(monkeypatch):
+    config = {
+        "logging": {
+            "request_max_body_length": 8,
+            "redact_fields": ["password"],
+            "log_body_methods": ["POST"],
+        }
+    }
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", config)
+    return config
 
 
 @pytest.mark.no_db
@@ -34,48 +48,110 @@ def test_sanitize_payload_truncates_long_text():
 
 @pytest.mark.no_db
 def test_extract_request_body_masks_json_fields():
-    scope = {
-        "type": "http",
-        "method": "POST",
-        "path": "/auth/login",
-        "headers": [(b"content-type", b"application/json")],
-        "query_string": b"",
-        "client": ("127.0.0.1", 12345),
-    }
+    body = b'{"username":"tester","password":"secret123"}'
+    seen, _ = _run_preview_middleware(_body_scope(b"application/json"), [body])
+
+    assert seen["body"] == body
+    assert seen["log"] == {"username": "tester", "password": "***"}
 
-    async def receive():
-        return {
-            "type": "http.request",
-            "body": b'{"username":"tester","password":"secret123"}',
-            "more_body": False,
-        }
 
-    request = Request(scope, receive)
-    body = asyncio.run(extract_request_body(request))
+@pytest.mark.no_db
+def test_extract_request_body_omits_multipart_content():
+    body = b"--abc\r\nbinary-content\r\n--abc--"
+    seen, _ = _run_preview_middleware(_body_scope(b"multipart/form-data; boundary=abc"), [body])
 
-    assert body == {"username": "tester", "password": "***"}
+    assert seen["body"] == body
+    assert seen["log"]["bodySummary"] == "<multipart omitted>"
+    assert seen["log"]["bodyBytes"] > 0
 
 
 @pytest.mark.no_db
-def test_extract_request_body_omits_multipart_content():
-    scope = {
+def test_extract_request_body_without_middleware_leaves_receive_untouched(logging_config):
+    body = b'{"username":"tester"}'
+    received = []
+    request = Request(_body_scope(b"application/json"), _chunked_receive([body], received))
+
+    assert asyncio.run(extract_request_body(request)) is None
+    assert received == []
+    assert asyncio.run(request.body()) == body
+
+
+def _body_scope(content_type: bytes, content_length=None):
+    headers = [(b"content-type", content_type)]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    return {
         "type": "http",
         "method": "POST",
-        "path": "/texts/upload",
-        "headers": [(b"content-type", b"multipart/form-data; boundary=abc")],
+        "path": "/upload",
+        "headers": headers,
         "query_string": b"",
         "client": ("127.0.0.1", 12345),
     }
 
+
+def _chunked_receive(chunks, received):
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+        for index, chunk in enumerate(chunks)
+    ]
+
     async def receive():
-        return {
-            "type": "http.request",
-            "body": b"--abc\r\nbinary-content\r\n--abc--",
-            "more_body": False,
+        received.append(len(messages))
+        return messages.pop(0)
+
+    return receive
+
+
+def _run_preview_middleware(scope, chunks):
+    received = []
+    seen = {}
+
+    async def downstream(inner_scope, receive, send):
+        request = Request(inner_scope, receive)
+        seen["body"] = await request.body()
+        seen["log"] = await extract_request_body(request)
+
+    middleware = RequestBodyPreviewMiddleware(downstream)
+    asyncio.run(middleware(scope, _chunked_receive(chunks, received), None))
+    return seen, received
+
+
+@pytest.mark.no_db
+def test_preview_middleware_captures_prefix_and_replays_body(logging_config):
+    chunks = [b"a" * 6, b"b" * 6, b"c" * 6]
+    seen, _ = _run_preview_middleware(_body_scope(b"text/plain", 18), chunks)
+
+    assert seen["body"] == b"".join(chunks)
+    assert seen["log"] == {"contentType": "text/plain", "bodyBytes": 18, "bodyPreview": "aaaaaabb...(truncated)"}
+
+
+@pytest.mark.no_db
+def test_preview_middleware_skips_binary_body(logging_config):
+    xlsx_type = b"application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    chunks = [b"PK\x03\x04" + b"x" * 60, b"y" * 64]
+    received = []
+
+    async def downstream(inner_scope, receive, send):
+        # 路由读取前中间件不应预读二进制请求体
+        assert received == []
+        request = Request(inner_scope, receive)
+        assert await extract_request_body(request) == {
+            "contentType": xlsx_type.decode(),
+            "bodyBytes": 128,
+            "bodySummary": "<binary omitted>",
         }
+        assert len(await request.body()) == 128
+
+    middleware = RequestBodyPreviewMiddleware(downstream)
+    asyncio.run(middleware(_body_scope(xlsx_type, 128), _chunked_receive(chunks, received), None))
+    assert len(received) == 2
 
-    request = Request(scope, receive)
-    body = asyncio.run(extract_request_body(request))
 
-    assert body["bodySummary"] == "<multipart omitted>"
-    assert body["bodyBytes"] > 0
+@pytest.mark.no_db
+def test_preview_middleware_omits_truncated_json(logging_config):
+    body = b'{"password":"' + b"s" * 30 + b'"}'
+    seen, _ = _run_preview_middleware(_body_scope(b"application/json"), [body[:10], body[10:20], body[20:]])
+
+    assert seen["body"] == body
+    assert seen["log"] == {"contentType": "application/json", "bodyBytes": None, "bodySummary": "<truncated body omitted>"}
@@ -1,8 +1,11 @@
 # 搜索与分页测试。
+import pytest
 from fastapi.testclient import TestClient
 
 from server.app import app
+from server.config import loader
 from server.db import db_cursor
+from server.routes import texts
 
 
 def _login(client: TestClient, seed_user):
@@ -190,3 +193,24 @@ def test_flat_list_endpoint_returns_all_parts(seed_user):
     assert data["total"] == 2
     parts = sorted(item["part"] for item in data["items"])
     assert parts == [1, 2]
+
+
+@pytest.mark.no_db
+def test_fulltext_match_clause_rechecks_with_like(monkeypatch):
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", {"text_list": {"fulltext_min_keyword_length": 2}})
+
+    sql, params = texts._build_text_match_clause('tm."sourceText"', "Gandalf", "fulltext")
+
+    assert sql == '(MATCH(tm."sourceText") AGAINST (%s IN BOOLEAN MODE) AND tm."sourceText" LIKE %s)'
+    assert params == ['"Gandalf"', "%Gandalf%"]
+
+
+@pytest.mark.no_db
+@pytest.mark.parametrize("keyword", ["甘", "barrow wight", "50%", 'say "hi"'])
+def test_fulltext_match_clause_falls_back_to_like(monkeypatch, keyword):
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", {"text_list": {"fulltext_min_keyword_length": 2}})
+
+    sql, params = texts._build_text_match_clause('tm."sourceText"', keyword, "fulltext")
+
+    assert sql == 'tm."sourceText" LIKE %s'
+    assert params == [f"%{keyword}%"]
@@ -0,0 +1,126 @@
+# 分段协议 golden 语料：共享解析器与各工具的解析入口都按 tests/data/segment_format_golden.json 校验。
+import json
+import random
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+# step4 按脚本方式运行，依赖同目录的 common 模块
+sys.path.insert(0, str(_PROJECT_ROOT / "tools" / "version_iteration_tool"))
+
+from tools.fix_textid.generate_fix_sql_from_sqlite import _extract_textids as extract_sqlite_textids  # noqa: E402
+from tools.fix_textid.generate_fix_sql_from_xlsx import _extract_textids as extract_xlsx_textids  # noqa: E402
+from tools.package_format_diff.analyze_package_xlsx_format import _make_segment_parser  # noqa: E402
+from tools.segment_format.segment_parser import DEFAULT_ID_PATTERN, SegmentParser  # noqa: E402
+from tools.valid_format.fix_xlsx_missing_brackets import _classify_segment  # noqa: E402
+from tools.valid_format.valid_xlsx_format_check import _match_fixed_format  # noqa: E402
+from tools.valid_format.xlsx_to_insert_segmented import _parse_segment as parse_xlsx_segment  # noqa: E402
+from tools.version_iteration_tool.step4_generate_text_main_next_insert import (  # noqa: E402
+    _parse_segment as parse_step4_segment,
+)
+
+pytestmark = pytest.mark.no_db
+
+_GOLDEN = json.loads((_PROJECT_ROOT / "tests" / "data" / "segment_format_golden.json").read_text(encoding="utf-8"))
+
+
+def _cases():
+    return [pytest.param(entry, id=entry["description"]) for entry in _GOLDEN]
+
+
+def _expected_tuple(entry):
+    expected = entry["expected"]
+    if expected is None:
+        return None
+    return expected["format"], expected["idPrefix"], expected["textId"], expected["payload"]
+
+
+@pytest.mark.parametrize("entry", _cases())
+def test_segment_parser_matches_golden(entry):
+    segment_parser = SegmentParser(entry.get("idPattern", DEFAULT_ID_PATTERN))
+
+    parsed = segment_parser.parse(entry["segment"])
+
+    assert (tuple(parsed) if parsed is not None else None) == _expected_tuple(entry)
+    assert segment_parser.is_valid(entry["segment"]) is (entry["expected"] is not None)
+
+
+@pytest.mark.parametrize("entry", _cases())
+def test_tools_match_golden(entry):
+    id_pattern = entry.get("idPattern", DEFAULT_ID_PATTERN)
+    segment_parser = SegmentParser(id_pattern)
+    segment = entry["segment"]
+    expected = entry["expected"]
+    lenient = tuple(entry["lenient"]) if entry["lenient"] is not None else None
+
+    assert parse_step4_segment(segment, segment_parser) == lenient
+    assert parse_xlsx_segment(segment, segment_parser) == lenient
+    assert _classify_segment(segment, segment_parser) == entry["fixKind"]
+
+    textids = (expected["idPrefix"], expected["textId"]) if expected is not None else None
+    assert extract_sqlite_textids(segment, segment_parser) == textids
+    assert extract_xlsx_textids(segment, segment_parser) == textids
+
+    info = _make_segment_parser(id_pattern)(segment)
+    assert info.is_valid is (expected is not None)
+    assert info.text_id == (expected["textId"] if expected is not None else None)
+    assert info.payload == (expected["payload"] if expected is not None else None)
+
+    if id_pattern == DEFAULT_ID_PATTERN:
+        assert _match_fixed_format(segment) is (expected is not None)
+
+
+def _legacy_parse(segment, id_pattern):
+    # 重构前各工具使用的三条正则，按格式顺序逐个 fullmatch
+    patterns = (
+        ("colon6", rf"^(?P<textId>{id_pattern})::::::\[(?P<text>.*)\]$"),
+        ("triple_colon_num", rf"^(?P<textId>{id_pattern}:::\d+):::\[(?P<text>.*)\]$"),
+        ("triple_colon_range", rf"^(?P<textId>{id_pattern}:::\d+(?:-\d+)+):::\[(?P<text>.*)\]$"),
+    )
+    for segment_format, pattern in patterns:
+        matched = re.fullmatch(pattern, segment, re.DOTALL)
+        if matched is not None:
+            id_prefix = re.match(id_pattern, segment).group(0)
+            return segment_format, id_prefix, matched.group("textId"), matched.group("text")
+    return None
+
+
+def _random_segment(rng):
+    # 按 "textId + 分隔符 + [载荷]" 的结构随机拼接，并随机注入缺失/多余字符
+    head = "".join(rng.choice("0123456789") for _ in range(rng.randint(0, 12)))
+    separator = rng.choice(
+        [
+            "::::::",
+            ":::::",
+            ":::::::",
+            ":::",
+            f":::{rng.randint(0, 99)}:::",
+            f":::{rng.randint(0, 9)}-{rng.randint(0, 99)}:::",
+            f":::{rng.randint(0, 9)}-{rng.randint(0, 9)}-{rng.randint(0, 9)}:::",
+            ":::-1:::",
+            ":::1-:::",
+        ]
+    )
+    body = "".join(rng.choice(["x", "中", "[", "]", ":", "-", "1", "\n", " "]) for _ in range(rng.randint(0, 8)))
+    segment = head + separator + rng.choice(["[", "", "[["]) + body + rng.choice(["]", "", "]]", "] ", "]\n"])
+    if rng.random() < 0.1:
+        position = rng.randint(0, len(segment))
+        segment = segment[:position] + rng.choice([":", "x", "[", "]"]) + segment[position:]
+    return segment
+
+
+@pytest.mark.parametrize("id_pattern", [DEFAULT_ID_PATTERN, r"\d{4,10}", r"\d+"])
+def test_segment_parser_matches_legacy_regexes_on_random_segments(id_pattern):
+    segment_parser = SegmentParser(id_pattern)
+    rng = random.Random(23)
+
+    valid_count = 0
+    for _ in range(5000):
+        segment = _random_segment(rng)
+        parsed = segment_parser.parse(segment)
+        assert (tuple(parsed) if parsed is not None else None) == _legacy_parse(segment, id_pattern), segment
+        valid_count += parsed is not None
+    assert valid_count > 200
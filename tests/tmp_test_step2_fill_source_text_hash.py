@@ -0,0 +1,125 @@
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# step2 按脚本方式运行，依赖同目录的 common 模块
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools" / "version_iteration_tool"))
+
+from tools.version_iteration_tool.step2_fill_source_text_hash import (  # noqa: E402
+    _clear_checkpoint,
+    _hash_rows,
+    _iter_pages,
+    _read_checkpoint,
+    _write_checkpoint,
+)
+
+pytestmark = pytest.mark.no_db
+
+
+class _FakeReadCursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        self._conn.queries.append((sql, params))
+        last_id = params[0] if params else None
+        rows = [row for row in self._conn.rows if last_id is None or row["row_id"] > last_id]
+        self._rows = rows[: self._conn.limit]
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class _FakeReadConn:
+    def __init__(self, rows, limit):
+        self.rows = rows
+        self.limit = limit
+        self.queries = []
+        self.commits = 0
+
+    def cursor(self, cursor_class=None):
+        return _FakeReadCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+
+def _config(**overrides):
+    config = {
+        "idColumn": "id",
+        "sourceTextColumn": "sourceText",
+        "hashColumn": "sourceTextHash",
+        "batchSize": 2,
+        "updatePolicy": "nullOnly",
+        "nullSourcePolicy": "emptyString",
+    }
+    config.update(overrides)
+    return config
+
+
+def test_iter_pages_uses_keyset_from_last_id():
+    rows = [{"row_id": row_id, "source_text": f"t{row_id}"} for row_id in (3, 5, 8, 13, 21)]
+    read_conn = _FakeReadConn(rows, limit=2)
+
+    pages = list(_iter_pages(read_conn, _config(), "lotro_test.text_main", last_id=None))
+
+    assert [[row["row_id"] for row in page] for page in pages] == [[3, 5], [8, 13], [21]]
+    assert [params for _, params in read_conn.queries] == [(), (5,), (13,)]
+    assert all("ORDER BY `id` LIMIT 2" in sql and "`sourceTextHash` IS NULL" in sql for sql, _ in read_conn.queries)
+    assert read_conn.commits == 3
+
+
+def test_iter_pages_resumes_after_checkpoint_id():
+    rows = [{"row_id": row_id, "source_text": ""} for row_id in (3, 5, 8)]
+    read_conn = _FakeReadConn(rows, limit=2)
+
+    pages = list(_iter_pages(read_conn, _config(updatePolicy="all"), "lotro_test.text_main", last_id=5))
+
+    assert [[row["row_id"] for row in page] for page in pages] == [[8]]
+    assert "IS NULL" not in read_conn.queries[0][0]
+
+
+def test_hash_rows_matches_sha256_and_null_policy():
+    rows = [{"row_id": 1, "source_text": "Bree"}, {"row_id": 2, "source_text": None}]
+
+    assert _hash_rows("emptyString", "text_main", rows) == [
+        (1, hashlib.sha256("Bree".encode("utf-8")).hexdigest()),
+        (2, hashlib.sha256(b"").hexdigest()),
+    ]
+    with pytest.raises(RuntimeError, match="id=2"):
+        _hash_rows("error", "text_main", rows)
+
+
+def test_read_checkpoint_rejects_mismatched_config(tmp_path):
+    checkpoint_path = tmp_path / "step2.checkpoint.json"
+    assert _read_checkpoint(checkpoint_path, _config())["tables"] == {}
+
+    checkpoint_path.write_text(
+        json.dumps({"idColumn": "id", "hashColumn": "sourceTextHash", "updatePolicy": "all", "tables": {}}),
+        encoding="utf-8",
+    )
+    with pytest.raises(RuntimeError, match="updatePolicy"):
+        _read_checkpoint(checkpoint_path, _config())
+
+
+def test_cleared_checkpoint_does_not_skip_next_run(tmp_path):
+    checkpoint_path = tmp_path / "step2.checkpoint.json"
+    checkpoint = _read_checkpoint(checkpoint_path, _config())
+    checkpoint["tables"]["lotro_test.text_main"] = {"lastId": 21, "scanned": 5, "updated": 5, "done": True}
+    _write_checkpoint(checkpoint_path, checkpoint)
+
+    _clear_checkpoint(checkpoint_path)
+    _clear_checkpoint(checkpoint_path)
+
+    assert not checkpoint_path.exists()
+    assert _read_checkpoint(checkpoint_path, _config())["tables"] == {}
@@ -0,0 +1,254 @@
+import json
+import sqlite3
+import sys
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import pytest
+
+# step4 按脚本方式运行，依赖同目录的 common 模块
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools" / "version_iteration_tool"))
+
+from tools.segment_format.segment_parser import SegmentParser  # noqa: E402
+from tools.version_iteration_tool import step4_generate_text_main_next_insert as step4  # noqa: E402
+
+pytestmark = pytest.mark.no_db
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self.rowcount = 0
+        self._row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self._conn.statements.append((sql, params))
+        self._row = None
+        if sql.startswith("SELECT 1 FROM"):
+            self._row = (1,) if self._conn.target_has_rows else None
+        elif sql.startswith("LOAD DATA"):
+            with open(params[0], "r", encoding="utf-8", newline="") as handle:
+                content = handle.read()
+            self._conn.tsv_files.append(content)
+            self.rowcount = content.count("\n") - self._conn.missing_rows
+        elif sql.startswith("INSERT INTO"):
+            self.rowcount = len(params) // 9 - self._conn.missing_rows
+        elif sql.startswith("DELETE FROM"):
+            self.rowcount = len(params)
+
+    def fetchone(self):
+        return self._row
+
+    def fetchall(self):
+        return [("Warning", 1062, "Duplicate entry")]
+
+
+class _FakeConn:
+    def __init__(self, checkpoint_path=None, target_has_rows=False, missing_rows=0, fail_on_commit=None):
+        self.checkpoint_path = checkpoint_path
+        self.target_has_rows = target_has_rows
+        self.missing_rows = missing_rows
+        self.fail_on_commit = fail_on_commit
+        self.statements = []
+        self.tsv_files = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.checkpoint_at_commit = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+        if self.checkpoint_path is not None and self.checkpoint_path.exists():
+            self.checkpoint_at_commit.append(json.loads(self.checkpoint_path.read_text(encoding="utf-8"))["lastFid"])
+        else:
+            self.checkpoint_at_commit.append(None)
+        if self.commits == self.fail_on_commit:
+            raise RuntimeError("commit failed")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def executed(self, prefix):
+        return [(sql, params) for sql, params in self.statements if sql.startswith(prefix)]
+
+
+def _config(tmp_path, **overrides):
+    config = {
+        "sourceTable": "Texts",
+        "fidColumn": "fid",
+        "textDataColumn": "text_data",
+        "splitDelimiter": "|||",
+        "invalidSegmentPolicy": "error",
+        "emptyTextDataPolicy": "skip",
+        "targetTable": "lotro_test.text_main_next",
+        "columns": {
+            key: key
+            for key in (
+                "fid",
+                "textId",
+                "part",
+                "sourceText",
+                "sourceTextHash",
+                "translatedText",
+                "status",
+                "isClaimed",
+                "editCount",
+                "uptTime",
+                "crtTime",
+            )
+        },
+        "translatedText": None,
+        "status": 1,
+        "isClaimed": False,
+        "editCount": 0,
+        "uptTimeExpression": "NOW()",
+        "crtTimeExpression": "NOW()",
+        "progressEveryFidRows": 0,
+        "dsnEnv": "LOTRO_STEP4_TEST_DSN",
+        "loadMethod": "executemany",
+        "loadBatchSize": 100,
+        "fidsPerCheckpoint": 2,
+        "checkpointPath": str(tmp_path / "step4.checkpoint.json"),
+        "workers": 1,
+        "parallelChunkFids": 10,
+    }
+    config.update(overrides)
+    return config
+
+
+def _source(fid_count):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE Texts (fid INTEGER, text_data TEXT)")
+    conn.executemany(
+        "INSERT INTO Texts (fid, text_data) VALUES (?, ?)",
+        [(fid, f"{fid}01::::::[text {fid}]") for fid in range(1, fid_count + 1)],
+    )
+    return conn
+
+
+def _run_load(monkeypatch, tmp_path, conn, config):
+    monkeypatch.setenv(config["dsnEnv"], "mysql://user:pass@db:3306/lotro_test")
+    monkeypatch.setattr(step4, "load_env_file", lambda: None)
+    monkeypatch.setattr(step4, "start_ssh_tunnel_from_env", nullcontext)
+
+    @contextmanager
+    def fake_connect(dsn, local_infile=False):
+        yield conn
+
+    monkeypatch.setattr(step4, "connect_mysql_from_dsn", fake_connect)
+    sqlite_path = tmp_path / "Texts.db"
+    return step4._load_into_mysql(config, sqlite_path, _source(5), SegmentParser(r"\d{2,10}"), step4._new_stats())
+
+
+def _row(fid, source_text, translated_text):
+    return (fid, f"{fid}01", 1, source_text, "hash", translated_text, 1, False, 0)
+
+
+def test_tsv_field_escapes_backslash_tab_newline_and_null(tmp_path):
+    assert step4._tsv_field("a\\b\tc\nd\re") == "a\\\\b\\tc\\nd\\re"
+    assert step4._tsv_field(None) == "\\N"
+    assert step4._tsv_field(True) == "1"
+    assert step4._tsv_field(7) == "7"
+
+    conn = _FakeConn()
+    config = _config(tmp_path, loadMethod="loadData")
+    loaded = step4._load_rows_with_load_data(conn.cursor(), config, [_row("1", "x\ty\\z\nw", None)])
+
+    assert loaded == 1
+    assert conn.tsv_files == ["1\t101\t1\tx\\ty\\\\z\\nw\thash\t\\N\t1\t0\t0\n"]
+    (sql, _), = conn.executed("LOAD DATA")
+    assert "ESCAPED BY '\\\\'" in sql
+    assert sql.endswith("SET `uptTime` = NOW(), `crtTime` = NOW()")
+
+
+def test_insert_method_builds_multi_row_values(tmp_path):
+    conn = _FakeConn()
+    config = _config(tmp_path, loadBatchSize=2)
+    rows = [_row(str(fid), f"s{fid}", None) for fid in (1, 2, 3)]
+
+    assert step4._load_rows_with_insert(conn.cursor(), config, rows) == 3
+
+    (first_sql, first_params), (second_sql, second_params) = conn.executed("INSERT INTO")
+    row_sql = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())"
+    assert first_sql.startswith("INSERT INTO `lotro_test`.`text_main_next` (`fid`, `textId`, `part`")
+    assert first_sql.endswith(f"VALUES {row_sql}, {row_sql}")
+    assert second_sql.endswith(f"VALUES {row_sql}")
+    assert first_params == [value for row in rows[:2] for value in row]
+    assert second_params == list(rows[2])
+
+
+def test_load_fid_range_rolls_back_when_row_count_differs(tmp_path):
+    conn = _FakeConn(missing_rows=1)
+    rows = [_row("1", "a", None), _row("1", "b", None)]
+
+    with pytest.raises(RuntimeError, match="导入行数不一致: expected=2, loaded=1"):
+        step4._load_fid_range(conn, conn.cursor(), _config(tmp_path), ["1"], rows, clear_existing=False)
+
+    assert (conn.commits, conn.rollbacks) == (0, 1)
+    assert conn.executed("SHOW WARNINGS")
+
+
+def test_load_refuses_non_empty_target_without_checkpoint(monkeypatch, tmp_path):
+    conn = _FakeConn(target_has_rows=True)
+
+    with pytest.raises(RuntimeError, match="目标表非空且无 checkpoint"):
+        _run_load(monkeypatch, tmp_path, conn, _config(tmp_path))
+
+    assert conn.executed("INSERT INTO") == []
+    assert conn.commits == 0
+    assert not (tmp_path / "step4.checkpoint.json").exists()
+
+
+def test_resume_deletes_only_first_range_and_checkpoints_after_commit(monkeypatch, tmp_path):
+    config = _config(tmp_path)
+    checkpoint_path = Path(config["checkpointPath"])
+    checkpoint_path.write_text(
+        json.dumps(
+            {
+                "sqlitePath": str(tmp_path / "Texts.db"),
+                "targetTable": config["targetTable"],
+                "lastFid": 1,
+                "loadedFidRows": 1,
+                "loadedRows": 1,
+            }
+        ),
+        encoding="utf-8",
+    )
+    # 续跑区间为 [2,3] 与 [4,5]；第二个区间提交失败
+    conn = _FakeConn(checkpoint_path=checkpoint_path, target_has_rows=True, fail_on_commit=2)
+
+    with pytest.raises(RuntimeError, match="commit failed"):
+        _run_load(monkeypatch, tmp_path, conn, config)
+
+    assert conn.executed("SELECT 1 FROM") == []
+    assert conn.executed("DELETE FROM") == [
+        ("DELETE FROM `lotro_test`.`text_main_next` WHERE `fid` IN (%s, %s)", ["2", "3"])
+    ]
+    # 提交时 checkpoint 仍是上一个区间，提交成功后才推进
+    assert conn.checkpoint_at_commit == [1, 3]
+    checkpoint = json.loads(checkpoint_path.read_text(encoding="utf-8"))
+    assert (checkpoint["lastFid"], checkpoint["loadedFidRows"], checkpoint["loadedRows"]) == (3, 3, 3)
+    assert conn.rollbacks == 1
+
+    conn = _FakeConn(checkpoint_path=checkpoint_path, target_has_rows=True)
+    result = _run_load(monkeypatch, tmp_path, conn, config)
+
+    assert conn.executed("DELETE FROM") == [
+        ("DELETE FROM `lotro_test`.`text_main_next` WHERE `fid` IN (%s, %s)", ["4", "5"])
+    ]
+    assert (result["loadedRows"], result["runRows"]) == (5, 2)
+    assert json.loads(checkpoint_path.read_text(encoding="utf-8"))["lastFid"] == 5
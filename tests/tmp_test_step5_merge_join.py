@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# step5 引擎按脚本方式运行，依赖同目录的 common 模块
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools" / "version_iteration_tool"))
+
+from tools.version_iteration_tool.step5_merge_join import (  # noqa: E402
+    CLASS_CHANGED,
+    CLASS_NEW,
+    CLASS_UNCHANGED,
+    merge_classify,
+    new_stats,
+    validation_errors,
+)
+
+pytestmark = pytest.mark.no_db
+
+
+def _classify(backup_rows, next_rows):
+    stats = new_stats()
+    classified = merge_classify(backup_rows, next_rows, stats)
+    return [(next_id, bak_id, segment_class) for _, next_id, bak_id, segment_class in classified], stats
+
+
+def test_merge_classify_matches_left_join_semantics():
+    backup_rows = [
+        (1, "100", "10", "h-a"),
+        (2, "100", "11", "h-b"),
+        (3, "100", "11:::1", "h-c"),
+        (4, "200", "10", "h-d"),
+        (5, "300", "10", "h-e"),
+    ]
+    next_rows = [
+        (11, "100", "10", "h-a"),
+        (12, "100", "11:::1", "h-c2"),
+        (13, "100", "12", "h-new"),
+        (14, "300", "10", "h-e"),
+        (15, "400", "10", "h-f"),
+    ]
+
+    result, stats = _classify(backup_rows, next_rows)
+
+    assert result == [
+        (11, 1, CLASS_UNCHANGED),
+        (12, 3, CLASS_CHANGED),
+        (13, None, CLASS_NEW),
+        (14, 5, CLASS_UNCHANGED),
+        (15, None, CLASS_NEW),
+    ]
+    assert (stats["new"], stats["changed"], stats["unchanged"], stats["backupOnly"]) == (2, 1, 2, 2)
+    assert (stats["backupRows"], stats["nextRows"]) == (5, 5)
+    assert validation_errors(stats) == []
+
+
+def test_merge_classify_reports_duplicates_and_null_hashes():
+    backup_rows = [(1, "100", "10", None), (2, "100", "10", "h"), (3, "100", "11", "h")]
+    next_rows = [(11, "100", "10", "h"), (12, "100", "11", None), (13, "100", "11", None)]
+
+    result, stats = _classify(backup_rows, next_rows)
+
+    assert [segment_class for _, _, segment_class in result] == [CLASS_CHANGED, CLASS_CHANGED]
+    assert stats["backupDuplicateKeys"] == 1
+    assert stats["nextDuplicateKeys"] == 1
+    assert validation_errors(stats) == [
+        "备份表存在重复 key(fid,textId)，数量=1",
+        "next表存在重复 key(fid,textId)，数量=1",
+        "备份表存在空哈希记录，数量=1",
+        "next表存在空哈希记录，数量=1",
+    ]
+
+
+def test_merge_classify_rejects_order_that_differs_from_binary_compare():
+    # 例如大小写不敏感排序会把 "B" 排在 "a" 之后
+    next_rows = [(11, "a", "10", "h"), (12, "B", "10", "h")]
+
+    with pytest.raises(RuntimeError, match="engine=sql"):
+        _classify([], next_rows)
@@ -1,11 +1,13 @@
 # 文本模板下载与上传测试。
 from io import BytesIO
 
+import pytest
 from fastapi.testclient import TestClient
 from openpyxl import Workbook, load_workbook
 
 from server.app import app
 from server.db import db_cursor
+from server.routes import texts
 
 
 def _login(client: TestClient, seed_user):
@@ -181,6 +183,79 @@ def test_text_template_upload_success(seed_user):
         assert change["reason"] == "线下回传"
 
 
+def test_text_template_upload_skips_unchanged_rows(seed_user):
+    with db_cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO text_main (fid, "textId", part, "sourceText", "translatedText", status, "editCount")
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            ("file_skip", 15001, 1, "src_same", "same_translation", 3, 5),
+        )
+        same_id = cursor.lastrowid
+        cursor.execute(
+            """
+            INSERT INTO text_main (fid, "textId", part, "sourceText", "translatedText", status, "editCount")
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            ("file_skip", 15002, 1, "src_changed", "old_changed", 1, 0),
+        )
+        changed_id = cursor.lastrowid
+
+    upload_bytes = _build_xlsx(
+        [
+            [same_id, "file_skip", 15001, 1, "src_same", "same_translation", "已完成"],
+            [changed_id, "file_skip", 15002, 1, "src_changed", "new_changed", "修改"],
+        ]
+    )
+
+    client = TestClient(app)
+    token = _login(client, seed_user)
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    }
+    response = client.post("/texts/upload?fileName=tmp_skip.xlsx", headers=headers, content=upload_bytes)
+    assert response.status_code == 200
+    assert response.json()["data"] == {"updatedCount": 1, "skippedCount": 1}
+
+    with db_cursor() as cursor:
+        cursor.execute('SELECT id, "translatedText", status, "editCount" FROM text_main WHERE fid = %s ORDER BY id', ("file_skip",))
+        rows = cursor.fetchall()
+        assert (rows[0]["translatedText"], rows[0]["status"], rows[0]["editCount"]) == ("same_translation", 3, 5)
+        assert (rows[1]["translatedText"], rows[1]["status"], rows[1]["editCount"]) == ("new_changed", 2, 1)
+
+        cursor.execute('SELECT "textId" FROM text_changes WHERE "textId" IN (%s, %s)', (same_id, changed_id))
+        assert [row["textId"] for row in cursor.fetchall()] == [changed_id]
+
+
+class _RecordingCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(("execute", sql, params))
+
+    def executemany(self, sql, seq_params):
+        self.statements.append(("executemany", sql, list(seq_params)))
+
+
+@pytest.mark.no_db
+def test_apply_upload_rows_batches_statements(monkeypatch):
+    monkeypatch.setattr(texts, "UPLOAD_APPLY_BATCH_SIZE", 2)
+    changed_rows = [{"id": index, "translatedText": f"t{index}", "status": 2} for index in (1, 2, 3)]
+    db_map = {index: {"translatedText": None if index == 1 else f"old{index}"} for index in (1, 2, 3)}
+    cursor = _RecordingCursor()
+
+    texts._apply_upload_rows(cursor, changed_rows, db_map, 9, "批量")
+
+    kinds = [item[0] for item in cursor.statements]
+    assert kinds == ["execute", "executemany", "execute", "executemany"]
+    assert cursor.statements[0][2] == (1, "t1", 2, "t2", 1, 2, 2, 2, 1, 2)
+    assert cursor.statements[1][2] == [(1, 9, "", "t1", "批量"), (2, 9, "old2", "t2", "批量")]
+    assert cursor.statements[2][2] == (3, "t3", 3, 2, 3)
+
+
 def test_text_template_upload_mismatch_rollback(seed_user):
     with db_cursor() as cursor:
         cursor.execute(
@@ -0,0 +1,102 @@
+# 文本列表游标分页测试。
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from server.app import app
+from server.db import db_cursor
+from server.routes import texts
+
+
+def _login(client: TestClient, seed_user):
+    response = client.post("/auth/login", json={"username": seed_user["username"], "password": seed_user["password"]})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["code"] == "0000"
+    return payload["data"]["token"]
+
+
+@pytest.mark.no_db
+def test_cursor_round_trip_keeps_seek_values():
+    upt_time = datetime(2026, 3, 1, 12, 30, 5)
+    encoded = texts._encode_cursor("texts", [upt_time, 42])
+
+    assert texts._decode_cursor(encoded, "texts") == [upt_time, 42]
+    assert texts._decode_cursor(texts._encode_cursor("children", [3, 7]), "children") == [3, 7]
+
+
+@pytest.mark.no_db
+def test_cursor_rejects_other_route_and_garbage():
+    encoded = texts._encode_cursor("texts", [datetime(2026, 3, 1), 1])
+    with pytest.raises(HTTPException, match="cursor 无效"):
+        texts._decode_cursor(encoded, "parents")
+    with pytest.raises(HTTPException, match="cursor 无效"):
+        texts._decode_cursor("not-a-cursor!", "texts")
+
+
+@pytest.mark.no_db
+def test_build_keyset_page_trims_probe_row_and_emits_next_cursor():
+    items = [
+        {"id": 3, "uptTime": datetime(2026, 3, 3)},
+        {"id": 2, "uptTime": datetime(2026, 3, 2)},
+        {"id": 1, "uptTime": datetime(2026, 3, 1)},
+    ]
+    page = texts._build_keyset_page(items, 2, None, "none", "texts", ("uptTime", "id"))
+
+    assert [item["id"] for item in page["items"]] == [3, 2]
+    assert page["hasMore"] is True
+    assert texts._decode_cursor(page["nextCursor"], "texts") == [datetime(2026, 3, 2), 2]
+
+    last_page = texts._build_keyset_page(items[:1], 2, 1, "exact", "texts", ("uptTime", "id"))
+    assert last_page["hasMore"] is False
+    assert last_page["nextCursor"] is None
+
+
+@pytest.mark.no_db
+def test_parse_total_mode_defaults_by_pagination_mode():
+    assert texts._parse_total_mode(None, keyset_mode=False) == "exact"
+    assert texts._parse_total_mode(None, keyset_mode=True) == "none"
+    with pytest.raises(HTTPException, match="totalMode"):
+        texts._parse_total_mode("rough", keyset_mode=True)
+
+
+def test_texts_cursor_pagination_walks_all_rows(seed_user):
+    with db_cursor() as cursor:
+        for index in range(5):
+            cursor.execute(
+                """
+                INSERT INTO text_main (fid, "textId", part, "sourceText", "translatedText", status, "editCount", "uptTime")
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                ("file_cursor", f"{3000 + index}", index + 1, f"seg{index}", None, 1, 0, "2026-03-01 00:00:00"),
+            )
+
+    client = TestClient(app)
+    token = _login(client, seed_user)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    seen = []
+    cursor_value = ""
+    while True:
+        response = client.get("/texts", params={"fid": "file_cursor", "pageSize": 2, "cursor": cursor_value}, headers=headers)
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["total"] is None
+        seen.extend(item["id"] for item in data["items"])
+        if not data["hasMore"]:
+            break
+        cursor_value = data["nextCursor"]
+
+    assert len(seen) == 5
+    assert seen == sorted(seen, reverse=True)
+
+    response = client.get(
+        "/texts/children",
+        params={"fid": "file_cursor", "pageSize": 2, "cursor": "", "totalMode": "exact"},
+        headers=headers,
+    )
+    data = response.json()["data"]
+    assert data["total"] == 4
+    assert [item["part"] for item in data["items"]] == [2, 3]
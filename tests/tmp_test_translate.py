@@ -43,3 +43,42 @@ def test_translate_update(seed_user):
 
         cursor.execute('SELECT COUNT(*) AS total FROM text_changes WHERE "textId" = %s', (text_id,))
         assert cursor.fetchone()["total"] == 1
+
+
+def test_translate_update_applies_dictionary_inline(seed_user):
+    client = TestClient(app)
+    token = _login(client, seed_user)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    create = client.post(
+        "/dictionary",
+        json={"termKey": "Moria", "termValue": "墨瑞亚", "variantValues": ["摩瑞亚"], "category": "place"},
+        headers=headers,
+    )
+    assert create.status_code == 200
+
+    with db_cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO text_main (fid, "textId", part, "sourceText", "translatedText", status, "editCount")
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            ("file_inline", 1002, 1, "Into Moria", "", 1, 0),
+        )
+        text_id = cursor.lastrowid
+
+    response = client.put(
+        f"/texts/{text_id}/translate",
+        json={"translatedText": "进入摩瑞亚", "reason": "翻译"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert (data["translatedText"], data["dictionaryCorrected"]) == ("进入墨瑞亚", True)
+
+    with db_cursor() as cursor:
+        cursor.execute('SELECT "translatedText", "editCount" FROM text_main WHERE id = %s', (text_id,))
+        row = cursor.fetchone()
+        assert (row["translatedText"], row["editCount"]) == ("进入墨瑞亚", 2)
+        cursor.execute('SELECT "afterText" FROM text_changes WHERE "textId" = %s ORDER BY id', (text_id,))
+        assert [item["afterText"] for item in cursor.fetchall()] == ["进入摩瑞亚", "进入墨瑞亚"]
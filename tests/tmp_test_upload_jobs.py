@@ -0,0 +1,278 @@
+# 异步上传任务测试。
+import threading
+import time
+from contextlib import contextmanager
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+from openpyxl import Workbook
+
+from server.app import app
+from server.config import loader
+from server.db import db_cursor
+from server.routes import texts
+from server.services import upload_jobs
+
+
+def _job_config(tmp_path, **overrides):
+    text_import_export = {
+        "upload_temp_dir": str(tmp_path),
+        "upload_job_workers": 1,
+        "upload_job_max_active": 2,
+        "upload_job_max_rows": 100,
+        "upload_job_max_bytes": 1024 * 1024,
+        "upload_job_max_errors": 2,
+        "upload_job_retention_seconds": 3600,
+        "upload_job_apply_chunk_rows": 1000,
+    }
+    text_import_export.update(overrides)
+    return {"text_import_export": text_import_export}
+
+
+@pytest.fixture
+def job_service(monkeypatch, tmp_path):
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", _job_config(tmp_path))
+    monkeypatch.setattr(upload_jobs, "_jobs", {})
+    monkeypatch.setattr(upload_jobs, "_executor", None)
+    yield tmp_path
+    upload_jobs.shutdown_upload_jobs()
+
+
+def _build_xlsx(rows) -> bytes:
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(list(texts.TEXT_TEMPLATE_HEADERS))
+    for row in rows:
+        sheet.append(row)
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def _wait_finished(job, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        snapshot = job.snapshot()
+        if snapshot["status"] in {"succeeded", "failed"}:
+            return snapshot
+        time.sleep(0.02)
+    raise AssertionError("上传任务未在超时时间内结束")
+
+
+@pytest.mark.no_db
+def test_upload_job_runs_in_background_and_removes_file(job_service):
+    file_path = job_service / "job.xlsx"
+    file_path.write_bytes(b"placeholder")
+
+    def runner(job):
+        job.set_phase("apply", 3)
+        job.advance(3)
+        job.updated_count = 3
+        return None
+
+    job = upload_jobs.submit_upload_job(7, "a.xlsx", None, str(file_path), runner)
+    snapshot = _wait_finished(job)
+
+    assert snapshot["status"] == "succeeded"
+    assert (snapshot["totalRows"], snapshot["processedRows"], snapshot["updatedCount"]) == (3, 3, 3)
+    assert not file_path.exists()
+    assert upload_jobs.get_upload_job(job.id) is job
+
+
+@pytest.mark.no_db
+def test_upload_job_limit_and_crash(job_service):
+    release = threading.Event()
+
+    def blocking_runner(job):
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    first = upload_jobs.submit_upload_job(1, "a.xlsx", None, str(job_service / "a.xlsx"), blocking_runner)
+    upload_jobs.submit_upload_job(1, "b.xlsx", None, str(job_service / "b.xlsx"), blocking_runner)
+    with pytest.raises(upload_jobs.UploadJobLimitError):
+        upload_jobs.submit_upload_job(1, "c.xlsx", None, str(job_service / "c.xlsx"), blocking_runner)
+
+    release.set()
+    snapshot = _wait_finished(first)
+    assert snapshot["status"] == "failed"
+    assert "boom" in snapshot["message"]
+
+
+@pytest.mark.no_db
+def test_shutdown_fails_queued_jobs_and_removes_files(job_service):
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking_runner(job):
+        started.set()
+        release.wait(5)
+        return None
+
+    running = upload_jobs.submit_upload_job(1, "a.xlsx", None, str(job_service / "a.xlsx"), blocking_runner)
+    queued_path = job_service / "b.xlsx"
+    queued_path.write_bytes(b"placeholder")
+    queued = upload_jobs.submit_upload_job(1, "b.xlsx", None, str(queued_path), blocking_runner)
+    assert started.wait(5)
+
+    upload_jobs.shutdown_upload_jobs()
+    release.set()
+
+    snapshot = queued.snapshot()
+    assert snapshot["status"] == "failed"
+    assert "服务正在关闭" in snapshot["message"]
+    assert snapshot["finishedAt"] is not None
+    assert not queued_path.exists()
+    assert _wait_finished(running)["status"] == "succeeded"
+
+
+@pytest.mark.no_db
+def test_shutdown_cancel_is_atomic_with_worker_start(job_service, monkeypatch):
+    ran = []
+    queued_path = job_service / "b.xlsx"
+    queued_path.write_bytes(b"placeholder")
+    job = upload_jobs.UploadJob(id="queued", user_id=1, file_name="b.xlsx", reason=None, file_path=str(queued_path), max_errors=2)
+    upload_jobs._jobs[job.id] = job
+    remove_file = upload_jobs._cleanup_job_file
+
+    def cleanup_while_worker_starts(path):
+        # 模拟工作线程恰好在取消过程中领取该任务
+        worker = threading.Thread(target=upload_jobs._run_job, args=(job, lambda item: ran.append(item.id)))
+        worker.start()
+        worker.join(0.2)
+        remove_file(path)
+        cleanup_while_worker_starts.worker = worker
+
+    monkeypatch.setattr(upload_jobs, "_cleanup_job_file", cleanup_while_worker_starts)
+    upload_jobs.shutdown_upload_jobs()
+    cleanup_while_worker_starts.worker.join(5)
+
+    snapshot = job.snapshot()
+    assert snapshot["status"] == "failed"
+    assert "服务正在关闭" in snapshot["message"]
+    assert ran == []
+    assert not queued_path.exists()
+
+
+@pytest.mark.no_db
+def test_upload_job_collects_row_errors_before_db(job_service):
+    file_path = job_service / "errors.xlsx"
+    file_path.write_bytes(
+        _build_xlsx(
+            [
+                [1, "fid", "t1", 1, "src", "dst", "新增"],
+                [1, "fid", "t1", 1, "src", "dst", "新增"],
+                ["x", "fid", "t2", 1, "src", "dst", "新增"],
+                [3, "fid", "t3", 1, "src", "dst", "未知"],
+            ]
+        )
+    )
+
+    job = upload_jobs.submit_upload_job(1, "errors.xlsx", None, str(file_path), texts._run_upload_job)
+    snapshot = _wait_finished(job)
+
+    assert snapshot["status"] == "failed"
+    assert snapshot["phase"] == "parse"
+    assert snapshot["errorCount"] == 3
+    assert [item["rowNumber"] for item in snapshot["errors"]] == [3, 4]
+    assert "3 处错误" in snapshot["message"]
+
+
+@pytest.mark.no_db
+def test_upload_job_applies_in_chunks_and_reports_partial_apply(job_service, monkeypatch):
+    monkeypatch.setattr(loader, "_CONFIG_CACHE", _job_config(job_service, upload_job_apply_chunk_rows=2))
+    file_path = job_service / "chunks.xlsx"
+    file_path.write_bytes(
+        _build_xlsx([[row_id, "fid", f"t{row_id}", 1, "src", f"dst{row_id}", "已完成"] for row_id in (1, 2, 3, 4, 5)])
+    )
+    db_rows = {
+        row_id: {"id": row_id, "fid": "fid", "textId": f"t{row_id}", "part": 1, "translatedText": None, "status": 1}
+        for row_id in (1, 2, 3, 4, 5)
+    }
+    transactions = []
+
+    @contextmanager
+    def fake_db_cursor():
+        transactions.append([])
+        yield object()
+        transactions[-1].append("commit")
+
+    def fake_fetch(cursor, parsed_rows, on_batch=None, lock_rows=True):
+        transactions[-1].append(("lock" if lock_rows else "read", [item["id"] for item in parsed_rows]))
+        return {item["id"]: db_rows[item["id"]] for item in parsed_rows}
+
+    def fake_apply(cursor, changed_rows, db_map, user_id, reason, on_batch=None):
+        if any(item["id"] == 5 for item in changed_rows):
+            raise RuntimeError("lock wait timeout")
+        transactions[-1].append(("apply", [item["id"] for item in changed_rows]))
+
+    monkeypatch.setattr(texts, "db_cursor", fake_db_cursor)
+    monkeypatch.setattr(texts, "_fetch_upload_targets", fake_fetch)
+    monkeypatch.setattr(texts, "_apply_upload_rows", fake_apply)
+    monkeypatch.setattr(texts.dictionary_correction, "apply_inline_corrections", lambda cursor, rows: {})
+    monkeypatch.setattr(texts, "mark_user_write", lambda user_id: None)
+    monkeypatch.setattr(texts, "bump_generation", lambda *scopes: None)
+    monkeypatch.setattr(texts, "bump_text_main_generation", lambda: transactions.append("bump"))
+
+    job = upload_jobs.submit_upload_job(1, "chunks.xlsx", None, str(file_path), texts._run_upload_job)
+    snapshot = _wait_finished(job)
+
+    assert transactions == [
+        [("read", [1, 2, 3, 4, 5]), "commit"],
+        [("lock", [1, 2]), ("apply", [1, 2]), "commit"],
+        "bump",
+        [("lock", [3, 4]), ("apply", [3, 4]), "commit"],
+        "bump",
+        [("lock", [5])],
+    ]
+    assert snapshot["status"] == "failed"
+    assert (snapshot["partialApply"], snapshot["appliedRows"], snapshot["updatedCount"]) == (True, 4, 4)
+    assert snapshot["processedRows"] == 4
+    assert "已提交 4 行" in snapshot["message"]
+
+
+def _login(client: TestClient, seed_user):
+    response = client.post("/auth/login", json={"username": seed_user["username"], "password": seed_user["password"]})
+    assert response.status_code == 200
+    return response.json()["data"]["token"]
+
+
+def test_upload_job_api_applies_rows(seed_user):
+    with db_cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO text_main (fid, "textId", part, "sourceText", "translatedText", status, "editCount")
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            ("file_job", 16001, 1, "src_job", "old_job", 1, 0),
+        )
+        text_id = cursor.lastrowid
+
+    client = TestClient(app)
+    token = _login(client, seed_user)
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    }
+    response = client.post(
+        "/texts/upload-jobs?fileName=tmp_job.xlsx",
+        headers=headers,
+        content=_build_xlsx([[text_id, "file_job", 16001, 1, "src_job", "new_job", "已完成"]]),
+    )
+    assert response.status_code == 200
+    job_id = response.json()["data"]["id"]
+
+    deadline = time.monotonic() + 10
+    data = None
+    while time.monotonic() < deadline:
+        data = client.get(f"/texts/upload-jobs/{job_id}", headers=headers).json()["data"]
+        if data["status"] in {"succeeded", "failed"}:
+            break
+        time.sleep(0.05)
+    assert data["status"] == "succeeded"
+    assert data["updatedCount"] == 1
+
+    with db_cursor() as cursor:
+        cursor.execute('SELECT "translatedText", status FROM text_main WHERE id = %s', (text_id,))
+        row = cursor.fetchone()
+        assert (row["translatedText"], row["status"]) == ("new_job", 3)
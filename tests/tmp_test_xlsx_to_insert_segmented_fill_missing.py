@@ -2,8 +2,8 @@ import pytest
 
 from tools.valid_format.xlsx_to_insert_segmented import (
     RowParseError,
+    SegmentParser,
     _build_output_rows_for_excel_row,
-    _build_patterns,
     _fill_missing_translated_segments,
 )
 
@@ -95,14 +95,14 @@ def test_fill_missing_translated_segments_reorders_by_source_order_with_copy():
 
 
 def test_build_output_rows_fills_missing_translated_segment_with_source_text():
-    patterns = _build_patterns(r"\d{2,10}")
+    segment_parser = SegmentParser(r"\d{2,10}")
 
     rows = _build_output_rows_for_excel_row(
         fid="620757423",
         source_raw="10001::::::[src_a]|||10002::::::[src_b]|||10003::::::[src_c]",
         translated_raw="10001::::::[dst_a]|||10003::::::[dst_c]",
         split_delimiter="|||",
-        patterns=patterns,
+        segment_parser=segment_parser,
         row_index=408,
         status_value=1,
         is_claimed_value=False,
@@ -118,14 +118,14 @@ def test_build_output_rows_fills_missing_translated_segment_with_source_text():
 
 
 def test_build_output_rows_realigns_equal_count_textid_mismatch_by_source_order():
-    patterns = _build_patterns(r"\d{2,10}")
+    segment_parser = SegmentParser(r"\d{2,10}")
 
     rows = _build_output_rows_for_excel_row(
         fid="620757716",
         source_raw="10001::::::[src_a]|||10002::::::[src_b]",
         translated_raw="10002::::::[dst_b]|||10001::::::[dst_a]",
         split_delimiter="|||",
-        patterns=patterns,
+        segment_parser=segment_parser,
         row_index=689,
         status_value=1,
         is_claimed_value=False,
@@ -0,0 +1,192 @@
+# 词典纠错匹配基准: 对比旧版逐字符 startswith 实现与 Aho-Corasick 编译索引的耗时与结果一致性。
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+_TOOLS_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_TOOLS_ROOT / "version_iteration_tool"))
+sys.path.insert(0, str(_TOOLS_ROOT.parent))
+
+from common import ConfigError, load_yaml_config, require_key, require_type  # noqa: E402
+from server.services.dictionary_matcher import CompiledCorrectionIndex, CorrectionRule  # noqa: E402
+
+_EN_WORDS = ("Bree", "Shire", "hobbit", "ranger", "quest", "Gandalf", "ring", "road", "pony", "inn")
+_ZH_CHARS = "布里理雷夏尔霍比特人游民任务甘道夫魔戒道路小马旅店古冢尸妖精灵矮人墨瑞亚石桥阴影号角歌谣地图的了在和"
+
+Result = List[Tuple[int, int, str]]
+
+
+def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    fixture = require_type(require_key(config, "fixture", ""), dict, "fixture")
+    benchmark = require_type(require_key(config, "benchmark", ""), dict, "benchmark")
+    normalized = {
+        "textCount": require_type(require_key(fixture, "textCount", "fixture."), int, "fixture.textCount"),
+        "textLength": require_type(require_key(fixture, "textLength", "fixture."), int, "fixture.textLength"),
+        "entryCount": require_type(require_key(fixture, "entryCount", "fixture."), int, "fixture.entryCount"),
+        "variantsPerEntry": require_type(
+            require_key(fixture, "variantsPerEntry", "fixture."), int, "fixture.variantsPerEntry"
+        ),
+        "seed": require_type(require_key(fixture, "seed", "fixture."), int, "fixture.seed"),
+        "repeat": require_type(require_key(benchmark, "repeat", "benchmark."), int, "benchmark.repeat"),
+    }
+    for key in ("textCount", "textLength", "entryCount", "variantsPerEntry", "repeat"):
+        if normalized[key] <= 0:
+            raise ConfigError(f"{key} 必须大于 0")
+    return normalized
+
+
+def _build_fixture(config: Dict[str, Any]) -> Tuple[List[CorrectionRule], List[Tuple[str, str]]]:
+    rng = random.Random(config["seed"])
+    rules: List[CorrectionRule] = []
+    for entry_id in range(1, config["entryCount"] + 1):
+        term_key = f"{rng.choice(_EN_WORDS)}{entry_id}"
+        variants = tuple(
+            {"".join(rng.choice(_ZH_CHARS) for _ in range(rng.randint(2, 4))) for _ in range(config["variantsPerEntry"])}
+        )
+        rules.append(CorrectionRule(entry_id, term_key, f"术语{entry_id}", variants))
+
+    texts: List[Tuple[str, str]] = []
+    for _ in range(config["textCount"]):
+        picked = rng.sample(rules, k=min(3, len(rules)))
+        source = " ".join(rule.term_key for rule in picked) + " " + " ".join(rng.choice(_EN_WORDS) for _ in range(8))
+        chars = [rng.choice(_ZH_CHARS) for _ in range(config["textLength"])]
+        for rule in picked:
+            position = rng.randrange(len(chars))
+            chars.insert(position, rng.choice(rule.variants))
+        texts.append((source, "".join(chars)))
+    return rules, texts
+
+
+def _legacy_count(text: str, needle: str) -> int:
+    # 与旧版 dictionary_correction._count_non_overlapping_occurrences 一致
+    if not text or not needle:
+        return 0
+    count = 0
+    start = 0
+    while True:
+        match_index = text.find(needle, start)
+        if match_index < 0:
+            return count
+        count += 1
+        start = match_index + len(needle)
+
+
+def _legacy_replace(text: str, variants: Tuple[str, ...], term_value: str) -> Tuple[int, str]:
+    # 与旧版 dictionary_correction._analyze_and_replace_variants 一致
+    sorted_variants = sorted(variants, key=len, reverse=True)
+    count = 0
+    parts: List[str] = []
+    cursor = 0
+    while cursor < len(text):
+        matched = None
+        for variant in sorted_variants:
+            if text.startswith(variant, cursor):
+                matched = variant
+                break
+        if matched is None:
+            parts.append(text[cursor])
+            cursor += 1
+            continue
+        count += 1
+        parts.append(term_value)
+        cursor += len(matched)
+    return count, "".join(parts)
+
+
+def _run_legacy(rules: List[CorrectionRule], texts: List[Tuple[str, str]]) -> Result:
+    # 旧流程: 每个条目一轮，用 LIKE 等价的子串判断筛候选后逐字符替换
+    result: Result = []
+    for rule_index, rule in enumerate(rules):
+        for text_index, (source, translated) in enumerate(texts):
+            if rule.term_key not in source or not any(variant in translated for variant in rule.variants):
+                continue
+            source_count = _legacy_count(source, rule.term_key)
+            translated_count, after_text = _legacy_replace(translated, rule.variants, rule.term_value)
+            if source_count > 0 and source_count == translated_count:
+                result.append((rule_index, text_index, after_text))
+    return sorted(result)
+
+
+def _run_per_entry_index(rules: List[CorrectionRule], texts: List[Tuple[str, str]]) -> Result:
+    # 每个条目编译一次索引（run_dictionary_correction 当前用法）
+    result: Result = []
+    for rule_index, rule in enumerate(rules):
+        index = CompiledCorrectionIndex([rule])
+        for text_index, (source, translated) in enumerate(texts):
+            if rule.term_key not in source or not any(variant in translated for variant in rule.variants):
+                continue
+            source_count = index.count_terms(source)[0]
+            translated_count, after_text = index.replace_variants(0, translated)
+            if source_count > 0 and source_count == translated_count:
+                result.append((rule_index, text_index, after_text))
+    return sorted(result)
+
+
+def _run_shared_index(rules: List[CorrectionRule], texts: List[Tuple[str, str]]) -> Result:
+    # 所有条目编译为一个索引，每条文本原文/译文各扫描一次
+    index = CompiledCorrectionIndex(rules)
+    result: Result = []
+    for text_index, (source, translated) in enumerate(texts):
+        variant_matches = index.scan_variants(translated)
+        if not variant_matches:
+            continue
+        term_counts = index.count_terms(source)
+        for rule_index in index.matched_rules(variant_matches):
+            source_count = term_counts[rule_index]
+            if source_count <= 0:
+                continue
+            translated_count, after_text = index.replace_variants(rule_index, translated, variant_matches)
+            if source_count == translated_count:
+                result.append((rule_index, text_index, after_text))
+    return sorted(result)
+
+
+def _time(func: Callable[[], Result], repeat: int) -> Tuple[float, Result]:
+    durations: List[float] = []
+    result: Result = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - started_at)
+    return statistics.median(durations) * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="词典纠错匹配实现基准对比")
+    parser.add_argument("--config", required=True, help="配置文件路径")
+    args = parser.parse_args()
+
+    config = _validate_config(load_yaml_config(Path(args.config).expanduser().resolve()))
+    rules, texts = _build_fixture(config)
+    print(
+        f"[INFO] texts={len(texts)} textLength={config['textLength']} entries={len(rules)} "
+        f"variantsPerEntry={config['variantsPerEntry']} repeat={config['repeat']}"
+    )
+
+    legacy_ms, legacy_result = _time(lambda: _run_legacy(rules, texts), config["repeat"])
+    per_entry_ms, per_entry_result = _time(lambda: _run_per_entry_index(rules, texts), config["repeat"])
+    shared_ms, shared_result = _time(lambda: _run_shared_index(rules, texts), config["repeat"])
+
+    print(f"{'mode':<14}{'median ms':>12}{'speedup':>10}{'hits':>10}  equal")
+    for mode, elapsed_ms, result in (
+        ("legacy", legacy_ms, legacy_result),
+        ("per-entry", per_entry_ms, per_entry_result),
+        ("shared", shared_ms, shared_result),
+    ):
+        print(
+            f"{mode:<14}{elapsed_ms:>12.1f}{legacy_ms / max(elapsed_ms, 1e-6):>9.1f}x"
+            f"{len(result):>10}  {result == legacy_result}"
+        )
+
+    if per_entry_result != legacy_result or shared_result != legacy_result:
+        raise RuntimeError("编译索引结果与旧版实现不一致")
+    print("[DONE] 基准完成，三种实现结果一致")
+
+
+if __name__ == "__main__":
+    main()
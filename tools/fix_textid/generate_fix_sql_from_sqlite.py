@@ -1,7 +1,7 @@
 """从 SQLite 原始数据推导 textId 错误→正确映射，生成 UPDATE SQL。
 
 原理：
-  对同一条分段，分别用"旧错误正则"和"新正确正则"各提取一次 textId，
+  对同一条分段解析一次，分别取"旧错误正则"和"新正确正则"下的 textId，
   找出两者不一致的条目，建立 (fid, old_textId) → new_textId 映射，
   无需连接数据库，直接生成可执行的 UPDATE SQL。
 
@@ -29,8 +29,10 @@ from typing import Any, Dict, Optional, Tuple
 
 _TOOLS_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(_TOOLS_ROOT / "version_iteration_tool"))
+sys.path.insert(0, str(_TOOLS_ROOT / "segment_format"))
 
 from common import ConfigError, load_yaml_config, require_key, require_type  # noqa: E402
+from segment_parser import SegmentParser  # noqa: E402
 
 
 def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
@@ -78,48 +80,21 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _build_wrong_patterns(
-    id_pattern: str,
-) -> Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
-    """构建旧的（错误的）正则——复现导入时的行为。
-    格式2/3 的 textId 命名组只捕获数字前缀，不含 :::{n} 或 :::{m-n} 部分。
-    """
-    p1 = re.compile(rf"^(?P<textId>{id_pattern})::::::\[(?P<text>.*)\]$", re.DOTALL)
-    p2 = re.compile(rf"^(?P<textId>{id_pattern}):::\d+:::\[(?P<text>.*)\]$", re.DOTALL)
-    p3 = re.compile(rf"^(?P<textId>{id_pattern}):::\d+(?:-\d+)+:::\[(?P<text>.*)\]$", re.DOTALL)
-    return p1, p2, p3
-
+def _extract_textids(segment: str, segment_parser: SegmentParser) -> Optional[Tuple[str, str]]:
+    """从一条分段文本中提取 (旧 textId, 新 textId)，返回 None 表示格式无法识别。
 
-def _build_correct_patterns(
-    id_pattern: str,
-) -> Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
-    """构建新的（正确的）正则。
-    格式2/3 的 textId 命名组包含完整业务标识。
+    旧 textId 复现导入时的错误行为：格式2/3 只取数字前缀，不含 :::{n} 或 :::{m-n} 部分；
+    新 textId 为完整业务标识。
     """
-    p1 = re.compile(rf"^(?P<textId>{id_pattern})::::::\[(?P<text>.*)\]$", re.DOTALL)
-    p2 = re.compile(rf"^(?P<textId>{id_pattern}:::\d+):::\[(?P<text>.*)\]$", re.DOTALL)
-    p3 = re.compile(
-        rf"^(?P<textId>{id_pattern}:::\d+(?:-\d+)+):::\[(?P<text>.*)\]$", re.DOTALL
-    )
-    return p1, p2, p3
-
-
-def _extract_textid(
-    segment: str,
-    patterns: Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]],
-) -> Optional[str]:
-    """从一条分段文本中提取 textId，三个格式按顺序尝试，返回 None 表示格式无法识别。"""
-    for p in patterns:
-        m = p.fullmatch(segment)
-        if m:
-            return m.group("textId")
-    return None
+    parsed = segment_parser.parse(segment)
+    if parsed is None:
+        return None
+    return parsed.id_prefix, parsed.text_id
 
 
 def _scan_sqlite(
     config: Dict[str, Any],
-    wrong_patterns: Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]],
-    correct_patterns: Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]],
+    segment_parser: SegmentParser,
 ) -> Dict[Tuple[str, str], str]:
     """扫描 SQLite 数据，建立 (fid, old_textId) → new_textId 映射。
     只包含需要修复的条目（old_textId != new_textId）。
@@ -154,12 +129,11 @@ def _scan_sqlite(
                     continue
                 total_segments += 1
 
-                old_tid = _extract_textid(segment, wrong_patterns)
-                new_tid = _extract_textid(segment, correct_patterns)
-
-                if old_tid is None or new_tid is None:
+                extracted = _extract_textids(segment, segment_parser)
+                if extracted is None:
                     skipped_segments += 1
                     continue
+                old_tid, new_tid = extracted
 
                 # 格式1：旧/新 textId 相同，无需修复
                 if old_tid == new_tid:
@@ -266,10 +240,9 @@ def main() -> None:
         if not out_path.parent.exists():
             raise FileNotFoundError(f"输出目录不存在: {out_path.parent}")
 
-    wrong_patterns = _build_wrong_patterns(config["idPattern"])
-    correct_patterns = _build_correct_patterns(config["idPattern"])
+    segment_parser = SegmentParser(config["idPattern"])
 
-    fix_map = _scan_sqlite(config, wrong_patterns, correct_patterns)
+    fix_map = _scan_sqlite(config, segment_parser)
     _write_outputs(fix_map, config, source_label=config["sqlitePath"])
 
     print("[DONE] 修复映射生成完成")
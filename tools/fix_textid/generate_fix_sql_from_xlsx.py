@@ -2,7 +2,7 @@
 
 原理：
   与 generate_fix_sql_from_sqlite.py 相同，区别在于数据来源是 xlsx 文件。
-  对每条分段，同时用"旧错误正则"和"新正确正则"各提取一次 textId，
+  对每条分段解析一次，同时取"旧错误正则"和"新正确正则"下的 textId，
   找出不一致的条目，建立 (fid, old_textId) → new_textId 映射，
   无需连接数据库，直接生成可执行的 UPDATE SQL。
 
@@ -37,8 +37,10 @@ from openpyxl.utils import column_index_from_string
 
 _TOOLS_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(_TOOLS_ROOT / "version_iteration_tool"))
+sys.path.insert(0, str(_TOOLS_ROOT / "segment_format"))
 
 from common import ConfigError, load_yaml_config, require_key, require_type  # noqa: E402
+from segment_parser import SegmentParser  # noqa: E402
 
 
 # ---------------------------------------------------------------------------
@@ -141,45 +143,19 @@ def _validate_config(config: Dict[str, Any], config_path: Path) -> Dict[str, Any
 
 
 # ---------------------------------------------------------------------------
-# 正则构建（与 sqlite 版本完全一致）
+# 分段解析（与 sqlite 版本完全一致）
 # ---------------------------------------------------------------------------
 
-def _build_wrong_patterns(
-    id_pattern: str,
-) -> Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
-    """构建旧的（错误的）正则——复现导入时的行为。
-    格式2/3 的 textId 命名组只捕获数字前缀，不含 :::{n} 或 :::{m-n} 部分。
-    """
-    p1 = re.compile(rf"^(?P<textId>{id_pattern})::::::\[(?P<text>.*)\]$", re.DOTALL)
-    p2 = re.compile(rf"^(?P<textId>{id_pattern}):::\d+:::\[(?P<text>.*)\]$", re.DOTALL)
-    p3 = re.compile(rf"^(?P<textId>{id_pattern}):::\d+(?:-\d+)+:::\[(?P<text>.*)\]$", re.DOTALL)
-    return p1, p2, p3
-
+def _extract_textids(segment: str, segment_parser: SegmentParser) -> Optional[Tuple[str, str]]:
+    """从一条分段文本中提取 (旧 textId, 新 textId)，返回 None 表示格式无法识别。
 
-def _build_correct_patterns(
-    id_pattern: str,
-) -> Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
-    """构建新的（正确的）正则。
-    格式2/3 的 textId 命名组包含完整业务标识。
+    旧 textId 复现导入时的错误行为：格式2/3 只取数字前缀，不含 :::{n} 或 :::{m-n} 部分；
+    新 textId 为完整业务标识。
     """
-    p1 = re.compile(rf"^(?P<textId>{id_pattern})::::::\[(?P<text>.*)\]$", re.DOTALL)
-    p2 = re.compile(rf"^(?P<textId>{id_pattern}:::\d+):::\[(?P<text>.*)\]$", re.DOTALL)
-    p3 = re.compile(
-        rf"^(?P<textId>{id_pattern}:::\d+(?:-\d+)+):::\[(?P<text>.*)\]$", re.DOTALL
-    )
-    return p1, p2, p3
-
-
-def _extract_textid(
-    segment: str,
-    patterns: Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]],
-) -> Optional[str]:
-    """从一条分段文本中提取 textId，返回 None 表示格式无法识别。"""
-    for p in patterns:
-        m = p.fullmatch(segment)
-        if m:
-            return m.group("textId")
-    return None
+    parsed = segment_parser.parse(segment)
+    if parsed is None:
+        return None
+    return parsed.id_prefix, parsed.text_id
 
 
 # ---------------------------------------------------------------------------
@@ -280,8 +256,7 @@ def _collect_merged_source(
 
 def _scan_xlsx(
     config: Dict[str, Any],
-    wrong_patterns: Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]],
-    correct_patterns: Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]],
+    segment_parser: SegmentParser,
 ) -> Dict[Tuple[str, str], str]:
     """扫描 xlsx 数据，建立 (fid, old_textId) → new_textId 映射。
     只包含需要修复的条目（old_textId != new_textId）。
@@ -331,12 +306,11 @@ def _scan_xlsx(
                 continue
             total_segments += 1
 
-            old_tid = _extract_textid(segment, wrong_patterns)
-            new_tid = _extract_textid(segment, correct_patterns)
-
-            if old_tid is None or new_tid is None:
+            extracted = _extract_textids(segment, segment_parser)
+            if extracted is None:
                 skipped_segments += 1
                 continue
+            old_tid, new_tid = extracted
 
             # 格式1：旧/新 textId 相同，无需修复
             if old_tid == new_tid:
@@ -451,10 +425,9 @@ def main() -> None:
         if not out_path.parent.exists():
             raise FileNotFoundError(f"输出目录不存在: {out_path.parent}")
 
-    wrong_patterns = _build_wrong_patterns(config["idPattern"])
-    correct_patterns = _build_correct_patterns(config["idPattern"])
+    segment_parser = SegmentParser(config["idPattern"])
 
-    fix_map = _scan_xlsx(config, wrong_patterns, correct_patterns)
+    fix_map = _scan_xlsx(config, segment_parser)
     _write_outputs(fix_map, config, source_label=config["xlsxPath"])
 
     print("[DONE] 修复映射生成完成")
@@ -0,0 +1,146 @@
+# 中间件鉴权压测: 对比鉴权在事件循环内同步执行（旧）与放入线程池（新）时的请求延迟分布。
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+_TOOLS_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_TOOLS_ROOT / "version_iteration_tool"))
+sys.path.insert(0, str(_TOOLS_ROOT.parent))
+
+import httpx  # noqa: E402
+from loguru import logger  # noqa: E402
+from common import ConfigError, load_yaml_config, require_key, require_type  # noqa: E402
+
+from server import app as app_module  # noqa: E402
+from server.routes.deps import try_resolve_auth_user  # noqa: E402
+from server.services import auth as auth_service  # noqa: E402
+
+_MODES = ("inline", "threadpool")
+
+
+def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    load = require_type(require_key(config, "load", ""), dict, "load")
+    simulation = require_type(require_key(config, "simulation", ""), dict, "simulation")
+    normalized = {
+        "path": require_type(require_key(load, "path", "load."), str, "load.path"),
+        "concurrency": require_type(require_key(load, "concurrency", "load."), int, "load.concurrency"),
+        "requestsPerClient": require_type(
+            require_key(load, "requestsPerClient", "load."), int, "load.requestsPerClient"
+        ),
+        "userCount": require_type(require_key(load, "userCount", "load."), int, "load.userCount"),
+        "dbLatencyMs": require_type(
+            require_key(simulation, "dbLatencyMs", "simulation."), (int, float), "simulation.dbLatencyMs"
+        ),
+        "authCacheEnabled": require_type(
+            require_key(simulation, "authCacheEnabled", "simulation."), bool, "simulation.authCacheEnabled"
+        ),
+    }
+    for key in ("concurrency", "requestsPerClient", "userCount"):
+        if normalized[key] <= 0:
+            raise ConfigError(f"{key} 必须大于 0")
+    if normalized["dbLatencyMs"] < 0:
+        raise ConfigError("dbLatencyMs 不能小于 0")
+    return normalized
+
+
+def _install_simulation(config: Dict[str, Any]) -> None:
+    latency_seconds = config["dbLatencyMs"] / 1000
+
+    def simulated_get_user_by_id(userId: int) -> Optional[Dict[str, Any]]:
+        # 模拟一次阻塞的 pymysql 查询
+        time.sleep(latency_seconds)
+        return {"id": userId, "username": f"load_user_{userId}", "isGuest": False}
+
+    auth_service.get_user_by_id = simulated_get_user_by_id
+    if not config["authCacheEnabled"]:
+        # TTL 为 0 的缓存不保存任何条目，每个请求都走 HMAC 校验 + 查库
+        auth_service._token_cache = auth_service._TtlLruCache(1, 0)
+        auth_service._user_cache = auth_service._TtlLruCache(1, 0)
+
+
+async def _inline_resolve(authorization: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    # 改造前的行为：在事件循环线程内直接调用同步鉴权
+    return try_resolve_auth_user(authorization)
+
+
+def _issue_tokens(user_count: int) -> List[str]:
+    now = int(time.time())
+    return [
+        auth_service.issue_token({"sub": user_id, "iat": now, "exp": now + 3600})
+        for user_id in range(1, user_count + 1)
+    ]
+
+
+async def _run_mode(mode: str, config: Dict[str, Any], tokens: List[str]) -> Dict[str, float]:
+    app_module.resolve_request_auth = _inline_resolve if mode == "inline" else _THREADPOOL_RESOLVE
+    latencies: List[float] = []
+    errors = 0
+    transport = httpx.ASGITransport(app=app_module.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+
+        async def run_client(client_index: int) -> None:
+            nonlocal errors
+            headers = {"Authorization": f"Bearer {tokens[client_index % len(tokens)]}"}
+            for _ in range(config["requestsPerClient"]):
+                started_at = time.perf_counter()
+                response = await client.get(config["path"], headers=headers)
+                latencies.append((time.perf_counter() - started_at) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(run_client(index) for index in range(config["concurrency"])))
+        elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": float(len(latencies)),
+        "errors": float(errors),
+        "p50": quantiles[49],
+        "p95": quantiles[94],
+        "p99": quantiles[98],
+        "max": latencies[-1],
+        "rps": len(latencies) / elapsed,
+    }
+
+
+_THREADPOOL_RESOLVE = app_module.resolve_request_auth
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="中间件鉴权事件循环阻塞压测")
+    parser.add_argument("--config", required=True, help="配置文件路径")
+    parser.add_argument("--mode", choices=(*_MODES, "both"), default="both", help="压测模式")
+    args = parser.parse_args()
+
+    config = _validate_config(load_yaml_config(Path(args.config).expanduser().resolve()))
+    # 去掉请求日志输出，只比较鉴权路径本身
+    logger.remove()
+    _install_simulation(config)
+    tokens = _issue_tokens(config["userCount"])
+    modes = _MODES if args.mode == "both" else (args.mode,)
+    print(
+        f"[INFO] path={config['path']} concurrency={config['concurrency']} "
+        f"requestsPerClient={config['requestsPerClient']} dbLatencyMs={config['dbLatencyMs']} "
+        f"authCacheEnabled={config['authCacheEnabled']}"
+    )
+
+    print(f"{'mode':<12}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'rps':>10}")
+    for mode in modes:
+        result = asyncio.run(_run_mode(mode, config, tokens))
+        print(
+            f"{mode:<12}{int(result['requests']):>10}{int(result['errors']):>8}{result['p50']:>10.1f}"
+            f"{result['p95']:>10.1f}{result['p99']:>10.1f}{result['max']:>10.1f}{result['rps']:>10.1f}"
+        )
+    print("[DONE] 压测完成")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 """比较 online 与 sys 汉化包 xlsx 的格式差异。
 
 说明：
-- 仅使用 Python 标准库，避免依赖 openpyxl / PyYAML。
+- 仅使用 Python 标准库，避免依赖 openpyxl / PyYAML；分段解析复用 tools/segment_format/segment_parser.py（同为标准库实现）。
 - 配置必须通过 JSON 文件显式提供；缺少配置直接报错。
 - 重点分析：
   1. xlsx 结构差异（sheet / 表头 / 分片列）
@@ -16,12 +16,17 @@ import argparse
 import csv
 import json
 import re
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Iterator, List, Optional, Tuple
 from xml.etree import ElementTree as ET
 from zipfile import ZipFile
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "segment_format"))
+
+from segment_parser import SegmentParser  # noqa: E402
+
 
 MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
 REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
@@ -442,24 +447,13 @@ def _build_group_record(file_cfg: FileConfig, fid: str, rows: List[Tuple[int, Op
 
 
 def _make_segment_parser(text_id_pattern: str):
-    pattern_colon6 = re.compile(rf"^(?P<textId>{text_id_pattern})::::::\[(?P<payload>.*)\]$", re.DOTALL)
-    pattern_triple_num = re.compile(rf"^(?P<textId>{text_id_pattern}:::\d+):::\[(?P<payload>.*)\]$", re.DOTALL)
-    pattern_triple_range = re.compile(
-        rf"^(?P<textId>{text_id_pattern}:::\d+(?:-\d+)+):::\[(?P<payload>.*)\]$",
-        re.DOTALL,
-    )
+    segment_parser = SegmentParser(text_id_pattern)
 
     def parse(segment: str) -> SegmentInfo:
-        for pattern in (pattern_colon6, pattern_triple_num, pattern_triple_range):
-            matched = pattern.fullmatch(segment)
-            if matched is not None:
-                return SegmentInfo(
-                    raw=segment,
-                    text_id=matched.group("textId"),
-                    payload=matched.group("payload"),
-                    is_valid=True,
-                )
-        return SegmentInfo(raw=segment, text_id=None, payload=None, is_valid=False)
+        parsed = segment_parser.parse(segment)
+        if parsed is None:
+            return SegmentInfo(raw=segment, text_id=None, payload=None, is_valid=False)
+        return SegmentInfo(raw=segment, text_id=parsed.text_id, payload=parsed.payload, is_valid=True)
 
     return parse
 
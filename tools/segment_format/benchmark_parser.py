@@ -0,0 +1,172 @@
+# 分段解析基准: 对比旧版“三条正则逐个 fullmatch”与共享 SegmentParser 的耗时与结果一致性。
+#   match: 只判定是否合法（valid_xlsx_format_check 的用法）
+#   parse: 判定并取出 textId 与载荷（step4 / xlsx_to_insert_segmented 等的用法）
+
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_TOOLS_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_TOOLS_ROOT / "version_iteration_tool"))
+sys.path.insert(0, str(_TOOLS_ROOT / "segment_format"))
+
+from common import ConfigError, load_yaml_config, require_key, require_type  # noqa: E402
+from segment_parser import SegmentParser  # noqa: E402
+
+_EN_WORDS = ("Bree", "Shire", "hobbit", "ranger", "quest", "Gandalf", "ring", "road", "pony", "inn", "[x]", "{a|b}")
+_ZH_CHARS = "布里理雷夏尔霍比特人游民任务甘道夫魔戒道路小马旅店古冢尸妖精灵矮人墨瑞亚石桥阴影号角歌谣地图的了在和"
+
+Result = List[Any]
+
+
+def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    fixture = require_type(require_key(config, "fixture", ""), dict, "fixture")
+    benchmark = require_type(require_key(config, "benchmark", ""), dict, "benchmark")
+    normalized = {
+        "segmentCount": require_type(
+            require_key(fixture, "segmentCount", "fixture."), int, "fixture.segmentCount"
+        ),
+        "payloadLength": require_type(
+            require_key(fixture, "payloadLength", "fixture."), int, "fixture.payloadLength"
+        ),
+        "invalidRatio": require_type(
+            require_key(fixture, "invalidRatio", "fixture."), (int, float), "fixture.invalidRatio"
+        ),
+        "idPattern": require_type(require_key(fixture, "idPattern", "fixture."), str, "fixture.idPattern"),
+        "seed": require_type(require_key(fixture, "seed", "fixture."), int, "fixture.seed"),
+        "repeat": require_type(require_key(benchmark, "repeat", "benchmark."), int, "benchmark.repeat"),
+    }
+    for key in ("segmentCount", "payloadLength", "repeat"):
+        if normalized[key] <= 0:
+            raise ConfigError(f"{key} 必须大于 0")
+    if not 0 <= normalized["invalidRatio"] <= 1:
+        raise ConfigError("invalidRatio 必须在 0~1 之间")
+    return normalized
+
+
+def _build_fixture(config: Dict[str, Any]) -> List[str]:
+    rng = random.Random(config["seed"])
+    segments: List[str] = []
+    for _ in range(config["segmentCount"]):
+        text_id = rng.randint(100, 99999999)
+        length = rng.randint(1, config["payloadLength"] * 2)
+        if rng.random() < 0.5:
+            payload = " ".join(rng.choice(_EN_WORDS) for _ in range(max(1, length // 6)))
+        else:
+            payload = "".join(rng.choice(_ZH_CHARS) for _ in range(length))
+        kind = rng.randrange(3)
+        if kind == 0:
+            segment = f"{text_id}::::::[{payload}]"
+        elif kind == 1:
+            segment = f"{text_id}:::{rng.randint(0, 9)}:::[{payload}]"
+        else:
+            start = rng.randint(0, 5)
+            segment = f"{text_id}:::{start}-{start + rng.randint(1, 4)}:::[{payload}]"
+        if rng.random() < config["invalidRatio"]:
+            # 常见错误：缺结尾 "]"、缺冒号、textId 混入非数字
+            segment = rng.choice((segment[:-1], segment.replace("::::::", ":::::", 1), f"x{segment}"))
+        segments.append(segment)
+    return segments
+
+
+def _build_legacy_patterns(id_pattern: str) -> Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
+    # 与重构前 step4 / xlsx_to_insert_segmented 的 _build_patterns 一致
+    return (
+        re.compile(rf"^(?P<textId>{id_pattern})::::::\[(?P<text>.*)\]$", re.DOTALL),
+        re.compile(rf"^(?P<textId>{id_pattern}:::\d+):::\[(?P<text>.*)\]$", re.DOTALL),
+        re.compile(rf"^(?P<textId>{id_pattern}:::\d+(?:-\d+)+):::\[(?P<text>.*)\]$", re.DOTALL),
+    )
+
+
+def _match_legacy(segments: List[str], patterns: Tuple[re.Pattern[str], ...]) -> Result:
+    pattern_colon6, pattern_triple_colon_num, pattern_triple_colon_range = patterns
+    return [
+        (
+            pattern_colon6.fullmatch(segment)
+            or pattern_triple_colon_num.fullmatch(segment)
+            or pattern_triple_colon_range.fullmatch(segment)
+        )
+        is not None
+        for segment in segments
+    ]
+
+
+def _match_shared(segments: List[str], segment_parser: SegmentParser) -> Result:
+    return [segment_parser.is_valid(segment) for segment in segments]
+
+
+def _legacy_parse_segment(segment: str, patterns: Tuple[re.Pattern[str], ...]) -> Optional[Tuple[str, str]]:
+    # 重构前各工具的 _parse_segment：按格式顺序逐个 fullmatch
+    pattern_colon6, pattern_triple_colon_num, pattern_triple_colon_range = patterns
+    matched = (
+        pattern_colon6.fullmatch(segment)
+        or pattern_triple_colon_num.fullmatch(segment)
+        or pattern_triple_colon_range.fullmatch(segment)
+    )
+    if matched is None:
+        return None
+    return matched.group("textId"), matched.group("text")
+
+
+def _parse_legacy(segments: List[str], patterns: Tuple[re.Pattern[str], ...]) -> Result:
+    return [_legacy_parse_segment(segment, patterns) for segment in segments]
+
+
+def _parse_shared(segments: List[str], segment_parser: SegmentParser) -> Result:
+    result: List[Optional[Tuple[str, str]]] = []
+    for segment in segments:
+        parsed = segment_parser.parse(segment)
+        result.append(None if parsed is None else (parsed.text_id, parsed.payload))
+    return result
+
+
+def _time(func: Callable[[], Result], repeat: int) -> Tuple[float, Result]:
+    durations: List[float] = []
+    result: Result = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - started_at)
+    return statistics.median(durations) * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="分段解析实现基准对比")
+    parser.add_argument("--config", required=True, help="配置文件路径")
+    args = parser.parse_args()
+
+    config = _validate_config(load_yaml_config(Path(args.config).expanduser().resolve()))
+    segments = _build_fixture(config)
+    legacy_patterns = _build_legacy_patterns(config["idPattern"])
+    segment_parser = SegmentParser(config["idPattern"])
+    print(
+        f"[INFO] segments={len(segments)} payloadLength~{config['payloadLength']} "
+        f"invalidRatio={config['invalidRatio']} repeat={config['repeat']}"
+    )
+
+    cases = (
+        ("match", lambda: _match_legacy(segments, legacy_patterns), lambda: _match_shared(segments, segment_parser)),
+        ("parse", lambda: _parse_legacy(segments, legacy_patterns), lambda: _parse_shared(segments, segment_parser)),
+    )
+    print(f"{'case':<8}{'mode':<10}{'median ms':>12}{'seg/s':>12}{'speedup':>10}  equal")
+    for case, run_legacy, run_shared in cases:
+        legacy_ms, legacy_result = _time(run_legacy, config["repeat"])
+        shared_ms, shared_result = _time(run_shared, config["repeat"])
+        for mode, elapsed_ms, result in (("legacy", legacy_ms, legacy_result), ("shared", shared_ms, shared_result)):
+            print(
+                f"{case:<8}{mode:<10}{elapsed_ms:>12.1f}{len(segments) / max(elapsed_ms, 1e-6) * 1000:>12.0f}"
+                f"{legacy_ms / max(elapsed_ms, 1e-6):>9.2f}x  {result == legacy_result}"
+            )
+        if shared_result != legacy_result:
+            raise RuntimeError(f"{case}: SegmentParser 结果与旧版三正则实现不一致")
+
+    print("[DONE] 基准完成，两种实现结果一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# 分段解析并行流水线基准: 生成合成 sqlite/xlsx 输入，按不同 workers 运行 step4 与 xlsx_to_insert_segmented，
+# 对比耗时并校验输出 SQL 与单进程逐字节一致。
+
+import argparse
+import hashlib
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import yaml
+from openpyxl import Workbook
+
+_TOOLS_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_TOOLS_ROOT / "version_iteration_tool"))
+
+from common import ConfigError, load_yaml_config, require_key, require_type  # noqa: E402
+
+_STEP4_SCRIPT = _TOOLS_ROOT / "version_iteration_tool" / "step4_generate_text_main_next_insert.py"
+_XLSX_SCRIPT = _TOOLS_ROOT / "valid_format" / "xlsx_to_insert_segmented.py"
+
+_EN_WORDS = ("Bree", "Shire", "hobbit", "ranger", "quest", "Gandalf", "ring", "road", "pony", "inn", "'s", "\\n")
+_ZH_CHARS = "布里理雷夏尔霍比特人游民任务甘道夫魔戒道路小马旅店古冢尸妖精灵矮人墨瑞亚石桥阴影号角歌谣地图的了在和"
+# 生成时间等随运行变化的注释行不参与一致性比较
+_VOLATILE_PREFIXES = ("-- generated_at_utc:",)
+
+
+def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    fixture = require_type(require_key(config, "fixture", ""), dict, "fixture")
+    benchmark = require_type(require_key(config, "benchmark", ""), dict, "benchmark")
+    normalized = {
+        "workDir": require_type(require_key(fixture, "workDir", "fixture."), str, "fixture.workDir"),
+        "fidCount": require_type(require_key(fixture, "fidCount", "fixture."), int, "fixture.fidCount"),
+        "segmentsPerFid": require_type(
+            require_key(fixture, "segmentsPerFid", "fixture."), int, "fixture.segmentsPerFid"
+        ),
+        "seed": require_type(require_key(fixture, "seed", "fixture."), int, "fixture.seed"),
+        "workers": require_type(require_key(benchmark, "workers", "benchmark."), list, "benchmark.workers"),
+        "chunkFids": require_type(require_key(benchmark, "chunkFids", "benchmark."), int, "benchmark.chunkFids"),
+        "tools": require_type(require_key(benchmark, "tools", "benchmark."), list, "benchmark.tools"),
+    }
+    for key in ("fidCount", "segmentsPerFid", "chunkFids"):
+        if normalized[key] <= 0:
+            raise ConfigError(f"{key} 必须大于 0")
+    if not normalized["workers"] or any(not isinstance(item, int) or item < 0 for item in normalized["workers"]):
+        raise ConfigError("benchmark.workers 必须是非空的非负整数列表")
+    unknown_tools = [tool for tool in normalized["tools"] if tool not in ("step4", "xlsx")]
+    if not normalized["tools"] or unknown_tools:
+        raise ConfigError(f"benchmark.tools 只能包含 step4/xlsx: {unknown_tools}")
+    return normalized
+
+
+def _random_text(rng: random.Random) -> str:
+    words = [rng.choice(_EN_WORDS) for _ in range(rng.randint(3, 12))]
+    if rng.random() < 0.2:
+        words.insert(rng.randrange(len(words)), "[x]")
+    return " ".join(words)
+
+
+def _random_translation(rng: random.Random) -> str:
+    return "".join(rng.choice(_ZH_CHARS) for _ in range(rng.randint(4, 24)))
+
+
+def _build_segment(rng: random.Random, text_id: int, text: str) -> str:
+    # 覆盖三种分段格式: id::::::[text]、id:::n:::[text]、id:::m-n:::[text]
+    kind = rng.randrange(3)
+    if kind == 0:
+        return f"{text_id}::::::[{text}]"
+    if kind == 1:
+        return f"{text_id}:::{rng.randint(0, 9)}:::[{text}]"
+    start = rng.randint(0, 5)
+    return f"{text_id}:::{start}-{start + rng.randint(1, 4)}:::[{text}]"
+
+
+def _build_fixture(config: Dict[str, Any], work_dir: Path) -> Tuple[Path, Path, int]:
+    rng = random.Random(config["seed"])
+    sqlite_path = work_dir / "bench_texts.db"
+    xlsx_path = work_dir / "bench_texts.xlsx"
+    sqlite_path.unlink(missing_ok=True)
+
+    connection = sqlite3.connect(sqlite_path)
+    connection.execute("CREATE TABLE patch_data (fid INTEGER, text_data TEXT)")
+    # write_only 模式不写 <dimension>，只读加载时 max_row 为 None，这里用普通模式生成
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = "sheet1"
+    worksheet.append(["fid", "splitPart", "sourceText", "translatedText"])
+
+    segment_total = 0
+    sqlite_rows: List[Tuple[int, str]] = []
+    for fid in range(1, config["fidCount"] + 1):
+        # 每个 fid 的分段数在 segmentsPerFid 附近波动，保证各块工作量不完全均匀
+        segment_count = max(1, config["segmentsPerFid"] + rng.randint(-2, 2))
+        segment_total += segment_count
+        source_segments: List[str] = []
+        translated_segments: List[str] = []
+        for _ in range(segment_count):
+            text_id = rng.randint(100, 99999999)
+            source_segments.append(_build_segment(rng, text_id, _random_text(rng)))
+            translated_segments.append(_build_segment(rng, text_id, _random_translation(rng)))
+        source_text = "|||".join(source_segments)
+        sqlite_rows.append((fid, source_text))
+        worksheet.append([fid, 1, source_text, "|||".join(translated_segments)])
+        if len(sqlite_rows) >= 10000:
+            connection.executemany("INSERT INTO patch_data (fid, text_data) VALUES (?, ?)", sqlite_rows)
+            sqlite_rows = []
+    if sqlite_rows:
+        connection.executemany("INSERT INTO patch_data (fid, text_data) VALUES (?, ?)", sqlite_rows)
+    connection.commit()
+    connection.close()
+    workbook.save(xlsx_path)
+    return sqlite_path, xlsx_path, segment_total
+
+
+def _step4_config(sqlite_path: Path, output_path: Path, workers: int, chunk_fids: int) -> Dict[str, Any]:
+    return {
+        "env": "test",
+        "database": {"dsnEnv": "LOTRO_DATABASE_DSN"},
+        "input": {
+            "sqlitePath": str(sqlite_path),
+            "sourceTable": "patch_data",
+            "fidColumn": "fid",
+            "textDataColumn": "text_data",
+        },
+        "parsing": {
+            "splitDelimiter": "|||",
+            "idPattern": r"\d{2,10}",
+            "invalidSegmentPolicy": "error",
+            "emptyTextDataPolicy": "skip",
+        },
+        "output": {
+            "sqlPath": str(output_path),
+            "targetTable": "text_main_next",
+            "chunkSize": 20000,
+            "overwrite": True,
+            "columns": {
+                name: name
+                for name in (
+                    "fid",
+                    "textId",
+                    "part",
+                    "sourceText",
+                    "sourceTextHash",
+                    "translatedText",
+                    "status",
+                    "isClaimed",
+                    "editCount",
+                    "uptTime",
+                    "crtTime",
+                )
+            },
+        },
+        "fixedValues": {
+            "translatedText": None,
+            "status": 1,
+            "isClaimed": False,
+            "editCount": 0,
+            "uptTimeExpression": "NOW()",
+            "crtTimeExpression": "NOW()",
+        },
+        "stats": {"progressEveryFidRows": 10 ** 9},
+        "parallel": {"workers": workers, "chunkFids": chunk_fids},
+        "load": {
+            "method": "loadData",
+            "batchSize": 2000,
+            "fidsPerCheckpoint": 2000,
+            "checkpointPath": str(output_path.with_suffix(".checkpoint.json")),
+        },
+    }
+
+
+def _xlsx_config(xlsx_path: Path, output_path: Path, workers: int, chunk_fids: int) -> Dict[str, Any]:
+    return {
+        "base_dir": str(xlsx_path.parent),
+        "input": {
+            "path": str(xlsx_path),
+            "sheet": "sheet1",
+            "row_start": 2,
+            "row_end": "max",
+            "columns": {"fid": "A", "splitPart": "B", "sourceText": "C", "translatedText": "D"},
+        },
+        "parsing": {"splitDelimiter": "|||", "idPattern": r"\d{2,10}"},
+        "output": {
+            "path": str(output_path),
+            "table": "text_main",
+            "chunkSize": 20000,
+            "overwrite": True,
+            "columns": {
+                name: name
+                for name in (
+                    "fid",
+                    "part",
+                    "textId",
+                    "sourceText",
+                    "sourceTextHash",
+                    "translatedText",
+                    "status",
+                    "isClaimed",
+                )
+            },
+        },
+        "fixedValues": {"status": 1, "isClaimed": False},
+        "behavior": {"skipBlankRows": True, "rowErrorPolicy": "error"},
+        "parallel": {"workers": workers, "chunkFids": chunk_fids},
+    }
+
+
+def _stable_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for line in handle:
+            if line.decode("utf-8").startswith(_VOLATILE_PREFIXES):
+                continue
+            digest.update(line)
+    return digest.hexdigest()
+
+
+def _run_tool(script: Path, config: Dict[str, Any], config_path: Path) -> float:
+    config_path.write_text(yaml.safe_dump(config, allow_unicode=True, sort_keys=False), encoding="utf-8")
+    started_at = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, str(script), "--config", str(config_path)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started_at
+    if completed.returncode != 0:
+        raise RuntimeError(f"{script.name} 执行失败 (config={config_path}):\n{completed.stderr}")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="分段解析并行流水线基准")
+    parser.add_argument("--config", required=True, help="配置文件路径")
+    args = parser.parse_args()
+
+    config_path = Path(args.config).expanduser().resolve()
+    config = _validate_config(load_yaml_config(config_path))
+    work_dir = Path(config["workDir"]).expanduser()
+    if not work_dir.is_absolute():
+        work_dir = config_path.parent / work_dir
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    fixture_started_at = time.perf_counter()
+    sqlite_path, xlsx_path, segment_total = _build_fixture(config, work_dir)
+    print(
+        f"[INFO] fids={config['fidCount']} segments={segment_total} chunkFids={config['chunkFids']} "
+        f"fixture={time.perf_counter() - fixture_started_at:.1f}s workDir={work_dir}"
+    )
+
+    tools = {
+        "step4": (_STEP4_SCRIPT, lambda output, workers: _step4_config(sqlite_path, output, workers, config["chunkFids"])),
+        "xlsx": (_XLSX_SCRIPT, lambda output, workers: _xlsx_config(xlsx_path, output, workers, config["chunkFids"])),
+    }
+    mismatched: List[str] = []
+    print(f"{'tool':<8}{'workers':>8}{'seconds':>10}{'seg/s':>12}{'speedup':>10}  identical")
+    for tool in config["tools"]:
+        script, build_config = tools[tool]
+        # 单进程结果作为基线
+        baseline_output = work_dir / f"{tool}_workers1.sql"
+        baseline_seconds = _run_tool(script, build_config(baseline_output, 1), work_dir / f"{tool}_workers1.yaml")
+        baseline_digest = _stable_digest(baseline_output)
+        print(f"{tool:<8}{1:>8}{baseline_seconds:>10.2f}{segment_total / baseline_seconds:>12.0f}{1.0:>9.2f}x  True")
+        for workers in config["workers"]:
+            if workers == 1:
+                continue
+            output_path = work_dir / f"{tool}_workers{workers}.sql"
+            elapsed = _run_tool(script, build_config(output_path, workers), work_dir / f"{tool}_workers{workers}.yaml")
+            identical = _stable_digest(output_path) == baseline_digest
+            if not identical:
+                mismatched.append(f"{tool} workers={workers}")
+            print(
+                f"{tool:<8}{workers:>8}{elapsed:>10.2f}{segment_total / elapsed:>12.0f}"
+                f"{baseline_seconds / max(elapsed, 1e-6):>9.2f}x  {identical}"
+            )
+
+    if mismatched:
+        raise RuntimeError(f"多进程输出与单进程不一致: {mismatched}")
+    print("[DONE] 基准完成，多进程输出与单进程逐字节一致（忽略 generated_at_utc 注释行）")
+
+
+if __name__ == "__main__":
+    main()
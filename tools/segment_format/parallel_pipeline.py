@@ -0,0 +1,94 @@
+# 分段解析并行流水线: 读取端按顺序切块 -> 进程池逐项处理 -> 按提交顺序产出结果。
+
+import contextlib
+import io
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# (结果, 处理期间的 stdout 输出, 异常)
+ItemOutcome = Tuple[Optional[Any], str, Optional[BaseException]]
+
+
+def resolve_workers(value: int) -> int:
+    """0 表示使用全部 CPU 核数。"""
+    if value < 0:
+        raise ValueError("workers 不能小于 0")
+    if value == 0:
+        return os.cpu_count() or 1
+    return value
+
+
+def _run_chunk(func: Callable[[Any], Any], chunk: List[Any]) -> List[ItemOutcome]:
+    # 子进程内逐项执行并捕获 print 输出，由主进程按原顺序回放，保证日志与串行执行一致
+    outcomes: List[ItemOutcome] = []
+    for item in chunk:
+        buffer = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(buffer):
+                result = func(item)
+        except Exception as exc:  # noqa: BLE001 - 异常随结果回传，由主进程按顺序抛出
+            outcomes.append((None, buffer.getvalue(), exc))
+            # 串行执行遇到异常即停止，后续项不再处理
+            break
+        outcomes.append((result, buffer.getvalue(), None))
+    return outcomes
+
+
+def _chunked(items: Iterable[T], chunk_size: int) -> Iterator[List[T]]:
+    chunk: List[T] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def map_ordered(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: int,
+    chunk_size: int,
+    max_pending_chunks: Optional[int] = None,
+) -> Iterator[R]:
+    """按输入顺序产出 func(item)；workers<=1 时在当前进程直接执行。
+
+    func 必须可被 pickle（模块级函数或其 functools.partial）。子进程中的 print 输出与异常
+    在主进程按输入顺序回放/抛出，因此输出文件、日志与异常位置都与串行执行一致。
+    同时在途的块数受 max_pending_chunks（默认 workers*2）限制，读取端不会把整个输入读入内存。
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size 必须大于 0")
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    pending_limit = max_pending_chunks if max_pending_chunks is not None else workers * 2
+    pending: Deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            for chunk in _chunked(items, chunk_size):
+                pending.append(executor.submit(_run_chunk, func, chunk))
+                if len(pending) >= pending_limit:
+                    yield from _replay(pending.popleft().result())
+            while pending:
+                yield from _replay(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _replay(outcomes: List[ItemOutcome]) -> Iterator[Any]:
+    for result, output, error in outcomes:
+        if output:
+            print(output, end="")
+        if error is not None:
+            raise error
+        yield result
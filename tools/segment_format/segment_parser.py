@@ -0,0 +1,85 @@
+# 分段协议解析: 一个组合正则一次 fullmatch 同时判定格式、取出 textId 与载荷，不再按格式逐个重试整段匹配。
+#
+#   格式1 {num}::::::[text]        → textId = {num}
+#   格式2 {num}:::{n}:::[text]     → textId = {num}:::{n}
+#   格式3 {num}:::{m-n}:::[text]   → textId = {num}:::{m-n}
+#
+# 与各工具原先的三条 fullmatch 正则（^(?P<textId>...):::...\[(?P<text>.*)\]$, re.DOTALL）结果一致：
+# 载荷即分段头之后的 "[" 与末尾 "]" 之间的全部内容。
+# 性能对比见 benchmark_parser.py。
+
+import re
+from typing import NamedTuple, Optional
+
+DEFAULT_ID_PATTERN = r"\d{2,10}"
+
+FORMAT_COLON6 = "colon6"
+FORMAT_TRIPLE_COLON_NUM = "triple_colon_num"
+FORMAT_TRIPLE_COLON_RANGE = "triple_colon_range"
+# {num}:::::[text]：少写一个冒号，不是合法格式，仅供修复/诊断工具识别
+FORMAT_COLON5 = "colon5"
+
+
+class SegmentHead(NamedTuple):
+    format: str
+    id_prefix: str  # 仅 {num}
+    text_id: str  # 完整业务标识；colon5 为 {num}
+    end: int  # 分隔符之后的下标，合法分段在此处为 "["
+
+
+class Segment(NamedTuple):
+    format: str
+    id_prefix: str
+    text_id: str
+    payload: str
+
+
+class SegmentParser:
+    """按 idPattern 编译一次，可在进程池间 pickle。"""
+
+    __slots__ = ("id_pattern", "_segment_pattern", "_head_pattern")
+
+    def __init__(self, id_pattern: str = DEFAULT_ID_PATTERN):
+        self.id_pattern = id_pattern
+        # 有 {n}/{m-n} 时分隔符为 ":::{n}:::"，否则条件分支再补 ":::" 构成 "::::::"
+        self._segment_pattern = re.compile(
+            rf"(?P<text_id>(?P<prefix>{id_pattern})(?::::(?P<num>\d+)(?P<range>(?:-\d+)+)?)?)"
+            rf":::(?(num)|:::)\[(?P<payload>.*)\]",
+            re.DOTALL,
+        )
+        # ":::" 后可选的 {n} / {m-n} 区分格式1 与格式2/3；colon5 分支放在最后，只在前者不成立时尝试
+        self._head_pattern = re.compile(
+            rf"(?P<prefix>{id_pattern})(?::::(?P<suffix>\d+(?:-\d+)*)?:::|(?P<colon5>:::::)(?!:))"
+        )
+
+    def __reduce__(self):
+        return SegmentParser, (self.id_pattern,)
+
+    def match_head(self, segment: str) -> Optional[SegmentHead]:
+        """只识别分段头，不检查其后的 [text]；供缺括号/缺冒号的诊断与修复使用。"""
+        matched = self._head_pattern.match(segment)
+        if matched is None:
+            return None
+        prefix = matched.group("prefix")
+        if matched.group("colon5") is not None:
+            return SegmentHead(FORMAT_COLON5, prefix, prefix, matched.end())
+        suffix = matched.group("suffix")
+        if suffix is None:
+            return SegmentHead(FORMAT_COLON6, prefix, prefix, matched.end())
+        segment_format = FORMAT_TRIPLE_COLON_RANGE if "-" in suffix else FORMAT_TRIPLE_COLON_NUM
+        return SegmentHead(segment_format, prefix, segment[: matched.end("suffix")], matched.end())
+
+    def parse(self, segment: str) -> Optional[Segment]:
+        """解析合法分段；格式不符（含 colon5）返回 None。"""
+        matched = self._segment_pattern.fullmatch(segment)
+        if matched is None:
+            return None
+        text_id, prefix, num, range_part, payload = matched.group("text_id", "prefix", "num", "range", "payload")
+        if num is None:
+            return Segment(FORMAT_COLON6, prefix, text_id, payload)
+        if range_part is None:
+            return Segment(FORMAT_TRIPLE_COLON_NUM, prefix, text_id, payload)
+        return Segment(FORMAT_TRIPLE_COLON_RANGE, prefix, text_id, payload)
+
+    def is_valid(self, segment: str) -> bool:
+        return self._segment_pattern.fullmatch(segment) is not None
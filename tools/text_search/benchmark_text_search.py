@@ -0,0 +1,215 @@
+# 文本搜索: 在合成数据表上对比 LIKE 子串匹配与 ngram 全文匹配的耗时与结果一致性。
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+_TOOLS_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_TOOLS_ROOT / "version_iteration_tool"))
+
+from common import (  # noqa: E402
+    ConfigError,
+    connect_mysql_from_dsn,
+    load_env_file,
+    load_yaml_config,
+    quote_table_ref,
+    require_key,
+    require_runtime_env,
+    require_type,
+    resolve_env_table_ref,
+    start_ssh_tunnel_from_env,
+    table_exists,
+)
+
+_EN_WORDS = (
+    "Bree", "Shire", "hobbit", "ranger", "quest", "Gandalf", "ring", "road", "pony", "inn",
+    "barrow", "wight", "elf", "dwarf", "Moria", "bridge", "shadow", "horn", "song", "map",
+)
+_ZH_WORDS = (
+    "布理", "夏尔", "霍比特人", "游民", "任务", "甘道夫", "魔戒", "道路", "小马", "旅店",
+    "古冢", "尸妖", "精灵", "矮人", "墨瑞亚", "石桥", "阴影", "号角", "歌谣", "地图",
+)
+
+
+def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    runtime_env = require_runtime_env(
+        require_type(require_key(config, "env", ""), str, "env"),
+        "env",
+    )
+    if runtime_env != "test":
+        raise ConfigError("基准测试会建表写入数据，env 仅允许 test")
+    database = require_type(require_key(config, "database", ""), dict, "database")
+    fixture = require_type(require_key(config, "fixture", ""), dict, "fixture")
+    benchmark = require_type(require_key(config, "benchmark", ""), dict, "benchmark")
+
+    dsn_env = require_type(require_key(database, "dsnEnv", "database."), str, "database.dsnEnv")
+    table = resolve_env_table_ref(
+        require_type(require_key(fixture, "table", "fixture."), str, "fixture.table"),
+        runtime_env,
+        "fixture.table",
+    )
+    row_count = require_type(require_key(fixture, "rowCount", "fixture."), int, "fixture.rowCount")
+    batch_size = require_type(require_key(fixture, "batchSize", "fixture."), int, "fixture.batchSize")
+    seed = require_type(require_key(fixture, "seed", "fixture."), int, "fixture.seed")
+    rebuild = require_type(require_key(fixture, "rebuild", "fixture."), bool, "fixture.rebuild")
+    keywords = require_type(require_key(benchmark, "keywords", "benchmark."), list, "benchmark.keywords")
+    repeat = require_type(require_key(benchmark, "repeat", "benchmark."), int, "benchmark.repeat")
+
+    if row_count <= 0:
+        raise ConfigError("fixture.rowCount 必须大于 0")
+    if batch_size <= 0:
+        raise ConfigError("fixture.batchSize 必须大于 0")
+    if repeat <= 0:
+        raise ConfigError("benchmark.repeat 必须大于 0")
+    if not keywords:
+        raise ConfigError("benchmark.keywords 不能为空")
+
+    normalized_keywords: List[Dict[str, str]] = []
+    for idx, item in enumerate(keywords):
+        item = require_type(item, dict, f"benchmark.keywords[{idx}]")
+        column = require_type(
+            require_key(item, "column", f"benchmark.keywords[{idx}]."), str, f"benchmark.keywords[{idx}].column"
+        )
+        keyword = require_type(
+            require_key(item, "keyword", f"benchmark.keywords[{idx}]."), str, f"benchmark.keywords[{idx}].keyword"
+        )
+        if column not in ("sourceText", "translatedText"):
+            raise ConfigError(f"benchmark.keywords[{idx}].column 仅支持 sourceText/translatedText")
+        if len(keyword) < 2 or any(char.isspace() or char in '"%_\\' for char in keyword):
+            raise ConfigError(f"benchmark.keywords[{idx}].keyword 会回退 LIKE，不适合做全文基准: {keyword}")
+        normalized_keywords.append({"column": column, "keyword": keyword})
+
+    return {
+        "dsnEnv": dsn_env,
+        "table": table,
+        "rowCount": row_count,
+        "batchSize": batch_size,
+        "seed": seed,
+        "rebuild": rebuild,
+        "keywords": normalized_keywords,
+        "repeat": repeat,
+    }
+
+
+def _build_fixture_row(rng: random.Random, index: int) -> Tuple[str, str, int, str, str]:
+    word_count = rng.randint(4, 24)
+    picks = [rng.randrange(len(_EN_WORDS)) for _ in range(word_count)]
+    source_text = " ".join(_EN_WORDS[pick] for pick in picks)
+    translated_text = "".join(_ZH_WORDS[pick] for pick in picks)
+    return (f"bench_{index // 20}", f"{100000 + index}", index % 20 + 1, source_text, translated_text)
+
+
+def _prepare_fixture(conn, config: Dict[str, Any]) -> None:
+    table_sql = quote_table_ref(config["table"])
+    with conn.cursor() as cursor:
+        exists = table_exists(cursor, config["table"])
+        if exists and not config["rebuild"]:
+            cursor.execute(f"SELECT COUNT(*) AS cnt FROM {table_sql}")
+            print(f"[INFO] 复用已有基准表: {config['table']} rows={cursor.fetchone()['cnt']}")
+            return
+        cursor.execute(f"DROP TABLE IF EXISTS {table_sql}")
+        cursor.execute(
+            f"""
+            CREATE TABLE {table_sql} (
+              id BIGINT NOT NULL AUTO_INCREMENT,
+              fid VARCHAR(64) NOT NULL,
+              `textId` VARCHAR(255) NOT NULL,
+              part INT NOT NULL,
+              `sourceText` TEXT,
+              `translatedText` TEXT,
+              PRIMARY KEY (id)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
+            """
+        )
+        conn.commit()
+
+        rng = random.Random(config["seed"])
+        started_at = time.perf_counter()
+        for batch_start in range(0, config["rowCount"], config["batchSize"]):
+            batch_end = min(batch_start + config["batchSize"], config["rowCount"])
+            rows = [_build_fixture_row(rng, index) for index in range(batch_start, batch_end)]
+            cursor.executemany(
+                f"INSERT INTO {table_sql} (fid, `textId`, part, `sourceText`, `translatedText`) VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+            conn.commit()
+            elapsed = time.perf_counter() - started_at
+            print(f"[INFO] 写入 {batch_end}/{config['rowCount']} rows ({batch_end / max(elapsed, 1e-9):.0f} rows/s)")
+
+        print("[INFO] 创建 ngram 全文索引")
+        cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+        cursor.execute(f"CREATE FULLTEXT INDEX ft_bench_source_text ON {table_sql}(`sourceText`) WITH PARSER ngram")
+        cursor.execute(f"CREATE FULLTEXT INDEX ft_bench_translated_text ON {table_sql}(`translatedText`) WITH PARSER ngram")
+        conn.commit()
+
+
+def _build_queries(table_sql: str, column: str, keyword: str) -> Dict[str, Tuple[str, Tuple[Any, ...]]]:
+    # 与 server/routes/texts.py::_build_text_match_clause 的 fuzzy/fulltext 分支保持一致。
+    column_sql = f"`{column}`"
+    return {
+        "fuzzy": (f"SELECT id FROM {table_sql} WHERE {column_sql} LIKE %s", (f"%{keyword}%",)),
+        "fulltext": (
+            f"SELECT id FROM {table_sql} "
+            f"WHERE MATCH({column_sql}) AGAINST (%s IN BOOLEAN MODE) AND {column_sql} LIKE %s",
+            (f'"{keyword}"', f"%{keyword}%"),
+        ),
+    }
+
+
+def _time_query(cursor, sql: str, params: Tuple[Any, ...], repeat: int) -> Tuple[float, Set[int]]:
+    durations: List[float] = []
+    ids: Set[int] = set()
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        cursor.execute(sql, params)
+        ids = {int(row["id"]) for row in cursor.fetchall()}
+        durations.append(time.perf_counter() - started_at)
+    return statistics.median(durations) * 1000, ids
+
+
+def _run_benchmark(conn, config: Dict[str, Any]) -> bool:
+    table_sql = quote_table_ref(config["table"])
+    all_equal = True
+    print(f"{'column':<16}{'keyword':<14}{'rows':>8}{'fuzzy ms':>12}{'fulltext ms':>14}{'speedup':>10}  equal")
+    with conn.cursor() as cursor:
+        for item in config["keywords"]:
+            queries = _build_queries(table_sql, item["column"], item["keyword"])
+            fuzzy_ms, fuzzy_ids = _time_query(cursor, *queries["fuzzy"], config["repeat"])
+            fulltext_ms, fulltext_ids = _time_query(cursor, *queries["fulltext"], config["repeat"])
+            equal = fuzzy_ids == fulltext_ids
+            all_equal = all_equal and equal
+            print(
+                f"{item['column']:<16}{item['keyword']:<14}{len(fuzzy_ids):>8}"
+                f"{fuzzy_ms:>12.1f}{fulltext_ms:>14.1f}{fuzzy_ms / max(fulltext_ms, 1e-6):>9.1f}x  {equal}"
+            )
+    return all_equal
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="LIKE 与 ngram 全文搜索基准对比")
+    parser.add_argument("--config", required=True, help="配置文件路径")
+    args = parser.parse_args()
+
+    config = _validate_config(load_yaml_config(Path(args.config).expanduser().resolve()))
+    load_env_file()
+    dsn_env = config["dsnEnv"]
+    if dsn_env not in os.environ:
+        raise RuntimeError(f"环境变量未设置: {dsn_env}")
+
+    with start_ssh_tunnel_from_env():
+        with connect_mysql_from_dsn(os.environ[dsn_env]) as conn:
+            _prepare_fixture(conn, config)
+            all_equal = _run_benchmark(conn, config)
+
+    if not all_equal:
+        raise RuntimeError("fulltext 与 fuzzy 结果集不一致，请检查 ngram_token_size 与停用词配置")
+    print("[DONE] 基准完成，两种模式结果一致")
+
+
+if __name__ == "__main__":
+    main()
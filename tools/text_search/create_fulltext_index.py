@@ -0,0 +1,145 @@
+# 文本搜索: 为 text_main 创建 ngram 全文索引（sourceMatchMode/translatedMatchMode=fulltext）。
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+_TOOLS_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_TOOLS_ROOT / "version_iteration_tool"))
+
+from common import (  # noqa: E402
+    ConfigError,
+    column_exists,
+    connect_mysql_from_dsn,
+    load_env_file,
+    load_yaml_config,
+    quote_ident,
+    quote_table_ref,
+    require_identifier,
+    require_key,
+    require_runtime_env,
+    require_type,
+    resolve_env_table_ref,
+    split_table_ref,
+    start_ssh_tunnel_from_env,
+    table_exists,
+)
+
+
+def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    runtime_env = require_runtime_env(
+        require_type(require_key(config, "env", ""), str, "env"),
+        "env",
+    )
+    database = require_type(require_key(config, "database", ""), dict, "database")
+    index_cfg = require_type(require_key(config, "index", ""), dict, "index")
+
+    dsn_env = require_type(require_key(database, "dsnEnv", "database."), str, "database.dsnEnv")
+    table = resolve_env_table_ref(
+        require_type(require_key(index_cfg, "table", "index."), str, "index.table"),
+        runtime_env,
+        "index.table",
+    )
+    ngram_token_size = require_type(
+        require_key(index_cfg, "ngramTokenSize", "index."), int, "index.ngramTokenSize"
+    )
+    indexes = require_type(require_key(index_cfg, "indexes", "index."), list, "index.indexes")
+
+    if ngram_token_size <= 0:
+        raise ConfigError("index.ngramTokenSize 必须大于 0")
+    if not indexes:
+        raise ConfigError("index.indexes 不能为空")
+
+    normalized_indexes: List[Dict[str, str]] = []
+    for idx, item in enumerate(indexes):
+        item = require_type(item, dict, f"index.indexes[{idx}]")
+        name = require_type(require_key(item, "name", f"index.indexes[{idx}]."), str, f"index.indexes[{idx}].name")
+        column = require_type(
+            require_key(item, "column", f"index.indexes[{idx}]."), str, f"index.indexes[{idx}].column"
+        )
+        require_identifier(name, f"index.indexes[{idx}].name")
+        require_identifier(column, f"index.indexes[{idx}].column")
+        normalized_indexes.append({"name": name, "column": column})
+
+    return {
+        "env": runtime_env,
+        "dsnEnv": dsn_env,
+        "table": table,
+        "ngramTokenSize": ngram_token_size,
+        "indexes": normalized_indexes,
+    }
+
+
+def _index_exists(cursor, table_ref: str, index_name: str) -> bool:
+    schema, table = split_table_ref(table_ref)
+    cursor.execute(
+        """
+        SELECT EXISTS (
+          SELECT 1
+          FROM information_schema.statistics
+          WHERE table_schema = %s AND table_name = %s AND index_name = %s
+        ) AS `exists`
+        """,
+        (schema, table, index_name),
+    )
+    return bool(cursor.fetchone()["exists"])
+
+
+def _check_ngram_token_size(cursor, expected: int) -> None:
+    cursor.execute("SELECT @@GLOBAL.ngram_token_size AS size")
+    actual = int(cursor.fetchone()["size"])
+    if actual != expected:
+        raise RuntimeError(
+            f"MySQL ngram_token_size={actual} 与配置 index.ngramTokenSize={expected} 不一致，"
+            "请调整 MySQL 启动参数或同步修改 config/lotro.yaml 的 text_list.fulltext_min_keyword_length"
+        )
+
+
+def _create_indexes(cursor, config: Dict[str, Any]) -> None:
+    table_ref = config["table"]
+    if not table_exists(cursor, table_ref):
+        raise RuntimeError(f"表不存在: {table_ref}")
+
+    _check_ngram_token_size(cursor, config["ngramTokenSize"])
+    # 默认英文停用词会让包含停用词的 ngram 不入索引，导致漏检，建索引前关闭。
+    cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+
+    for item in config["indexes"]:
+        if not column_exists(cursor, table_ref, item["column"]):
+            raise RuntimeError(f"列不存在: {table_ref}.{item['column']}")
+        if _index_exists(cursor, table_ref, item["name"]):
+            print(f"[SKIP] 索引已存在: {table_ref}.{item['name']}")
+            continue
+        started_at = time.perf_counter()
+        print(f"[INFO] 创建全文索引: {table_ref}.{item['name']} ({item['column']})")
+        cursor.execute(
+            f"CREATE FULLTEXT INDEX {quote_ident(item['name'])} "
+            f"ON {quote_table_ref(table_ref)}({quote_ident(item['column'])}) WITH PARSER ngram"
+        )
+        print(f"[DONE] {item['name']} elapsedSec={time.perf_counter() - started_at:.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="为 text_main 创建 ngram 全文索引")
+    parser.add_argument("--config", required=True, help="配置文件路径")
+    args = parser.parse_args()
+
+    config = _validate_config(load_yaml_config(Path(args.config).expanduser().resolve()))
+    load_env_file()
+    dsn_env = config["dsnEnv"]
+    if dsn_env not in os.environ:
+        raise RuntimeError(f"环境变量未设置: {dsn_env}")
+
+    with start_ssh_tunnel_from_env():
+        with connect_mysql_from_dsn(os.environ[dsn_env]) as conn:
+            with conn.cursor() as cursor:
+                _create_indexes(cursor, config)
+
+    print(f"[DONE] [{config['env']}] 全文索引创建完成")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
 import argparse
-import re
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Tuple
 
 import yaml
 from openpyxl import load_workbook
 from openpyxl.utils import column_index_from_string
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "segment_format"))
+
+from segment_parser import FORMAT_COLON5, SegmentParser  # noqa: E402
+
 
 _EXCEL_MAX_CELL_TEXT_LENGTH = 32767
 
@@ -167,105 +171,62 @@ def _validate_config(data: Dict[str, Any], config_path: Path) -> Dict[str, Any]:
     }
 
 
-def _build_valid_patterns(id_pattern: str) -> Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
-    return (
-        re.compile(rf"^(?P<textId>{id_pattern})::::::\[(?P<text>.*)\]$", re.DOTALL),
-        re.compile(rf"^(?P<textId>{id_pattern}:::\d+):::\[(?P<text>.*)\]$", re.DOTALL),
-        re.compile(rf"^(?P<textId>{id_pattern}:::\d+(?:-\d+)+):::\[(?P<text>.*)\]$", re.DOTALL),
-    )
-
-
-def _build_missing_open_patterns(id_pattern: str) -> Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
-    return (
-        re.compile(rf"^(?P<head>{id_pattern}::::::)(?P<text>(?!\[).*)\]$", re.DOTALL),
-        re.compile(rf"^(?P<head>{id_pattern}:::\d+:::)(?P<text>(?!\[).*)\]$", re.DOTALL),
-        re.compile(rf"^(?P<head>{id_pattern}:::\d+(?:-\d+)+:::)(?P<text>(?!\[).*)\]$", re.DOTALL),
-    )
-
-
-def _build_missing_close_patterns(id_pattern: str) -> Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
-    return (
-        re.compile(rf"^(?P<head>{id_pattern}::::::)\[(?P<text>.*)$", re.DOTALL),
-        re.compile(rf"^(?P<head>{id_pattern}:::\d+:::)\[(?P<text>.*)$", re.DOTALL),
-        re.compile(rf"^(?P<head>{id_pattern}:::\d+(?:-\d+)+:::)\[(?P<text>.*)$", re.DOTALL),
-    )
-
-
-def _build_missing_colon_patterns(id_pattern: str) -> Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
-    return (
-        re.compile(rf"^(?P<head>{id_pattern}:::::)(?!:)\[(?P<text>.*)\]$", re.DOTALL),
-        re.compile(rf"^(?P<head>{id_pattern}:::::)(?!:)(?P<text>(?!\[).*)\]$", re.DOTALL),
-        re.compile(rf"^(?P<head>{id_pattern}:::::)(?!:)\[(?P<text>.*)$", re.DOTALL),
-    )
-
-
-def _first_fullmatch(patterns: Tuple[re.Pattern[str], ...], text: str) -> Optional[re.Match[str]]:
-    for pattern in patterns:
-        matched = pattern.fullmatch(text)
-        if matched is not None:
-            return matched
-    return None
-
-
-def _classify_segment(
-    segment: str,
-    valid_patterns: Tuple[re.Pattern[str], ...],
-    missing_colon_patterns: Tuple[re.Pattern[str], ...],
-    missing_open_patterns: Tuple[re.Pattern[str], ...],
-    missing_close_patterns: Tuple[re.Pattern[str], ...],
-) -> str:
-    if _first_fullmatch(valid_patterns, segment) is not None:
-        return "valid"
-    if _first_fullmatch(missing_colon_patterns, segment) is not None:
-        return "missing_colon"
-    if _first_fullmatch(missing_open_patterns, segment) is not None:
-        return "missing_open"
-    if _first_fullmatch(missing_close_patterns, segment) is not None:
-        return "missing_close"
-    return "other_invalid"
+def _match_segment(segment: str, segment_parser: SegmentParser) -> Tuple[str, str, str]:
+    # 按分段头之后是否有 "[" / 结尾 "]" 归类，返回 (kind, head, text)。
+    # kind: valid / missing_colon（{num}:::::，此时 "[" 与 "]" 至少有一个）/ missing_open / missing_close / other_invalid
+    head = segment_parser.match_head(segment)
+    if head is None:
+        return "other_invalid", "", ""
+    rest = segment[head.end :]
+    opened = rest.startswith("[")
+    body = rest[1:] if opened else rest
+    closed = body.endswith("]")
+    text = body[:-1] if closed else body
+    head_text = segment[: head.end]
+    if head.format == FORMAT_COLON5:
+        if opened or closed:
+            return "missing_colon", head_text, text
+        return "other_invalid", "", ""
+    if opened and closed:
+        return "valid", head_text, text
+    if closed:
+        return "missing_open", head_text, text
+    if opened:
+        return "missing_close", head_text, text
+    return "other_invalid", "", ""
+
+
+def _classify_segment(segment: str, segment_parser: SegmentParser) -> str:
+    return _match_segment(segment, segment_parser)[0]
 
 
 def _repair_segment(
     segment: str,
-    valid_patterns: Tuple[re.Pattern[str], ...],
-    missing_colon_patterns: Tuple[re.Pattern[str], ...],
-    missing_open_patterns: Tuple[re.Pattern[str], ...],
-    missing_close_patterns: Tuple[re.Pattern[str], ...],
+    segment_parser: SegmentParser,
     allow_missing_colon: bool,
     allow_missing_opening: bool,
     allow_missing_closing: bool,
 ) -> Tuple[str, List[str]]:
-    if _first_fullmatch(valid_patterns, segment) is not None:
+    kind, head_text, text = _match_segment(segment, segment_parser)
+    if kind == "valid":
         return segment, []
 
-    if allow_missing_colon:
-        matched = _first_fullmatch(missing_colon_patterns, segment)
-        if matched is not None:
-            repaired = f"{matched.group('head')}:[{matched.group('text')}]"
-            if _first_fullmatch(valid_patterns, repaired) is None:
-                raise ValueError(f"repair produced invalid segment: {repaired}")
-            repair_kinds = ["missing_colon"]
-            if "[" not in segment:
-                repair_kinds.append("missing_open")
-            if segment.endswith("]") is False:
-                repair_kinds.append("missing_close")
-            return repaired, repair_kinds
-
-    if allow_missing_opening:
-        matched = _first_fullmatch(missing_open_patterns, segment)
-        if matched is not None:
-            repaired = f"{matched.group('head')}[{matched.group('text')}]"
-            if _first_fullmatch(valid_patterns, repaired) is None:
-                raise ValueError(f"repair produced invalid segment: {repaired}")
-            return repaired, ["missing_open"]
-
-    if allow_missing_closing:
-        matched = _first_fullmatch(missing_close_patterns, segment)
-        if matched is not None:
-            repaired = f"{matched.group('head')}[{matched.group('text')}]"
-            if _first_fullmatch(valid_patterns, repaired) is None:
-                raise ValueError(f"repair produced invalid segment: {repaired}")
-            return repaired, ["missing_close"]
+    if kind == "missing_colon" and allow_missing_colon:
+        repaired = f"{head_text}:[{text}]"
+        if not segment_parser.is_valid(repaired):
+            raise ValueError(f"repair produced invalid segment: {repaired}")
+        repair_kinds = ["missing_colon"]
+        if "[" not in segment:
+            repair_kinds.append("missing_open")
+        if segment.endswith("]") is False:
+            repair_kinds.append("missing_close")
+        return repaired, repair_kinds
+
+    if (kind == "missing_open" and allow_missing_opening) or (kind == "missing_close" and allow_missing_closing):
+        repaired = f"{head_text}[{text}]"
+        if not segment_parser.is_valid(repaired):
+            raise ValueError(f"repair produced invalid segment: {repaired}")
+        return repaired, [kind]
 
     return segment, []
 
@@ -294,10 +255,7 @@ def _summarize_segment(text: str, max_len: int) -> str:
 def _repair_cell_text(
     raw_text: str,
     split_delimiter: str,
-    valid_patterns: Tuple[re.Pattern[str], ...],
-    missing_colon_patterns: Tuple[re.Pattern[str], ...],
-    missing_open_patterns: Tuple[re.Pattern[str], ...],
-    missing_close_patterns: Tuple[re.Pattern[str], ...],
+    segment_parser: SegmentParser,
     allow_missing_colon: bool,
     allow_missing_opening: bool,
     allow_missing_closing: bool,
@@ -319,10 +277,7 @@ def _repair_cell_text(
 
         repaired_core, repair_kinds = _repair_segment(
             stripped_core,
-            valid_patterns,
-            missing_colon_patterns,
-            missing_open_patterns,
-            missing_close_patterns,
+            segment_parser,
             allow_missing_colon,
             allow_missing_opening,
             allow_missing_closing,
@@ -342,10 +297,7 @@ def _repair_cell_text(
 
         final_kind = _classify_segment(
             final_segment,
-            valid_patterns,
-            missing_colon_patterns,
-            missing_open_patterns,
-            missing_close_patterns,
+            segment_parser,
         )
         if final_kind != "valid":
             invalid_segments.append((segment_index, final_kind, final_segment))
@@ -362,10 +314,7 @@ def _repair_cell_text(
 def _collect_invalid_segments(
     raw_text: str,
     split_delimiter: str,
-    valid_patterns: Tuple[re.Pattern[str], ...],
-    missing_colon_patterns: Tuple[re.Pattern[str], ...],
-    missing_open_patterns: Tuple[re.Pattern[str], ...],
-    missing_close_patterns: Tuple[re.Pattern[str], ...],
+    segment_parser: SegmentParser,
 ) -> List[Tuple[int, str, str]]:
     invalid_segments: List[Tuple[int, str, str]] = []
     for segment_index, raw_piece in enumerate(raw_text.split(split_delimiter), start=1):
@@ -376,10 +325,7 @@ def _collect_invalid_segments(
             continue
         kind = _classify_segment(
             stripped_core,
-            valid_patterns,
-            missing_colon_patterns,
-            missing_open_patterns,
-            missing_close_patterns,
+            segment_parser,
         )
         if kind != "valid":
             invalid_segments.append((segment_index, kind, stripped_core))
@@ -423,10 +369,7 @@ def run_from_config(config_path: Path) -> Dict[str, Any]:
     max_samples_per_kind = config["behavior"]["maxSamplesPerKind"]
     skip_blank_cells = config["behavior"]["skipBlankCells"]
 
-    valid_patterns = _build_valid_patterns(id_pattern)
-    missing_colon_patterns = _build_missing_colon_patterns(id_pattern)
-    missing_open_patterns = _build_missing_open_patterns(id_pattern)
-    missing_close_patterns = _build_missing_close_patterns(id_pattern)
+    segment_parser = SegmentParser(id_pattern)
 
     invalid_samples: Dict[str, List[Tuple[int, int, str]]] = {
         "empty_segment": [],
@@ -462,10 +405,7 @@ def run_from_config(config_path: Path) -> Dict[str, Any]:
         result = _repair_cell_text(
             raw_text,
             split_delimiter,
-            valid_patterns,
-            missing_colon_patterns,
-            missing_open_patterns,
-            missing_close_patterns,
+            segment_parser,
             allow_missing_colon,
             allow_missing_opening,
             allow_missing_closing,
@@ -492,10 +432,7 @@ def run_from_config(config_path: Path) -> Dict[str, Any]:
             final_invalid_segments = _collect_invalid_segments(
                 raw_text,
                 split_delimiter,
-                valid_patterns,
-                missing_colon_patterns,
-                missing_open_patterns,
-                missing_close_patterns,
+                segment_parser,
             )
         else:
             if repaired_text != raw_text:
@@ -7,17 +7,16 @@ from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Iterable, List, Optional, Tuple
 
-import re
 from openpyxl import Workbook, load_workbook
 from openpyxl.utils import column_index_from_string
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "segment_format"))
+
+from segment_parser import SegmentParser  # noqa: E402
+
 
 _ID_PATTERN = r"\d{2,10}"
-_PATTERN_COLON6 = re.compile(rf"^{_ID_PATTERN}::::::\[.*\]$", re.DOTALL)
-_PATTERN_TRIPLE_COLON_NUM = re.compile(rf"^{_ID_PATTERN}:::\d+:::\[.*\]$", re.DOTALL)
-_PATTERN_TRIPLE_COLON_RANGE = re.compile(
-    rf"^{_ID_PATTERN}:::\d+(?:-\d+)+:::\[.*\]$", re.DOTALL
-)
+_SEGMENT_PARSER = SegmentParser(_ID_PATTERN)
 
 
 def _normalize_cell(value: object) -> str:
@@ -33,11 +32,7 @@ def _split_segments(text: str) -> List[str]:
 
 
 def _match_fixed_format(segment: str) -> bool:
-    return bool(
-        _PATTERN_COLON6.fullmatch(segment)
-        or _PATTERN_TRIPLE_COLON_RANGE.fullmatch(segment)
-        or _PATTERN_TRIPLE_COLON_NUM.fullmatch(segment)
-    )
+    return _SEGMENT_PARSER.is_valid(segment)
 
 
 def count_fixed_formats(text: str) -> Tuple[int, List[str]]:
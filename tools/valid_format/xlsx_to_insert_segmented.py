@@ -13,8 +13,10 @@
 """
 
 import argparse
+import functools
 import hashlib
 import re
+import sys
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -22,6 +24,11 @@ import yaml
 from openpyxl import load_workbook
 from openpyxl.utils import column_index_from_string
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "segment_format"))
+
+from parallel_pipeline import map_ordered, resolve_workers  # noqa: E402
+from segment_parser import SegmentParser  # noqa: E402
+
 
 class ConfigError(Exception):
     pass
@@ -224,6 +231,7 @@ def _validate_config(data: Dict[str, Any]) -> Dict[str, Any]:
     output_cfg = _require_type(_require_key(data, "output", ""), dict, "output")
     fixed_values = _require_type(_require_key(data, "fixedValues", ""), dict, "fixedValues")
     behavior_cfg = _require_type(_require_key(data, "behavior", ""), dict, "behavior")
+    parallel_cfg = _require_type(_require_key(data, "parallel", ""), dict, "parallel")
 
     input_path = _require_type(_require_key(input_cfg, "path", "input."), str, "input.path")
     sheet = _require_type(_require_key(input_cfg, "sheet", "input."), str, "input.sheet")
@@ -276,8 +284,18 @@ def _validate_config(data: Dict[str, Any]) -> Dict[str, Any]:
         "behavior.rowErrorPolicy",
         ("error", "skip"),
     )
+    workers = _require_type(_require_key(parallel_cfg, "workers", "parallel."), int, "parallel.workers")
+    parallel_chunk_fids = _require_type(
+        _require_key(parallel_cfg, "chunkFids", "parallel."),
+        int,
+        "parallel.chunkFids",
+    )
     if row_start <= 0:
         raise ConfigError("input.row_start must be > 0")
+    if workers < 0:
+        raise ConfigError("parallel.workers must be >= 0")
+    if parallel_chunk_fids <= 0:
+        raise ConfigError("parallel.chunkFids must be > 0")
     if chunk_size <= 0:
         raise ConfigError("output.chunkSize must be > 0")
     if split_delimiter == "":
@@ -312,52 +330,31 @@ def _validate_config(data: Dict[str, Any]) -> Dict[str, Any]:
         "is_claimed_value": is_claimed_value,
         "skip_blank_rows": skip_blank_rows,
         "row_error_policy": row_error_policy,
+        "workers": resolve_workers(workers),
+        "parallel_chunk_fids": parallel_chunk_fids,
     }
 
 
-def _build_patterns(id_pattern: str) -> Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
-    # textId 命名组必须包含完整业务标识：
+def _parse_segment(segment: str, segment_parser: SegmentParser) -> Optional[Tuple[str, str]]:
+    # textId 为完整业务标识：
     #   格式1 {num}::::::[text]        → textId = {num}
     #   格式2 {num}:::{n}:::[text]     → textId = {num}:::{n}
     #   格式3 {num}:::{m-n}:::[text]   → textId = {num}:::{m-n}
-    pattern_colon6 = re.compile(rf"^(?P<textId>{id_pattern})::::::\[(?P<text>.*)\]$", re.DOTALL)
-    pattern_triple_colon_num = re.compile(rf"^(?P<textId>{id_pattern}:::\d+):::\[(?P<text>.*)\]$", re.DOTALL)
-    pattern_triple_colon_range = re.compile(
-        rf"^(?P<textId>{id_pattern}:::\d+(?:-\d+)+):::\[(?P<text>.*)\]$",
-        re.DOTALL,
-    )
-    return pattern_colon6, pattern_triple_colon_num, pattern_triple_colon_range
-
-
-def _parse_segment(
-    segment: str,
-    patterns: Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]],
-) -> Optional[Tuple[str, str]]:
-    pattern_colon6, pattern_triple_colon_num, pattern_triple_colon_range = patterns
-    matched = (
-        pattern_colon6.fullmatch(segment)
-        or pattern_triple_colon_num.fullmatch(segment)
-        or pattern_triple_colon_range.fullmatch(segment)
-    )
-    if matched is None:
+    parsed = segment_parser.parse(segment)
+    if parsed is None:
         open_count = segment.count("[")
         close_count = segment.count("]")
         if open_count > close_count:
-            repaired = segment + ("]" * (open_count - close_count))
-            matched = (
-                pattern_colon6.fullmatch(repaired)
-                or pattern_triple_colon_num.fullmatch(repaired)
-                or pattern_triple_colon_range.fullmatch(repaired)
-            )
-        if matched is None:
+            parsed = segment_parser.parse(segment + ("]" * (open_count - close_count)))
+        if parsed is None:
             return None
 
-    text = matched.group("text")
+    text = parsed.payload
     open_count = text.count("[")
     close_count = text.count("]")
     if open_count > close_count:
         text = text + "]" * (open_count - close_count)
-    return matched.group("textId"), text
+    return parsed.text_id, text
 
 
 def _validate_segment_text_structure(text: str) -> Optional[str]:
@@ -382,7 +379,7 @@ def _parse_cell_segments(
     fid: str,
     raw_text: str,
     split_delimiter: str,
-    patterns: Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]],
+    segment_parser: SegmentParser,
     row_index: int,
     column_name: str,
 ) -> List[Tuple[str, str]]:
@@ -397,7 +394,7 @@ def _parse_cell_segments(
         segment = piece.strip()
         if segment == "":
             raise RowParseError(f"Row {row_index} fid= {fid} {column_name} segment #{idx} is empty")
-        extracted = _parse_segment(segment, patterns)
+        extracted = _parse_segment(segment, segment_parser)
         if extracted is None:
             snippet = segment.replace("\n", "\\n")
             if len(snippet) > 120:
@@ -496,13 +493,20 @@ def _build_output_rows_for_excel_row(
     source_raw: str,
     translated_raw: str,
     split_delimiter: str,
-    patterns: Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]],
+    segment_parser: SegmentParser,
     row_index: int,
     status_value: int,
     is_claimed_value: bool,
 ) -> List[List[str]]:
     # 对单个 fid 的合并文本做协议拆分，并产出多条 INSERT 记录（每段一条）。
-    source_segments = _parse_cell_segments(fid, source_raw, split_delimiter, patterns, row_index, "sourceText")
+    source_segments = _parse_cell_segments(
+        fid,
+        source_raw,
+        split_delimiter,
+        segment_parser,
+        row_index,
+        "sourceText",
+    )
     if translated_raw.strip() == "":
         translated_segments = [(text_id, "") for text_id, _ in source_segments]
     else:
@@ -510,7 +514,7 @@ def _build_output_rows_for_excel_row(
             fid,
             translated_raw,
             split_delimiter,
-            patterns,
+            segment_parser,
             row_index,
             "translatedText",
         )
@@ -645,6 +649,33 @@ def _fill_missing_translated_segments(
     return aligned_translated, copied_count, dropped_count
 
 
+def _build_output_rows_for_merged_fid(
+    merged_row: Tuple[str, str, str, int],
+    split_delimiter: str,
+    segment_parser: SegmentParser,
+    status_value: int,
+    is_claimed_value: bool,
+) -> Tuple[Optional[List[List[str]]], Optional[RowParseError]]:
+    # 进程池入口：行错误作为返回值交回主进程，由主进程按 rowErrorPolicy 决定跳过或终止。
+    fid_text, source_raw, translated_raw, row_index = merged_row
+    try:
+        return (
+            _build_output_rows_for_excel_row(
+                fid=fid_text,
+                source_raw=source_raw,
+                translated_raw=translated_raw,
+                split_delimiter=split_delimiter,
+                segment_parser=segment_parser,
+                row_index=row_index,
+                status_value=status_value,
+                is_claimed_value=is_claimed_value,
+            ),
+            None,
+        )
+    except RowParseError as exc:
+        return None, exc
+
+
 def _write_insert(handle, table: str, output_columns: Dict[str, str], rows: List[List[str]]) -> None:
     if not rows:
         return
@@ -712,7 +743,7 @@ def main() -> None:
     split_part_idx = column_index_from_string(config["split_part_col"]) - 1
     source_idx = column_index_from_string(config["source_col"]) - 1
     translated_idx = column_index_from_string(config["translated_col"]) - 1
-    patterns = _build_patterns(config["id_pattern"])
+    segment_parser = SegmentParser(config["id_pattern"])
 
     merged_fid_rows, skipped_blank_rows, skipped_error_rows = _collect_merged_fid_rows(
         worksheet=worksheet,
@@ -728,32 +759,32 @@ def main() -> None:
 
     row_buffer: List[List[str]] = []
     generated_rows = 0
-    skipped_empty_source_rows = 0
     skipped_fid_rows = 0
 
+    non_empty_fid_rows = [item for item in merged_fid_rows if item[1].strip() != ""]
+    skipped_empty_source_rows = len(merged_fid_rows) - len(non_empty_fid_rows)
+    build_rows = functools.partial(
+        _build_output_rows_for_merged_fid,
+        split_delimiter=config["split_delimiter"],
+        segment_parser=segment_parser,
+        status_value=config["status_value"],
+        is_claimed_value=config["is_claimed_value"],
+    )
+
     with output_path.open("w", encoding="utf-8") as handle:
         handle.write("-- Auto-generated by xlsx_to_insert_segmented.py\n")
-        for fid_text, source_raw, translated_raw, row_index in merged_fid_rows:
-            if source_raw.strip() == "":
-                skipped_empty_source_rows += 1
-                continue
-            try:
-                output_rows = _build_output_rows_for_excel_row(
-                    fid=fid_text,
-                    source_raw=source_raw,
-                    translated_raw=translated_raw,
-                    split_delimiter=config["split_delimiter"],
-                    patterns=patterns,
-                    row_index=row_index,
-                    status_value=config["status_value"],
-                    is_claimed_value=config["is_claimed_value"],
-                )
-            except RowParseError as exc:
+        for output_rows, row_error in map_ordered(
+            build_rows,
+            non_empty_fid_rows,
+            workers=config["workers"],
+            chunk_size=config["parallel_chunk_fids"],
+        ):
+            if row_error is not None:
                 if config["row_error_policy"] == "skip":
                     skipped_fid_rows += 1
-                    print(f"[SKIP] {exc}")
+                    print(f"[SKIP] {row_error}")
                     continue
-                raise
+                raise row_error
 
             for generated in output_rows:
                 row_buffer.append(generated)
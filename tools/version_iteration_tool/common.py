@@ -83,7 +83,7 @@ def parse_mysql_dsn(dsn: str) -> Dict[str, Any]:
     }
 
 
-def connect_mysql_from_dsn(dsn: str):
+def connect_mysql_from_dsn(dsn: str, local_infile: bool = False):
     mysql = parse_mysql_dsn(dsn)
     tunnel_port = os.environ.get("LOTRO_TUNNEL_PORT")
     if mysql["host"] in ("127.0.0.1", "localhost") and tunnel_port is not None and tunnel_port != "":
@@ -106,6 +106,7 @@ def connect_mysql_from_dsn(dsn: str):
         client_flag=CLIENT.MULTI_STATEMENTS,
         init_command="SET SESSION sql_mode = CONCAT_WS(',', @@SESSION.sql_mode, 'ANSI_QUOTES')",
         autocommit=False,
+        local_infile=local_infile,
     )
 
 
@@ -18,6 +18,7 @@ from common import (
     resolve_env_table_ref,
     start_ssh_tunnel_from_env,
 )
+from step5_merge_join import run_step5_merge_join
 
 
 def _sql_literal(value: str) -> str:
@@ -209,6 +210,8 @@ def _validate_config(config: Dict[str, Any], start_step_override: Optional[int])
     database = require_type(require_key(config, "database", ""), dict, "database")
     tables = require_type(require_key(config, "tables", ""), dict, "tables")
 
+    step5 = require_type(require_key(config, "step5", ""), dict, "step5")
+
     dsn_env = require_type(require_key(database, "dsnEnv", "database."), str, "database.dsnEnv")
 
     backup_table = resolve_env_table_ref(
@@ -236,6 +239,31 @@ def _validate_config(config: Dict[str, Any], start_step_override: Optional[int])
             raise ConfigError(f"startStep 仅支持 5/6/7，当前值: {start_step_raw}")
         start_step = start_step_raw
 
+    engine = require_type(require_key(step5, "engine", "step5."), str, "step5.engine")
+    if engine not in ("sql", "mergeJoin"):
+        raise ConfigError(f"step5.engine 仅支持 sql/mergeJoin，当前值: {engine}")
+    merge_join = require_type(require_key(step5, "mergeJoin", "step5."), dict, "step5.mergeJoin")
+    fetch_size = require_type(
+        require_key(merge_join, "fetchSize", "step5.mergeJoin."), int, "step5.mergeJoin.fetchSize"
+    )
+    chunk_size = require_type(
+        require_key(merge_join, "chunkSize", "step5.mergeJoin."), int, "step5.mergeJoin.chunkSize"
+    )
+    sample_size = require_type(
+        require_key(merge_join, "sampleSize", "step5.mergeJoin."), int, "step5.mergeJoin.sampleSize"
+    )
+    report_path = require_type(
+        require_key(merge_join, "reportPath", "step5.mergeJoin."), str, "step5.mergeJoin.reportPath"
+    )
+    if fetch_size <= 0:
+        raise ConfigError("step5.mergeJoin.fetchSize 必须大于 0")
+    if chunk_size <= 0:
+        raise ConfigError("step5.mergeJoin.chunkSize 必须大于 0")
+    if sample_size < 0:
+        raise ConfigError("step5.mergeJoin.sampleSize 不能小于 0")
+    if report_path == "":
+        raise ConfigError("step5.mergeJoin.reportPath 不能为空")
+
     return {
         "env": runtime_env,
         "dsnEnv": dsn_env,
@@ -244,6 +272,11 @@ def _validate_config(config: Dict[str, Any], start_step_override: Optional[int])
         "mapTable": map_table,
         "changesTable": changes_table,
         "startStep": start_step,
+        "step5Engine": engine,
+        "fetchSize": fetch_size,
+        "chunkSize": chunk_size,
+        "sampleSize": sample_size,
+        "reportPath": report_path,
     }
 
 
@@ -256,6 +289,11 @@ def _parse_args() -> argparse.Namespace:
         choices=("5", "6", "7"),
         help="从哪个步骤开始执行，覆盖配置文件中的 startStep（5=全部，6=仅 Step6+Step7，7=仅 Step7）",
     )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="仅以 mergeJoin 引擎执行 Step5 分类并输出报告，不修改任何表，也不执行 Step6/Step7",
+    )
     return parser.parse_args()
 
 
@@ -268,6 +306,8 @@ def main() -> None:
     raw_config = load_yaml_config(Path(args.config).expanduser().resolve())
     start_step_override = int(args.start_step) if args.start_step else None
     config = _validate_config(raw_config, start_step_override)
+    if args.dry_run and (config["step5Engine"] != "mergeJoin" or config["startStep"] != 5):
+        raise ConfigError("--dry-run 仅支持 step5.engine=mergeJoin 且从 Step5 开始执行")
 
     load_env_file()
     dsn_env = config["dsnEnv"]
@@ -298,11 +338,19 @@ def main() -> None:
                     print(f"[INFO] changes_table: {changes_table}")
 
                     if start_step <= 5:
-                        print("[INFO] 执行 Step5: compare + inherit")
+                        print(f"[INFO] 执行 Step5: compare + inherit (engine={config['step5Engine']})")
                         started = time.monotonic()
-                        _run_step5(cursor, conn, backup_table, next_table)
+                        if config["step5Engine"] == "mergeJoin":
+                            # 两表各用一条独立连接流式读取，分类临时表与更新走主连接
+                            with connect_mysql_from_dsn(dsn) as backup_conn, connect_mysql_from_dsn(dsn) as next_conn:
+                                run_step5_merge_join(conn, backup_conn, next_conn, config, args.dry_run)
+                        else:
+                            _run_step5(cursor, conn, backup_table, next_table)
                         elapsed = time.monotonic() - started
                         print(f"[INFO] Step5 完成, 耗时 {elapsed:.2f}s")
+                        if args.dry_run:
+                            print("[DONE] Step5 dry-run 完成，未执行 Step6/Step7")
+                            return
 
                     if start_step <= 6:
                         print("[INFO] 执行 Step6: create text id map")
@@ -1,10 +1,21 @@
 # 文本版本迭代 Step2: 计算并回填 sourceTextHash。
+#
+# 读取端在独立连接上按主键 keyset 分页（WHERE id > lastId ORDER BY id LIMIT n），哈希交给进程池，
+# 写入端每批先写入临时暂存表再 JOIN 更新并提交；每批提交后记录 checkpoint，中断后重跑即续跑。
+# 全部表完成后删除 checkpoint，下个版本重跑时从头回填。
 
 import argparse
+import functools
 import hashlib
+import json
 import os
+import sys
+import time
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pymysql
 
 from common import (
     ConfigError,
@@ -23,6 +34,12 @@ from common import (
     table_exists,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "segment_format"))
+
+from parallel_pipeline import map_ordered, resolve_workers  # noqa: E402
+
+_STAGING_TABLE = "tmp_step2_source_text_hash"
+
 
 def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
     runtime_env = require_runtime_env(
@@ -31,6 +48,8 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
     )
     database = require_type(require_key(config, "database", ""), dict, "database")
     hash_cfg = require_type(require_key(config, "hash", ""), dict, "hash")
+    parallel_cfg = require_type(require_key(config, "parallel", ""), dict, "parallel")
+    checkpoint_cfg = require_type(require_key(config, "checkpoint", ""), dict, "checkpoint")
 
     dsn_env = require_type(require_key(database, "dsnEnv", "database."), str, "database.dsnEnv")
     tables = require_type(require_key(hash_cfg, "tables", "hash."), list, "hash.tables")
@@ -47,6 +66,10 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
     missing_table_policy = require_type(
         require_key(hash_cfg, "missingTablePolicy", "hash."), str, "hash.missingTablePolicy"
     )
+    workers = require_type(require_key(parallel_cfg, "workers", "parallel."), int, "parallel.workers")
+    checkpoint_path = require_type(
+        require_key(checkpoint_cfg, "path", "checkpoint."), str, "checkpoint.path"
+    )
 
     if not tables:
         raise ConfigError("hash.tables 不能为空")
@@ -67,6 +90,10 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
         raise ConfigError("hash.nullSourcePolicy 仅支持 emptyString/error")
     if missing_table_policy not in ("skip", "error"):
         raise ConfigError("hash.missingTablePolicy 仅支持 skip/error")
+    if workers < 0:
+        raise ConfigError("parallel.workers 不能小于 0")
+    if checkpoint_path == "":
+        raise ConfigError("checkpoint.path 不能为空")
 
     return {
         "env": runtime_env,
@@ -79,6 +106,8 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
         "updatePolicy": update_policy,
         "nullSourcePolicy": null_source_policy,
         "missingTablePolicy": missing_table_policy,
+        "workers": workers,
+        "checkpointPath": checkpoint_path,
     }
 
 
@@ -90,55 +119,176 @@ def _build_hash_text(source_text: Any, null_source_policy: str, table_ref: str,
     return str(source_text)
 
 
-def _fill_table_hash(cursor, config: Dict[str, Any], table_ref: str) -> Tuple[int, int]:
-    id_column = config["idColumn"]
-    source_text_column = config["sourceTextColumn"]
-    hash_column = config["hashColumn"]
+def _hash_rows(null_source_policy: str, table_ref: str, rows: List[Dict[str, Any]]) -> List[Tuple[Any, str]]:
+    """返回 [(row_id, sha256)]；在进程池中执行，须为模块级函数。"""
+    hashed: List[Tuple[Any, str]] = []
+    for row in rows:
+        source_text = _build_hash_text(row["source_text"], null_source_policy, table_ref, row["row_id"])
+        hashed.append((row["row_id"], hashlib.sha256(source_text.encode("utf-8")).hexdigest()))
+    return hashed
 
-    if not table_exists(cursor, table_ref):
-        if config["missingTablePolicy"] == "skip":
-            print(f"[SKIP] 表不存在，跳过: {table_ref}")
-            return 0, 0
-        raise RuntimeError(f"表不存在: {table_ref}")
 
-    for column_name in (id_column, source_text_column, hash_column):
-        if not column_exists(cursor, table_ref, column_name):
-            raise RuntimeError(f"列不存在: {table_ref}.{column_name}")
+def _read_checkpoint(checkpoint_path: Path, config: Dict[str, Any]) -> Dict[str, Any]:
+    if not checkpoint_path.exists():
+        return {
+            "idColumn": config["idColumn"],
+            "hashColumn": config["hashColumn"],
+            "updatePolicy": config["updatePolicy"],
+            "tables": {},
+        }
+    with checkpoint_path.open("r", encoding="utf-8") as handle:
+        checkpoint = json.load(handle)
+    for key in ("idColumn", "hashColumn", "updatePolicy"):
+        if checkpoint.get(key) != config[key]:
+            raise RuntimeError(
+                f"checkpoint 与当前配置不一致，请确认后删除: {checkpoint_path} "
+                f"({key}={checkpoint.get(key)}, 当前配置={config[key]})"
+            )
+    return checkpoint
 
-    where_clause = ""
-    if config["updatePolicy"] == "nullOnly":
-        where_clause = f"WHERE {quote_ident(hash_column)} IS NULL"
 
-    select_sql = (
-        f"SELECT {quote_ident(id_column)} AS row_id, {quote_ident(source_text_column)} AS source_text "
-        f"FROM {quote_table_ref(table_ref)} {where_clause} ORDER BY {quote_ident(id_column)}"
-    )
+def _write_checkpoint(checkpoint_path: Path, checkpoint: Dict[str, Any]) -> None:
+    # 先写临时文件再替换，避免中断时留下半截 JSON
+    tmp_path = checkpoint_path.with_name(checkpoint_path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        json.dump(checkpoint, handle, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def _clear_checkpoint(checkpoint_path: Path) -> None:
+    # 全部表完成后不再保留，否则下个版本重跑会把所有表当作已完成跳过
+    checkpoint_path.unlink(missing_ok=True)
 
-    total_scanned = 0
-    total_updated = 0
-    batch: List[Tuple[str, Any]] = []
 
-    cursor.execute(select_sql)
+def _iter_pages(read_conn, config: Dict[str, Any], table_ref: str, last_id: Any) -> Iterator[List[Dict[str, Any]]]:
+    """按主键 keyset 分页读取；每页单独执行、读完即提交，不持有长事务快照。"""
+    id_column = quote_ident(config["idColumn"])
+    conditions: List[str] = []
+    if config["updatePolicy"] == "nullOnly":
+        conditions.append(f"{quote_ident(config['hashColumn'])} IS NULL")
+    select_prefix = (
+        f"SELECT {id_column} AS row_id, {quote_ident(config['sourceTextColumn'])} AS source_text "
+        f"FROM {quote_table_ref(table_ref)} WHERE "
+    )
+    select_suffix = f" ORDER BY {id_column} LIMIT {config['batchSize']}"
+
     while True:
-        rows = cursor.fetchmany(config["batchSize"])
+        if last_id is None:
+            sql = select_prefix + " AND ".join(conditions or ["1 = 1"]) + select_suffix
+            params: Tuple[Any, ...] = ()
+        else:
+            sql = select_prefix + " AND ".join([f"{id_column} > %s"] + conditions) + select_suffix
+            params = (last_id,)
+        with read_conn.cursor(pymysql.cursors.SSDictCursor) as cursor:
+            cursor.execute(sql, params)
+            rows = list(cursor)
+        read_conn.commit()
         if not rows:
-            break
-        total_scanned += len(rows)
-
-        for row in rows:
-            source_text = _build_hash_text(row["source_text"], config["nullSourcePolicy"], table_ref, row["row_id"])
-            source_hash = hashlib.sha256(source_text.encode("utf-8")).hexdigest()
-            batch.append((source_hash, row["row_id"]))
-
-        cursor.executemany(
-            f"UPDATE {quote_table_ref(table_ref)} "
-            f"SET {quote_ident(hash_column)} = %s WHERE {quote_ident(id_column)} = %s",
-            batch,
+            return
+        yield rows
+        if len(rows) < config["batchSize"]:
+            return
+        last_id = rows[-1]["row_id"]
+
+
+def _prepare_staging_table(cursor, config: Dict[str, Any], table_ref: str) -> None:
+    # 临时表仅当前会话可见，列类型从目标表复制；CREATE/DROP TEMPORARY 不会隐式提交
+    id_column = quote_ident(config["idColumn"])
+    cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {quote_ident(_STAGING_TABLE)}")
+    cursor.execute(
+        f"CREATE TEMPORARY TABLE {quote_ident(_STAGING_TABLE)} (PRIMARY KEY ({id_column})) "
+        f"SELECT {id_column}, {quote_ident(config['hashColumn'])} FROM {quote_table_ref(table_ref)} LIMIT 0"
+    )
+
+
+def _apply_hash_batch(conn, cursor, config: Dict[str, Any], table_ref: str, hashed: List[Tuple[Any, str]]) -> int:
+    """单事务：清空暂存表 -> 批量写入 -> JOIN 更新目标表。"""
+    id_column = quote_ident(config["idColumn"])
+    hash_column = quote_ident(config["hashColumn"])
+    staging_table = quote_ident(_STAGING_TABLE)
+    try:
+        cursor.execute(f"DELETE FROM {staging_table}")
+        # executemany 会把 INSERT ... VALUES 合并为多行语句
+        cursor.executemany(f"INSERT INTO {staging_table} ({id_column}, {hash_column}) VALUES (%s, %s)", hashed)
+        cursor.execute(
+            f"UPDATE {quote_table_ref(table_ref)} AS t JOIN {staging_table} AS s ON t.{id_column} = s.{id_column} "
+            f"SET t.{hash_column} = s.{hash_column}"
         )
-        total_updated += len(batch)
-        batch = []
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return len(hashed)
 
-    return total_scanned, total_updated
+
+def _fill_table_hash(
+    conn,
+    read_conn,
+    config: Dict[str, Any],
+    table_ref: str,
+    checkpoint_path: Path,
+    checkpoint: Dict[str, Any],
+) -> Tuple[int, int]:
+    id_column = config["idColumn"]
+    source_text_column = config["sourceTextColumn"]
+    hash_column = config["hashColumn"]
+
+    with conn.cursor() as cursor:
+        if not table_exists(cursor, table_ref):
+            if config["missingTablePolicy"] == "skip":
+                print(f"[SKIP] 表不存在，跳过: {table_ref}")
+                return 0, 0
+            raise RuntimeError(f"表不存在: {table_ref}")
+
+        for column_name in (id_column, source_text_column, hash_column):
+            if not column_exists(cursor, table_ref, column_name):
+                raise RuntimeError(f"列不存在: {table_ref}.{column_name}")
+
+    state = checkpoint["tables"].get(table_ref)
+    if state is None:
+        state = {"lastId": None, "scanned": 0, "updated": 0, "done": False}
+        checkpoint["tables"][table_ref] = state
+    elif state["done"]:
+        print(f"[SKIP] checkpoint 记录已完成: {table_ref} scanned={state['scanned']}, updated={state['updated']}")
+        return 0, 0
+    else:
+        print(f"[RESUME] {table_ref} lastId={state['lastId']}, scanned={state['scanned']}, updated={state['updated']}")
+
+    hash_pages = functools.partial(_hash_rows, config["nullSourcePolicy"], table_ref)
+    started_at = time.perf_counter()
+    run_rows = 0
+    with conn.cursor() as cursor:
+        _prepare_staging_table(cursor, config, table_ref)
+        try:
+            # 每页作为一项交给进程池；读取端最多领先 workers*2 页
+            for hashed in map_ordered(
+                hash_pages,
+                _iter_pages(read_conn, config, table_ref, state["lastId"]),
+                workers=config["workers"],
+                chunk_size=1,
+            ):
+                batch_started_at = time.perf_counter()
+                updated = _apply_hash_batch(conn, cursor, config, table_ref, hashed)
+                batch_elapsed = time.perf_counter() - batch_started_at
+                run_rows += len(hashed)
+                state["lastId"] = hashed[-1][0]
+                state["scanned"] += len(hashed)
+                state["updated"] += updated
+                checkpoint["updatedAtUtc"] = datetime.now(timezone.utc).isoformat()
+                _write_checkpoint(checkpoint_path, checkpoint)
+                total_elapsed = time.perf_counter() - started_at
+                print(
+                    f"[HASH] {table_ref} ids={hashed[0][0]}..{hashed[-1][0]} rows={len(hashed)} "
+                    f"update={batch_elapsed:.2f}s totalRows={state['scanned']} "
+                    f"rows/s={run_rows / max(total_elapsed, 1e-9):.0f}"
+                )
+        finally:
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {quote_ident(_STAGING_TABLE)}")
+
+    state["done"] = True
+    checkpoint["updatedAtUtc"] = datetime.now(timezone.utc).isoformat()
+    _write_checkpoint(checkpoint_path, checkpoint)
+    return state["scanned"], state["updated"]
 
 
 def main() -> None:
@@ -153,16 +303,28 @@ def main() -> None:
         raise RuntimeError(f"环境变量未设置: {dsn_env}")
 
     dsn = os.environ[dsn_env]
+    checkpoint_path = Path(config["checkpointPath"]).expanduser().resolve()
+    if not checkpoint_path.parent.exists():
+        raise FileNotFoundError(f"checkpoint 目录不存在: {checkpoint_path.parent}")
+    checkpoint = _read_checkpoint(checkpoint_path, config)
+    workers = resolve_workers(config["workers"])
+    config = {**config, "workers": workers}
+    print(f"[INFO] workers={workers}, batchSize={config['batchSize']}, checkpoint={checkpoint_path}")
 
     with start_ssh_tunnel_from_env():
-        with connect_mysql_from_dsn(dsn) as conn:
-            with conn.cursor() as cursor:
-                for table_ref in config["tables"]:
-                    scanned, updated = _fill_table_hash(cursor, config, table_ref)
-                    conn.commit()
-                    print(f"[DONE] [{config['env']}] {table_ref} scanned={scanned}, updated={updated}")
-
-    print("[DONE] Step2 完成")
+        # 读取与更新分用两个连接，分页读取不与更新事务共用游标
+        with connect_mysql_from_dsn(dsn) as conn, connect_mysql_from_dsn(dsn) as read_conn:
+            for table_ref in config["tables"]:
+                started_at = time.perf_counter()
+                scanned, updated = _fill_table_hash(conn, read_conn, config, table_ref, checkpoint_path, checkpoint)
+                elapsed = time.perf_counter() - started_at
+                print(
+                    f"[DONE] [{config['env']}] {table_ref} scanned={scanned}, updated={updated}, "
+                    f"elapsed={elapsed:.1f}s"
+                )
+
+    _clear_checkpoint(checkpoint_path)
+    print(f"[DONE] Step2 完成，已删除 checkpoint: {checkpoint_path}")
 
 
 if __name__ == "__main__":
@@ -1,15 +1,23 @@
-# 文本版本迭代 Step4: 解析 Texts.db 并生成 text_main_next 导入 SQL。
+# 文本版本迭代 Step4: 解析 Texts.db 并生成 text_main_next 导入 SQL，或直接导入 text_main_next。
 
 import argparse
+import functools
 import hashlib
+import json
+import os
 import re
 import sqlite3
+import sys
+import tempfile
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from common import (
     ConfigError,
+    connect_mysql_from_dsn,
+    load_env_file,
     load_yaml_config,
     quote_ident,
     quote_table_ref,
@@ -18,8 +26,14 @@ from common import (
     require_runtime_env,
     resolve_env_table_ref,
     require_type,
+    start_ssh_tunnel_from_env,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "segment_format"))
+
+from parallel_pipeline import map_ordered, resolve_workers  # noqa: E402
+from segment_parser import SegmentParser  # noqa: E402
+
 
 def _validate_policy(value: str, path: str, choices: Iterable[str]) -> str:
     if value not in choices:
@@ -38,6 +52,9 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
     output_cfg = require_type(require_key(config, "output", ""), dict, "output")
     fixed_cfg = require_type(require_key(config, "fixedValues", ""), dict, "fixedValues")
     stats_cfg = require_type(require_key(config, "stats", ""), dict, "stats")
+    database_cfg = require_type(require_key(config, "database", ""), dict, "database")
+    load_cfg = require_type(require_key(config, "load", ""), dict, "load")
+    parallel_cfg = require_type(require_key(config, "parallel", ""), dict, "parallel")
 
     sqlite_path = require_type(require_key(input_cfg, "sqlitePath", "input."), str, "input.sqlitePath")
     source_table = require_type(require_key(input_cfg, "sourceTable", "input."), str, "input.sourceTable")
@@ -104,8 +121,41 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
         "stats.progressEveryFidRows",
     )
 
+    dsn_env = require_type(require_key(database_cfg, "dsnEnv", "database."), str, "database.dsnEnv")
+    load_method = _validate_policy(
+        require_type(require_key(load_cfg, "method", "load."), str, "load.method"),
+        "load.method",
+        ("loadData", "executemany"),
+    )
+    load_batch_size = require_type(require_key(load_cfg, "batchSize", "load."), int, "load.batchSize")
+    fids_per_checkpoint = require_type(
+        require_key(load_cfg, "fidsPerCheckpoint", "load."),
+        int,
+        "load.fidsPerCheckpoint",
+    )
+    checkpoint_path = require_type(
+        require_key(load_cfg, "checkpointPath", "load."),
+        str,
+        "load.checkpointPath",
+    )
+
+    workers = require_type(require_key(parallel_cfg, "workers", "parallel."), int, "parallel.workers")
+    parallel_chunk_fids = require_type(
+        require_key(parallel_cfg, "chunkFids", "parallel."),
+        int,
+        "parallel.chunkFids",
+    )
+
     if chunk_size <= 0:
         raise ConfigError("output.chunkSize 必须大于 0")
+    if workers < 0:
+        raise ConfigError("parallel.workers 不能小于 0")
+    if parallel_chunk_fids <= 0:
+        raise ConfigError("parallel.chunkFids 必须大于 0")
+    if load_batch_size <= 0:
+        raise ConfigError("load.batchSize 必须大于 0")
+    if fids_per_checkpoint <= 0:
+        raise ConfigError("load.fidsPerCheckpoint 必须大于 0")
     if split_delimiter == "":
         raise ConfigError("parsing.splitDelimiter 不能为空")
     if status_value not in (1, 2, 3):
@@ -175,6 +225,13 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
         "uptTimeExpression": upt_time_expression,
         "crtTimeExpression": crt_time_expression,
         "progressEveryFidRows": progress_every_fid_rows,
+        "dsnEnv": dsn_env,
+        "loadMethod": load_method,
+        "loadBatchSize": load_batch_size,
+        "fidsPerCheckpoint": fids_per_checkpoint,
+        "checkpointPath": checkpoint_path,
+        "workers": resolve_workers(workers),
+        "parallelChunkFids": parallel_chunk_fids,
     }
 
 
@@ -199,55 +256,23 @@ def _sql_literal(value: Any) -> str:
     return "'" + text + "'"
 
 
-def _build_patterns(id_pattern: str) -> Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
-    # 与 tools/valid_format/xlsx_format_check.py 的 3 种格式保持一致。
-    # textId 命名组必须包含完整业务标识：
-    #   格式1 {num}::::::[text]        → textId = {num}
-    #   格式2 {num}:::{n}:::[text]     → textId = {num}:::{n}
-    #   格式3 {num}:::{m-n}:::[text]   → textId = {num}:::{m-n}
-    pattern_colon6 = re.compile(
-        rf"^(?P<textId>{id_pattern})::::::\[(?P<sourceText>.*)\]$",
-        re.DOTALL,
-    )
-    pattern_triple_colon_num = re.compile(
-        rf"^(?P<textId>{id_pattern}:::\d+):::\[(?P<sourceText>.*)\]$",
-        re.DOTALL,
-    )
-    pattern_triple_colon_range = re.compile(
-        rf"^(?P<textId>{id_pattern}:::\d+(?:-\d+)+):::\[(?P<sourceText>.*)\]$",
-        re.DOTALL,
-    )
-    return pattern_colon6, pattern_triple_colon_num, pattern_triple_colon_range
-
-
-def _parse_segment(
-    segment: str,
-    patterns: Tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]],
-) -> Optional[Tuple[str, str]]:
-    pattern_colon6, pattern_triple_colon_num, pattern_triple_colon_range = patterns
-    matched = (
-        pattern_colon6.fullmatch(segment)
-        or pattern_triple_colon_num.fullmatch(segment)
-        or pattern_triple_colon_range.fullmatch(segment)
-    )
-    if matched is None:
+def _parse_segment(segment: str, segment_parser: SegmentParser) -> Optional[Tuple[str, str]]:
+    # 分段格式与 tools/valid_format/xlsx_format_check.py 一致，由 tools/segment_format/segment_parser.py 统一解析；
+    # textId 为完整业务标识（{num} / {num}:::{n} / {num}:::{m-n}）。
+    parsed = segment_parser.parse(segment)
+    if parsed is None:
         open_count = segment.count("[")
         close_count = segment.count("]")
         if open_count > close_count:
-            repaired = segment + ("]" * (open_count - close_count))
-            matched = (
-                pattern_colon6.fullmatch(repaired)
-                or pattern_triple_colon_num.fullmatch(repaired)
-                or pattern_triple_colon_range.fullmatch(repaired)
-            )
-        if matched is None:
+            parsed = segment_parser.parse(segment + ("]" * (open_count - close_count)))
+        if parsed is None:
             return None
-    text = matched.group("sourceText")
+    text = parsed.payload
     open_count = text.count("[")
     close_count = text.count("]")
     if open_count > close_count:
         text = text + "]" * (open_count - close_count)
-    return matched.group("textId"), text
+    return parsed.text_id, text
 
 
 def _validate_segment_text_structure(text: str) -> Optional[str]:
@@ -274,26 +299,123 @@ def _write_insert_sql(handle, table_name: str, columns: List[str], rows: List[Li
         handle.write("(" + ", ".join(row) + ")" + suffix)
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Step4 生成 text_main_next 导入 SQL")
-    parser.add_argument("--config", required=True, help="配置文件路径")
-    args = parser.parse_args()
 
-    config = _validate_config(load_yaml_config(Path(args.config).expanduser().resolve()))
 
-    sqlite_path = Path(config["sqlitePath"]).expanduser().resolve()
-    if not sqlite_path.exists():
-        raise FileNotFoundError(f"SQLite 文件不存在: {sqlite_path}")
-
-    output_path = Path(config["sqlPath"]).expanduser().resolve()
-    if output_path.exists() and not config["overwrite"]:
-        raise RuntimeError(f"输出文件已存在且 overwrite=false: {output_path}")
-    if not output_path.parent.exists():
-        raise FileNotFoundError(f"输出目录不存在: {output_path.parent}")
-
-    patterns = _build_patterns(config["idPattern"])
+def _new_stats() -> Dict[str, int]:
+    return {"total_fid_rows": 0, "skipped_empty_rows": 0, "total_segments": 0, "valid_segments": 0}
+
+
+def _parse_fid_row(
+    source_row: Tuple[Any, Any],
+    config: Dict[str, Any],
+    segment_parser: SegmentParser,
+    render_sql: bool,
+) -> Tuple[Any, str, Optional[List[Any]], int]:
+    """解析单个 fid，返回 (fid 原值, fid, 行列表, 分段总数)；空 text_data 被跳过时行列表为 None。
+
+    render_sql=True 时每行为已转义的 SQL 字面量列表，否则为 LOAD/INSERT 使用的原始值元组。
+    只依赖入参，可在进程池中执行。
+    """
+    fid_raw, text_data_raw = source_row
+    fid_value = str(fid_raw)
+    text_data = "" if text_data_raw is None else str(text_data_raw)
+
+    if text_data == "":
+        if config["emptyTextDataPolicy"] == "skip":
+            return fid_raw, fid_value, None, 0
+        raise RuntimeError(f"text_data 为空: fid={fid_value}")
+
+    rows: List[Any] = []
+    segments = text_data.split(config["splitDelimiter"])
+    part = 0
+    for segment_index, raw_segment in enumerate(segments, start=1):
+        segment = raw_segment.strip()
+        if segment == "":
+            if config["invalidSegmentPolicy"] == "skip":
+                continue
+            raise RuntimeError(f"空分段: fid={fid_value}, segmentIndex={segment_index}")
+
+        parsed = _parse_segment(segment, segment_parser)
+        if parsed is None:
+            if config["invalidSegmentPolicy"] == "skip":
+                continue
+            preview = segment[:200]
+            raise RuntimeError(
+                f"分段格式不合法: fid={fid_value}, segmentIndex={segment_index}, segment={preview}"
+            )
 
-    ordered_columns = [
+        text_id, source_text = parsed
+        structure_error = _validate_segment_text_structure(source_text)
+        if structure_error is not None:
+            preview = source_text[:200].replace("\n", "\\n")
+            print(
+                f"[WARN] 分段内容结构非法但继续保留: fid={fid_value}, "
+                f"segmentIndex={segment_index}, error={structure_error}, segment={preview}"
+            )
+        source_hash = hashlib.sha256(source_text.encode("utf-8")).hexdigest()
+
+        part += 1
+        if render_sql:
+            rows.append(
+                [
+                    _sql_literal(fid_value),
+                    _sql_literal(text_id),
+                    _sql_literal(part),
+                    _sql_literal(source_text),
+                    _sql_literal(source_hash),
+                    _sql_literal(config["translatedText"]),
+                    _sql_literal(config["status"]),
+                    _sql_literal(config["isClaimed"]),
+                    _sql_literal(config["editCount"]),
+                    config["uptTimeExpression"],
+                    config["crtTimeExpression"],
+                ]
+            )
+        else:
+            rows.append(
+                (
+                    fid_value,
+                    text_id,
+                    part,
+                    source_text,
+                    source_hash,
+                    config["translatedText"],
+                    config["status"],
+                    config["isClaimed"],
+                    config["editCount"],
+                )
+            )
+    return fid_raw, fid_value, rows, len(segments)
+
+
+def _iter_fid_rows(
+    source_rows: Iterable[Tuple[Any, Any]],
+    config: Dict[str, Any],
+    segment_parser: SegmentParser,
+    stats: Dict[str, int],
+    render_sql: bool,
+) -> Iterator[Tuple[Any, str, List[Any]]]:
+    """按 fid 顺序产出 (fid 原值, fid, 行列表)；parallel.workers>1 时解析/哈希/转义在进程池中执行。"""
+    parse = functools.partial(_parse_fid_row, config=config, segment_parser=segment_parser, render_sql=render_sql)
+    for fid_raw, fid_value, rows, segment_count in map_ordered(
+        parse,
+        source_rows,
+        workers=config["workers"],
+        chunk_size=config["parallelChunkFids"],
+    ):
+        stats["total_fid_rows"] += 1
+        if config["progressEveryFidRows"] > 0 and stats["total_fid_rows"] % config["progressEveryFidRows"] == 0:
+            print(f"[PROGRESS] fid_rows={stats['total_fid_rows']}, valid_segments={stats['valid_segments']}")
+        if rows is None:
+            stats["skipped_empty_rows"] += 1
+            continue
+        stats["total_segments"] += segment_count
+        stats["valid_segments"] += len(rows)
+        yield fid_raw, fid_value, rows
+
+
+def _ordered_columns(config: Dict[str, Any]) -> List[str]:
+    return [
         config["columns"]["fid"],
         config["columns"]["textId"],
         config["columns"]["part"],
@@ -307,109 +429,302 @@ def main() -> None:
         config["columns"]["crtTime"],
     ]
 
-    select_sql = (
-        f"SELECT {quote_ident(config['fidColumn'])}, {quote_ident(config['textDataColumn'])} "
-        f"FROM {quote_ident(config['sourceTable'])} ORDER BY {quote_ident(config['fidColumn'])}"
+
+def _build_select_sql(config: Dict[str, Any], resume: bool) -> str:
+    fid_sql = quote_ident(config["fidColumn"])
+    where_sql = f" WHERE {fid_sql} > ?" if resume else ""
+    return (
+        f"SELECT {fid_sql}, {quote_ident(config['textDataColumn'])} "
+        f"FROM {quote_ident(config['sourceTable'])}{where_sql} ORDER BY {fid_sql}"
     )
 
-    total_fid_rows = 0
-    skipped_empty_rows = 0
-    total_segments = 0
-    valid_segments = 0
 
+def _write_sql_file(
+    config: Dict[str, Any],
+    sqlite_path: Path,
+    sqlite_conn: sqlite3.Connection,
+    segment_parser: SegmentParser,
+    stats: Dict[str, int],
+) -> Path:
+    output_path = Path(config["sqlPath"]).expanduser().resolve()
+    if output_path.exists() and not config["overwrite"]:
+        raise RuntimeError(f"输出文件已存在且 overwrite=false: {output_path}")
+    if not output_path.parent.exists():
+        raise FileNotFoundError(f"输出目录不存在: {output_path.parent}")
+
+    ordered_columns = _ordered_columns(config)
     rows_buffer: List[List[str]] = []
+    cursor = sqlite_conn.cursor()
+    cursor.execute(_build_select_sql(config, resume=False))
 
-    with sqlite3.connect(sqlite_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(select_sql)
-
-        with output_path.open("w", encoding="utf-8") as handle:
-            handle.write("-- Auto-generated by step4_generate_text_main_next_insert.py\n")
-            handle.write(f"-- generated_at_utc: {datetime.now(timezone.utc).isoformat()}\n")
-            handle.write(f"-- env: {config['env']}\n")
-            handle.write(f"-- source_sqlite: {sqlite_path}\n\n")
-
-            for fid_raw, text_data_raw in cursor:
-                total_fid_rows += 1
-                if config["progressEveryFidRows"] > 0 and total_fid_rows % config["progressEveryFidRows"] == 0:
-                    print(f"[PROGRESS] fid_rows={total_fid_rows}, valid_segments={valid_segments}")
-
-                fid_value = str(fid_raw)
-                text_data = "" if text_data_raw is None else str(text_data_raw)
-
-                if text_data == "":
-                    if config["emptyTextDataPolicy"] == "skip":
-                        skipped_empty_rows += 1
-                        continue
-                    raise RuntimeError(f"text_data 为空: fid={fid_value}")
-
-                part = 0
-                for segment_index, raw_segment in enumerate(text_data.split(config["splitDelimiter"]), start=1):
-                    total_segments += 1
-                    segment = raw_segment.strip()
-                    if segment == "":
-                        if config["invalidSegmentPolicy"] == "skip":
-                            continue
-                        raise RuntimeError(f"空分段: fid={fid_value}, segmentIndex={segment_index}")
-
-                    parsed = _parse_segment(segment, patterns)
-                    if parsed is None:
-                        if config["invalidSegmentPolicy"] == "skip":
-                            continue
-                        preview = segment[:200]
+    with output_path.open("w", encoding="utf-8") as handle:
+        handle.write("-- Auto-generated by step4_generate_text_main_next_insert.py\n")
+        handle.write(f"-- generated_at_utc: {datetime.now(timezone.utc).isoformat()}\n")
+        handle.write(f"-- env: {config['env']}\n")
+        handle.write(f"-- source_sqlite: {sqlite_path}\n\n")
+
+        for _, _, rows in _iter_fid_rows(cursor, config, segment_parser, stats, render_sql=True):
+            for row in rows:
+                rows_buffer.append(row)
+                if len(rows_buffer) >= config["chunkSize"]:
+                    _write_insert_sql(handle, config["targetTable"], ordered_columns, rows_buffer)
+                    rows_buffer = []
+
+        if rows_buffer:
+            _write_insert_sql(handle, config["targetTable"], ordered_columns, rows_buffer)
+
+        handle.write("\n")
+        handle.write(f"-- total_fid_rows: {stats['total_fid_rows']}\n")
+        handle.write(f"-- skipped_empty_rows: {stats['skipped_empty_rows']}\n")
+        handle.write(f"-- total_segments: {stats['total_segments']}\n")
+        handle.write(f"-- valid_segments: {stats['valid_segments']}\n")
+    return output_path
+
+
+# LOAD DATA 默认转义规则：反斜杠转义控制字符，\N 表示 NULL
+_TSV_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+
+
+def _tsv_field(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value).translate(_TSV_ESCAPES)
+
+
+def _read_checkpoint(checkpoint_path: Path, sqlite_path: Path, target_table: str) -> Optional[Dict[str, Any]]:
+    if not checkpoint_path.exists():
+        return None
+    with checkpoint_path.open("r", encoding="utf-8") as handle:
+        checkpoint = json.load(handle)
+    if checkpoint.get("sqlitePath") != str(sqlite_path) or checkpoint.get("targetTable") != target_table:
+        raise RuntimeError(
+            "checkpoint 与当前配置不一致，请确认后删除: "
+            f"{checkpoint_path} (sqlitePath={checkpoint.get('sqlitePath')}, targetTable={checkpoint.get('targetTable')})"
+        )
+    return checkpoint
+
+
+def _write_checkpoint(checkpoint_path: Path, checkpoint: Dict[str, Any]) -> None:
+    # 先写临时文件再替换，避免中断时留下半截 JSON
+    tmp_path = checkpoint_path.with_name(checkpoint_path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        json.dump(checkpoint, handle, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def _load_rows_with_load_data(cursor, config: Dict[str, Any], rows: List[Tuple[Any, ...]]) -> int:
+    columns = _ordered_columns(config)
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", newline="\n", suffix=".tsv", prefix="step4_", delete=False
+    ) as handle:
+        tsv_path = handle.name
+        for row in rows:
+            handle.write("\t".join(_tsv_field(value) for value in row))
+            handle.write("\n")
+    try:
+        # 时间列沿用 SQL 模式的表达式，通过 SET 子句在服务端求值
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {quote_table_ref(config['targetTable'])} "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+            f"({', '.join(quote_ident(column) for column in columns[:9])}) "
+            f"SET {quote_ident(columns[9])} = {config['uptTimeExpression']}, "
+            f"{quote_ident(columns[10])} = {config['crtTimeExpression']}",
+            (tsv_path,),
+        )
+        return cursor.rowcount
+    finally:
+        os.remove(tsv_path)
+
+
+def _load_rows_with_insert(cursor, config: Dict[str, Any], rows: List[Tuple[Any, ...]]) -> int:
+    # 值列表中含时间表达式时 pymysql 的 executemany 会退化为逐行执行，这里手动拼多行 VALUES
+    columns_sql = ", ".join(quote_ident(column) for column in _ordered_columns(config))
+    row_sql = "(" + ", ".join(["%s"] * 9) + f", {config['uptTimeExpression']}, {config['crtTimeExpression']})"
+    loaded = 0
+    for start in range(0, len(rows), config["loadBatchSize"]):
+        batch = rows[start : start + config["loadBatchSize"]]
+        cursor.execute(
+            f"INSERT INTO {quote_table_ref(config['targetTable'])} ({columns_sql}) VALUES "
+            + ", ".join([row_sql] * len(batch)),
+            [value for row in batch for value in row],
+        )
+        loaded += cursor.rowcount
+    return loaded
+
+
+def _load_fid_range(
+    conn,
+    cursor,
+    config: Dict[str, Any],
+    fids: List[str],
+    rows: List[Tuple[Any, ...]],
+    clear_existing: bool,
+) -> None:
+    """单事务写入一个 fid 区间；clear_existing 用于续跑时清理上次已提交但未记录 checkpoint 的区间。"""
+    try:
+        if clear_existing:
+            placeholders = ", ".join(["%s"] * len(fids))
+            cursor.execute(
+                f"DELETE FROM {quote_table_ref(config['targetTable'])} "
+                f"WHERE {quote_ident(config['columns']['fid'])} IN ({placeholders})",
+                fids,
+            )
+        if config["loadMethod"] == "loadData":
+            loaded = _load_rows_with_load_data(cursor, config, rows)
+        else:
+            loaded = _load_rows_with_insert(cursor, config, rows)
+        # LOCAL 导入遇到重复键/数据截断只产生警告，行数不一致即视为失败
+        if loaded != len(rows):
+            cursor.execute("SHOW WARNINGS LIMIT 5")
+            warnings = cursor.fetchall()
+            raise RuntimeError(f"导入行数不一致: expected={len(rows)}, loaded={loaded}, warnings={warnings}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def _load_into_mysql(
+    config: Dict[str, Any],
+    sqlite_path: Path,
+    sqlite_conn: sqlite3.Connection,
+    segment_parser: SegmentParser,
+    stats: Dict[str, int],
+) -> Dict[str, Any]:
+    checkpoint_path = Path(config["checkpointPath"]).expanduser().resolve()
+    if not checkpoint_path.parent.exists():
+        raise FileNotFoundError(f"checkpoint 目录不存在: {checkpoint_path.parent}")
+    checkpoint = _read_checkpoint(checkpoint_path, sqlite_path, config["targetTable"])
+    if checkpoint is None:
+        checkpoint = {
+            "sqlitePath": str(sqlite_path),
+            "targetTable": config["targetTable"],
+            "lastFid": None,
+            "loadedFidRows": 0,
+            "loadedRows": 0,
+        }
+    else:
+        print(
+            f"[RESUME] lastFid={checkpoint['lastFid']}, loadedFidRows={checkpoint['loadedFidRows']}, "
+            f"loadedRows={checkpoint['loadedRows']}"
+        )
+    resume = checkpoint["lastFid"] is not None
+
+    load_env_file()
+    dsn_env = config["dsnEnv"]
+    if dsn_env not in os.environ:
+        raise RuntimeError(f"环境变量未设置: {dsn_env}")
+
+    started_at = time.perf_counter()
+    run_rows = 0
+    with start_ssh_tunnel_from_env():
+        with connect_mysql_from_dsn(os.environ[dsn_env], local_infile=config["loadMethod"] == "loadData") as conn:
+            with conn.cursor() as cursor:
+                if not resume:
+                    cursor.execute(f"SELECT 1 FROM {quote_table_ref(config['targetTable'])} LIMIT 1")
+                    if cursor.fetchone() is not None:
                         raise RuntimeError(
-                            f"分段格式不合法: fid={fid_value}, segmentIndex={segment_index}, segment={preview}"
+                            f"目标表非空且无 checkpoint，拒绝重复导入: {config['targetTable']}"
                         )
 
-                    text_id, source_text = parsed
-                    structure_error = _validate_segment_text_structure(source_text)
-                    if structure_error is not None:
-                        preview = source_text[:200].replace("\n", "\\n")
-                        print(
-                            f"[WARN] 分段内容结构非法但继续保留: fid={fid_value}, "
-                            f"segmentIndex={segment_index}, error={structure_error}, segment={preview}"
-                        )
-                    source_hash = hashlib.sha256(source_text.encode("utf-8")).hexdigest()
-
-                    part += 1
-                    valid_segments += 1
-                    rows_buffer.append(
-                        [
-                            _sql_literal(fid_value),
-                            _sql_literal(text_id),
-                            _sql_literal(part),
-                            _sql_literal(source_text),
-                            _sql_literal(source_hash),
-                            _sql_literal(config["translatedText"]),
-                            _sql_literal(config["status"]),
-                            _sql_literal(config["isClaimed"]),
-                            _sql_literal(config["editCount"]),
-                            config["uptTimeExpression"],
-                            config["crtTimeExpression"],
-                        ]
+                source_cursor = sqlite_conn.cursor()
+                if resume:
+                    source_cursor.execute(_build_select_sql(config, resume=True), (checkpoint["lastFid"],))
+                else:
+                    source_cursor.execute(_build_select_sql(config, resume=False))
+
+                range_fids: List[str] = []
+                range_rows: List[Tuple[Any, ...]] = []
+                last_fid_raw: Any = None
+                clear_existing = resume
+
+                def flush() -> None:
+                    nonlocal range_fids, range_rows, clear_existing, run_rows
+                    range_started_at = time.perf_counter()
+                    _load_fid_range(conn, cursor, config, range_fids, range_rows, clear_existing)
+                    range_elapsed = time.perf_counter() - range_started_at
+                    run_rows += len(range_rows)
+                    checkpoint["lastFid"] = last_fid_raw
+                    checkpoint["loadedFidRows"] += len(range_fids)
+                    checkpoint["loadedRows"] += len(range_rows)
+                    checkpoint["updatedAtUtc"] = datetime.now(timezone.utc).isoformat()
+                    _write_checkpoint(checkpoint_path, checkpoint)
+                    total_elapsed = time.perf_counter() - started_at
+                    print(
+                        f"[LOAD] fids={range_fids[0]}..{range_fids[-1]} rows={len(range_rows)} "
+                        f"elapsed={range_elapsed:.2f}s rows/s={len(range_rows) / max(range_elapsed, 1e-9):.0f} "
+                        f"totalRows={checkpoint['loadedRows']} avgRows/s={run_rows / max(total_elapsed, 1e-9):.0f}"
                     )
+                    range_fids = []
+                    range_rows = []
+                    clear_existing = False
+
+                for fid_raw, fid_value, rows in _iter_fid_rows(
+                    source_cursor, config, segment_parser, stats, render_sql=False
+                ):
+                    last_fid_raw = fid_raw
+                    range_fids.append(fid_value)
+                    range_rows.extend(rows)
+                    if len(range_fids) >= config["fidsPerCheckpoint"]:
+                        flush()
+                if range_fids:
+                    flush()
+
+    elapsed = time.perf_counter() - started_at
+    return {
+        "checkpointPath": checkpoint_path,
+        "loadedRows": checkpoint["loadedRows"],
+        "runRows": run_rows,
+        "elapsed": elapsed,
+    }
 
-                    if len(rows_buffer) >= config["chunkSize"]:
-                        _write_insert_sql(handle, config["targetTable"], ordered_columns, rows_buffer)
-                        rows_buffer = []
 
-            if rows_buffer:
-                _write_insert_sql(handle, config["targetTable"], ordered_columns, rows_buffer)
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Step4 生成 text_main_next 导入 SQL 或直接导入数据库")
+    parser.add_argument("--config", required=True, help="配置文件路径")
+    parser.add_argument(
+        "--mode",
+        choices=("sql", "load"),
+        default="sql",
+        help="sql=生成导入 SQL 文件；load=直接写入目标表（按 fid 区间提交并记录 checkpoint，可续跑）",
+    )
+    args = parser.parse_args()
 
-            handle.write("\n")
-            handle.write(f"-- total_fid_rows: {total_fid_rows}\n")
-            handle.write(f"-- skipped_empty_rows: {skipped_empty_rows}\n")
-            handle.write(f"-- total_segments: {total_segments}\n")
-            handle.write(f"-- valid_segments: {valid_segments}\n")
+    config = _validate_config(load_yaml_config(Path(args.config).expanduser().resolve()))
 
-    print("[DONE] Step4 导入 SQL 生成完成")
-    print(f"[STAT] total_fid_rows={total_fid_rows}")
-    print(f"[STAT] skipped_empty_rows={skipped_empty_rows}")
-    print(f"[STAT] total_segments={total_segments}")
-    print(f"[STAT] valid_segments={valid_segments}")
-    print(f"[FILE] {output_path}")
+    sqlite_path = Path(config["sqlitePath"]).expanduser().resolve()
+    if not sqlite_path.exists():
+        raise FileNotFoundError(f"SQLite 文件不存在: {sqlite_path}")
+
+    segment_parser = SegmentParser(config["idPattern"])
+    stats = _new_stats()
+
+    with sqlite3.connect(sqlite_path) as conn:
+        if args.mode == "load":
+            result = _load_into_mysql(config, sqlite_path, conn, segment_parser, stats)
+        else:
+            output_path = _write_sql_file(config, sqlite_path, conn, segment_parser, stats)
+
+    if args.mode == "load":
+        print(f"[DONE] Step4 导入 {config['targetTable']} 完成")
+    else:
+        print("[DONE] Step4 导入 SQL 生成完成")
+    print(f"[STAT] total_fid_rows={stats['total_fid_rows']}")
+    print(f"[STAT] skipped_empty_rows={stats['skipped_empty_rows']}")
+    print(f"[STAT] total_segments={stats['total_segments']}")
+    print(f"[STAT] valid_segments={stats['valid_segments']}")
+    if args.mode == "load":
+        print(f"[STAT] loaded_rows_this_run={result['runRows']}, loaded_rows_total={result['loadedRows']}")
+        print(f"[STAT] elapsed={result['elapsed']:.1f}s, rows/s={result['runRows'] / max(result['elapsed'], 1e-9):.0f}")
+        print(f"[FILE] {result['checkpointPath']}")
+    else:
+        print(f"[FILE] {output_path}")
 
 
 if __name__ == "__main__":
     main()
     # python ./tools/version_iteration_tool/step4_generate_text_main_next_insert.py --config ./tools/version_iteration_tool/step4_generate_text_main_next_insert.yaml 
+    # python ./tools/version_iteration_tool/step4_generate_text_main_next_insert.py --config ./tools/version_iteration_tool/step4_generate_text_main_next_insert.yaml --mode load
@@ -0,0 +1,297 @@
+# Step5 归并比对引擎: 两表按 (fid, textId) 顺序流式读取，在 Python 中归并比对 sourceTextHash 完成分类，
+# 再按 next_id 分块批量继承译文。dry-run 只读两表并输出分类报告，可在不改动线上表的情况下预演。
+#
+# 分类语义与 run_step5_to_step7._run_step5 一致：按 (fid, textId) 关联（该键在两表中唯一，part 不参与比较），
+#   1=新增（备份表无此键） 2=修改（哈希不同） 3=未变（哈希相同，继承备份表译文）
+# 重复键与空哈希在流式读取中顺带统计，不再单独执行 GROUP BY 校验。
+
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pymysql
+
+from common import quote_table_ref
+
+_CLASSIFY_TABLE = "tmp_step5_merge_classify"
+
+CLASS_NEW = 1
+CLASS_CHANGED = 2
+CLASS_UNCHANGED = 3
+
+_CLASS_NAMES = {CLASS_NEW: "new", CLASS_CHANGED: "changed", CLASS_UNCHANGED: "unchanged"}
+
+Key = Tuple[str, str]
+# (id, fid, textId, sourceTextHash)
+SourceRow = Tuple[int, str, str, Optional[str]]
+
+
+def new_stats() -> Dict[str, int]:
+    return {
+        "backupRows": 0,
+        "nextRows": 0,
+        "backupDuplicateKeys": 0,
+        "nextDuplicateKeys": 0,
+        "backupNullHash": 0,
+        "nextNullHash": 0,
+        "new": 0,
+        "changed": 0,
+        "unchanged": 0,
+        "backupOnly": 0,
+    }
+
+
+def _iter_unique_rows(
+    rows: Iterable[SourceRow], label: str, stats: Dict[str, int]
+) -> Iterator[Tuple[Key, int, Optional[str]]]:
+    """校验升序并跳过重复键；键按 Python 字符串比较，与库内排序不一致时直接报错而不是静默错配。"""
+    previous_key: Optional[Key] = None
+    for row_id, fid, text_id, source_hash in rows:
+        stats[f"{label}Rows"] += 1
+        key = (fid, text_id)
+        if previous_key is not None:
+            if key < previous_key:
+                raise RuntimeError(
+                    f"{label} 表排序与二进制字符串比较不一致: {previous_key} -> {key}，"
+                    "fid/textId 含大小写或非 ASCII 字符时请改用 engine=sql"
+                )
+            if key == previous_key:
+                stats[f"{label}DuplicateKeys"] += 1
+                continue
+        if source_hash is None:
+            stats[f"{label}NullHash"] += 1
+        previous_key = key
+        yield key, row_id, source_hash
+
+
+def merge_classify(
+    backup_rows: Iterable[SourceRow],
+    next_rows: Iterable[SourceRow],
+    stats: Dict[str, int],
+) -> Iterator[Tuple[Key, int, Optional[int], int]]:
+    """按键归并两个有序流，逐条产出 next 表的 (key, next_id, bak_id, class)。"""
+    backup_iter = _iter_unique_rows(backup_rows, "backup", stats)
+    next_iter = _iter_unique_rows(next_rows, "next", stats)
+    backup_row = next(backup_iter, None)
+    for next_key, next_id, next_hash in next_iter:
+        while backup_row is not None and backup_row[0] < next_key:
+            stats["backupOnly"] += 1
+            backup_row = next(backup_iter, None)
+        if backup_row is None or backup_row[0] != next_key:
+            stats["new"] += 1
+            yield next_key, next_id, None, CLASS_NEW
+            continue
+        # 与 SQL 版的 <=> 一致：两边都为 NULL 也算相同（空哈希本身会导致校验失败）
+        segment_class = CLASS_UNCHANGED if next_hash == backup_row[2] else CLASS_CHANGED
+        stats[_CLASS_NAMES[segment_class]] += 1
+        yield next_key, next_id, backup_row[1], segment_class
+        backup_row = next(backup_iter, None)
+    while backup_row is not None:
+        stats["backupOnly"] += 1
+        backup_row = next(backup_iter, None)
+
+
+def validation_errors(stats: Dict[str, int]) -> List[str]:
+    errors: List[str] = []
+    if stats["backupDuplicateKeys"] > 0:
+        errors.append(f"备份表存在重复 key(fid,textId)，数量={stats['backupDuplicateKeys']}")
+    if stats["nextDuplicateKeys"] > 0:
+        errors.append(f"next表存在重复 key(fid,textId)，数量={stats['nextDuplicateKeys']}")
+    if stats["backupNullHash"] > 0:
+        errors.append(f"备份表存在空哈希记录，数量={stats['backupNullHash']}")
+    if stats["nextNullHash"] > 0:
+        errors.append(f"next表存在空哈希记录，数量={stats['nextNullHash']}")
+    return errors
+
+
+def _stream_rows(conn, table_ref: str, fetch_size: int) -> Iterator[SourceRow]:
+    # 非缓冲游标逐批取回，只读键与哈希，译文等大字段在继承时由服务端按主键 JOIN
+    with conn.cursor(pymysql.cursors.SSCursor) as cursor:
+        cursor.execute(
+            f"SELECT id, fid, `textId`, `sourceTextHash` FROM {quote_table_ref(table_ref)} "
+            "ORDER BY fid, `textId`"
+        )
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield from rows
+    conn.commit()
+
+
+def _create_classify_table(cursor) -> None:
+    cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {_CLASSIFY_TABLE}")
+    cursor.execute(
+        f"CREATE TEMPORARY TABLE {_CLASSIFY_TABLE} ("
+        "  next_id BIGINT NOT NULL,"
+        "  bak_id BIGINT NULL,"
+        "  class TINYINT NOT NULL,"
+        "  PRIMARY KEY (next_id)"
+        ") ENGINE=InnoDB"
+    )
+
+
+def _insert_classified(cursor, rows: List[Tuple[int, Optional[int], int]]) -> None:
+    # executemany 会把 INSERT ... VALUES 合并为多行语句
+    cursor.executemany(f"INSERT INTO {_CLASSIFY_TABLE} (next_id, bak_id, class) VALUES (%s, %s, %s)", rows)
+
+
+def _classify(
+    conn,
+    backup_conn,
+    next_conn,
+    config: Dict[str, Any],
+    dry_run: bool,
+) -> Tuple[Dict[str, int], Dict[str, List[Dict[str, Any]]]]:
+    stats = new_stats()
+    samples: Dict[str, List[Dict[str, Any]]] = {name: [] for name in _CLASS_NAMES.values()}
+    pending: List[Tuple[int, Optional[int], int]] = []
+    started_at = time.perf_counter()
+
+    with conn.cursor() as cursor:
+        if not dry_run:
+            _create_classify_table(cursor)
+        for key, next_id, bak_id, segment_class in merge_classify(
+            _stream_rows(backup_conn, config["backupTable"], config["fetchSize"]),
+            _stream_rows(next_conn, config["nextTable"], config["fetchSize"]),
+            stats,
+        ):
+            class_samples = samples[_CLASS_NAMES[segment_class]]
+            if len(class_samples) < config["sampleSize"]:
+                class_samples.append({"fid": key[0], "textId": key[1], "nextId": next_id, "bakId": bak_id})
+            if dry_run:
+                continue
+            pending.append((next_id, bak_id, segment_class))
+            if len(pending) >= config["chunkSize"]:
+                _insert_classified(cursor, pending)
+                pending = []
+        if pending:
+            _insert_classified(cursor, pending)
+        if not dry_run:
+            conn.commit()
+
+    elapsed = time.perf_counter() - started_at
+    scanned = stats["backupRows"] + stats["nextRows"]
+    print(
+        f"[INFO] Step5 归并分类: 新增={stats['new']} 修改={stats['changed']} 未变={stats['unchanged']} "
+        f"备份独有={stats['backupOnly']} 扫描={scanned} 耗时={elapsed:.2f}s rows/s={scanned / max(elapsed, 1e-9):.0f}"
+    )
+    return stats, samples
+
+
+def _apply_chunks(conn, config: Dict[str, Any], stats: Dict[str, int]) -> Tuple[int, int]:
+    """按 next_id 区间分块：class=1,2 只改状态，class=3 按主键 JOIN 继承备份表译文；每块单独提交。"""
+    next_table = quote_table_ref(config["nextTable"])
+    backup_table = quote_table_ref(config["backupTable"])
+    total_rows = stats["new"] + stats["changed"] + stats["unchanged"]
+    updated_12 = 0
+    updated_3 = 0
+    last_id = 0
+    chunk = 0
+    started_at = time.perf_counter()
+
+    with conn.cursor() as cursor:
+        while True:
+            cursor.execute(
+                f"SELECT MAX(next_id) AS hi, COUNT(*) AS cnt FROM ("
+                f"SELECT next_id FROM {_CLASSIFY_TABLE} WHERE next_id > %s ORDER BY next_id LIMIT %s) t",
+                (last_id, config["chunkSize"]),
+            )
+            row = cursor.fetchone()
+            if row["hi"] is None:
+                break
+            high_id = int(row["hi"])
+            try:
+                cursor.execute(
+                    f"UPDATE {next_table} AS nxt "
+                    f"JOIN {_CLASSIFY_TABLE} AS cls ON cls.next_id = nxt.id "
+                    f"SET nxt.status = CASE cls.class WHEN 1 THEN 1 WHEN 2 THEN 2 END, "
+                    f"nxt.`uptTime` = NOW() "
+                    f"WHERE cls.next_id > %s AND cls.next_id <= %s AND cls.class IN (1, 2)",
+                    (last_id, high_id),
+                )
+                updated_12 += cursor.rowcount
+                cursor.execute(
+                    f"UPDATE {next_table} AS nxt "
+                    f"JOIN {_CLASSIFY_TABLE} AS cls ON cls.next_id = nxt.id "
+                    f"JOIN {backup_table} AS bak ON bak.id = cls.bak_id "
+                    f"SET nxt.`translatedText` = bak.`translatedText`, "
+                    f"nxt.status = bak.status, "
+                    f"nxt.`editCount` = bak.`editCount`, "
+                    f"nxt.`uptTime` = bak.`uptTime` "
+                    f"WHERE cls.next_id > %s AND cls.next_id <= %s AND cls.class = 3",
+                    (last_id, high_id),
+                )
+                updated_3 += cursor.rowcount
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            chunk += 1
+            last_id = high_id
+            done = updated_12 + updated_3
+            elapsed = time.perf_counter() - started_at
+            print(
+                f"[INFO] Step5 块 {chunk}: {int(row['cnt'])} 行, 累计 {done}/{total_rows}, "
+                f"rows/s={done / max(elapsed, 1e-9):.0f}"
+            )
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {_CLASSIFY_TABLE}")
+
+    if updated_12 != stats["new"] + stats["changed"]:
+        raise RuntimeError(
+            f"新增+修改更新行数不一致: expected={stats['new'] + stats['changed']} actual={updated_12}"
+        )
+    if updated_3 != stats["unchanged"]:
+        raise RuntimeError(f"继承更新行数不一致: expected={stats['unchanged']} actual={updated_3}")
+    return updated_12, updated_3
+
+
+def _write_report(
+    report_path: Path,
+    config: Dict[str, Any],
+    dry_run: bool,
+    stats: Dict[str, int],
+    samples: Dict[str, List[Dict[str, Any]]],
+    errors: List[str],
+    elapsed: float,
+) -> None:
+    report = {
+        "engine": "mergeJoin",
+        "dryRun": dry_run,
+        "backupTable": config["backupTable"],
+        "nextTable": config["nextTable"],
+        "generatedAtUtc": datetime.now(timezone.utc).isoformat(),
+        "elapsedSeconds": round(elapsed, 3),
+        "stats": stats,
+        "validationErrors": errors,
+        "samples": samples,
+    }
+    with report_path.open("w", encoding="utf-8") as handle:
+        json.dump(report, handle, ensure_ascii=False, indent=2)
+    print(f"[FILE] {report_path}")
+
+
+def run_step5_merge_join(conn, backup_conn, next_conn, config: Dict[str, Any], dry_run: bool) -> Dict[str, int]:
+    """conn 用于分类临时表与更新；backup_conn/next_conn 各自承载一条流式读取，三者须为不同连接。"""
+    report_path = Path(config["reportPath"]).expanduser().resolve()
+    if not report_path.parent.exists():
+        raise FileNotFoundError(f"报告目录不存在: {report_path.parent}")
+
+    started_at = time.perf_counter()
+    stats, samples = _classify(conn, backup_conn, next_conn, config, dry_run)
+    errors = validation_errors(stats)
+    _write_report(report_path, config, dry_run, stats, samples, errors, time.perf_counter() - started_at)
+    if errors:
+        if not dry_run:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {_CLASSIFY_TABLE}")
+        raise RuntimeError("；".join(errors))
+    if dry_run:
+        print("[INFO] Step5 dry-run：未修改任何表")
+        return stats
+
+    _, updated_3 = _apply_chunks(conn, config, stats)
+    print(f"[INFO] Step5 汇总: 新增={stats['new']} 修改={stats['changed']} 继承={updated_3}")
+    return stats